@@ -0,0 +1,112 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+""" 
+Implements a simple pool of worker threads.
+"""
+
+
+import Queue
+import threading
+
+
+__version__ = "$Revision-Id:$" 
+
+
+class WorkerPool(object):
+    """ 
+    Executes tasks using a fixed number of threads. The number of pending tasks
+    is limited so that the producing thread is blocked when the workers fall behind.
+    """
+    
+    def __init__(self, workerNumber):
+        """
+        @param workerNumber: Number of worker threads. If it is smaller than two,
+                             tasks are directly executed by the calling thread.
+        @type workerNumber: C{int}
+        """
+        
+        self._tasks = Queue.Queue(max(workerNumber, 1) * 2)
+        self._workers = list()
+        self._error = None
+        if workerNumber > 1:
+            for _ in range(workerNumber):
+                worker = threading.Thread(target=self._work)
+                worker.setDaemon(True)
+                worker.start()
+                self._workers.append(worker)
+    
+    def _work(self):
+        """ Processes tasks until C{None} is received. """
+        
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                break
+            try:
+                task()
+            # Keeps the worker alive. The error is raised again on shut down. pylint: disable=W0703
+            except Exception, error:
+                if self._error is None:
+                    self._error = error
+    
+    def execute(self, task):
+        """ 
+        Schedules the task. Blocks until a worker is able to accept it.
+        
+        @param task: Function without parameters.
+        @type task: C{callable}
+        """
+        
+        if len(self._workers) == 0:
+            task()
+        else:
+            self._tasks.put(task)
+    
+    def shutdown(self):
+        """ Waits until all scheduled tasks are finished and stops the workers. """
+        
+        for _ in self._workers:
+            self._tasks.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = list()
+        if not self._error is None:
+            error = self._error
+            self._error = None
+            raise error
+
@@ -0,0 +1,540 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Implements the creation of ZIP archives which are directly streamed to the storage.
+"""
+
+
+import binascii
+from collections import deque
+import struct
+import threading
+import time
+import zlib
+
+from datafinder.common.worker_pool import WorkerPool
+from datafinder.persistence.error import PersistenceError
+
+
+__version__ = "$Revision-Id:$" 
+
+
+# Members whose content is smaller are compressed by the worker threads in memory
+PARALLEL_COMPRESSION_LIMIT = 1024 * 1024
+DEFAULT_WORKER_NUMBER = 4
+
+_BLOCK_SIZE = 64 * 1024
+_PIPE_BUFFER_SIZE = 16 * _BLOCK_SIZE
+
+# ZIP file format constants
+_LOCAL_FILE_HEADER = struct.Struct("<4s2B4HL2L2H")
+_LOCAL_FILE_HEADER_SIGNATURE = "PK\003\004"
+_DATA_DESCRIPTOR = struct.Struct("<4sLQQ")
+_DATA_DESCRIPTOR_SIGNATURE = "PK\007\010"
+_CENTRAL_DIRECTORY = struct.Struct("<4s4B4HL2L5H2L")
+_CENTRAL_DIRECTORY_SIGNATURE = "PK\001\002"
+_END_OF_CENTRAL_DIRECTORY = struct.Struct("<4s4H2LH")
+_END_OF_CENTRAL_DIRECTORY_SIGNATURE = "PK\005\006"
+_ZIP64_END_OF_CENTRAL_DIRECTORY = struct.Struct("<4sQ2H2L4Q")
+_ZIP64_END_OF_CENTRAL_DIRECTORY_SIGNATURE = "PK\006\006"
+_ZIP64_LOCATOR = struct.Struct("<4sLQL")
+_ZIP64_LOCATOR_SIGNATURE = "PK\006\007"
+_ZIP64_EXTRA_TAG = 0x0001
+_ZIP64_VERSION = 45
+_UNIX_SYSTEM = 3
+_DATA_DESCRIPTOR_FLAG = 0x08
+_UTF8_FILENAME_FLAG = 0x800
+_ZIP_DEFLATED = 8
+_ZIP32_LIMIT = 0xFFFFFFFF
+_ZIP32_ENTRY_LIMIT = 0xFFFF
+_DEFAULT_EXTERNAL_ATTRIBUTES = 0600 << 16
+
+
+class ArchiveWriter(object):
+    """ 
+    Writes members into ZIP archive parts. Every part is streamed to the storage while it is created
+    and is a complete ZIP archive on its own. A new part is started when the current part exceeds the 
+    maximum part size. The content of small members is compressed by worker threads in parallel.
+    The data of larger members is opened not until the member is written. Thus, besides the streams 
+    currently read by the worker threads, only a single member stream is open at a time.
+    """
+    
+    def __init__(self, storePartCallback, maximumPartSize=None, workerNumber=DEFAULT_WORKER_NUMBER, 
+                 parallelCompressionLimit=PARALLEL_COMPRESSION_LIMIT):
+        """
+        @param storePartCallback: Function which stores the content of an archive part. It is called in a 
+                                  separate thread and reads the part from the given file-like object.
+        @type storePartCallback: C{callable}
+        @param maximumPartSize: Size in bytes after which a new part is started. C{None} indicates 
+                                that all members are written into a single part.
+        @type maximumPartSize: C{int}
+        @param workerNumber: Number of threads compressing members in parallel.
+        @type workerNumber: C{int}
+        @param parallelCompressionLimit: Maximum number of bytes of a member which is compressed in memory.
+        @type parallelCompressionLimit: C{int}
+        """
+        
+        self._storePartCallback = storePartCallback
+        self._maximumPartSize = maximumPartSize
+        self._parallelCompressionLimit = parallelCompressionLimit
+        self._workerPool = WorkerPool(workerNumber)
+        self._pendingJobs = deque()
+        self._maximumPendingJobNumber = max(workerNumber, 1) * 2
+        self._part = None
+        self.partNumber = 0
+        self.memberPartIndexes = list()
+        
+    def addMember(self, name, openDataCallback):
+        """ 
+        Adds a member to the archive.
+        
+        @param name: Name of the archive member.
+        @type name: C{unicode}
+        @param openDataCallback: Function returning a new file-like object providing the content of the member.
+                                 It is called again when the member is too large to be compressed in memory.
+        @type openDataCallback: C{callable}
+        """
+        
+        try:
+            job = _CompressionJob(name, openDataCallback, self._parallelCompressionLimit)
+            self._pendingJobs.append(job)
+            self._workerPool.execute(job.run)
+            while len(self._pendingJobs) > self._maximumPendingJobNumber:
+                self._writeMember(self._pendingJobs.popleft())
+        except Exception, error: # Stops all transfers before reporting the error. pylint: disable=W0703
+            raise self._abort(error)
+        
+    def close(self):
+        """ 
+        Writes the remaining members and finishes the current part.
+        The indexes of the parts containing the members are available
+        in the order the members were added afterwards.
+        """
+        
+        try:
+            while self._pendingJobs:
+                self._writeMember(self._pendingJobs.popleft())
+            self._finishPart()
+            self._workerPool.shutdown()
+        except Exception, error: # Stops all transfers before reporting the error. pylint: disable=W0703
+            raise self._abort(error)
+        
+    def _writeMember(self, job):
+        """ Writes the member into the current part. """
+        
+        try:
+            job.wait()
+            if self._part is None:
+                self._part = _ArchivePart(self._storePartCallback)
+                self.partNumber += 1
+            zipWriter = self._part.zipWriter
+            if job.compressedContent is None:
+                dataStream = job.openDataCallback()
+                try:
+                    zipWriter.writeMember(job.name, dataStream)
+                finally:
+                    dataStream.close()
+            else:
+                zipWriter.writeCompressedMember(job.name, job.crc, job.size, job.compressedContent)
+        finally:
+            job.close()
+        self.memberPartIndexes.append(self.partNumber - 1)
+        if not self._maximumPartSize is None and zipWriter.size >= self._maximumPartSize:
+            self._finishPart()
+    
+    def _finishPart(self):
+        """ Completes the current part and waits until it has been stored. """
+        
+        if not self._part is None:
+            part = self._part
+            self._part = None
+            part.finish()
+    
+    def _abort(self, error):
+        """ Stops the transfer of the current part and the compression of pending members. """
+        
+        part = self._part
+        self._part = None
+        if not part is None:
+            if not part.error is None: # The transfer failed before
+                error = part.error
+            part.abort(error)
+        try:
+            self._workerPool.shutdown()
+        except Exception: # The original error is reported. pylint: disable=W0703
+            pass
+        while self._pendingJobs:
+            self._pendingJobs.popleft().close()
+        return error
+
+
+class _CompressionJob(object):
+    """ 
+    Reads the content of an archive member and compresses it if it is small enough. Otherwise,
+    the data stream is closed and the member is read again and compressed while it is written. 
+    Keeping the stream open would hold its connection until the member is written which might 
+    prevent the transfer of the archive part.
+    """
+    
+    def __init__(self, name, openDataCallback, compressionLimit):
+        """ Constructor. """
+        
+        self.name = name
+        self.openDataCallback = openDataCallback
+        self._compressionLimit = compressionLimit
+        self._finished = threading.Event()
+        self._error = None
+        
+        self.compressedContent = None
+        self.crc = 0
+        self.size = 0
+        
+    def run(self):
+        """ Reads and compresses the content. """
+        
+        try:
+            dataStream = self.openDataCallback()
+            try:
+                blocks = list()
+                size = 0
+                while size <= self._compressionLimit:
+                    block = dataStream.read(_BLOCK_SIZE)
+                    if len(block) == 0:
+                        break
+                    blocks.append(block)
+                    size += len(block)
+            finally:
+                dataStream.close()
+            if size <= self._compressionLimit:
+                content = "".join(blocks)
+                self.crc = binascii.crc32(content) & 0xFFFFFFFF
+                self.size = size
+                compressor = _createCompressor()
+                self.compressedContent = compressor.compress(content) + compressor.flush()
+        except Exception, error: # Reported in the writing thread. pylint: disable=W0703
+            self._error = error
+        self._finished.set()
+        
+    def wait(self):
+        """ Waits until the job is finished and raises occurred errors. """
+        
+        self._finished.wait()
+        if not self._error is None:
+            raise self._error
+    
+    def close(self):
+        """ Releases the compressed content. """
+        
+        self._finished.wait()
+        self.compressedContent = None
+
+
+class _ArchivePart(object):
+    """ Transfers a ZIP archive to the storage using a separate thread while it is written. """
+    
+    def __init__(self, storePartCallback):
+        """ Constructor. """
+        
+        self.error = None
+        self._pipe = _Pipe()
+        self.zipWriter = _ZipStreamWriter(self._pipe)
+        self._thread = threading.Thread(target=self._store, args=(storePartCallback,))
+        self._thread.setDaemon(True)
+        self._thread.start()
+        
+    def _store(self, storePartCallback):
+        """ Stores the part. """
+        
+        try:
+            storePartCallback(self._pipe)
+        except Exception, error: # Reported in the writing thread. pylint: disable=W0703
+            self.error = error
+        self._pipe.close()
+        
+    def finish(self):
+        """ Writes the central directory and waits until the part is stored. """
+        
+        writeError = None
+        try:
+            self.zipWriter.close()
+        except IOError, error:
+            writeError = error
+        self._pipe.finish(writeError)
+        self._thread.join()
+        if not self.error is None:
+            raise self.error
+        if not writeError is None:
+            raise writeError
+        
+    def abort(self, error):
+        """ Aborts the transfer. """
+        
+        self._pipe.finish(error)
+        self._thread.join()
+
+
+class _Pipe(object):
+    """ 
+    File-like object transferring the data written by one thread to another thread 
+    reading it. Writing blocks if the reading thread falls behind.
+    """
+    
+    def __init__(self, bufferSize=_PIPE_BUFFER_SIZE):
+        """ Constructor. """
+        
+        self._bufferSize = bufferSize
+        self._blocks = deque()
+        self._bufferedBytes = 0
+        self._condition = threading.Condition()
+        self._isFinished = False
+        self._isClosed = False
+        self._error = None
+        
+    def write(self, data):
+        """ Called by the writing thread to add data. """
+        
+        self._condition.acquire()
+        try:
+            while self._bufferedBytes >= self._bufferSize and not self._isClosed:
+                self._condition.wait()
+            if self._isClosed:
+                raise IOError("The archive is not read anymore.")
+            if len(data) > 0:
+                self._blocks.append(data)
+                self._bufferedBytes += len(data)
+                self._condition.notifyAll()
+        finally:
+            self._condition.release()
+    
+    def finish(self, error=None):
+        """ 
+        Called by the writing thread when all data has been written. If an error is given, 
+        the reading thread is notified that the data is incomplete.
+        """
+        
+        self._condition.acquire()
+        try:
+            self._isFinished = True
+            self._error = error
+            self._condition.notifyAll()
+        finally:
+            self._condition.release()
+        
+    def read(self, size=-1):
+        """ Reads the given number of bytes. Blocks until the data is available or all data has been read. """
+        
+        self._condition.acquire()
+        try:
+            if self._isClosed:
+                raise ValueError("I/O operation on closed file.")
+            blocks = list()
+            readBytes = 0
+            while size < 0 or readBytes < size:
+                if self._blocks:
+                    block = self._blocks.popleft()
+                    if size >= 0 and readBytes + len(block) > size:
+                        self._blocks.appendleft(block[size - readBytes:])
+                        block = block[:size - readBytes]
+                    blocks.append(block)
+                    readBytes += len(block)
+                    self._bufferedBytes -= len(block)
+                    self._condition.notifyAll()
+                elif self._isFinished:
+                    if not self._error is None:
+                        raise PersistenceError("Creation of the archive has been aborted.\nReason: '%s'" % str(self._error))
+                    break
+                else:
+                    self._condition.wait()
+            return "".join(blocks)
+        finally:
+            self._condition.release()
+            
+    def close(self):
+        """ Called by the reading thread when it does not read any more data. """
+        
+        self._condition.acquire()
+        try:
+            self._isClosed = True
+            self._condition.notifyAll()
+        finally:
+            self._condition.release()
+
+
+class _ZipStreamWriter(object):
+    """ 
+    Writes a ZIP archive into a stream which does not support random access. For this purpose, 
+    checksum and sizes of the members are written after their content using data descriptors.
+    ZIP64 extensions are used to support members and archives larger than 4GB.
+    """
+    
+    def __init__(self, outputStream):
+        """ Constructor. """
+        
+        self._outputStream = outputStream
+        self._entries = list()
+        self.size = 0
+        
+    def _write(self, data):
+        """ Writes the data and keeps track of the archive size. """
+        
+        self._outputStream.write(data)
+        self.size += len(data)
+        
+    def writeMember(self, name, dataStream):
+        """ Compresses the member while writing it. """
+        
+        entry = self._writeLocalFileHeader(name)
+        compressor = _createCompressor()
+        crc = 0
+        size = 0
+        compressedSize = 0
+        content = dataStream.read(_BLOCK_SIZE)
+        while len(content) > 0:
+            crc = binascii.crc32(content, crc)
+            size += len(content)
+            compressedContent = compressor.compress(content)
+            compressedSize += len(compressedContent)
+            self._write(compressedContent)
+            content = dataStream.read(_BLOCK_SIZE)
+        compressedContent = compressor.flush()
+        compressedSize += len(compressedContent)
+        self._write(compressedContent)
+        self._writeDataDescriptor(entry, crc & 0xFFFFFFFF, compressedSize, size)
+        
+    def writeCompressedMember(self, name, crc, size, compressedContent):
+        """ Writes an already compressed member. """
+        
+        entry = self._writeLocalFileHeader(name)
+        self._write(compressedContent)
+        self._writeDataDescriptor(entry, crc, len(compressedContent), size)
+        
+    def _writeLocalFileHeader(self, name):
+        """ Writes the local file header of a member whose sizes are not known yet. """
+        
+        entry = _ZipEntry(name, self.size, time.localtime())
+        extra = struct.pack("<2H2Q", _ZIP64_EXTRA_TAG, 16, 0, 0)
+        self._write(_LOCAL_FILE_HEADER.pack(_LOCAL_FILE_HEADER_SIGNATURE, _ZIP64_VERSION, 0, entry.flags,
+                                            _ZIP_DEFLATED, entry.dosTime, entry.dosDate, 0, 
+                                            _ZIP32_LIMIT, _ZIP32_LIMIT, len(entry.name), len(extra)))
+        self._write(entry.name)
+        self._write(extra)
+        return entry
+    
+    def _writeDataDescriptor(self, entry, crc, compressedSize, size):
+        """ Writes checksum and sizes of the member. """
+        
+        self._write(_DATA_DESCRIPTOR.pack(_DATA_DESCRIPTOR_SIGNATURE, crc, compressedSize, size))
+        entry.crc = crc
+        entry.compressedSize = compressedSize
+        entry.size = size
+        self._entries.append(entry)
+        
+    def close(self):
+        """ Writes the central directory. """
+        
+        centralDirectoryOffset = self.size
+        for entry in self._entries:
+            extraValues = list()
+            size = entry.size
+            if size >= _ZIP32_LIMIT:
+                extraValues.append(size)
+                size = _ZIP32_LIMIT
+            compressedSize = entry.compressedSize
+            if compressedSize >= _ZIP32_LIMIT:
+                extraValues.append(compressedSize)
+                compressedSize = _ZIP32_LIMIT
+            offset = entry.offset
+            if offset >= _ZIP32_LIMIT:
+                extraValues.append(offset)
+                offset = _ZIP32_LIMIT
+            extra = ""
+            if len(extraValues) > 0:
+                extra = struct.pack("<2H%iQ" % len(extraValues), _ZIP64_EXTRA_TAG, 8 * len(extraValues), *extraValues)
+            self._write(_CENTRAL_DIRECTORY.pack(_CENTRAL_DIRECTORY_SIGNATURE, _ZIP64_VERSION, _UNIX_SYSTEM, _ZIP64_VERSION, 0,
+                                                entry.flags, _ZIP_DEFLATED, entry.dosTime, entry.dosDate, entry.crc, 
+                                                compressedSize, size, len(entry.name), len(extra), 0, 0, 0, 
+                                                _DEFAULT_EXTERNAL_ATTRIBUTES, offset))
+            self._write(entry.name)
+            self._write(extra)
+        
+        centralDirectorySize = self.size - centralDirectoryOffset
+        entryNumber = len(self._entries)
+        if entryNumber >= _ZIP32_ENTRY_LIMIT or centralDirectoryOffset >= _ZIP32_LIMIT \
+           or centralDirectorySize >= _ZIP32_LIMIT:
+            zip64EndOffset = self.size
+            self._write(_ZIP64_END_OF_CENTRAL_DIRECTORY.pack(_ZIP64_END_OF_CENTRAL_DIRECTORY_SIGNATURE, 44, 
+                                                             _ZIP64_VERSION, _ZIP64_VERSION, 0, 0, entryNumber, entryNumber, 
+                                                             centralDirectorySize, centralDirectoryOffset))
+            self._write(_ZIP64_LOCATOR.pack(_ZIP64_LOCATOR_SIGNATURE, 0, zip64EndOffset, 1))
+            entryNumber = min(entryNumber, _ZIP32_ENTRY_LIMIT)
+            centralDirectoryOffset = min(centralDirectoryOffset, _ZIP32_LIMIT)
+            centralDirectorySize = min(centralDirectorySize, _ZIP32_LIMIT)
+        self._write(_END_OF_CENTRAL_DIRECTORY.pack(_END_OF_CENTRAL_DIRECTORY_SIGNATURE, 0, 0, entryNumber, entryNumber,
+                                                   centralDirectorySize, centralDirectoryOffset, 0))
+
+
+class _ZipEntry(object):
+    """ 
+    Information about an archive member required for the central directory. 
+    Names which cannot be encoded in ASCII are stored in UTF-8 and flagged accordingly.
+    """
+    
+    def __init__(self, name, offset, localTime):
+        """ Constructor. """
+        
+        self.flags = _DATA_DESCRIPTOR_FLAG
+        if isinstance(name, unicode):
+            try:
+                name = name.encode("ascii")
+            except UnicodeEncodeError:
+                name = name.encode("UTF-8")
+                self.flags |= _UTF8_FILENAME_FLAG
+        self.name = name
+        self.offset = offset
+        self.dosDate = (localTime[0] - 1980) << 9 | localTime[1] << 5 | localTime[2]
+        self.dosTime = localTime[3] << 11 | localTime[4] << 5 | (localTime[5] // 2)
+        self.crc = 0
+        self.compressedSize = 0
+        self.size = 0
+
+
+def _createCompressor():
+    """ Creates a compressor producing raw deflate data as used in ZIP archives. """
+    
+    return zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
@@ -40,15 +40,18 @@ Implements the main archiving process.
 """
 
 
-import os
 import logging
-from tempfile import NamedTemporaryFile
 from StringIO import StringIO
 
+from datafinder.core.archive_writer import ArchiveWriter
 from datafinder.core.configuration.properties.constants import ARCHIVE_ROOT_COLLECTION_ID, \
                                                                ARCHIVE_PART_INDEX_ID, ARCHIVE_PART_COUNT_ID
+from datafinder.core.item.collection import ItemCollection, ItemRoot
 from datafinder.core.item.data_persister.constants import ITEM_STATE_ARCHIVED, ITEM_STATE_ARCHIVED_MEMBER, \
                                                           ITEM_STATE_ARCHIVED_READONLY, ITEM_STATE_NULL
+from datafinder.core.item.leaf import ItemLeaf
+from datafinder.core.item.link import ItemLink
+from datafinder.core.item.visitor.base import ItemTreeWalkerBase, VisitSlot
 from datafinder.core.item.visitor.importer import Importer
 from datafinder.core.error import ItemError, CoreError
 from datafinder.persistence.error import PersistenceError
@@ -64,6 +67,9 @@ _STOP_PROCESSING_STATES = [ITEM_STATE_ARCHIVED_MEMBER]
 
 _ARCHIVE_SUFFIX = " Archive"
 
+# Size in bytes after which a new archive part is started
+_MAXIMUM_PART_SIZE = 1024 ** 3
+
 
 class Archiver(object):
     """ Implements the archiving process. """
@@ -94,8 +100,8 @@ class Archiver(object):
 
         archiveRoot = self._createArchiveRoot(sourceCollection, parentCollection, properties)
         try:
-            self._storeArchiveData(sourceCollection, archiveRoot)
-            self._performPostArchivingActions(sourceCollection, archiveRoot)
+            archivedLeafs = self._storeArchiveData(sourceCollection, archiveRoot)
+            self._performPostArchivingActions(sourceCollection, archiveRoot, archivedLeafs)
         except ItemError, error:
             try:
                 archiveRoot.delete()
@@ -146,60 +152,45 @@ class Archiver(object):
             return archiveRoot
     
     def _storeArchiveData(self, sourceCollection, archiveRoot):
-        """ Collects data which has to be archived and stores it. """
+        """ 
+        Collects data which has to be archived and streams it into new archive parts.
+        Returns the archived leafs and the indexes of the parts containing them.
+        """
         
-        importedLeafs = list()
-        temporaryFilePath = self._determineTemporaryFilePath()
-        try:
-            # put everything in a temporary file
-            cwr = self._repositoryManager.workingRepository
-            archiveRepository = self._repositoryManager.connectRepository("arch:" + temporaryFilePath)
-            try:
-                importer = Importer(_STOP_TRAVERSAL_STATES, _STOP_PROCESSING_STATES)
-                for item in sourceCollection.getChildren():
-                    importer.performImport(item, archiveRepository.root, ignoreLinks=True)
-                    importedLeafs += importer.importedLeafs
-            finally:
-                self._repositoryManager.disconnectRepository(archiveRepository)
-                self._repositoryManager.workingRepository = cwr
-
-            # store it - when necessary
-            if len(importedLeafs) > 0:
-                try:
-                    archiveRoot.dataPersister.storeData(open(temporaryFilePath, "rb")) 
-                except (OSError, IOError):
-                    raise ItemError("Unable to access temporary created archive data.")
-        finally:
-            try:
-                os.remove(temporaryFilePath)
-            except OSError:
-                _log.debug("Cannot remove temporary file '%s'" % temporaryFilePath)
-        return importedLeafs
-                    
-    @staticmethod
-    def _determineTemporaryFilePath():
-        """ Determines a temporary file path and returns it. """
+        collector = _ArchiveMemberCollector()
+        for item in sourceCollection.getChildren():
+            collector.walk(item)
+        if len(collector.leafs) == 0:
+            return list()
         
+        maximumPartSize = None
+        firstPartIndex = 0
+        if self._repository.configuration.isManagedRepository:
+            maximumPartSize = _MAXIMUM_PART_SIZE
+            firstPartIndex = archiveRoot.properties[ARCHIVE_PART_COUNT_ID].value
+        writer = ArchiveWriter(archiveRoot.dataPersister.storeData, maximumPartSize)
         try:
-            tmpFile = NamedTemporaryFile()
-            tmpFile.close()
-        except (OSError, IOError):
-            raise ItemError("Cannot determine temporary file name.")
-        else:
-            return tmpFile.name
+            for leaf in collector.leafs:
+                writer.addMember(leaf.path[len(sourceCollection.path):], leaf.retrieveData)
+            writer.close()
+        except (OSError, IOError, PersistenceError), error:
+            raise ItemError("Unable to store archive data.\nReason: '%s'" % str(error))
+        return [(leaf, firstPartIndex + partIndex) for leaf, partIndex in zip(collector.leafs, writer.memberPartIndexes)]
 
-    def _performPostArchivingActions(self, sourceItem, targetItem):
+    def _performPostArchivingActions(self, sourceItem, targetItem, archivedLeafs):
         """ Performs post archiving actions. """
         
         if self._repository.configuration.isManagedRepository:
-            properties = [self._repository.createProperty(ARCHIVE_ROOT_COLLECTION_ID, targetItem.path),
-                          self._repository.createProperty(ARCHIVE_PART_INDEX_ID, 0)]
+            properties = [self._repository.createProperty(ARCHIVE_ROOT_COLLECTION_ID, targetItem.path)]
+            partIndexes = dict([(leaf.path, partIndex) for leaf, partIndex in archivedLeafs])
+            determinePartIndex = lambda item: [self._repository.createProperty(ARCHIVE_PART_INDEX_ID, 
+                                                                               partIndexes.get(item.path, 0))]
             failedCopiedItems = list()
             importer = Importer(_STOP_TRAVERSAL_STATES, _STOP_PROCESSING_STATES)
             for sourceItem in sourceItem.getChildren():
                 try:
-                    importer.performImport(sourceItem, targetItem, defaultProperties=properties, 
-                                           copyData=False, ignoreLinks=True)
+                    importer.performImport(sourceItem, targetItem, defaultProperties=properties, copyData=False, 
+                                           ignoreLinks=True, determinePropertiesCallback=determinePartIndex)
                 except CoreError, error:
                     failedCopiedItems.append((sourceItem, error.message))
             
@@ -226,16 +217,12 @@ class Archiver(object):
         if not archiveRoot.state in (ITEM_STATE_ARCHIVED, ITEM_STATE_ARCHIVED_READONLY):
             raise ItemError("Archive '%s' cannot be committed as it is no archive or a read-only archive." % archiveRoot.path)
 
-        importedLeafs = self._storeArchiveData(archiveRoot, archiveRoot)
+        archivedLeafs = self._storeArchiveData(archiveRoot, archiveRoot)
 
         # Update properties of newly added archive members
-        partIndex = archiveRoot.properties[ARCHIVE_PART_COUNT_ID].value - 1
-        if partIndex < 0:
-            partIndex = 0
-        properties = [self._repository.createProperty(ARCHIVE_ROOT_COLLECTION_ID, archiveRoot.path),
-                      self._repository.createProperty(ARCHIVE_PART_INDEX_ID, partIndex)]
-            
-        for importedLeaf in importedLeafs:
+        for importedLeaf, partIndex in archivedLeafs:
+            properties = [self._repository.createProperty(ARCHIVE_ROOT_COLLECTION_ID, archiveRoot.path),
+                          self._repository.createProperty(ARCHIVE_PART_INDEX_ID, partIndex)]
             try:
                 if importedLeaf.fileStorer == importedLeaf.dataPersister.fileStorer:
                     importedLeaf.storeData(StringIO("")) # When data is not stored on an external storage then it is set to "0"
@@ -250,3 +237,23 @@ class Archiver(object):
                 _log.error("Cannot update item '%s'. Reason: '%s'" % error.message)
                 continue
         archiveRoot.refresh()
+
+
+class _ArchiveMemberCollector(ItemTreeWalkerBase, object):
+    """ Collects the leafs whose content has to be archived. """
+    
+    def __init__(self):
+        """ Constructor. """
+        
+        super(_ArchiveMemberCollector, self).__init__(-1, _STOP_TRAVERSAL_STATES, _STOP_PROCESSING_STATES)
+        self.leafs = list()
+        
+    def _collectLeaf(self, leaf):
+        """ Collects leafs providing content. """
+        
+        if leaf.capabilities.canRetrieveData:
+            self.leafs.append(leaf)
+            
+    handle = VisitSlot((_collectLeaf, [ItemLeaf]), 
+                       (lambda self, _: None, [ItemLink, ItemCollection, ItemRoot]))
+
@@ -77,6 +77,7 @@ class RepositoryConfiguration(object):
         self._iconHandler = None
         self._scriptHandler = None
         self._preferences = None
+        self.maximumItemCacheSize = None # Maximum number of cached items. C{None} means the default is used.
 
     def setManagedRepositoryParameters(self, configurationCollection, dataModelHandler, dataStoreHandler,
                                        dataStoreAccessManager, iconHandler, scriptHandler, preferences):
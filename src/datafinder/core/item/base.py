@@ -263,12 +263,14 @@ class ItemBase(object):
             except PersistenceError, error:
                 raise ItemError("Cannot read item data. Reason: '%s'" % error.message)
 
-    def getTemporaryFileObject(self, deleteOnClose=True):
+    def getTemporaryFileObject(self, deleteOnClose=True, readOnly=False):
         """ 
         Returns a named local temporary file object allowing access to the binary content.
         
         @param deleteOnClose: Automatically deletes the temporary file object when its closed. Default: C{True}
         @type deleteOnClose: C{bool}
+        @param readOnly: Flag indicating that the file is neither changed nor deleted by the caller. Default: C{False}
+        @type readOnly: C{bool}
         
         @return: Tuple consisting of local file path and opened temporary file object.
         @rtype: C{tuple} of C{unicode}, C{object} implementing file protocol
@@ -278,7 +280,7 @@ class ItemBase(object):
             raise ItemError("This item does not allow data retrieval.")
         else:
             try:
-                return self.dataPersister.fileStorer.getTemporaryFileObject(self.name, deleteOnClose)
+                return self.dataPersister.fileStorer.getTemporaryFileObject(self.name, deleteOnClose, readOnly)
             except PersistenceError, error:
                 raise ItemError("Cannot retrieve temporary file object. Reason: '%s'" % error.message)
 
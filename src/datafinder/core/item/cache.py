@@ -0,0 +1,279 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Implements a path-indexed cache of items which is bounded by the number of cached items.
+"""
+
+
+import threading
+
+
+__version__ = "$Revision-Id:$" 
+
+
+# Default maximum number of cached items
+DEFAULT_MAXIMUM_SIZE = 100000
+
+
+class ItemCache(object):
+    """ 
+    Thread-safe item cache whose entries are organized in a tree of path segments.
+    Thus, invalidation of a sub tree only touches the items of this sub tree. 
+    When the maximum size is reached the least recently used item is evicted. 
+    Items whose descendants are cached are pinned, i.e. only items without cached
+    descendants are candidates for eviction. Candidates which are rejected by the 
+    eviction preparation are held until they are used again.
+    """
+    
+    def __init__(self, maximumSize=DEFAULT_MAXIMUM_SIZE, prepareEviction=None):
+        """ 
+        Constructor.
+        
+        @param maximumSize: Maximum number of cached items. Default: L{DEFAULT_MAXIMUM_SIZE<DEFAULT_MAXIMUM_SIZE>}
+        @type maximumSize: C{int}
+        @param prepareEviction: Optional callback which is invoked before the given item is evicted 
+                                and indicates whether the item might be evicted. Default: every item might be evicted.
+        @type prepareEviction: Callable taking the item and returning a C{bool}.
+        """
+        
+        self._maximumSize = maximumSize
+        self._prepareEviction = prepareEviction
+        self._lock = threading.RLock()
+        self._rootNode = _Node(None, None)
+        self._lruRoot = _Node(None, None) # Sentinel of the usage order of unpinned nodes
+        self._lruRoot.previous = self._lruRoot.next = self._lruRoot
+        self._size = 0
+        
+    @staticmethod
+    def _splitPath(path):
+        """ Splits the path into its segments. The root path is represented by an empty list. """
+        
+        return [segment for segment in path.split("/") if segment]
+
+    def _findNode(self, path):
+        """ Returns the node of the given path or C{None}. """
+        
+        node = self._rootNode
+        for segment in self._splitPath(path):
+            node = node.children.get(segment)
+            if node is None:
+                break
+        return node
+        
+    def get(self, path, default=None):
+        """ 
+        Returns the item of the given path and marks it as most recently used.
+        
+        @param path: Path of the item.
+        @type path: C{unicode}
+        @param default: Value returned if the item is not cached.
+        @type default: C{object}
+        
+        @return: The cached item or the default value.
+        @rtype: L{ItemBase<datafinder.core.item.base.ItemBase>}
+        """
+        
+        self._lock.acquire()
+        try:
+            node = self._findNode(path)
+            if node is None or node.item is None:
+                return default
+            if node.isLinked:
+                self._unlink(node)
+                self._link(node)
+            elif not node.children: # Held node becomes a candidate again
+                self._link(node)
+            return node.item
+        finally:
+            self._lock.release()
+    
+    def __contains__(self, path):
+        """ Checks whether an item is cached for the given path. """
+        
+        self._lock.acquire()
+        try:
+            node = self._findNode(path)
+            return not node is None and not node.item is None
+        finally:
+            self._lock.release()
+            
+    def __setitem__(self, path, item):
+        """ Adds or replaces the item of the given path and evicts the least recently used items if required. """
+        
+        self._lock.acquire()
+        try:
+            node = self._rootNode
+            for segment in self._splitPath(path):
+                child = node.children.get(segment)
+                if child is None:
+                    if node.isLinked:
+                        self._unlink(node) # The node gets pinned by its first child
+                    child = _Node(segment, node)
+                    node.children[segment] = child
+                node = child
+            
+            if node.item is None:
+                self._size += 1
+            node.item = item
+            if node.isLinked:
+                self._unlink(node)
+            if not node.children:
+                self._link(node)
+            
+            while self._size > self._maximumSize and self._lruRoot.next is not self._lruRoot:
+                candidate = self._lruRoot.next
+                if self._prepareEviction is None or self._prepareEviction(candidate.item):
+                    self._evict(candidate)
+                else:
+                    self._unlink(candidate)
+        finally:
+            self._lock.release()
+            
+    def _evict(self, node):
+        """ Removes the item of the given unpinned node. """
+        
+        self._unlink(node)
+        node.item = None
+        self._size -= 1
+        self._detach(node)
+        
+    def invalidate(self, path):
+        """ 
+        Removes the item of the given path and the items of all paths below it.
+        
+        @param path: Path of the sub tree root.
+        @type path: C{unicode}
+        """
+        
+        self._lock.acquire()
+        try:
+            node = self._findNode(path)
+            if not node is None:
+                nodes = [node]
+                while nodes:
+                    currentNode = nodes.pop()
+                    if not currentNode.item is None:
+                        currentNode.item = None
+                        self._size -= 1
+                    if currentNode.isLinked:
+                        self._unlink(currentNode)
+                    nodes.extend(currentNode.children.values())
+                    currentNode.children = dict()
+                self._detach(node)
+        finally:
+            self._lock.release()
+            
+    def _detach(self, node):
+        """ 
+        Removes the empty node from the tree. Ancestors which become empty are removed 
+        as well and ancestors without further descendants become candidates for eviction.
+        """
+        
+        parent = node.parent
+        while not parent is None:
+            del parent.children[node.name]
+            if parent.children:
+                break
+            if not parent.item is None:
+                self._link(parent)
+                break
+            node = parent
+            parent = node.parent
+                
+    def clear(self):
+        """ Removes all items. """
+        
+        self._lock.acquire()
+        try:
+            self._rootNode = _Node(None, None)
+            self._lruRoot.previous = self._lruRoot.next = self._lruRoot
+            self._size = 0
+        finally:
+            self._lock.release()
+            
+    def __len__(self):
+        """ Returns the number of cached items. """
+        
+        return self._size
+    
+    def _link(self, node):
+        """ Appends the node as most recently used node. """
+        
+        lastNode = self._lruRoot.previous
+        node.previous = lastNode
+        node.next = self._lruRoot
+        lastNode.next = node
+        self._lruRoot.previous = node
+        
+    @staticmethod
+    def _unlink(node):
+        """ Removes the node from the usage order. """
+        
+        node.previous.next = node.next
+        node.next.previous = node.previous
+        node.previous = node.next = None
+
+
+class _Node(object):
+    """ Represents a path segment of the cache tree. """
+    
+    __slots__ = ("name", "parent", "children", "item", "previous", "next")
+    
+    def __init__(self, name, parent):
+        """ 
+        Constructor.
+        
+        @param name: The path segment.
+        @type name: C{unicode}
+        @param parent: The parent node.
+        @type parent: L{_Node<_Node>}
+        """
+        
+        self.name = name
+        self.parent = parent
+        self.children = dict()
+        self.item = None
+        self.previous = None
+        self.next = None
+        
+    @property
+    def isLinked(self):
+        """ Flag indicating whether the node is part of the usage order, i.e. it is unpinned. """
+        
+        return not self.previous is None
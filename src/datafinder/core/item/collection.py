@@ -65,6 +65,8 @@ class ItemCollection(ItemBase):
         ItemBase.__init__(self, name, fileStorer)
         self._isCollection = True
         self._children = None
+        self._childIndex = dict() # Maps the name of a child to the child
+        self._caseFoldedChildIndex = dict() # Maps the lower-case name of a child to the number of such children
         self._childrenPopulated = False
         self._dataType = None
         
@@ -108,6 +110,8 @@ class ItemCollection(ItemBase):
         
         if self._children is None:
             self._children = list()
+            self._childIndex = dict()
+            self._caseFoldedChildIndex = dict()
             try:
                 try:
                     children = self.fileStorer.getChildren()
@@ -130,30 +134,43 @@ class ItemCollection(ItemBase):
         if not item is None:
             if not self.hasChild(item.name):
                 self.getChildren().append(item)
+                self._childIndex[item.name] = item
+                caseFoldedName = item.name.lower()
+                self._caseFoldedChildIndex[caseFoldedName] = self._caseFoldedChildIndex.get(caseFoldedName, 0) + 1
                 item.parent = self
         
     def removeChild(self, item):
-        """ @see: L{ItemBase.removeChild<datafinder.core.item.base.ItemBase.removeChild>} """
+        """ 
+        @see: L{ItemBase.removeChild<datafinder.core.item.base.ItemBase.removeChild>} 
+        @note: Only the given child object is removed. Other items with the same name are ignored.
+        """
         
         if not item is None:
-            try:
-                self.getChildren().remove(item)
-            except ValueError:
-                pass
-            else:
+            children = self.getChildren()
+            name = item.name
+            if not self._childIndex.get(name) is item: # The item might have been renamed after it has been added
+                name = None
+                for childName, child in self._childIndex.iteritems():
+                    if child is item:
+                        name = childName
+                        break
+            if not name is None:
+                children.remove(item)
+                del self._childIndex[name]
+                caseFoldedName = name.lower()
+                self._caseFoldedChildIndex[caseFoldedName] -= 1
+                if self._caseFoldedChildIndex[caseFoldedName] == 0:
+                    del self._caseFoldedChildIndex[caseFoldedName]
                 item.parent = None
 
     def hasChild(self, name, isCaseSensitive=False):
         """ @see: L{ItemBase.hasChild<datafinder.core.item.base.ItemBase.hasChild>} """
         
-        for child in self.getChildren():
-            if not isCaseSensitive:
-                if child.name == name:
-                    return True
-            else:
-                if child.name.lower() == name.lower():
-                    return True
-        return False
+        self.getChildren()
+        if not isCaseSensitive:
+            return name in self._childIndex
+        else:
+            return name.lower() in self._caseFoldedChildIndex
     
     def copy(self, item):
         """ @see: L{copy<datafinder.core.item.base.ItemBase.copy>}"""
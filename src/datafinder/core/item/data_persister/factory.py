@@ -46,6 +46,7 @@ from datafinder.core.configuration.datastores.constants import DEFAULT_STORE, OF
 from datafinder.core.configuration.properties import constants as property_constants
 from datafinder.core.item.data_persister import constants
 from datafinder.core.item.data_persister import persisters
+from datafinder.persistence.error import PersistenceError
 
 
 __version__ = "$Revision-Id:$" 
@@ -68,6 +69,17 @@ class DataPersisterFactory(object):
         self._dataStoreHandler = dataStoreHandler
         self._dataStoreAccessManager = dataStoreAccessManager
         self._propertyDefinitionRegistry = propertyDefinitionRegistry
+        self._archiveFileSystems = dict()
+        
+    def release(self):
+        """ Releases the file systems of the opened archive parts. """
+        
+        for key, fileSystem in self._archiveFileSystems.items():
+            try:
+                fileSystem.release()
+            except PersistenceError:
+                _logger.error("Cannot release archive '%s'." % key)
+        self._archiveFileSystems.clear()
         
     def createDataPersister(self, item):
         """ Creates the suitable data persister and attaches it to the item. """
@@ -78,7 +90,8 @@ class DataPersisterFactory(object):
         if dataState == constants.ITEM_STATE_ARCHIVED_MEMBER:
             rootItemPath = item.properties[property_constants.ARCHIVE_ROOT_COLLECTION_ID].value
             rootItem = item.itemFactory.create(rootItemPath)
-            dataPersister = persisters.ArchiveMemberDataPersister(dataState, item, rootItem, self._propertyDefinitionRegistry)
+            dataPersister = persisters.ArchiveMemberDataPersister(dataState, item, rootItem, self._propertyDefinitionRegistry, 
+                                                                  self._archiveFileSystems)
         elif dataState in [constants.ITEM_STATE_NULL, constants.ITEM_STATE_INACCESSIBLE, 
                            constants.ITEM_STATE_UNSUPPORTED_STORAGE_INTERFACE]:
             dataPersister = persisters.NullDataPersister(dataState)
@@ -41,12 +41,8 @@ access data on the same file system.
 """
 
 
-import atexit
 import logging
-import os
-import random
-from tempfile import mkstemp
-import time
+import uuid
 
 from hashlib import sha1
 
@@ -58,6 +54,7 @@ from datafinder.core.configuration.properties.constants import CONTENT_IDENTIFIE
 from datafinder.core.item.property import Property
 
 from datafinder.persistence.common.configuration import BaseConfiguration
+from datafinder.persistence.data.random_access import RandomAccessFile
 from datafinder.persistence.error import PersistenceError
 from datafinder.persistence.factory import FileSystem
 
@@ -66,15 +63,11 @@ __version__ = "$Revision-Id:$"
 
 
 _log = logging.getLogger(__name__)
-_BLOCK_SIZE = 30000
 
 def _generateUniqueIdentifier(uri):
     """ Generates an unique name from the given URI. """
     
-    firstTime = time.time()
-    time.sleep(random.random())
-    secondTime = time.time()
-    return sha1(uri + str(firstTime + secondTime)).hexdigest()
+    return sha1(uri + uuid.uuid4().hex).hexdigest()
 
 
 class NullDataPersister(object):
@@ -139,6 +132,21 @@ class NullDataPersister(object):
 
         pass
     
+    def retrieveRandomAccessData(self, index=0):
+        """
+        Provides seekable access to the data associated with the referenced item. If the storage
+        supports random access, only the requested parts of the data are transferred. Otherwise,
+        a local copy kept in the content cache is provided.
+        
+        @param index: Optional parameter identifying the "block" where the required is contained. Default: C{0}
+        @type index: C{int}
+        
+        @return: Seekable file-like object.
+        @rtype: C{object} implementing the file protocol
+        """
+        
+        pass
+    
     def storeData(self, fileObj):
         """
         Writes the data to the associated file resource.
@@ -181,6 +189,17 @@ class DefaultDataPersister(NullDataPersister):
         _log.debug(index)
         return self._fileStorer.readData()
     
+    def retrieveRandomAccessData(self, index=0):
+        """
+        Data is directly accessed using the associated file storer object.
+        """
+        
+        _log.debug(index)
+        if self._fileStorer.canReadDataRange:
+            return RandomAccessFile(self._fileStorer)
+        else:
+            return self._fileStorer.getLocalFileObject()
+    
     def storeData(self, fileObj):
         """
         Data is directly written to the associated file storer object.
@@ -272,6 +291,13 @@ class FlatDataPersister(DefaultDataPersister):
         _log.debug(index)
         self._prepareAction()
         return DefaultDataPersister.retrieveData(self)
+    
+    def retrieveRandomAccessData(self, index=0):
+        """ Additionally ensure creation of the file storer instance. """
+        
+        _log.debug(index)
+        self._prepareAction()
+        return DefaultDataPersister.retrieveRandomAccessData(self)
         
     def storeData(self, fileObj):
         """ Additionally ensure creation of the file storer instance. """
@@ -420,6 +446,15 @@ class ArchiveDataPersister(DefaultDataPersister):
         
         _log.debug(index)
         return self._determineFileStorer(index).readData()
+    
+    def retrieveRandomAccessData(self, index=0):
+        """ @see: L{retrieveRandomAccessData<datafinder.core.item.data_persister.persisters.NullDataPersister.retrieveRandomAccessData>} """
+        
+        fileStorer = self._determineFileStorer(index)
+        if fileStorer.canReadDataRange:
+            return RandomAccessFile(fileStorer)
+        else:
+            return fileStorer.getLocalFileObject()
         
     def storeData(self, fileObj):
         """ @see: L{storeData<datafinder.core.item.data_persister.persisters.NullDataPersister.storeData>} """
@@ -449,7 +484,7 @@ class ArchiveMemberDataPersister(NullDataPersister):
     This class implements a data persister that can retrieve and store data of archive members.
     """
     
-    def __init__(self, dataState, item, rootItem, propertyRegistry):
+    def __init__(self, dataState, item, rootItem, propertyRegistry, archiveFileSystems=None):
         """
         Constructor.
         
@@ -462,6 +497,9 @@ class ArchiveMemberDataPersister(NullDataPersister):
         @param propertyRegistry: Reference to the property definition registry.
         @type propertyRegistry: L{PropertyDefinitionRegistry<datafinder.core.configuration.
         properties.registry.PropertyDefinitionRegistry>} 
+        @param archiveFileSystems: Shared mapping of the opened archive parts to their file systems.
+                                   The owner is responsible for releasing the file systems.
+        @type archiveFileSystems: C{dict}
         """
         
         super(ArchiveMemberDataPersister, self).__init__(dataState, None)
@@ -469,39 +507,32 @@ class ArchiveMemberDataPersister(NullDataPersister):
         self._propertyRegistry = propertyRegistry
         self._rootItem = rootItem
         self._fileSystem = None
+        self._archiveFileSystems = archiveFileSystems
+        if self._archiveFileSystems is None:
+            self._archiveFileSystems = dict()
         self._index = int(item.properties[ARCHIVE_PART_INDEX_ID].value)
         
     def _ensureReadableSystem(self):
         """
         Make sure, self._archiveFileSystem contains a valid readable file system. If
-        none is present, the corresponding ZIP file will be downloaded.
+        none is present, the corresponding ZIP file is opened using random access. Thus, only 
+        the central directory and the requested members are transferred. If the storage does 
+        not support random access, the local copy of the ZIP file kept in the content cache is used.
         """
         
         if self._fileSystem is None:
             key = self._rootItem.path + str(self._index)
-            if key in _temporaryFileMap:
-                self._fileSystem = _temporaryFileMap[key][1]
+            if key in self._archiveFileSystems:
+                self._fileSystem = self._archiveFileSystems[key]
             else:
-                fd, path = mkstemp()
-                fileHandle = os.fdopen(fd, "w+b")
-                inStream = self._rootItem.dataPersister.retrieveData(self._index)
                 try:
-                    block = inStream.read(_BLOCK_SIZE)
-                    while len(block) > 0:
-                        fileHandle.write(block)
-                        block = inStream.read(_BLOCK_SIZE)
-                        while len(block) > 0:
-                            fileHandle.write(block)
-                            block = inStream.read(_BLOCK_SIZE)
-                    fileHandle.close()
-                except (OSError, IOError), error:
-                    reason = os.strerror(error.errno or 0)
-                    raise ItemError("Cannot retrieve archive.\nReason: '%s'" % reason)
-                else:
-                    config = BaseConfiguration('arch:' + path)
-                    _log.debug("Downloaded %s to %s." % (self._rootItem.path, path))
-                    self._fileSystem = FileSystem(config)
-                    _temporaryFileMap[key] = (path, self._fileSystem)
+                    archiveFile = self._rootItem.dataPersister.retrieveRandomAccessData(self._index)
+                except PersistenceError, error:
+                    raise ItemError("Cannot retrieve archive.\nReason: '%s'" % error.message)
+                config = BaseConfiguration("arch:" + archiveFile.name, archiveFile=archiveFile)
+                _log.debug("Opened archive part %i of %s." % (self._index, self._rootItem.path))
+                self._fileSystem = FileSystem(config)
+                self._archiveFileSystems[key] = self._fileSystem
 
     def copy(self, item):
         """ @see: L{copy<datafinder.core.item.data_persister.persisters.NullDataPersister.copy>} """
@@ -534,20 +565,3 @@ class ArchiveMemberDataPersister(NullDataPersister):
             innerPath = self._item.path[len(self._rootItem.path):]
             self._fileStorer = self._fileSystem.createFileStorer(innerPath)
         return self._fileStorer
-
-
-_temporaryFileMap = dict()
-
-    
-def _cleanupTemporaryFiles():
-    """ Cleans up the temporary created files on application exit. """
-
-    for filePath, fileSystem in _temporaryFileMap.values():
-        try:
-            fileSystem.release()
-            os.remove(filePath)
-        except (OSError, PersistenceError):
-            _log.error("Cannot clean up temporary file '%s'" % filePath)
-
-
-atexit.register(_cleanupTemporaryFiles)
@@ -41,6 +41,7 @@ Factory module for the creating of new items.
 
 
 from datafinder.core.error import ItemError
+from datafinder.core.item.cache import ItemCache, DEFAULT_MAXIMUM_SIZE
 from datafinder.core.item.collection import ItemCollection, ItemRoot
 from datafinder.core.item.leaf import ItemLeaf
 from datafinder.core.item.link import ItemLink
@@ -67,7 +68,28 @@ class ItemFactory(object):
         self._configuration = configuration
         self._dataPersisterFactory = DataPersisterFactory(
             configuration.dataStoreHandler, configuration.dataStoreAccessManager ,configuration.propertyDefinitionRegistry)
-        self._itemCache = dict()
+        maximumCacheSize = configuration.maximumItemCacheSize
+        if maximumCacheSize is None:
+            maximumCacheSize = DEFAULT_MAXIMUM_SIZE
+        self._itemCache = ItemCache(maximumCacheSize, self._prepareEviction)
+        
+    @staticmethod
+    def _prepareEviction(item):
+        """ 
+        Prepares the eviction of the item from the item cache. When the item is referenced by the 
+        populated children of its parent, these children are reset. Otherwise, the item would be 
+        created a second time when it is requested again. The cached siblings are reused when the 
+        children are retrieved again. The root item is never evicted.
+        """
+        
+        if item.isRoot:
+            return False
+        parent = item._parent # Avoids the creation of the parent item
+        if not parent is None and parent.childrenPopulated \
+           and parent._childIndex.get(item.name) is item:
+            parent._children = None
+            parent._childrenPopulated = False
+        return True
                 
     def createFileStorer(self, path):
         """ 
@@ -213,16 +235,15 @@ class ItemFactory(object):
         """
         
         try:
-            if fileStorer is None \
-            and path not in self._itemCache:
-                fileStorer = self._fileSystem.createFileStorer(path)
-            elif fileStorer is not None:
+            if not fileStorer is None:
                 path = fileStorer.identifier
-            if path in self._itemCache:
-                item = self._itemCache[path]
+            item = self._itemCache.get(path)
+            if not item is None:
                 if not parent is None:
                     item.parent = parent
                 return item
+            if fileStorer is None:
+                fileStorer = self._fileSystem.createFileStorer(path)
             
             if path == "/":
                 item = self._createItem(ItemRoot, fileStorer, None, parent)
@@ -258,13 +279,15 @@ class ItemFactory(object):
         return item 
     
     def invalidate(self, path):
-        """ Invalidate an entry from the item cache. """
+        """ Invalidates the item of the given path and all cached items below it. """
+        
+        self._itemCache.invalidate(path)
+        
+    def release(self):
+        """ Releases the cached items and the resources of their data persisters. """
         
-        if path in self._itemCache:
-            del self._itemCache[path]
-        for itemPath in self._itemCache.keys()[:]:
-            if itemPath.startswith(path):
-                del self._itemCache[itemPath]
+        self._itemCache.clear()
+        self._dataPersisterFactory.release()
 
     def getDataType(self, dataTypeName):
         """ Retrieves the data type for the given name. """
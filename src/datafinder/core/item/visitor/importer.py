@@ -38,7 +38,13 @@
 """ This module provides a tree walker that copies all items from one repository to another. """
 
 
+import shutil
+import sys
+from tempfile import SpooledTemporaryFile
+import threading
+
 from datafinder.common import logger
+from datafinder.common.worker_pool import WorkerPool
 from datafinder.core.configuration.properties.constants import CONTENT_CREATION_DATETIME_PROPERTY_ID, \
                                                                CREATION_DATETIME_ID, DATA_FORMAT_ID, SIZE_ID, \
                                                                CONTENT_SIZE_ID, CONTENT_MODIFICATION_DATETIME_ID, \
@@ -49,28 +55,47 @@ from datafinder.core.item.link import ItemLink
 from datafinder.core.item.leaf import ItemLeaf
 from datafinder.core.item.property import Property
 from datafinder.core.item.visitor.base import ItemTreeWalkerBase, VisitSlot
+from datafinder.persistence.error import PersistenceError
 
 
 __version__ = "$Revision-Id:$" 
 
 
+# Default number of threads creating leafs and transferring their data
+DEFAULT_WORKER_NUMBER = 4
+# Content up to this size (in bytes) is buffered in memory before it is stored
+_MAXIMUM_SPOOL_MEMORY_SIZE = 1024 ** 2
+
+
 class Importer(ItemTreeWalkerBase, object): # inherit from object to make pylint happy, but this is a pylint issue
     """
     This class uses the L{ItemTreeWalkerBase<datafinder.core.item.visitor.base.ItemTreeWalkerBase>}
     protocol to implement a recursive copy algorithm between two repositories. It is assumed
     (but NOT checked) that the repository configurations are compatible.
+    
+    Collections and links are created in walking order. The creation of leafs and the 
+    transfer of their data are performed by a bounded number of worker threads. The content 
+    of a leaf is streamed from the source to the target. It is only buffered locally when both
+    share a connection pool which cannot provide a source and a target connection to every worker. 
+    Otherwise, the workers might exhaust the pool. Leafs which cannot be imported are reported at the end 
+    of the import without aborting it. The changes of the target file system are collected 
+    in a transaction which is committed at the end. If the import is aborted by an error, 
+    the transaction is rolled back instead and the created items are invalidated.
     """
     
     
     _log = logger.getDefaultLogger()
     
     
-    def __init__(self, stopTraversalStates=None, stopProcessStates=None):
+    def __init__(self, stopTraversalStates=None, stopProcessStates=None, workerNumber=DEFAULT_WORKER_NUMBER):
         """ 
         @param stopTraversalStates: List of states that are used to prevent traversal of specific collections. Default: C{None}
         @type stopTraversalStates: C{list} of C{unicode}
         @param stopProcessStates: List of states that are used to prevent processing a specific items. Default: C{None}
         @type stopProcessStates: C{list} of C{unicode}
+        @param workerNumber: Number of threads importing leafs in parallel. C{1} imports all leafs 
+                             in the calling thread. Default: L{DEFAULT_WORKER_NUMBER<DEFAULT_WORKER_NUMBER>}
+        @type workerNumber: C{int}
         """
         
         super(Importer, self).__init__(-1, stopTraversalStates, stopProcessStates)
@@ -85,6 +110,11 @@ class Importer(ItemTreeWalkerBase, object): # inherit from object to make pylint
         self._copyData = True
         self._ignoreLinks = False
         self._determinePropertiesCallback = None
+        self._workerNumber = workerNumber
+        self._workerPool = None
+        self._failedLeafs = None
+        self._createdItems = None
+        self._lock = threading.Lock()
         self.importedLeafs = None
         
     def performImport(self, source, targetCollection, newSourceName=None, 
@@ -124,22 +154,67 @@ class Importer(ItemTreeWalkerBase, object): # inherit from object to make pylint
         self.importedLeafs = list()
         self._ignoreLinks = ignoreLinks
         self._determinePropertiesCallback = determinePropertiesCallback
+        self._failedLeafs = list()
+        self._createdItems = list()
         
-        self.walk(source)
-        
-        missingDefferedLinkPaths = list()
-        for source, importName, destinationParent in self._deferredLinks:
+        fileSystem = targetCollection.fileStorer.fileSystem
+        fileSystem.beginTransaction()
+        try:
+            self._workerPool = WorkerPool(self._workerNumber)
             try:
-                self._copyLink(source, importName, destinationParent)
-            except ItemError:
-                missingDefferedLinkPaths.append(source.path)
+                self.walk(source)
+            finally:
+                try:
+                    self._workerPool.shutdown()
+                finally:
+                    self._cleanUpFailedLeafs()
+            
+            missingDefferedLinkPaths = list()
+            for source, importName, destinationParent in self._deferredLinks:
+                try:
+                    self._copyLink(source, importName, destinationParent)
+                except ItemError:
+                    missingDefferedLinkPaths.append(source.path)
+        except:
+            errorType, error, traceback = sys.exc_info()
+            self._rollbackTransaction(fileSystem)
+            raise errorType, error, traceback
+        self._commitTransaction(fileSystem)
         
+        errorMessage = ""
+        if len(self._failedLeafs) > 0:
+            errorMessage = "The following items could not be imported:"
+            for leaf, _, error in self._failedLeafs:
+                errorMessage += "\n" + leaf.path + " Reason: " + error.message
         if len(missingDefferedLinkPaths) > 0:
-            errorMessage = "The following links could not be imported:"
+            if len(errorMessage) > 0:
+                errorMessage += "\n"
+            errorMessage += "The following links could not be imported:"
             for linkPath in missingDefferedLinkPaths:
                 errorMessage += "\n" + linkPath
+        if len(errorMessage) > 0:
             raise ItemError(errorMessage)
     
+    def _commitTransaction(self, fileSystem):
+        """ Commits the imported items. They are discarded if the commit fails. """
+        
+        try:
+            fileSystem.commitTransaction()
+        except PersistenceError, error:
+            self._rollbackTransaction(fileSystem)
+            raise ItemError("Unable to commit the imported items.\nReason: '%s'" % error.message)
+        
+    def _rollbackTransaction(self, fileSystem):
+        """ Discards the imported items. Errors are only logged so they do not mask the original error. """
+        
+        try:
+            fileSystem.rollbackTransaction()
+        except PersistenceError, error:
+            self._log.error(error.args)
+        for item in reversed(self._createdItems):
+            if not item.path is None: # Failed items have already been invalidated
+                item.invalidate()
+    
     def walk(self, node):
         """
         @see: L{walk<datafinder.core.item.visitor.base.ItemTreeWalkerBase.walk>} method to add further post-processing.
@@ -160,6 +235,7 @@ class Importer(ItemTreeWalkerBase, object): # inherit from object to make pylint
         destinationLinkTargetPath = baseDestinationPath + source.linkTarget.path[len(self._source.path):]
         destinationLinkTarget = self._itemFactory.create(destinationLinkTargetPath)
         link = self._itemFactory.createLink(importName, destinationLinkTarget, destinationParent)
+        self._createdItems.append(link)
         properties = source.properties.values()[:]
         if not self._determinePropertiesCallback is None:
             properties.extend(self._determinePropertiesCallback(source))
@@ -195,33 +271,95 @@ class Importer(ItemTreeWalkerBase, object): # inherit from object to make pylint
         return importName
 
     def _importLeaf(self, leaf):
-        """ Retrieves the content of a leaf item. """
+        """ Prepares the import of a leaf item and hands it over to the worker threads. """
         
         if leaf.capabilities.canRetrieveData:
             importName = self._determineImportName(leaf)
             importedLeaf = self._itemFactory.createLeaf(importName, self._pwd)
+            self._createdItems.append(importedLeaf)
             properties = self._determineLeafProperties(leaf)
+            self._workerPool.execute(lambda: self._createLeaf(leaf, importedLeaf, properties))
+            
+    def _createLeaf(self, leaf, importedLeaf, properties):
+        """ Creates the leaf item and transfers its content. Errors are recorded for later clean up. """
+        
+        try:
+            importedLeaf.create(properties)
+            if self._copyData:
+                self._copyContent(leaf, importedLeaf)
+        except CoreError, error:
+            self._log.error(error.args)
+            self._lock.acquire()
             try:
-                importedLeaf.create(properties)
-            except CoreError, error:
-                self._handleLeafCreationError(importedLeaf, error)
-            else:
-                if self._copyData:
-                    try:
-                        importedLeaf.storeData(leaf.retrieveData())
-                    except CoreError, error:
-                        self._handleLeafCreationError(importedLeaf, error)
-                    else:
-                        self.importedLeafs.append(leaf)
+                self._failedLeafs.append((leaf, importedLeaf, error))
+            finally:
+                self._lock.release()
+        else:
+            if self._copyData:
+                self._lock.acquire()
+                try:
+                    self.importedLeafs.append(leaf)
+                finally:
+                    self._lock.release()
                         
-    def _handleLeafCreationError(self, leaf, error):
-        self._log.error(error.args)
+    def _copyContent(self, leaf, importedLeaf):
+        """ Streams the content of the leaf into the imported leaf. """
+        
+        requiresSpooling = self._requiresSpooling(leaf, importedLeaf)
+        dataStream = leaf.retrieveData()
+        if requiresSpooling:
+            dataStream = self._spoolData(dataStream)
         try:
-            leaf.delete(ignoreStorageLocation=True)
-        except CoreError, error_:
-            leaf.invalidate()
-            self._log.info(error_.args)
-        raise error
+            importedLeaf.storeData(dataStream)
+        finally:
+            dataStream.close()
+            
+    def _requiresSpooling(self, leaf, importedLeaf):
+        """ 
+        Checks whether the content has to be buffered before it is stored. This is the case if 
+        the source and the target share a connection pool which might be exhausted by workers
+        holding a source connection while they are waiting for a target connection.
+        """
+        
+        connectionPool = self._determineConnectionPool(leaf)
+        if connectionPool is None or not connectionPool is self._determineConnectionPool(importedLeaf):
+            return False
+        return connectionPool.maxConnectionNumber <= self._workerNumber
+    
+    @staticmethod
+    def _determineConnectionPool(item):
+        """ Returns the connection pool used to access the content of the item or C{None}. """
+        
+        fileStorer = item.dataPersister.fileStorer
+        if fileStorer is None:
+            return None
+        return fileStorer.fileSystem.connectionPool
+                        
+    @staticmethod
+    def _spoolData(dataStream):
+        """ Buffers the content and releases the source stream. """
+        
+        spoolFile = SpooledTemporaryFile(_MAXIMUM_SPOOL_MEMORY_SIZE)
+        try:
+            try:
+                shutil.copyfileobj(dataStream, spoolFile)
+            finally:
+                dataStream.close()
+        except IOError, error:
+            spoolFile.close()
+            raise ItemError("Cannot read item data. Reason: '%s'" % str(error))
+        spoolFile.seek(0)
+        return spoolFile
+        
+    def _cleanUpFailedLeafs(self):
+        """ Removes the leafs which could not be imported. """
+        
+        for _, importedLeaf, _ in self._failedLeafs:
+            try:
+                importedLeaf.delete(ignoreStorageLocation=True)
+            except CoreError, error:
+                importedLeaf.invalidate()
+                self._log.info(error.args)
                         
     def _determineLeafProperties(self, leaf):
         """ Determines the properties when importing a leaf item. """
@@ -247,6 +385,7 @@ class Importer(ItemTreeWalkerBase, object): # inherit from object to make pylint
         
         importName = self._determineImportName(collection)
         importedCollection = self._itemFactory.createCollection(importName, self._pwd)
+        self._createdItems.append(importedCollection)
         
         properties = collection.properties.values()[:]
         if not self._determinePropertiesCallback is None:
@@ -264,3 +403,4 @@ class Importer(ItemTreeWalkerBase, object): # inherit from object to make pylint
                        (_importLeaf, [ItemLeaf]), 
                        (_importCollection, [ItemCollection]), 
                        (lambda self, _: None, [ItemRoot]))
+
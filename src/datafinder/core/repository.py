@@ -166,6 +166,7 @@ class Repository(object):
     def release(self):
         """ Disconnects from the current repository. """
         
+        self._itemFactory.release()
         self._configuration.release()
         self._fileSystem.release()
         
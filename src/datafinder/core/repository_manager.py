@@ -105,6 +105,7 @@ class RepositoryManager(object):
         """
         
         self.preferences.load()
+        BaseConfiguration.contentCacheMaximumSize = self.preferences.contentCacheMaximumSize
         self.scriptRegistry.load()
         self.iconRegistry.load()
         self.dataFormatRegistry.load()
@@ -142,8 +143,10 @@ class RepositoryManager(object):
     def _createBaseRepositoryConfiguration(self, isManagedRepository=False):
         propertyDefinitionFactory = PropertyDefinitionFactory()
         propertyDefinitionRegistry = PropertyDefinitionRegistry(propertyDefinitionFactory, isManagedRepository)
-        return RepositoryConfiguration(
+        configuration = RepositoryConfiguration(
             propertyDefinitionFactory, propertyDefinitionRegistry, self.iconRegistry, self.dataFormatRegistry)
+        configuration.maximumItemCacheSize = self.preferences.maximumItemCacheSize
+        return configuration
       
     @staticmethod
     def _createConfigurationCollection(configurationUri, username, password, baseUri):
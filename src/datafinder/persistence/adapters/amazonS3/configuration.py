@@ -40,6 +40,9 @@ Defines S3-specific connection parameters.
 """
 
 
+from datafinder.persistence.adapters.amazonS3 import constants
+
+
 __version__ = "$Revision-Id$" 
 
 
@@ -61,3 +64,14 @@ class Configuration(object):
         self.password = baseConfiguration.password
           
         self.bucketName = baseConfiguration.uriPath
+
+        self.connectionIdleTimeout = baseConfiguration.connectionIdleTimeout or constants.CONNECTION_IDLE_TIMEOUT
+        self.connectionMaximumLifetime = baseConfiguration.connectionMaximumLifetime or constants.CONNECTION_MAXIMUM_LIFETIME
+        
+        self.partSize = max(baseConfiguration.partSize or constants.PART_SIZE, constants.MINIMUM_PART_SIZE)
+        self.transferThreadNumber = baseConfiguration.transferThreadNumber or constants.TRANSFER_THREAD_NUMBER
+        
+        self.cacheMaximumSize = baseConfiguration.cacheMaximumSize or constants.CACHE_MAXIMUM_SIZE
+        self.cacheTimeToLive = baseConfiguration.cacheTimeToLive
+        if self.cacheTimeToLive is None:
+            self.cacheTimeToLive = constants.CACHE_TIME_TO_LIVE
@@ -61,8 +61,15 @@ class S3ConnectionPool(ConnectionPool):
         """
         
         self._configuration = configuration
-        ConnectionPool.__init__(self, MAX_CONNECTION_NUMBER)
+        ConnectionPool.__init__(self, MAX_CONNECTION_NUMBER, idleTimeout=configuration.connectionIdleTimeout, 
+                                maxLifetime=configuration.connectionMaximumLifetime)
         
+    @property
+    def accessKey(self):
+        """ Returns the access key identifying the account the connections belong to. """
+        
+        return self._configuration.username
+    
     def _createConnection(self):
         """ Creates a s3 connection. """
         
@@ -45,3 +45,32 @@ __version__ = "$Revision-Id$"
 
 MAX_POOL_NUMBER = 10
 MAX_CONNECTION_NUMBER = 5
+CONNECTION_IDLE_TIMEOUT = 300 # in seconds
+CONNECTION_MAXIMUM_LIFETIME = 3600 # in seconds
+
+# Objects up to this size in bytes are copied with a single request
+MAXIMUM_SINGLE_COPY_SIZE = 5 * 1024 ** 3
+# Minimum part size in bytes of multipart copies
+COPY_PART_SIZE = 1024 ** 3
+# Maximum number of parts of a multipart upload
+MAXIMUM_PART_NUMBER = 10000
+
+# Size in bytes of the parts which are transferred concurrently
+PART_SIZE = 16 * 1024 ** 2
+# Minimum size in bytes of the parts of a multipart upload
+MINIMUM_PART_SIZE = 5 * 1024 ** 2
+# Number of parts which are transferred concurrently
+TRANSFER_THREAD_NUMBER = 4
+# Number of attempts to transfer a single part
+PART_TRANSFER_ATTEMPTS = 3
+
+# Size in bytes of the blocks which are read from the HTTP response
+READ_BLOCK_SIZE = 64 * 1024
+# Objects up to this size in bytes are spilled into a temporary file when seeking
+MAXIMUM_SPILL_SIZE = 100 * 1024 ** 2
+# Size in bytes up to which spilled content is kept in memory
+SPILL_MEMORY_SIZE = 1024 ** 2
+
+# Constants for caching of the listing results
+CACHE_MAXIMUM_SIZE = 10000
+CACHE_TIME_TO_LIVE = 60 # in seconds
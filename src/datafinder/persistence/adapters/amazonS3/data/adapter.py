@@ -46,14 +46,18 @@ The keys with the identifier of the item are stored in the bucket.
 """
 
 
-from atexit import register
-from os import remove
-from locale import resetlocale, setlocale, LC_TIME, Error
+from httplib import HTTPException
 import logging
-from tempfile import NamedTemporaryFile
+import socket
+from StringIO import StringIO
 
 from boto.exception import S3ResponseError, S3CreateError, BotoClientError, S3DataError
+from boto.s3.multipart import MultiPartUpload
+from boto.s3.prefix import Prefix
 
+from datafinder.common.worker_pool import WorkerPool
+from datafinder.persistence.adapters.amazonS3 import constants
+from datafinder.persistence.adapters.amazonS3.data.stream import S3ReadStream
 from datafinder.persistence.error import PersistenceError
 from datafinder.persistence.data.datastorer import NullDataStorer
 
@@ -62,16 +66,14 @@ __version__ = "$Revision-Id$"
 
 
 UTF_ENCODING = "UTF-8"
-LOCALE_TIME = "C"
-
-
-_temporaryFiles = list()
 
 
 class DataS3Adapter(NullDataStorer):
     """ An adapter instance represents an item within the Amazon S3 file system. """
 
-    def __init__(self, identifier, connectionPool, bucketname):
+    def __init__(self, identifier, connectionPool, bucketname, 
+                 partSize=constants.PART_SIZE, transferThreadNumber=constants.TRANSFER_THREAD_NUMBER, bucketVerified=False, 
+                 listingCache=None):
         """
         @param identifier: Logical identifier of the resource.
         @type identifier: C{unicode}
@@ -79,46 +81,42 @@ class DataS3Adapter(NullDataStorer):
         @type connectionPool: L{Connection<datafinder.persistence.amazonS3.connection_pool.S3ConnectionPool>}
         @param bucketname: Name of the bucket in Amazon S3, specified in the data location of the configuration.
         @type bucketname: C{unicode}
+        @param partSize: Size in bytes of the parts which are transferred concurrently.
+        @type partSize: C{int}
+        @param transferThreadNumber: Number of parts which are transferred concurrently.
+        @type transferThreadNumber: C{int}
+        @param bucketVerified: Flag indicating that the bucket has already been looked up. Otherwise, 
+                               the bucket is looked up and created if it does not exist.
+        @type bucketVerified: C{bool}
+        @param listingCache: Cache which is filled with the listing entries of the children when listing a collection.
+                             It maps the identifier to a L{ListingEntry<datafinder.persistence.adapters.amazonS3.data.adapter.ListingEntry>}.
+        @type listingCache: L{LruCache<datafinder.persistence.common.cache.LruCache>}
         """ 
         
         NullDataStorer.__init__(self, identifier)
         self._connectionPool = connectionPool
+        self._partSize = partSize
+        self._transferThreadNumber = transferThreadNumber
         
         self._bucketname = bucketname
-        self._bucket = self._getBucket()
+        if not bucketVerified:
+            lookupBucket(connectionPool, bucketname)
+        
+        self._listingCache = listingCache
         
         self._keyname =  identifier.encode(UTF_ENCODING)
         self._key = None
 
-    def _getBucket(self):
-        """ Gets a s3 bucket, to access and store data items on the service """ 
+    def _getBucket(self, connection):
+        """ Returns the bucket bound to the given connection without requesting it. """
         
-        bucket = None
-        setlocale(LC_TIME, LOCALE_TIME)
-        connection = self._connectionPool.acquire()
-        try:
-            bucket = connection.lookup(self._bucketname)
-            if bucket is None:
-                bucket = connection.create_bucket(self._bucketname)
-        except (S3ResponseError, S3CreateError), error:
-            if bucket is None:
-                raise PersistenceError("Cannot determine item existence. Reason: '%s'" % error.error_message)
-            else:
-                errorMessage = u"Cannot create resource '%s'. Reason: '%s'" % (self.identifier, error.error_message)
-                raise PersistenceError(errorMessage)                    
-        finally:
-            self._connectionPool.release(connection)
-            self._resetLocale()
-        return bucket
-    
+        return connection.get_bucket(self._bucketname, validate=False)
+
     @property
     def isLeaf(self):
         """ @see:L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>} """
         
-        if self._isRoot(self._keyname):
-            return False
-        else: 
-            return True
+        return not self.isCollection
      
     @staticmethod
     def _isRoot(key):  
@@ -128,12 +126,27 @@ class DataS3Adapter(NullDataStorer):
     
     @property
     def isCollection(self):
-        """ @see: L{NullDataStorer<datafinder.persistence.metadata.metadatastorenr.NullDataStorer>} """
+        """ 
+        @see: L{NullDataStorer<datafinder.persistence.metadata.metadatastorenr.NullDataStorer>} 
+        @note: Besides the root, key prefixes which are delimited by "/" are represented as collections.
+        """
         
-        if self._keyname == "/":
+        if self._isRoot(self._keyname):
             return True
-        else:
-            return False
+        if not self._listingCache is None:
+            listingEntry = self._listingCache.get(self.identifier)
+            if not listingEntry is None:
+                return listingEntry.isCollection
+        connection = self._connectionPool.acquire()
+        try:
+            isCollection = len(self._getBucket(connection).get_all_keys(prefix=self._keyname + "/", max_keys=1)) > 0
+        except S3ResponseError, error:
+            raise PersistenceError("Cannot determine item type of '%s'. Reason: '%s'" % (self.identifier, error))
+        finally:
+            self._connectionPool.release(connection)
+        if isCollection and not self._listingCache is None:
+            self._listingCache[self.identifier] = ListingEntry(True)
+        return isCollection
         
     @property
     def canAddChildren(self):
@@ -144,81 +157,220 @@ class DataS3Adapter(NullDataStorer):
     def createResource(self):
         """ @see:L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>} """
         
-        setlocale(LC_TIME, LOCALE_TIME)
         connection = self._connectionPool.acquire()
         try:
             if not self._keyname ==  "/":
-                self._key = self._bucket.get_key(self._keyname)
-                if not self._key:
-                    self._key = self._bucket.new_key(self._keyname)                                    
+                self._key = self._createKey(self._getBucket(connection))
         except (S3ResponseError, PersistenceError), error:
             errorMessage = "Cannot create resource '%s'. Reason: '%s'" % (self.identifier, error) 
             raise PersistenceError(errorMessage)
         finally:
             self._connectionPool.release(connection)
-            self._resetLocale()
         return self._key 
+    
+    def _createKey(self, bucket):
+        """ Returns the existing or a new key of the given bucket. """
+        
+        key = bucket.get_key(self._keyname)
+        if not key:
+            key = bucket.new_key(self._keyname)
+        return key
                 
     def getChildren(self):
-        """ @see:L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>} """
+        """ 
+        @see:L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>} 
+        @note: The children are retrieved page-wise while iterating over the returned generator.
+               A connection is only used while a page is requested. The listing entries of the 
+               children are added to the listing cache.
+        """
         
-        result = list()      
-        if self.isCollection:    
-            setlocale(LC_TIME, LOCALE_TIME)
-            connection = self._connectionPool.acquire()
-            try:
-                result = self._bucket.get_all_keys()
-            except S3ResponseError, error: 
-                errorMessage = u"Cannot retrieve children of item '%s'. Reason: '%s'" % (self.identifier, error)
-                raise PersistenceError(errorMessage)
-            finally: 
-                self._connectionPool.release(connection)
-                self._resetLocale()
-        return result
+        if self.isCollection:
+            return self._listChildren()
+        return iter(list())
+    
+    def _listChildren(self):
+        """ Lists the direct children using the "/" delimiter. The pages are requested on demand. """
+        
+        prefix = self._keyname.rstrip("/") + "/"
+        marker = ""
+        isTruncated = True
+        while isTruncated:
+            entries = self._listPage(prefix, marker)
+            for entry in entries:
+                name = entry.name
+                if not isinstance(name, unicode):
+                    name = name.decode(UTF_ENCODING)
+                if isinstance(entry, Prefix):
+                    identifier = name.rstrip("/")
+                    listingEntry = ListingEntry(True)
+                elif name.encode(UTF_ENCODING) == prefix: # Placeholder object of the collection itself
+                    continue
+                else:
+                    identifier = name
+                    listingEntry = ListingEntry(False, entry.size, entry.last_modified)
+                if not self._listingCache is None:
+                    self._listingCache[identifier] = listingEntry
+                yield identifier
+            isTruncated = entries.is_truncated and len(entries) > 0
+            if isTruncated:
+                marker = entries.next_marker or entries[-1].name
+                
+    def _listPage(self, prefix, marker):
+        """ Requests the page of keys and common prefixes following the marker. """
+        
+        connection = self._connectionPool.acquire()
+        try:
+            return self._getBucket(connection).get_all_keys(prefix=prefix, delimiter="/", marker=marker)
+        except S3ResponseError, error: 
+            errorMessage = u"Cannot retrieve children of item '%s'. Reason: '%s'" % (self.identifier, error)
+            raise PersistenceError(errorMessage)
+        finally:
+            self._connectionPool.release(connection)
+            
+    def _invalidateListingEntry(self):
+        """ Removes the outdated listing entry of the item. """
+        
+        if not self._listingCache is None:
+            self._listingCache.invalidate(self.identifier)
 
     def writeData(self, data):
         """ @see:L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>} """
         
-        setlocale(LC_TIME, LOCALE_TIME)
-        connection = self._connectionPool.acquire()
+        self._invalidateListingEntry()
         try:
-            self._key = self.createResource()
-            self._key.set_contents_from_file(data)
-        except (PersistenceError, S3ResponseError, S3DataError), error:
+            content = data.read(self._partSize)
+            if len(content) < self._partSize:
+                connection = self._connectionPool.acquire()
+                try:
+                    self._key = self._createKey(self._getBucket(connection))
+                    self._key.set_contents_from_string(content)
+                finally:
+                    self._connectionPool.release(connection)
+            else:
+                self._uploadParts(content, data) # The parts acquire their own connections
+        except (PersistenceError, S3ResponseError, S3DataError, IOError, HTTPException), error:
             errorMessage = "Unable to write data to '%s'. " % self.identifier \
                            + "Reason: %s" % error
             raise PersistenceError(errorMessage)
-        finally:
-            self._connectionPool.release(connection) 
-            self._resetLocale() 
         
     def readData(self):
-        """ @see:L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>} """
+        """ 
+        @see:L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>} 
+        @note: The content is streamed while reading the returned file object. It has to be closed
+               to release the HTTP response and the temporary file which is used when seeking.
+        """
         
-        setlocale(LC_TIME, LOCALE_TIME)
         connection = self._connectionPool.acquire()
         try:
-            fileObject = NamedTemporaryFile(delete=False)
-            self.createResource()
-            self._key.get_contents_to_filename(fileObject.name)
-            _temporaryFiles.append(fileObject)
-            return fileObject
-        except (PersistenceError, S3ResponseError, BotoClientError), error:
+            key = self._getBucket(connection).get_key(self._keyname)
+            if key is None:
+                raise PersistenceError("The item does not exist.")
+            return S3ReadStream(self.identifier, key.size, self._openResponse, self._readRange, 
+                                self._partSize, self._transferThreadNumber)
+        except (PersistenceError, S3ResponseError, BotoClientError, IOError, HTTPException), error:
             errorMessage = "Unable to read data from '%s'. " % self.identifier \
                            + "Reason: %s" % error
             raise PersistenceError(errorMessage)
         finally:
             self._connectionPool.release(connection) 
-            self._resetLocale() 
     
+    def _uploadParts(self, firstPart, data):
+        """ Uploads the content using a multipart upload whose parts are transferred concurrently. """
+        
+        connection = self._connectionPool.acquire()
+        try:
+            upload = self._getBucket(connection).initiate_multipart_upload(self._keyname)
+        finally:
+            self._connectionPool.release(connection)
+        try:
+            workerPool = WorkerPool(self._transferThreadNumber)
+            try:
+                partNumber = 1
+                content = firstPart
+                while content:
+                    workerPool.execute(lambda partNumber=partNumber, content=content: 
+                                       self._uploadPart(upload.id, partNumber, content))
+                    partNumber += 1
+                    content = data.read(self._partSize)
+            finally:
+                workerPool.shutdown()
+            self._transferPart(lambda connection: self._bindUpload(upload, connection).complete_upload())
+        except:
+            try:
+                self._transferPart(lambda connection: self._bindUpload(upload, connection).cancel_upload())
+            except (S3ResponseError, socket.error, HTTPException):
+                logging.getLogger("").debug("Cannot cancel upload of '%s'." % self.identifier)
+            raise
+        
+    def _bindUpload(self, upload, connection):
+        """ Binds the multipart upload to the bucket of the given connection. """
+        
+        upload.bucket = self._getBucket(connection)
+        return upload
+        
+    def _uploadPart(self, uploadId, partNumber, content):
+        """ Uploads a single part using its own connection. The transfer is retried on errors. """
+        
+        def _transfer(connection):
+            upload = MultiPartUpload(self._getBucket(connection))
+            upload.id = uploadId
+            upload.key_name = self._keyname
+            upload.upload_part_from_file(StringIO(content), partNumber)
+        self._transferPart(_transfer)
+    
+    def _openResponse(self, start):
+        """ 
+        Requests the content starting at the given position. The used connection is 
+        released when the response is closed.
+        """
+        
+        connection = self._connectionPool.acquire()
+        try:
+            key = self._getBucket(connection).new_key(self._keyname)
+            headers = None
+            if start > 0:
+                headers = {"Range": "bytes=%i-" % start}
+            key.open_read(headers)
+        except:
+            self._connectionPool.release(connection)
+            raise
+        return _PooledResponse(key, self._connectionPool, connection)
+    
+    def _readRange(self, start, end):
+        """ Downloads a single byte range using its own connection. The transfer is retried on errors. """
+        
+        def _transfer(connection):
+            key = self._getBucket(connection).new_key(self._keyname)
+            return key.get_contents_as_string(headers={"Range": "bytes=%i-%i" % (start, end)})
+        return self._transferPart(_transfer)
+    
+    def _transferPart(self, transfer):
+        """ 
+        Calls the transfer function with a connection of the pool until it succeeds or the attempts are exhausted. 
+        Returns the result of the transfer function.
+        """
+        
+        attempt = 1
+        while True:
+            connection = self._connectionPool.acquire()
+            try:
+                try:
+                    return transfer(connection)
+                except (S3ResponseError, socket.error, HTTPException), error:
+                    if attempt == constants.PART_TRANSFER_ATTEMPTS or getattr(error, "status", 500) < 500: # Client errors are not retried
+                        raise
+                    attempt += 1
+            finally:
+                self._connectionPool.release(connection)
+        
     def delete(self):
         """ @see:L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>} """
         
         if self.isLeaf:
-            setlocale(LC_TIME, LOCALE_TIME)
+            self._invalidateListingEntry()
             connection = self._connectionPool.acquire()
             try:
-                self.createResource()
+                self._key = self._createKey(self._getBucket(connection))
                 self._key.delete()
             except (PersistenceError, S3ResponseError), error:  
                 errorMessage = "Unable to delete item '%s'. " % self.identifier \
@@ -226,7 +378,6 @@ class DataS3Adapter(NullDataStorer):
                 raise PersistenceError(errorMessage)     
             finally:
                 self._connectionPool.release(connection) 
-                self._resetLocale()   
         else:
             raise PersistenceError("Unable to delete item '%s'. " % self.identifier)
        
@@ -237,62 +388,155 @@ class DataS3Adapter(NullDataStorer):
         self.delete()
         
     def copy(self, destination):
-        """ @see:L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>} """
+        """ 
+        @see:L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>} 
+        @note: Within the same account the object is copied on the server. 
+               Otherwise, the content is transferred via the client.
+        """
         
-        setlocale(LC_TIME, LOCALE_TIME)
-        connection = self._connectionPool.acquire()
         try:
-            destination.writeData(self.readData())       
+            if self._canCopyOnServer(destination):
+                destination._invalidateListingEntry()
+                connection = self._connectionPool.acquire()
+                try:
+                    self._copyOnServer(destination, connection)
+                finally:
+                    self._connectionPool.release(connection)
+            else:
+                data = self.readData() # Reading and writing acquire their own connections
+                try:
+                    destination.writeData(data)
+                finally:
+                    data.close()
         except (S3ResponseError, S3CreateError, PersistenceError), error:
-            errorMessage = "Unable to move item '%s' to '%s'." % (self.identifier, self._bucket.identifier)\
+            errorMessage = "Unable to copy item '%s' to '%s'. " % (self.identifier, destination.identifier)\
                            + "Reason: %s" % error
             raise PersistenceError(errorMessage)
-        finally:
-            self._connectionPool.release(connection) 
-            self._resetLocale()
+            
+    def _canCopyOnServer(self, destination):
+        """ Checks whether the destination object can be created by a server-side copy. """
+        
+        return isinstance(destination, DataS3Adapter) and destination.isLeaf \
+               and destination._connectionPool.accessKey == self._connectionPool.accessKey
+    
+    def _copyOnServer(self, destination, connection):
+        """ 
+        Copies the object on the server using a single request or a multipart copy for large objects. 
+        Both buckets belong to the same account. Thus, the given connection is used for both of them.
+        """
+        
+        key = self._getBucket(connection).get_key(self._keyname)
+        if key is None:
+            raise PersistenceError("The item does not exist.")
+        destinationBucket = destination._getBucket(connection)
+        if key.size > constants.MAXIMUM_SINGLE_COPY_SIZE:
+            headers = {"Content-Type": key.content_type}
+            upload = destinationBucket.initiate_multipart_upload(destination._keyname, headers, metadata=key.metadata)
+            try:
+                partSize = max(constants.COPY_PART_SIZE, -(-key.size // constants.MAXIMUM_PART_NUMBER))
+                for partNumber, start in enumerate(xrange(0, key.size, partSize)):
+                    end = min(start + partSize, key.size) - 1
+                    upload.copy_part_from_key(self._bucketname, self._keyname, partNumber + 1, start, end)
+                upload.complete_upload()
+            except S3ResponseError:
+                upload.cancel_upload()
+                raise
+        else:
+            destinationBucket.copy_key(destination._keyname, self._bucketname, self._keyname)
 
     def exists(self):
         """ @see:L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>} """
         
-        exists = True
-        if self.isLeaf:
-            setlocale(LC_TIME, LOCALE_TIME)
-            connection = self._connectionPool.acquire()
-            try: 
-                key = self._bucket.get_key(self._keyname)
-                if key is None:
-                    exists = False
-            except S3ResponseError, error:
-                raise PersistenceError("Cannot determine item existence. " \
-                                       + "Reason: '%s'" % error.error_message)
-            finally: 
-                self._connectionPool.release(connection)
-                self._resetLocale()
-        return exists 
+        if self._isRoot(self._keyname):
+            return True
+        if not self._listingCache is None and self.identifier in self._listingCache:
+            return True
+        connection = self._connectionPool.acquire()
+        try: 
+            key = self._getBucket(connection).get_key(self._keyname)
+        except S3ResponseError, error:
+            raise PersistenceError("Cannot determine item existence. " \
+                                   + "Reason: '%s'" % error.error_message)
+        finally: 
+            self._connectionPool.release(connection)
+        if key is None:
+            return self.isCollection
+        return True
 
-    @staticmethod
-    def _resetLocale():
-        """Reseting the process time settings"""
+
+class _PooledResponse(object):
+    """ Opened key which releases its connection when the response is closed. """
+    
+    def __init__(self, key, connectionPool, connection):
+        """ 
+        @param key: Key which has been opened for reading.
+        @type key: C{boto.s3.key.Key}
+        @param connectionPool: The pool providing the connection.
+        @param connection: The connection used by the response.
+        """
         
-        try:
-            resetlocale(LC_TIME)
-        except Error:
-            setlocale(LC_TIME, "C")
+        self._key = key
+        self._connectionPool = connectionPool
+        self._connection = connection
+        
+    def read(self, size=0):
+        """ Reads a block of at most C{size} bytes. """
+        
+        return self._key.read(size)
+    
+    def close(self, fast=False):
+        """ Closes the response and releases the connection. """
+        
+        if not self._connection is None:
+            try:
+                self._key.close(fast)
+            finally:
+                self._connectionPool.release(self._connection)
+                self._connection = None
 
-     
-@register
-def _cleanupTemporaryFile(fileList=None):
-    """ Cleaning up temporary files. Problems are sent to the debug logger""" 
+
+class ListingEntry(object):
+    """ Describes an item as it has been retrieved when listing its parent collection. """
     
-    if fileList:
-        tempFiles = fileList
-    else:
-        tempFiles = _temporaryFiles     
-    for tempFile in tempFiles:
-        try:
-            tempFile.close()
-            remove(tempFile.name)
-        except (OSError, PersistenceError):
-            _log = logging.getLogger("")
-            _log.debug("Cannot clean up temporary file '%s'" % tempFile.name)
+    def __init__(self, isCollection, size=None, lastModified=None):
+        """
+        @param isCollection: Flag indicating whether the item is a key prefix.
+        @type isCollection: C{bool}
+        @param size: Size of the object in bytes.
+        @type size: C{int}
+        @param lastModified: Last modification time stamp of the object as provided by S3.
+        @type lastModified: C{unicode}
+        """
+        
+        self.isCollection = isCollection
+        self.size = size
+        self.lastModified = lastModified
+
+
+def lookupBucket(connectionPool, bucketname):
+    """ 
+    Gets the S3 bucket which is used to access and store data items on the service.
+    The bucket is created if it does not exist.
+    
+    @param connectionPool: Connection pool - connection to S3
+    @type connectionPool: L{Connection<datafinder.persistence.amazonS3.connection_pool.S3ConnectionPool>}
+    @param bucketname: Name of the bucket.
+    @type bucketname: C{unicode}
+    
+    @return: The bucket.
+    @rtype: C{boto.s3.bucket.Bucket}
+    
+    @raise PersistenceError: Indicating problems on looking up or creating the bucket.
+    """
+    
+    connection = connectionPool.acquire()
+    try:
+        bucket = connection.lookup(bucketname)
+        if bucket is None:
+            bucket = connection.create_bucket(bucketname)
+        return bucket
+    except (S3ResponseError, S3CreateError), error:
+        raise PersistenceError("Cannot access bucket '%s'. Reason: '%s'" % (bucketname, error.error_message))
+    finally:
+        connectionPool.release(connection)
         
\ No newline at end of file
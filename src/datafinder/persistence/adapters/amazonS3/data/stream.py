@@ -0,0 +1,313 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Provides read access to the content of S3 objects without storing it in local files.
+"""
+
+
+from collections import deque
+from httplib import HTTPException
+from tempfile import SpooledTemporaryFile
+import socket
+import threading
+
+from boto.exception import S3ResponseError, BotoClientError
+
+from datafinder.common.worker_pool import WorkerPool
+from datafinder.persistence.adapters.amazonS3 import constants
+
+
+__version__ = "$Revision-Id$" 
+
+
+class S3ReadStream(object):
+    """ 
+    Read-only file object over the content of an S3 object. The content is read from the 
+    HTTP response or, for objects larger than a part, from byte ranges which are prefetched concurrently.
+    
+    Seeking spills objects up to C{MAXIMUM_SPILL_SIZE} bytes into a temporary file which is
+    removed on close. Larger objects are repositioned by requesting the content starting at the new position.
+    """
+    
+    def __init__(self, name, size, openResponse, readRange, partSize, prefetchNumber):
+        """
+        @param name: Identifier of the object.
+        @type name: C{unicode}
+        @param size: Size of the object in bytes.
+        @type size: C{int}
+        @param openResponse: Function which opens the content starting at the given position 
+                             and returns the opened C{boto.s3.key.Key}.
+        @type openResponse: C{callable}
+        @param readRange: Function which returns the content between the given start and end positions.
+        @type readRange: C{callable}
+        @param partSize: Size in bytes of the prefetched byte ranges.
+        @type partSize: C{int}
+        @param prefetchNumber: Number of byte ranges which are prefetched concurrently.
+                               If it is smaller than two, the content is read from a single response.
+        @type prefetchNumber: C{int}
+        """
+        
+        self.name = name
+        self._size = size
+        self._openResponse = openResponse
+        self._readRange = readRange
+        self._partSize = partSize
+        self._prefetchNumber = prefetchNumber
+        self._position = 0
+        self._source = None
+        self._spillFile = None
+        self.closed = False
+        
+    def read(self, size=-1):
+        """ 
+        Reads at most C{size} bytes from the current position.
+        If C{size} is negative or omitted, the remaining content is returned.
+        
+        @raise IOError: Indicating problems retrieving the content.
+        """
+        
+        self._checkClosed()
+        if not self._spillFile is None:
+            return self._spillFile.read(size)
+        return self._readSource(size)
+    
+    def _readSource(self, size):
+        """ Reads from the current source and moves the current position. """
+        
+        remainingSize = self._size - self._position
+        if size < 0 or size > remainingSize:
+            size = remainingSize
+        result = list()
+        try:
+            while size > 0:
+                if self._source is None:
+                    self._source = self._createSource()
+                content = self._source.read(size)
+                if not content:
+                    raise IOError("Unexpected end of the content of '%s'." % self.name)
+                result.append(content)
+                size -= len(content)
+                self._position += len(content)
+        except (S3ResponseError, BotoClientError, HTTPException, socket.error), error:
+            self._closeSource()
+            raise IOError("Cannot read content of '%s'. Reason: '%s'" % (self.name, error))
+        return "".join(result)
+    
+    def _createSource(self):
+        """ Creates the source which provides the content starting at the current position. """
+        
+        if self._prefetchNumber > 1 and self._size - self._position > self._partSize:
+            return _PrefetchingSource(self._readRange, self._position, self._size, self._partSize, self._prefetchNumber)
+        return _ResponseSource(self._openResponse(self._position))
+    
+    def _closeSource(self):
+        """ Closes the current source. """
+        
+        if not self._source is None:
+            source = self._source
+            self._source = None
+            source.close()
+            
+    def seek(self, offset, whence=0):
+        """ Sets the current position. C{whence} is interpreted as described for C{file.seek}. """
+        
+        self._checkClosed()
+        if whence == 1:
+            offset += self.tell()
+        elif whence == 2:
+            offset += self._size
+        if offset < 0:
+            raise IOError("Invalid position '%i'." % offset)
+        
+        if self._spillFile is None and offset != self._position:
+            if self._size <= constants.MAXIMUM_SPILL_SIZE:
+                self._spill()
+            else:
+                self._closeSource()
+                self._position = min(offset, self._size)
+        if not self._spillFile is None:
+            self._spillFile.seek(offset)
+            
+    def _spill(self):
+        """ Transfers the complete content into a temporary file. """
+        
+        self._closeSource()
+        self._position = 0
+        spillFile = SpooledTemporaryFile(constants.SPILL_MEMORY_SIZE)
+        try:
+            content = self._readSource(constants.READ_BLOCK_SIZE)
+            while content:
+                spillFile.write(content)
+                content = self._readSource(constants.READ_BLOCK_SIZE)
+        except:
+            spillFile.close()
+            raise
+        self._closeSource()
+        self._spillFile = spillFile
+        
+    def tell(self):
+        """ Returns the current position. """
+        
+        self._checkClosed()
+        if not self._spillFile is None:
+            return self._spillFile.tell()
+        return self._position
+    
+    def close(self):
+        """ Closes the file object. The HTTP response and the temporary file are released. """
+        
+        if not self.closed:
+            self.closed = True
+            self._closeSource()
+            if not self._spillFile is None:
+                self._spillFile.close()
+                self._spillFile = None
+            
+    def _checkClosed(self):
+        """ Raises a C{ValueError} if the file object has been closed. """
+        
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+        
+
+class _ResponseSource(object):
+    """ Reads the content from an open HTTP response. """
+    
+    def __init__(self, key):
+        """ 
+        @param key: Key which has been opened for reading.
+        @type key: C{boto.s3.key.Key}
+        """
+        
+        self._key = key
+        
+    def read(self, size):
+        """ Reads a block of at most C{size} bytes. """
+        
+        return self._key.read(min(size, constants.READ_BLOCK_SIZE))
+        
+    def close(self):
+        """ Closes the response without reading the remaining content. """
+        
+        self._key.close(fast=True)
+        
+
+class _PrefetchingSource(object):
+    """ 
+    Reads the content from byte ranges which are retrieved ahead of the current position. 
+    The number of retrieved but not yet consumed byte ranges is limited by the number of prefetching threads.
+    """
+    
+    def __init__(self, readRange, start, size, partSize, prefetchNumber):
+        """ Constructor. """
+        
+        self._readRange = readRange
+        self._nextStart = start
+        self._size = size
+        self._partSize = partSize
+        self._prefetchNumber = prefetchNumber
+        self._workerPool = WorkerPool(prefetchNumber)
+        self._parts = deque()
+        self._content = ""
+        self._contentPosition = 0
+        
+    def read(self, size):
+        """ Reads at most C{size} bytes from the current part. """
+        
+        if self._contentPosition == len(self._content):
+            self._schedule()
+            if len(self._parts) == 0:
+                return ""
+            self._content = self._parts.popleft().wait()
+            self._contentPosition = 0
+            self._schedule()
+        content = self._content[self._contentPosition:self._contentPosition + size]
+        self._contentPosition += len(content)
+        return content
+    
+    def _schedule(self):
+        """ Schedules retrieval of the following parts. """
+        
+        while len(self._parts) < self._prefetchNumber and self._nextStart < self._size:
+            end = min(self._nextStart + self._partSize, self._size) - 1
+            part = _Part(self._readRange, self._nextStart, end)
+            self._workerPool.execute(part.fetch)
+            self._parts.append(part)
+            self._nextStart = end + 1
+            
+    def close(self):
+        """ Discards the prefetched parts and waits for running retrievals. """
+        
+        self._parts.clear()
+        self._content = ""
+        self._workerPool.shutdown()
+        
+
+class _Part(object):
+    """ Byte range which is retrieved by a worker thread. """
+    
+    def __init__(self, readRange, start, end):
+        """ Constructor. """
+        
+        self._readRange = readRange
+        self._start = start
+        self._end = end
+        self._content = None
+        self._error = None
+        self._retrieved = threading.Event()
+        
+    def fetch(self):
+        """ Retrieves the content. Errors are kept to be raised by the consuming thread. """
+        
+        try:
+            try:
+                self._content = self._readRange(self._start, self._end)
+            # The error is raised again when the content is consumed. pylint: disable=W0703
+            except Exception, error:
+                self._error = error
+        finally:
+            self._retrieved.set()
+            
+    def wait(self):
+        """ Waits until the content has been retrieved and returns it. """
+        
+        self._retrieved.wait()
+        if not self._error is None:
+            raise self._error
+        return self._content
@@ -44,11 +44,15 @@ access an Amazon s3 file system.
 __version__ = "$Revision-Id$" 
 
 
+import threading
+
 from datafinder.persistence.adapters.amazonS3.configuration import Configuration
 from datafinder.persistence.adapters.amazonS3.connection_pool import S3ConnectionPool
-from datafinder.persistence.adapters.amazonS3.data.adapter import DataS3Adapter
+from datafinder.persistence.adapters.amazonS3.data.adapter import DataS3Adapter, lookupBucket
+from datafinder.persistence.adapters.amazonS3.metadata.adapter import MetadataS3Adapter
 from datafinder.persistence.adapters.amazonS3 import constants
 from datafinder.persistence.common.base_factory import BaseFileSystem
+from datafinder.persistence.common.cache import LruCache
 from datafinder.persistence.common.connection.manager import ConnectionPoolManager
 from datafinder.persistence.error import PersistenceError
 
@@ -67,6 +71,9 @@ class FileSystem(BaseFileSystem):
         BaseFileSystem.__init__(self)
         self._configuration = Configuration(baseConfiguration)
         self._connectionPool = self._getConnectionPool()
+        self._bucketVerified = False
+        self._bucketLock = threading.Lock()
+        self._listingCache = LruCache(self._configuration.cacheMaximumSize, self._configuration.cacheTimeToLive)
 
     def _getConnectionPool(self):
         
@@ -86,11 +93,35 @@ class FileSystem(BaseFileSystem):
             raise PersistenceError("Invalid credentials provided.")
         else:
             self._connectionPool.reload()
+            self._bucketVerified = False
+    
+    def _verifyBucket(self):
+        """ 
+        Looks up the bucket once. The adapters only keep the bucket name and access 
+        the bucket using the connection they have acquired.
+        """
+        
+        self._bucketLock.acquire()
+        try:
+            if not self._bucketVerified:
+                lookupBucket(self._connectionPool, self._configuration.bucketName)
+                self._bucketVerified = True
+        finally:
+            self._bucketLock.release()
     
     def createDataStorer(self, identifier):
         """ Factory Method providing a Amazon S3-specific data storer. """
         
-        return DataS3Adapter(identifier, self._connectionPool, self._configuration.bucketName)
+        self._verifyBucket()
+        return DataS3Adapter(identifier, self._connectionPool, self._configuration.bucketName, 
+                             self._configuration.partSize, self._configuration.transferThreadNumber, 
+                             True, self._listingCache)
+    
+    def createMetadataStorer(self, identifier):
+        """ Factory Method providing a Amazon S3-specific meta data storer. """
+        
+        self._verifyBucket()
+        return MetadataS3Adapter(identifier, self._connectionPool, self._configuration.bucketName, self._listingCache)
   
     def release(self):
         """ Releases the acquired connection pool. """
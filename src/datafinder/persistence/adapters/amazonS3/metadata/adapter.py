@@ -0,0 +1,116 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Implements adapter for retrieving the meta data of S3 objects.
+"""
+
+
+import calendar
+from datetime import datetime
+
+from boto.exception import S3ResponseError
+from boto.utils import parse_ts
+
+from datafinder.persistence.adapters.amazonS3.data.adapter import ListingEntry, UTF_ENCODING
+from datafinder.persistence.error import PersistenceError
+from datafinder.persistence.metadata import constants
+from datafinder.persistence.metadata.metadatastorer import NullMetadataStorer
+from datafinder.persistence.metadata.value_mapping import MetadataValue
+
+
+__version__ = "$Revision-Id$" 
+
+
+class MetadataS3Adapter(NullMetadataStorer):
+    """ 
+    Provides the size and the modification time of S3 objects. The values are taken 
+    from the listing of the parent collection if available. Otherwise, they are requested.
+    """
+    
+    def __init__(self, identifier, connectionPool, bucketname, listingCache=None):
+        """ 
+        @param identifier: Identifier of the item.
+        @type identifier: C{unicode}
+        @param connectionPool: Connection pool - connection to S3
+        @type connectionPool: L{Connection<datafinder.persistence.amazonS3.connection_pool.S3ConnectionPool>}
+        @param bucketname: Name of the bucket containing the object.
+        @type bucketname: C{unicode}
+        @param listingCache: Cache containing the listing entries which have been retrieved when listing the parent collection.
+        @type listingCache: L{LruCache<datafinder.persistence.common.cache.LruCache>}
+        """
+        
+        NullMetadataStorer.__init__(self, identifier)
+        self._connectionPool = connectionPool
+        self._bucketname = bucketname
+        self._listingCache = listingCache
+        self._keyname = identifier.encode(UTF_ENCODING)
+        
+    def retrieve(self, propertyIds=None):
+        """ @see: L{NullMetadataStorer<datafinder.persistence.metadata.metadatastorer.NullMetadataStorer>}"""
+        
+        listingEntry = self._retrieveListingEntry()
+        result = dict()
+        if not listingEntry.size is None:
+            result[constants.SIZE] = MetadataValue(str(listingEntry.size))
+        if not listingEntry.lastModified is None:
+            timestamp = calendar.timegm(parse_ts(listingEntry.lastModified).timetuple())
+            result[constants.MODIFICATION_DATETIME] = MetadataValue(str(timestamp), datetime)
+        if not propertyIds:
+            return result
+        return dict([(propertyId, result[propertyId]) for propertyId in propertyIds if propertyId in result])
+    
+    def _retrieveListingEntry(self):
+        """ Returns the cached listing entry or requests the object information. """
+        
+        if not self._listingCache is None:
+            listingEntry = self._listingCache.get(self.identifier)
+            if not listingEntry is None:
+                return listingEntry
+        if self._keyname == "/":
+            return ListingEntry(True)
+        connection = self._connectionPool.acquire()
+        try:
+            key = connection.get_bucket(self._bucketname, validate=False).get_key(self._keyname)
+        except S3ResponseError, error:
+            raise PersistenceError("Cannot retrieve properties of item '%s'. Reason: '%s'" % (self.identifier, error))
+        finally:
+            self._connectionPool.release(connection)
+        if key is None:
+            return ListingEntry(True)
+        return ListingEntry(False, key.size, key.last_modified)
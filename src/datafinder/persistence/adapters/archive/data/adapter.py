@@ -44,21 +44,19 @@ ZIP compressed archives.
 __version__ = "$Revision-Id$" 
 
 
-import codecs
-import types
-from zipfile import ZipInfo
+import time
+from zipfile import BadZipfile, ZipInfo, LargeZipFile
 
+from datafinder.persistence.adapters.archive.index import ArchiveIndex
+from datafinder.persistence.adapters.archive.member_writer import MemberWriter
 from datafinder.persistence.data.datastorer import NullDataStorer
 from datafinder.persistence.error import PersistenceError
 
 
-_ZIP_FILENAME_CODEC = codecs.lookup("CP437")
-
-
 class DataArchiveAdapter(NullDataStorer, object):
     """ This class implements the L{NullDataStorer} scheme for ZIP archives. """
     
-    def __init__(self, identifier, archive, password=None, readonly=False):
+    def __init__(self, identifier, archive, password=None, readonly=False, index=None, writer=None):
         """ Constructor.
         
         @param identifier: The identifier of the associated item.
@@ -69,28 +67,29 @@ class DataArchiveAdapter(NullDataStorer, object):
         @type password: C{string}
         @param readonly: Flag whether the archive is opened read-only.
         @type readonly: C{bool}
+        @param index: Index of the archive members which is shared by all adapters of the archive. 
+                      If it is not provided, it is built from the archive.
+        @type index: L{ArchiveIndex<datafinder.persistence.adapters.archive.index.ArchiveIndex>}
+        @param writer: Writer of the archive members which is shared by all adapters of the archive.
+                       If it is not provided, an own writer is used.
+        @type writer: L{MemberWriter<datafinder.persistence.adapters.archive.member_writer.MemberWriter>}
         """
         
         super(DataArchiveAdapter, self).__init__(identifier)
         self._archive = archive
-        self._children = None
+        self._index = index
+        if self._index is None:
+            self._index = ArchiveIndex(archive)
+        self._writer = writer
+        if self._writer is None:
+            self._writer = MemberWriter(archive)
         self._password = password
         self._readonly = readonly
-        self._persistenceId = _ZIP_FILENAME_CODEC.encode(self.identifier, errors="ignore")[0] #identifier used to access item in zip archive
     
     def getChildren(self):
         """ @see:L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>}  """
         
-        if not self._children:
-            self._children = list()
-            files = self._archive.namelist()
-            for name in files:
-                if not isinstance(name, types.UnicodeType):
-                    name = _ZIP_FILENAME_CODEC.decode(name, errors="ignore")[0]
-                if name.startswith(self.identifier) \
-                and name.find("/", len(self.identifier) + 1) < 0:
-                    self._children.append(name)
-        return self._children
+        return self._index.getChildren(self.identifier)
     
     @property
     def canAddChildren(self):
@@ -101,32 +100,32 @@ class DataArchiveAdapter(NullDataStorer, object):
     def exists(self):
         """ @see:L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>}  """
         
-        try:
-            self._archive.getinfo(self._persistenceId)
-        except KeyError:
-            return False
-        return True
+        return not self._index.getInfo(self.identifier) is None
     
     def writeData(self, data):
         """ @see:L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>}  """
 
         if self._readonly:
             raise PersistenceError(u"Tried to write to read-only archive.")
+        info = self._index.getInfo(self.identifier)
+        if info is None:
+            info = ZipInfo(self.identifier, time.localtime(time.time())[:6]) # Non-ASCII names are stored UTF-8 encoded
+            info.compress_type = self._archive.compression
         try:
-            info = self._archive.getinfo(self._persistenceId)
-        except KeyError:
-            info = ZipInfo(self._persistenceId)
-        try:
-            self._archive.writestr(info, data.read())
-        except IOError, error:
-            errorMessage = "Cannot write data of archive member '%s'.\nReason: '%s'" % (self.identifier, error.message)
+            self._writer.write(info, data)
+            self._index.add(info)
+        except (IOError, LargeZipFile), error:
+            errorMessage = "Cannot write data of archive member '%s'.\nReason: '%s'" % (self.identifier, str(error))
             raise PersistenceError(errorMessage)
 
     def readData(self):
         """ @see:L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>}  """
 
+        info = self._index.getInfo(self.identifier)
+        if info is None:
+            raise PersistenceError("The archive member '%s' does not exist." % self.identifier)
         try:
-            return self._archive.open(self._persistenceId, "r", self._password)
-        except IOError, error:
-            errorMessage = "Cannot access archive member '%s'.\nReason: '%s'" % (self.identifier, error.message)
+            return self._archive.open(info, "r", self._password)
+        except (IOError, KeyError, BadZipfile), error:
+            errorMessage = "Cannot access archive member '%s'.\nReason: '%s'" % (self.identifier, str(error))
             raise PersistenceError(errorMessage)
@@ -42,9 +42,12 @@ access a ZIP archive as repository.
 """
 
 import os
-from zipfile import ZipFile, is_zipfile
+import threading
+from zipfile import ZipFile, BadZipfile, ZIP_DEFLATED, is_zipfile
 
 from datafinder.persistence.adapters.archive.data.adapter import DataArchiveAdapter
+from datafinder.persistence.adapters.archive.index import ArchiveIndex
+from datafinder.persistence.adapters.archive.member_writer import MemberWriter
 from datafinder.persistence.common.base_factory import BaseFileSystem
 from datafinder.persistence.error import PersistenceError
 from datafinder.persistence.metadata.metadatastorer import NullMetadataStorer
@@ -65,7 +68,9 @@ class FileSystem(BaseFileSystem):
         """ Initialize the archive file system.
         
         The file system is only instantiated here, the opening / creation of the actual
-        archive happens during the call to prepareUsage.
+        archive happens during the call to prepareUsage. If the configuration provides
+        a seekable file object as C{archiveFile}, the archive is read from it and
+        opened read-only.
         
         @param baseConfiguration: Object specifying configuration options such as the filename
                                   of the archive and the password used for encoding.
@@ -76,6 +81,8 @@ class FileSystem(BaseFileSystem):
         
         self._configuration = baseConfiguration
         self._archive = None
+        self._index = None
+        self._writer = None
         self.readonly = False
     
     def updateCredentials(self, credentials=None):
@@ -98,7 +105,8 @@ class FileSystem(BaseFileSystem):
         @type identifier: string
         """
     
-        return DataArchiveAdapter(identifier, self._archive, readonly=self.readonly)
+        return DataArchiveAdapter(identifier, self._archive, readonly=self.readonly, 
+                                  index=self._index, writer=self._writer)
     
     def createMetadataStorer(self, identifier):
         """ Create an instance of an archive specific MetadataStorer.
@@ -126,6 +134,8 @@ class FileSystem(BaseFileSystem):
         if self._archive is not None:
             self._archive.close()
             self._archive = None
+            self._index = None
+            self._writer = None
     
     def prepareUsage(self):
         """ Prepare the current archive for usage. This means that the respective archive
@@ -133,12 +143,66 @@ class FileSystem(BaseFileSystem):
         (if the file already exists) or created.
         """
         
+        if not self._archive and not self._configuration.archiveFile is None:
+            try:
+                self._archive = _RandomAccessZipFile(self._configuration.archiveFile)
+                self.readonly = True
+            except (IOError, BadZipfile), error:
+                raise PersistenceError("Unable to open archive. Reason: '%s'" % str(error))
         if not self._archive:
             filename = self._configuration.uriPath
             try:
                 if os.path.exists(filename) and is_zipfile(filename):
-                    self._archive = ZipFile(filename, "a", allowZip64=True)
+                    self._archive = ZipFile(filename, "a", ZIP_DEFLATED, allowZip64=True)
                 else:
-                    self._archive = ZipFile(filename, "w", allowZip64=True)
+                    self._archive = ZipFile(filename, "w", ZIP_DEFLATED, allowZip64=True)
             except IOError, error:
                 raise PersistenceError("Unable to create archive. Reason: '%s'" % str(error))
+        if self._index is None:
+            self._index = ArchiveIndex(self._archive)
+            self._writer = MemberWriter(self._archive, allowZip64=True)
+
+
+class _RandomAccessZipFile(ZipFile):
+    """ 
+    Read-only ZIP archive which is accessed through a L{RandomAccessFile<datafinder.persistence.
+    data.random_access.RandomAccessFile>} or a local file object. The central directory is read once 
+    when opening the archive. Every member is read using its own clone of the file object or its own 
+    local file object so members can be read concurrently.
+    """
+    
+    def __init__(self, archiveFile):
+        """ 
+        Constructor.
+        
+        @param archiveFile: File object providing the archive content.
+        @type archiveFile: L{RandomAccessFile<datafinder.persistence.data.random_access.RandomAccessFile>} or C{file}
+        """
+        
+        ZipFile.__init__(self, archiveFile, "r", allowZip64=True)
+        self._openLock = threading.Lock()
+        
+    def open(self, name, mode="r", pwd=None):
+        """ @see: C{zipfile.ZipFile.open} """
+        
+        self._openLock.acquire()
+        try:
+            archiveFile = self.fp
+            if hasattr(archiveFile, "clone"):
+                self.fp = archiveFile.clone()
+            else:
+                self.fp = open(archiveFile.name, "rb")
+            try:
+                return ZipFile.open(self, name, mode, pwd)
+            finally:
+                self.fp = archiveFile
+        finally:
+            self._openLock.release()
+            
+    def close(self):
+        """ Closes the archive and the underlying file object. """
+        
+        archiveFile = self.fp
+        ZipFile.close(self)
+        if not archiveFile is None:
+            archiveFile.close()
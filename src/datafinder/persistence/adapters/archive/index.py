@@ -0,0 +1,140 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Implements an index of the members of a ZIP archive which allows efficient listing of directories.
+"""
+
+
+import codecs
+import threading
+import types
+
+
+__version__ = "$Revision-Id:$" 
+
+
+_ZIP_FILENAME_CODEC = codecs.lookup("CP437")
+
+
+class ArchiveIndex(object):
+    """ 
+    Maps the identifiers of the archive members to their member information and 
+    the identifiers of directories to the identifiers of their direct members.
+    The index is built once from the central directory of the archive and 
+    has to be updated when members are added.
+    """
+    
+    def __init__(self, archive):
+        """ 
+        Constructor.
+        
+        @param archive: The indexed archive.
+        @type archive: C{zipfile.ZipFile}
+        """
+        
+        self._lock = threading.RLock()
+        self._members = dict()
+        self._children = dict()
+        for info in archive.infolist():
+            self.add(info)
+            
+    @staticmethod
+    def _decodeName(name):
+        """ Returns the identifier of the given member name. """
+        
+        if not isinstance(name, types.UnicodeType):
+            name = _ZIP_FILENAME_CODEC.decode(name, errors="ignore")[0]
+        return name
+    
+    @staticmethod
+    def _determineParentIdentifier(identifier):
+        """ Returns the identifier of the directory containing the given identifier. """
+        
+        parentIdentifier = identifier.rstrip("/").rsplit("/", 1)[0]
+        if identifier.startswith("/") and not parentIdentifier:
+            parentIdentifier = "/"
+        return parentIdentifier
+        
+    def add(self, info):
+        """ 
+        Adds or replaces the information of an archive member.
+        
+        @param info: Information of the archive member.
+        @type info: C{zipfile.ZipInfo}
+        """
+        
+        identifier = self._decodeName(info.filename)
+        self._lock.acquire()
+        try:
+            if not identifier in self._members and not identifier.endswith("/"): # Directory entries are not listed
+                parentIdentifier = self._determineParentIdentifier(identifier)
+                self._children.setdefault(parentIdentifier, list()).append(identifier)
+            self._members[identifier] = info
+        finally:
+            self._lock.release()
+            
+    def getInfo(self, identifier):
+        """ 
+        Returns the information of the given archive member.
+        
+        @param identifier: Identifier of the archive member.
+        @type identifier: C{unicode}
+        
+        @return: The member information or C{None} if the member does not exist.
+        @rtype: C{zipfile.ZipInfo}
+        """
+        
+        return self._members.get(identifier)
+    
+    def getChildren(self, identifier):
+        """ 
+        Returns the identifiers of the direct members of the given directory.
+        
+        @param identifier: Identifier of the directory.
+        @type identifier: C{unicode}
+        
+        @return: Identifiers of the direct members.
+        @rtype: C{list} of C{unicode}
+        """
+        
+        self._lock.acquire()
+        try:
+            return self._children.get(identifier, list())[:]
+        finally:
+            self._lock.release()
@@ -0,0 +1,208 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Implements the streamed writing of ZIP archive members.
+"""
+
+
+import os
+import shutil
+import stat
+import threading
+import zlib
+from tempfile import SpooledTemporaryFile
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZIP64_LIMIT, ZIP_FILECOUNT_LIMIT, LargeZipFile
+
+
+__version__ = "$Revision-Id:$" 
+
+
+_BLOCK_SIZE = 65536
+_MAXIMUM_SPOOL_MEMORY_SIZE = 8 * 1024 * 1024
+
+
+class MemberWriter(object):
+    """ 
+    Writes archive members by compressing the content block-wise from the source stream.
+    Members are appended to the archive one after another. If the archive is in use by 
+    another writer, the member is compressed into a spool file first and appended afterwards.
+    This way several members can be compressed concurrently.
+    """
+    
+    def __init__(self, archive, allowZip64=False):
+        """ 
+        Constructor.
+        
+        @param archive: The archive the members are written to.
+        @type archive: C{zipfile.ZipFile}
+        @param allowZip64: Flag indicating whether ZIP64 extensions are used for large members and archives.
+                           It should correspond to the setting of the archive. Default: C{False}
+        @type allowZip64: C{bool}
+        """
+        
+        self._archive = archive
+        self._allowZip64 = allowZip64
+        self._lock = threading.Lock()
+        
+    def write(self, info, data):
+        """ 
+        Writes the given member. The CRC, the sizes and the offset of the 
+        member information are set accordingly.
+        
+        @param info: Information of the archive member.
+        @type info: C{zipfile.ZipInfo}
+        @param data: Stream providing the member content.
+        @type data: file-like object
+        
+        @raise IOError: Indicating problems on reading or writing the content or an archive 
+                        which has not been opened for writing.
+        @raise LargeZipFile: The member requires ZIP64 extensions which are not enabled.
+        """
+        
+        if self._lock.acquire(False):
+            try:
+                self._writeDirectly(info, data)
+            finally:
+                self._lock.release()
+        else:
+            spoolFile = SpooledTemporaryFile(_MAXIMUM_SPOOL_MEMORY_SIZE)
+            try:
+                self._compress(info, data, spoolFile)
+                spoolFile.seek(0)
+                self._lock.acquire()
+                try:
+                    self._append(info, spoolFile)
+                finally:
+                    self._lock.release()
+            finally:
+                spoolFile.close()
+    
+    def _writeDirectly(self, info, data):
+        """ Compresses the content directly into the archive and corrects the member header afterwards. """
+        
+        archive = self._archive
+        size = _determineSize(data)
+        zip64 = self._allowZip64 and (size is None or size * 1.05 > ZIP64_LIMIT)
+        info.file_size = size or 0
+        info.compress_size = 0
+        info.CRC = 0 # Sizes and CRC are corrected after compression
+        self._prepareHeader(info)
+        archive.fp.write(info.FileHeader(zip64))
+        try:
+            self._compress(info, data, archive.fp)
+            if not zip64 and (info.file_size > ZIP64_LIMIT or info.compress_size > ZIP64_LIMIT):
+                raise LargeZipFile("Size of member '%s' has increased during compression." % info.filename)
+        except:
+            archive.fp.seek(info.header_offset) # Removes the incomplete member
+            archive.fp.truncate()
+            raise
+        position = archive.fp.tell()
+        archive.fp.seek(info.header_offset)
+        archive.fp.write(info.FileHeader(zip64))
+        archive.fp.seek(position)
+        self._register(info)
+        
+    def _append(self, info, compressedData):
+        """ Appends the already compressed content to the archive. """
+        
+        archive = self._archive
+        zip64 = info.file_size > ZIP64_LIMIT or info.compress_size > ZIP64_LIMIT
+        self._prepareHeader(info)
+        archive.fp.write(info.FileHeader(zip64))
+        shutil.copyfileobj(compressedData, archive.fp, _BLOCK_SIZE)
+        self._register(info)
+    
+    def _prepareHeader(self, info):
+        """ Checks whether the member can be written and determines its offset. """
+        
+        archive = self._archive
+        if not archive.mode in ("w", "a") or archive.fp is None:
+            raise IOError("The archive has not been opened for writing.")
+        if not info.compress_type in (ZIP_STORED, ZIP_DEFLATED):
+            raise IOError("The compression method of member '%s' is not supported." % info.filename)
+        info.flag_bits = 0x00
+        info.header_offset = archive.fp.tell()
+        if not self._allowZip64 and (info.header_offset > ZIP64_LIMIT or len(archive.infolist()) >= ZIP_FILECOUNT_LIMIT):
+            raise LargeZipFile("The archive would require ZIP64 extensions.")
+        archive.comment = archive.comment # Marks the archive as modified so the central directory is written on close
+    
+    def _register(self, info):
+        """ Adds the written member to the central directory of the archive. """
+        
+        self._archive.filelist.append(info)
+        self._archive.NameToInfo[info.filename] = info
+        
+    @staticmethod
+    def _compress(info, data, target):
+        """ Compresses the content block-wise into the target and determines CRC and sizes. """
+        
+        compressor = None
+        if info.compress_type == ZIP_DEFLATED:
+            compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        crc = 0
+        fileSize = 0
+        compressSize = 0
+        block = data.read(_BLOCK_SIZE)
+        while block:
+            fileSize += len(block)
+            crc = zlib.crc32(block, crc) & 0xffffffff
+            if not compressor is None:
+                block = compressor.compress(block)
+            compressSize += len(block)
+            target.write(block)
+            block = data.read(_BLOCK_SIZE)
+        if not compressor is None:
+            block = compressor.flush()
+            compressSize += len(block)
+            target.write(block)
+        info.CRC = crc
+        info.file_size = fileSize
+        info.compress_size = compressSize
+
+
+def _determineSize(data):
+    """ Determines the size of the given stream or returns C{None} if it is unknown. """
+    
+    try:
+        fileStatus = os.fstat(data.fileno())
+    except (AttributeError, IOError, OSError, ValueError):
+        return None
+    if stat.S_ISREG(fileStatus.st_mode):
+        return fileStatus.st_size
+    return None
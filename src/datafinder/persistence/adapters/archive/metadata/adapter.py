@@ -77,7 +77,18 @@ class MetadataArchiveAdapter(NullMetadataStorer, object):
         super(MetadataArchiveAdapter, self).__init__(identifier)
         self._archive = archive
         self._password = password
-        self._persistenceId = _ZIP_FILENAME_CODEC.encode(self.identifier, errors="ignore")[0] + ".xml"
+        self._persistenceId = self.identifier + ".xml" # Non-ASCII names are stored UTF-8 encoded
+        self._legacyPersistenceId = _ZIP_FILENAME_CODEC.encode(self._persistenceId, errors="ignore")[0]
+        
+    def _getInfo(self):
+        """ Returns the information of the meta data member or C{None}. Members with CP437-encoded names are found as well. """
+        
+        for name in (self._persistenceId, self._legacyPersistenceId):
+            try:
+                return self._archive.getinfo(name)
+            except KeyError:
+                continue
+        return None
         
     @staticmethod
     def _decodeMetadata(text):
@@ -120,10 +131,10 @@ class MetadataArchiveAdapter(NullMetadataStorer, object):
         """ @see: L{NullMetadataStorer<datafinder.persistence.metadata.metadatastorer.NullMetadataStorer>} """
         # fixme meinel: add propertyIds to filter retrieved properties
         
-        try:
-            return self._decodeMetadata(self._archive.open(self._persistenceId, "r", self._password).read())
-        except KeyError:
+        info = self._getInfo()
+        if info is None:
             return dict()
+        return self._decodeMetadata(self._archive.open(info, "r", self._password).read())
 
     def _storeMetadata(self, encodedMetadata):
         """ This method stores back the given meta data.
@@ -133,9 +144,8 @@ class MetadataArchiveAdapter(NullMetadataStorer, object):
                         L{MetadataValue<datafinder.persistence.metadata.value_mapping.MetadataValue>}
         """
         
-        try:
-            info = self._archive.getinfo(self._persistenceId)
-        except KeyError:
+        info = self._getInfo()
+        if info is None:
             info = ZipInfo(self._persistenceId)
 
         self._archive.writestr(info, encodedMetadata)
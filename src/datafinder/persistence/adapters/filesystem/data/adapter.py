@@ -108,6 +108,12 @@ class DataFileSystemAdapter(NullDataStorer):
         if self.isCollection and not util.isWindowsRootPath(self._persistenceId):
             canAddChildren = True
         return canAddChildren 
+    
+    @property
+    def canReadDataRange(self):
+        """ @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>}  """
+        
+        return True
 
     def createCollection(self, recursively=False):
         """ @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>}  """
@@ -209,6 +215,31 @@ class DataFileSystemAdapter(NullDataStorer):
             reason = os.strerror(error.errno)
             errorMessage = "Cannot read item data '%s'. Reason: '%s'." % (self.identifier, reason)
             raise PersistenceError(errorMessage)
+        
+    def readDataRange(self, offset, length):
+        """ @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>}  """
+        
+        try:
+            fd = open(self._persistenceId, "rb")
+            try:
+                fd.seek(offset)
+                return fd.read(length)
+            finally:
+                fd.close()
+        except IOError, error:
+            reason = os.strerror(error.errno)
+            errorMessage = "Cannot read item data '%s'. Reason: '%s'." % (self.identifier, reason)
+            raise PersistenceError(errorMessage)
+        
+    def determineSize(self):
+        """ @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>}  """
+        
+        try:
+            return os.path.getsize(self._persistenceId)
+        except OSError, error:
+            reason = os.strerror(error.errno)
+            errorMessage = "Cannot determine size of item '%s'. Reason: '%s'." % (self.identifier, reason)
+            raise PersistenceError(errorMessage)
 
     def writeData(self, dataStream):
         """ @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>}  """
@@ -40,6 +40,9 @@ SFTP configuration parameters.
 """
 
 
+from datafinder.persistence.adapters.sftp import constants
+
+
 __version__ = "$Revision-Id:$" 
 
 
@@ -54,6 +57,27 @@ class Configuration(object):
         
         self.baseUri = baseConfiguration.baseUri or ""
         self.hostname = baseConfiguration.uriHostname or ""
+        self.port = baseConfiguration.uriPort or constants.DEFAULT_SSH_PORT
         self.basePath = baseConfiguration.uriPath or "/"
         self.username = baseConfiguration.username
         self.password = baseConfiguration.password
+
+        self.connectionIdleTimeout = baseConfiguration.connectionIdleTimeout or constants.CONNECTION_IDLE_TIMEOUT
+        self.connectionMaximumLifetime = baseConfiguration.connectionMaximumLifetime or constants.CONNECTION_MAXIMUM_LIFETIME
+        
+        self.windowSize = baseConfiguration.windowSize or constants.WINDOW_SIZE
+        self.maximumPacketSize = baseConfiguration.maximumPacketSize or constants.MAXIMUM_PACKET_SIZE
+        self.readPrefetchEnabled = baseConfiguration.readPrefetchEnabled
+        if self.readPrefetchEnabled is None:
+            self.readPrefetchEnabled = constants.READ_PREFETCH_ENABLED
+        self.writePipeliningEnabled = baseConfiguration.writePipeliningEnabled
+        if self.writePipeliningEnabled is None:
+            self.writePipeliningEnabled = constants.WRITE_PIPELINING_ENABLED
+        
+        self.treeOperationThreadNumber = baseConfiguration.treeOperationThreadNumber or constants.TREE_OPERATION_THREAD_NUMBER
+        self.progressCallback = baseConfiguration.progressCallback
+        
+        self.cacheMaximumSize = baseConfiguration.cacheMaximumSize or constants.CACHE_MAXIMUM_SIZE
+        self.cacheTimeToLive = baseConfiguration.cacheTimeToLive
+        if self.cacheTimeToLive is None:
+            self.cacheTimeToLive = constants.CACHE_TIME_TO_LIVE
@@ -43,7 +43,7 @@ Implements a connection pool for the SFTP adapter.
 
 import socket
 
-from paramiko import Transport, SSHException
+from paramiko import SFTPClient, Transport, SSHException
 
 from datafinder.persistence.adapters.sftp import constants
 from datafinder.persistence.common.connection.pool import ConnectionPool
@@ -63,7 +63,8 @@ class SftpConnectionPool(ConnectionPool):
         """
         
         self._configuration = configuration
-        ConnectionPool.__init__(self, constants.MAX_CONNECTION_NUMBER)
+        ConnectionPool.__init__(self, constants.MAX_CONNECTION_NUMBER, idleTimeout=configuration.connectionIdleTimeout, 
+                                maxLifetime=configuration.connectionMaximumLifetime)
 
     def _createConnection(self):
         """
@@ -71,14 +72,25 @@ class SftpConnectionPool(ConnectionPool):
         """
 
         try:
-            connection = Transport((self._configuration.hostname, constants.DEFAULT_SSH_PORT))
+            connection = Transport((self._configuration.hostname, self._configuration.port), 
+                                   default_window_size=self._configuration.windowSize,
+                                   default_max_packet_size=self._configuration.maximumPacketSize)
             connection.connect(username=self._configuration.username, password=self._configuration.password)
-            return connection.open_sftp_client()
+            return SFTPClient.from_transport(connection, self._configuration.windowSize, 
+                                             self._configuration.maximumPacketSize)
         except (SSHException, socket.error, socket.gaierror), error:
             errorMessage = u"Unable to establish SFTP connection to host '%s'! " \
                            % (self._configuration.hostname) + "\nReason: '%s'" % str(error)
             raise PersistenceError(errorMessage)
 
+    def _validateConnection(self, connection):
+        """
+        @see: L{_validateConnection<datafinder.persistence.common.connection.pool.ConnectionPool._validateConnection>}
+        """
+        
+        channel = connection.get_channel()
+        return not channel.closed and channel.get_transport().is_active()
+
     def _releaseConnection(self, connection):
         """
         @see: L{_releaseConnection<datafinder.persistence.common.connection.pool.ConnectionPool._releaseConnection>}
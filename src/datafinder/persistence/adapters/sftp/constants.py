@@ -46,7 +46,25 @@ __version__ = "$Revision-Id:$"
 DEFAULT_SSH_PORT = 22
 MAX_POOL_NUMBER = 10
 MAX_CONNECTION_NUMBER = 5
-BLOCK_SIZE = 30000
+CONNECTION_IDLE_TIMEOUT = 300 # in seconds
+CONNECTION_MAXIMUM_LIFETIME = 3600 # in seconds
+BLOCK_SIZE = 8 * 32768 # Multiple of the maximum size of a single SFTP read/write request
 FILE_NAME_ENCODING = "UTF-8"
 DEFAULT_DIRECTORY_PERMISSIONS = 0o3770 # rwxrws--T
 DEFAULT_FILE_PERMISSIONS = 0o660 # rw-rw----
+
+# Flow control of the SSH channel
+WINDOW_SIZE = 64 * 1024 ** 2 # in bytes
+MAXIMUM_PACKET_SIZE = 64 * 1024 # in bytes
+
+# Read requests are sent ahead of the consumed data
+READ_PREFETCH_ENABLED = True
+# Write requests are sent without waiting for the previous ones to be acknowledged
+WRITE_PIPELINING_ENABLED = True
+
+# Number of threads which delete or copy the content of directories
+TREE_OPERATION_THREAD_NUMBER = 4
+
+# Constants for caching of the item attributes
+CACHE_MAXIMUM_SIZE = 10000
+CACHE_TIME_TO_LIVE = 60 # in seconds
@@ -50,9 +50,11 @@ import sys
 import tempfile
 
 from paramiko.ssh_exception import SSHException
+from datafinder.persistence.common.cache import LruCache
 from datafinder.persistence.error import PersistenceError
 from datafinder.persistence.data import datastorer
 from datafinder.persistence.adapters.sftp import constants
+from datafinder.persistence.adapters.sftp.data import tree
 
 
 class SftpDataAdapter(datastorer.NullDataStorer):
@@ -65,26 +67,59 @@ class SftpDataAdapter(datastorer.NullDataStorer):
     """
     
     def __init__(self, identifier, persistenceIdentifier, 
-                 connectionPool, factory, idMapper):
+                 connectionPool, factory, idMapper, 
+                 readPrefetchEnabled=constants.READ_PREFETCH_ENABLED, 
+                 writePipeliningEnabled=constants.WRITE_PIPELINING_ENABLED,
+                 attributeCache=None, treeOperationThreadNumber=constants.TREE_OPERATION_THREAD_NUMBER,
+                 progressCallback=None):
+        """
+        @param attributeCache: Cache of the SFTP attributes (mode, size, modification time, owner) 
+                               which is filled when listing collections. Identifier => C{paramiko.SFTPAttributes}
+                               C{None} indicates that a private cache is used.
+        @type attributeCache: L{LruCache<datafinder.persistence.common.cache.LruCache>}
+        @param treeOperationThreadNumber: Number of threads which delete or copy the content of directories.
+        @type treeOperationThreadNumber: C{int}
+        @param progressCallback: Function which is called with the identifier, the number of processed items
+                                 and the number of items discovered so far when deleting or copying directories.
+        @type progressCallback: C{callable}
+        """
+        
         datastorer.NullDataStorer.__init__(self, identifier)
         
         self._connectionPool = connectionPool
         self._persistenceIdentifier = persistenceIdentifier
         self._factory = factory
         self._idMapper = idMapper
+        self._readPrefetchEnabled = readPrefetchEnabled
+        self._writePipeliningEnabled = writePipeliningEnabled
+        self._attributeCache = attributeCache
+        if self._attributeCache is None:
+            self._attributeCache = LruCache()
+        self._treeOperationThreadNumber = treeOperationThreadNumber
+        self._progressCallback = progressCallback
         
     @property
     def isCollection(self):
         """ @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>} """
         
-        connection = self._connectionPool.acquire()
         try:
-            return stat.S_ISDIR(connection.stat(self._persistenceIdentifier).st_mode)
+            return stat.S_ISDIR(self._determineAttributes().st_mode)
         except (IOError, EOFError, SSHException):
             message = "Cannot determine item type (file or collection) of '%s'!" % self.identifier
             self._reRaiseError(message)
-        finally:
-            self._connectionPool.release(connection)
+            
+    def _determineAttributes(self):
+        """ Returns the cached attributes or retrieves them. """
+        
+        attributes = self._attributeCache.get(self.identifier)
+        if attributes is None:
+            connection = self._connectionPool.acquire()
+            try:
+                attributes = connection.stat(self._persistenceIdentifier)
+            finally:
+                self._connectionPool.release(connection)
+            self._attributeCache[self.identifier] = attributes
+        return attributes
             
     @staticmethod
     def _reRaiseError(message):
@@ -102,6 +137,12 @@ class SftpDataAdapter(datastorer.NullDataStorer):
         """ @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>} """
         
         return self.isCollection
+    
+    @property
+    def canReadDataRange(self):
+        """ @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>} """
+        
+        return True
 
     def createCollection(self, recursively=False):
         """
@@ -126,6 +167,7 @@ class SftpDataAdapter(datastorer.NullDataStorer):
                     "The collection path is too deeply nested.")
     
     def _createSingleCollection(self):
+        self._attributeCache.invalidate(self.identifier)
         connection = self._connectionPool.acquire()
         try:
             connection.mkdir(self._persistenceIdentifier)
@@ -164,14 +206,21 @@ class SftpDataAdapter(datastorer.NullDataStorer):
         raise PersistenceError("Not implemented.")
 
     def getChildren(self):
-        """ @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>} """
+        """ 
+        @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>}
+        @note: The attributes of the children are retrieved with the listing and added to the attribute cache.
+               The listing provides the attributes of symbolic links instead of their targets. Thus, 
+               symbolic links are not cached and their targets are retrieved on lookup.
+        """
         
         connection = self._connectionPool.acquire()
         try:
             children = list()
-            for name in connection.listdir(self._persistenceIdentifier):
-                name = name.decode(constants.FILE_NAME_ENCODING, "replace")
+            for attributes in connection.listdir_attr(self._persistenceIdentifier):
+                name = attributes.filename.decode(constants.FILE_NAME_ENCODING, "replace")
                 child_id = self._idMapper.determineChildId(self.identifier, name)
+                if not attributes.st_mode is None and not stat.S_ISLNK(attributes.st_mode):
+                    self._attributeCache[child_id] = attributes
                 children.append(child_id)
             return children
         except (IOError, EOFError, SSHException):
@@ -183,9 +232,8 @@ class SftpDataAdapter(datastorer.NullDataStorer):
     def exists(self):
         """ @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>} """
         
-        connection = self._connectionPool.acquire()
         try:
-            connection.stat(self._persistenceIdentifier)
+            self._determineAttributes()
             return True
         except IOError, error:
             if error.errno == errno.ENOENT:
@@ -195,57 +243,36 @@ class SftpDataAdapter(datastorer.NullDataStorer):
         except (EOFError, SSHException):
             message = "Cannot determine existence of '%s'!" % self.identifier
             self._reRaiseError(message)
-        finally:
-            self._connectionPool.release(connection)
 
     def delete(self):
         """
         @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>}
         @note: As there is no library function to delete complete directories,
-               we implemented it on our own.
+               we implemented it on our own. The content of directories is removed
+               using several connections concurrently.
         """
         
         isCollection = self.isCollection
-        connection = self._connectionPool.acquire()
+        self._attributeCache.invalidate(self.identifier)
         try:
             if isCollection:
-                self._deleteCollection(connection)
+                self._deleteCollection()
             else:
-                self._deleteLeaf(connection)
+                self._deleteLeaf()
         except (IOError, EOFError, SSHException):
             message = "Cannot delete item '%s'!" % self.identifier
             self._reRaiseError(message)
-        finally:
-            self._connectionPool.release(connection)
             
-    def _deleteCollection(self, connection):
-        emptiedCollections = self._emptyAllCollections(connection)
-        self._deleteEmptiedCollections(connection, emptiedCollections)
+    def _deleteCollection(self):
+        workQueue = tree.WorkQueue(self._connectionPool, self._treeOperationThreadNumber)
+        tree.deleteTree(workQueue, self._persistenceIdentifier, tree.Progress(self.identifier, self._progressCallback))
         
-    def _emptyAllCollections(self, connection):
-        collections = [self._persistenceIdentifier]
-        emptiedCollections = list()
-        while collections:
-            currentCollection = collections[0]
-            for attrs in connection.listdir_attr(currentCollection):
-                persistenceId = self._idMapper.determinePersistenceChildId(
-                    currentCollection, attrs.filename)
-                if not stat.S_ISDIR(attrs.st_mode):
-                    connection.remove(persistenceId)
-                else:
-                    collections.append(persistenceId)
-            collections.remove(currentCollection)
-            emptiedCollections.append(currentCollection)
-        return emptiedCollections
-        
-    @staticmethod
-    def _deleteEmptiedCollections(connection, emptiedCollections):
-        emptiedCollections.reverse()
-        for collection in emptiedCollections:
-            connection.rmdir(collection)
-        
-    def _deleteLeaf(self, connection):
-        connection.remove(self._persistenceIdentifier)
+    def _deleteLeaf(self):
+        connection = self._connectionPool.acquire()
+        try:
+            connection.remove(self._persistenceIdentifier)
+        finally:
+            self._connectionPool.release(connection)
 
     def copy(self, destination):
         """
@@ -253,50 +280,45 @@ class SftpDataAdapter(datastorer.NullDataStorer):
         @note: There is no library function to copy complete directories.
                Additionally, every file needs to be transferred to the client
                and back to the server. Thus, it takes some time to copy large data sets.
-               Unfortunately, this is a limitation of SFTP.
+               Unfortunately, this is a limitation of SFTP. To reduce the impact, 
+               the content of directories is copied using several connections concurrently.
         """
         
         isCollection = self.isCollection
-        connection = self._connectionPool.acquire()
+        self._attributeCache.invalidate(destination.identifier)
         try:
             if isCollection:
-                self._copyCollection(connection, destination)
+                self._copyCollection(destination)
             else:
                 self._copyLeaf(destination)
         except (IOError, EOFError, SSHException):
             message = "Cannot copy item '%s'!" % self.identifier
             self._reRaiseError(message)
-        finally:
-            self._connectionPool.release(connection)
             
-    def _copyCollection(self, connection, destination):
-        collections = [self]
-        baseOrginalId = self.identifier
-        baseDestinationId = destination.identifier
-        while collections:
-            currentCollection = collections[0]
-            self._createDestinationCollection(currentCollection, baseOrginalId, baseDestinationId)
-            self._copyCollectionContent(currentCollection, connection, collections, baseOrginalId, baseDestinationId)
-            
-    def _createDestinationCollection(self, orgCollection, baseOrginalId, baseDestinationId):
-        destCollectionId = orgCollection.identifier.replace(baseOrginalId, baseDestinationId)
-        destCollection = self._factory.createDataStorer(destCollectionId)
-        destCollection.createCollection()
-    
-    def _copyCollectionContent(self, orgCollection, connection, collections, baseOrginalId, baseDestinationId):
-        orgPersistenceId = self._idMapper.determinePeristenceId(orgCollection.identifier)
-        for attrs in connection.listdir_attr(orgPersistenceId):
-            name = attrs.filename.decode(constants.FILE_NAME_ENCODING, "replace")
-            itemId = self._idMapper.determineChildId(orgCollection.identifier, name)
-            itemStorer = self._factory.createDataStorer(itemId)
-            if stat.S_ISDIR(attrs.st_mode):
-                collections.append(itemStorer)
-            else:
-                destItemId = itemId.replace(baseOrginalId, baseDestinationId)
-                destItemStorer = self._factory.createDataStorer(destItemId)
-                data = itemStorer.readData()
-                destItemStorer.writeData(data)
-        collections.remove(orgCollection)
+    def _copyCollection(self, destination):
+        workQueue = tree.WorkQueue(self._connectionPool, self._treeOperationThreadNumber)
+        destinationPersistenceId = self._idMapper.determinePeristenceId(destination.identifier)
+        tree.copyTree(workQueue, self._persistenceIdentifier, destinationPersistenceId, self._copyFile, 
+                      tree.Progress(self.identifier, self._progressCallback))
+        
+    def _copyFile(self, connection, sourcePersistenceId, destinationPersistenceId):
+        """ Streams the content of the source file into the destination file using the given connection. """
+        
+        sourceFileObject = connection.open(sourcePersistenceId, "rb")
+        try:
+            if self._readPrefetchEnabled:
+                sourceFileObject.prefetch()
+            destinationFileObject = connection.open(destinationPersistenceId, "wb")
+            try:
+                destinationFileObject.set_pipelined(self._writePipeliningEnabled)
+                block = sourceFileObject.read(constants.BLOCK_SIZE)
+                while block:
+                    destinationFileObject.write(block)
+                    block = sourceFileObject.read(constants.BLOCK_SIZE)
+            finally:
+                destinationFileObject.close()
+        finally:
+            sourceFileObject.close()
     
     def _copyLeaf(self, destination):
         data = self.readData()
@@ -305,6 +327,8 @@ class SftpDataAdapter(datastorer.NullDataStorer):
     def move(self, destination):
         """ @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>} """
         
+        self._attributeCache.invalidate(self.identifier)
+        self._attributeCache.invalidate(destination.identifier)
         connection = self._connectionPool.acquire()
         destPersistenceId = self._idMapper.determinePeristenceId(destination.identifier)
         try:
@@ -316,17 +340,26 @@ class SftpDataAdapter(datastorer.NullDataStorer):
             self._connectionPool.release(connection)
 
     def readData(self):
-        """ @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>} """
+        """ 
+        @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>}
+        @note: If prefetching is enabled, the read requests are sent without waiting for
+               the previous responses. Thus, the transfer is not bound by the latency.
+        """
         
         connection = self._connectionPool.acquire()
         temporaryFileObject = tempfile.TemporaryFile()
         try:
             temporaryFileObject.seek(0)
-            remoteFileObject = connection.open(self._persistenceIdentifier)
-            block = remoteFileObject.read(constants.BLOCK_SIZE)
-            while block:
-                temporaryFileObject.write(block)
+            remoteFileObject = connection.open(self._persistenceIdentifier, "rb")
+            try:
+                if self._readPrefetchEnabled:
+                    remoteFileObject.prefetch()
                 block = remoteFileObject.read(constants.BLOCK_SIZE)
+                while block:
+                    temporaryFileObject.write(block)
+                    block = remoteFileObject.read(constants.BLOCK_SIZE)
+            finally:
+                remoteFileObject.close()
             temporaryFileObject.seek(0)
             return temporaryFileObject
         except (IOError, EOFError, SSHException):
@@ -334,17 +367,51 @@ class SftpDataAdapter(datastorer.NullDataStorer):
             self._reRaiseError(message)
         finally:
             self._connectionPool.release(connection)
+            
+    def readDataRange(self, offset, length):
+        """ @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>} """
+        
+        connection = self._connectionPool.acquire()
+        try:
+            remoteFileObject = connection.open(self._persistenceIdentifier)
+            try:
+                remoteFileObject.seek(offset)
+                return remoteFileObject.read(length)
+            finally:
+                remoteFileObject.close()
+        except (IOError, EOFError, SSHException):
+            message = "Cannot read data of item '%s'!" % self.identifier
+            self._reRaiseError(message)
+        finally:
+            self._connectionPool.release(connection)
+            
+    def determineSize(self):
+        """ @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>} """
+        
+        try:
+            return self._determineAttributes().st_size
+        except (IOError, EOFError, SSHException):
+            message = "Cannot determine size of item '%s'!" % self.identifier
+            self._reRaiseError(message)
 
     def writeData(self, data):
-        """ @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>} """
+        """ 
+        @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>}
+        @note: If pipelining is enabled, the write requests are acknowledged when closing the remote file. 
+        """
         
+        self._attributeCache.invalidate(self.identifier)
         connection = self._connectionPool.acquire()
         try:
-            remoteFileObject = connection.open(self._persistenceIdentifier, "w")
-            block = data.read(constants.BLOCK_SIZE)
-            while block:
-                remoteFileObject.write(block)
+            remoteFileObject = connection.open(self._persistenceIdentifier, "wb")
+            try:
+                remoteFileObject.set_pipelined(self._writePipeliningEnabled)
                 block = data.read(constants.BLOCK_SIZE)
+                while block:
+                    remoteFileObject.write(block)
+                    block = data.read(constants.BLOCK_SIZE)
+            finally:
+                remoteFileObject.close()
         except (IOError, EOFError, SSHException):
             message = "Cannot write data to item '%s'!" % self.identifier
             self._reRaiseError(message)
@@ -0,0 +1,307 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Implements recursive deletion and copying of directories using several SFTP connections concurrently.
+"""
+
+
+__version__ = "$Revision-Id:$" 
+
+
+import Queue
+import stat
+import sys
+import threading
+
+from datafinder.persistence.adapters.sftp import constants
+from datafinder.persistence.adapters.sftp.utils import ItemIdentifierMapper
+
+
+class WorkQueue(object):
+    """ 
+    Executes tasks with a fixed number of threads. Every task is called with a connection 
+    of the pool and may schedule further tasks. After the first error, the remaining tasks are skipped.
+    """
+    
+    def __init__(self, connectionPool, workerNumber):
+        """
+        @param connectionPool: Pool providing the SFTP connections.
+        @type connectionPool: L{SftpConnectionPool<datafinder.persistence.adapters.sftp.connection_pool.SftpConnectionPool>}
+        @param workerNumber: Number of worker threads.
+        @type workerNumber: C{int}
+        """
+        
+        self._connectionPool = connectionPool
+        self._workerNumber = max(workerNumber, 1)
+        self._tasks = Queue.Queue()
+        self._condition = threading.Condition()
+        self._pendingTaskNumber = 0
+        self._errorInfo = None
+        
+    def put(self, task):
+        """ 
+        Schedules a task.
+        
+        @param task: Function which is called with a connection.
+        @type task: C{callable}
+        """
+        
+        self._condition.acquire()
+        try:
+            self._pendingTaskNumber += 1
+        finally:
+            self._condition.release()
+        self._tasks.put(task)
+        
+    def join(self):
+        """ 
+        Executes the scheduled tasks and the tasks scheduled by them. 
+        Returns when all tasks are processed and raises the first error of a task.
+        """
+        
+        workers = list()
+        for _ in range(self._workerNumber):
+            worker = threading.Thread(target=self._work)
+            worker.setDaemon(True)
+            worker.start()
+            workers.append(worker)
+        self._condition.acquire()
+        try:
+            while self._pendingTaskNumber > 0:
+                self._condition.wait()
+        finally:
+            self._condition.release()
+        for worker in workers:
+            self._tasks.put(None)
+        for worker in workers:
+            worker.join()
+        if not self._errorInfo is None:
+            errorType, error, traceback = self._errorInfo
+            self._errorInfo = None
+            raise errorType, error, traceback
+        
+    def _work(self):
+        """ Processes tasks until C{None} is received. """
+        
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                break
+            try:
+                if self._errorInfo is None:
+                    connection = self._connectionPool.acquire()
+                    try:
+                        task(connection)
+                    finally:
+                        self._connectionPool.release(connection)
+            # The error is raised again by the joining thread. pylint: disable=W0703
+            except Exception:
+                self._condition.acquire()
+                try:
+                    if self._errorInfo is None:
+                        self._errorInfo = sys.exc_info()
+                finally:
+                    self._condition.release()
+            self._condition.acquire()
+            try:
+                self._pendingTaskNumber -= 1
+                if self._pendingTaskNumber == 0:
+                    self._condition.notifyAll()
+            finally:
+                self._condition.release()
+                
+
+class Progress(object):
+    """ Counts the discovered and processed items and reports them to the progress callback. """
+    
+    def __init__(self, identifier, progressCallback=None):
+        """
+        @param identifier: Identifier of the item the operation has been started for.
+        @type identifier: C{unicode}
+        @param progressCallback: Function which is called with the identifier, the number of processed items 
+                                 and the number of items discovered so far.
+        @type progressCallback: C{callable}
+        """
+        
+        self._identifier = identifier
+        self._progressCallback = progressCallback
+        self._lock = threading.Lock()
+        self.processedNumber = 0
+        self.discoveredNumber = 0
+        
+    def discover(self, number=1):
+        """ Adds discovered items. """
+        
+        self._lock.acquire()
+        try:
+            self.discoveredNumber += number
+        finally:
+            self._lock.release()
+            
+    def process(self):
+        """ Adds a processed item and reports the progress. """
+        
+        self._lock.acquire()
+        try:
+            self.processedNumber += 1
+            processedNumber, discoveredNumber = self.processedNumber, self.discoveredNumber
+        finally:
+            self._lock.release()
+        if not self._progressCallback is None:
+            self._progressCallback(self._identifier, processedNumber, discoveredNumber)
+            
+    
+class _Directory(object):
+    """ Directory whose removal waits until the listing and the removal of all children are finished. """
+    
+    def __init__(self, path, parent):
+        self.path = path
+        self.parent = parent
+        self._pendingNumber = 1 # The listing
+        self._lock = threading.Lock()
+        
+    def add(self):
+        """ Adds a child whose removal has to be awaited. """
+        
+        self._lock.acquire()
+        try:
+            self._pendingNumber += 1
+        finally:
+            self._lock.release()
+        
+    def finish(self):
+        """ Marks the listing or the removal of a child as finished. Returns C{True} if the directory is empty. """
+        
+        self._lock.acquire()
+        try:
+            self._pendingNumber -= 1
+            return self._pendingNumber == 0
+        finally:
+            self._lock.release()
+            
+
+def deleteTree(workQueue, path, progress):
+    """ 
+    Removes the directory and its content. Directories are listed and files are removed concurrently.
+    A directory is removed after all its children have been removed.
+    
+    @param workQueue: Queue executing the individual operations.
+    @type workQueue: L{WorkQueue<WorkQueue>}
+    @param path: Path of the directory on the server.
+    @type path: C{str}
+    @param progress: Collects the processed items.
+    @type progress: L{Progress<Progress>}
+    """
+    
+    def _finish(directory):
+        if directory.finish():
+            workQueue.put(lambda connection: _removeDirectory(directory, connection))
+    
+    def _list(directory, connection):
+        attributesList = connection.listdir_attr(directory.path)
+        progress.discover(len(attributesList))
+        for attributes in attributesList:
+            childPath = ItemIdentifierMapper.determinePersistenceChildId(directory.path, attributes.filename)
+            directory.add()
+            if stat.S_ISDIR(attributes.st_mode):
+                child = _Directory(childPath, directory)
+                workQueue.put(lambda connection, child=child: _list(child, connection))
+            else:
+                workQueue.put(lambda connection, childPath=childPath: _removeFile(childPath, directory, connection))
+        _finish(directory)
+        
+    def _removeFile(path, parent, connection):
+        connection.remove(path)
+        progress.process()
+        _finish(parent)
+        
+    def _removeDirectory(directory, connection):
+        connection.rmdir(directory.path)
+        progress.process()
+        if not directory.parent is None:
+            _finish(directory.parent)
+    
+    progress.discover()
+    root = _Directory(path, None)
+    workQueue.put(lambda connection: _list(root, connection))
+    workQueue.join()
+    
+
+def copyTree(workQueue, sourcePath, destinationPath, copyFile, progress):
+    """ 
+    Copies the directory and its content. Directories are created and listed and files are copied concurrently.
+    The content of a directory is copied after the destination directory has been created.
+    
+    @param workQueue: Queue executing the individual operations.
+    @type workQueue: L{WorkQueue<WorkQueue>}
+    @param sourcePath: Path of the source directory on the server.
+    @type sourcePath: C{str}
+    @param destinationPath: Path of the destination directory on the server.
+    @type destinationPath: C{str}
+    @param copyFile: Function which copies a file. It is called with the connection, 
+                     the source path and the destination path.
+    @type copyFile: C{callable}
+    @param progress: Collects the processed items.
+    @type progress: L{Progress<Progress>}
+    """
+    
+    def _copyDirectory(sourcePath, destinationPath, connection):
+        connection.mkdir(destinationPath)
+        # The mode parameter of mkdir does not work for rwxrws--T
+        connection.chmod(destinationPath, constants.DEFAULT_DIRECTORY_PERMISSIONS)
+        progress.process()
+        attributesList = connection.listdir_attr(sourcePath)
+        progress.discover(len(attributesList))
+        for attributes in attributesList:
+            childSourcePath = ItemIdentifierMapper.determinePersistenceChildId(sourcePath, attributes.filename)
+            childDestinationPath = ItemIdentifierMapper.determinePersistenceChildId(destinationPath, attributes.filename)
+            if stat.S_ISDIR(attributes.st_mode):
+                workQueue.put(lambda connection, source=childSourcePath, destination=childDestinationPath: 
+                              _copyDirectory(source, destination, connection))
+            else:
+                workQueue.put(lambda connection, source=childSourcePath, destination=childDestinationPath: 
+                              _copyFile(source, destination, connection))
+                
+    def _copyFile(sourcePath, destinationPath, connection):
+        copyFile(connection, sourcePath, destinationPath)
+        progress.process()
+    
+    progress.discover()
+    workQueue.put(lambda connection: _copyDirectory(sourcePath, destinationPath, connection))
+    workQueue.join()
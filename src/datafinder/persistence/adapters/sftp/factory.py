@@ -53,7 +53,9 @@ from datafinder.persistence.adapters.sftp import constants, utils
 from datafinder.persistence.adapters.sftp.configuration import Configuration
 from datafinder.persistence.adapters.sftp.connection_pool import SftpConnectionPool
 from datafinder.persistence.adapters.sftp.data.adapter import SftpDataAdapter
+from datafinder.persistence.adapters.sftp.metadata.adapter import MetadataSftpAdapter
 from datafinder.persistence.common.base_factory import BaseFileSystem
+from datafinder.persistence.common.cache import LruCache
 from datafinder.persistence.common.connection.manager import ConnectionPoolManager
 
 
@@ -75,6 +77,7 @@ class FileSystem(BaseFileSystem):
         self._configuration = Configuration(baseConfiguration)
         self._connectionPool = self._getConnectionPool()
         self._idMapper = utils.ItemIdentifierMapper(self._configuration.basePath)
+        self._attributeCache = LruCache(self._configuration.cacheMaximumSize, self._configuration.cacheTimeToLive)
         
     def _getConnectionPool(self):
         connectionPool = self._connectionManager.get(self._configuration.baseUri)
@@ -96,7 +99,23 @@ class FileSystem(BaseFileSystem):
         
         persistenceId = self._idMapper.determinePeristenceId(identifier)
         return SftpDataAdapter(
-            identifier, persistenceId, self._connectionPool, self, self._idMapper)
+            identifier, persistenceId, self._connectionPool, self, self._idMapper,
+            self._configuration.readPrefetchEnabled, self._configuration.writePipeliningEnabled, self._attributeCache,
+            self._configuration.treeOperationThreadNumber, self._configuration.progressCallback)
+    
+    def createMetadataStorer(self, identifier):
+        """ 
+        Creates a SFTP specific meta data storer instance.
+        
+        @param identifier: Logical identifier of a file system item.
+        @type identifier: C{unicode}
+        
+        @return: SFTP specific meta data storer instance.
+        @rtype: L{MetadataSftpAdapter<datafinder.persistence.adapters.sftp.metadata.adapter.MetadataSftpAdapter>}
+        """
+        
+        persistenceId = self._idMapper.determinePeristenceId(identifier)
+        return MetadataSftpAdapter(identifier, persistenceId, self._connectionPool, self._attributeCache)
     
     def release(self):
         """ 
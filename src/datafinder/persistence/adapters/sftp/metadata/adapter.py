@@ -0,0 +1,108 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Implements the meta data adapter which provides the SFTP attributes of files/directories.
+"""
+
+
+__version__ = "$Revision-Id:$" 
+
+
+from datetime import datetime
+import sys
+
+from paramiko.ssh_exception import SSHException
+
+from datafinder.persistence.common.cache import LruCache
+from datafinder.persistence.error import PersistenceError
+from datafinder.persistence.metadata import constants
+from datafinder.persistence.metadata.metadatastorer import NullMetadataStorer
+from datafinder.persistence.metadata.value_mapping import MetadataValue
+
+
+class MetadataSftpAdapter(NullMetadataStorer):
+    """
+    Provides size, modification time and owner (user ID) of an item.
+    The attributes are taken from the attribute cache which is filled when listing 
+    the parent collection. Otherwise, they are requested.
+    @note: Custom meta data is not supported.
+    @see: For interface details see: L{NullMetadataStorer<datafinder.persistence.metadata.metadatastorer.NullMetadataStorer>}
+    """
+    
+    def __init__(self, identifier, persistenceIdentifier, connectionPool, attributeCache=None):
+        """
+        @param attributeCache: Cache of the SFTP attributes. Identifier => C{paramiko.SFTPAttributes}
+                               C{None} indicates that a private cache is used.
+        @type attributeCache: L{LruCache<datafinder.persistence.common.cache.LruCache>}
+        """
+        
+        NullMetadataStorer.__init__(self, identifier)
+        self._persistenceIdentifier = persistenceIdentifier
+        self._connectionPool = connectionPool
+        self._attributeCache = attributeCache
+        if self._attributeCache is None:
+            self._attributeCache = LruCache()
+        
+    def retrieve(self, propertyIds=None):
+        """ @see: L{NullMetadataStorer<datafinder.persistence.metadata.metadatastorer.NullMetadataStorer>} """
+        
+        attributes = self._determineAttributes()
+        result = dict()
+        result[constants.MODIFICATION_DATETIME] = MetadataValue(str(attributes.st_mtime), datetime)
+        result[constants.SIZE] = MetadataValue(str(attributes.st_size))
+        result[constants.OWNER] = MetadataValue(unicode(attributes.st_uid), unicode)
+        if not propertyIds:
+            return result
+        return dict([(propertyId, result[propertyId]) for propertyId in propertyIds if propertyId in result])
+    
+    def _determineAttributes(self):
+        """ Returns the cached attributes or retrieves them. """
+        
+        attributes = self._attributeCache.get(self.identifier)
+        if attributes is None:
+            connection = self._connectionPool.acquire()
+            try:
+                attributes = connection.stat(self._persistenceIdentifier)
+            except (IOError, EOFError, SSHException):
+                _, value, traceback = sys.exc_info()
+                raise PersistenceError, u"Cannot retrieve properties of item '%s'.\nReason: '%s'" % (self.identifier, value), traceback
+            finally:
+                self._connectionPool.release(connection)
+            self._attributeCache[self.identifier] = attributes
+        return attributes
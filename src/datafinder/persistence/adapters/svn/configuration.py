@@ -45,6 +45,7 @@ import os
 import tempfile
 
 from datafinder.persistence.error import PersistenceError
+from datafinder.persistence.adapters.svn import constants
 from datafinder.persistence.adapters.svn.util.util import pepareSvnPath
 
 
@@ -67,6 +68,10 @@ class Configuration(object):
         self.username = baseConfiguration.username
         self.password = baseConfiguration.password
         
+        self.updateInterval = baseConfiguration.updateInterval
+        if self.updateInterval is None:
+            self.updateInterval = constants.UPDATE_INTERVAL
+        
         baseWorkingCopyPath = baseConfiguration.baseWorkingDirectory or tempfile.gettempdir()
         if not baseWorkingCopyPath is None:
             hash_ = hashlib.sha1(self.baseUrl).hexdigest()
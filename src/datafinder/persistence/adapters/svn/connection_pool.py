@@ -68,5 +68,6 @@ class SubversionConnectionPool(ConnectionPool):
         workingCopyPath = self._configuration.workingCopyPath
         username = self._configuration.username
         password = self._configuration.password
-        return util.createSubversionConnection(repoPath, workingCopyPath, username, password)
+        updateInterval = self._configuration.updateInterval
+        return util.createSubversionConnection(repoPath, workingCopyPath, username, password, updateInterval)
     
\ No newline at end of file
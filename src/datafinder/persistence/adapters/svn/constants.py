@@ -44,7 +44,15 @@ __version__ = "$Revision-Id$"
 
 # Constants for connection pooling
 MAX_POOL_NUMBER = 10
-MAX_CONNECTION_NUMBER = 1 
+MAX_CONNECTION_NUMBER = 4
+
+# Seconds during which the determined HEAD revision is reused before checking it again
+UPDATE_INTERVAL = 5
+
+# Depths of working copy updates
+DEPTH_EMPTY = 0
+DEPTH_IMMEDIATES = 1
+DEPTH_INFINITY = 2
 
 WIN32 = "win32"
 UTF8 = "UTF-8"
@@ -47,6 +47,7 @@ import shutil
 from datafinder.persistence.error import PersistenceError
 from datafinder.persistence.adapters.svn.error import SubversionError
 from datafinder.persistence.adapters.svn import constants
+from datafinder.persistence.adapters.svn.transaction import Transaction
 from datafinder.persistence.adapters.svn.util import util
 from datafinder.persistence.data.datastorer import NullDataStorer
 
@@ -59,9 +60,13 @@ _log = logging.getLogger()
 
 
 class DataSubversionAdapter(NullDataStorer):
-    """ An adapter instance represents an item within the SVN file system. """
+    """ 
+    An adapter instance represents an item within the SVN file system. 
+    While the transaction is active, created and written items are only staged in
+    the working copy. Deleting, copying and moving are always performed on the server.
+    """
 
-    def __init__(self, identifier, connectionPool):
+    def __init__(self, identifier, connectionPool, transaction=None):
         """
         Constructor.
         
@@ -70,10 +75,16 @@ class DataSubversionAdapter(NullDataStorer):
         @param connectionPool: Connection pool.
         @type connectionPool: L{Connection<datafinder.persistence.svn.
         connection_pool.SVNConnectionPool>}
+        @param transaction: Transaction collecting the changes which is shared by all adapters
+                            of the file system. If it is not provided, changes are committed immediately.
+        @type transaction: L{Transaction<datafinder.persistence.adapters.svn.transaction.Transaction>}
         """
         
         NullDataStorer.__init__(self, identifier)
         self._connectionPool = connectionPool
+        self._transaction = transaction
+        if self._transaction is None:
+            self._transaction = Transaction()
 
     @property
     def linkTarget(self):
@@ -95,7 +106,8 @@ class DataSubversionAdapter(NullDataStorer):
         
     def _updateParentItem(self, connection):
         parentId = util.determineParentPath(self.identifier)
-        connection.update(parentId)
+        if not self._transaction.isCreated(parentId):
+            connection.update(parentId, constants.DEPTH_IMMEDIATES)
         
     @property
     def isLink(self):
@@ -111,6 +123,12 @@ class DataSubversionAdapter(NullDataStorer):
             
     def _determinItemKind(self, checkCollectionKind=True):
         connection = self._connectionPool.acquire()
+        if self._transaction.isCreated(self.identifier):
+            try:
+                isCollection = os.path.isdir(connection.workingCopyPath + self.identifier)
+                return isCollection == checkCollectionKind
+            finally:
+                self._connectionPool.release(connection)
         if checkCollectionKind:
             checkMethod = connection.isCollection
         else:
@@ -148,9 +166,14 @@ class DataSubversionAdapter(NullDataStorer):
         self.createResource()
         connection = self._connectionPool.acquire()
         try:
-            connection.update(self.identifier)
-            connection.setProperty(self.identifier, constants.LINK_TARGET_PROPERTY_NAME, 
-                                   destination.identifier)
+            if self._transaction.isActive:
+                connection.stageProperty(self.identifier, constants.LINK_TARGET_PROPERTY_NAME, 
+                                         destination.identifier)
+                self._transaction.stage(self.identifier)
+            else:
+                connection.update(self.identifier)
+                connection.setProperty(self.identifier, constants.LINK_TARGET_PROPERTY_NAME, 
+                                       destination.identifier)
         except SubversionError, error:
             errorMessage = u"Cannot set property. Reason: '%s'" % error
             raise PersistenceError(errorMessage)
@@ -171,7 +194,7 @@ class DataSubversionAdapter(NullDataStorer):
                     shutil.rmtree(path)
                 self._createLocalFile(path)
             connection.add(self.identifier)
-            connection.checkin(self.identifier)
+            self._checkin(connection, True)
         except OSError, error:
             errorMessage = os.strerror(error.errno)
             raise PersistenceError(errorMessage)
@@ -209,7 +232,7 @@ class DataSubversionAdapter(NullDataStorer):
                     os.remove(path)
                     self._createLocalDirectory(path)
             connection.add(self.identifier)
-            connection.checkin(self.identifier)
+            self._checkin(connection, True)
         except OSError, error:
             errorMessage = os.strerror(error.errno)
             raise PersistenceError(errorMessage)
@@ -223,19 +246,31 @@ class DataSubversionAdapter(NullDataStorer):
     @staticmethod
     def _createLocalDirectory(path):
         os.mkdir(path)
+        
+    def _checkin(self, connection, created=False):
+        """ Commits the changes of the item or stages them if the transaction is active. """
+        
+        if self._transaction.isActive:
+            self._transaction.stage(self.identifier, created)
+        else:
+            connection.checkin(self.identifier)
               
     def _getParent(self):
         """ Helper which create the parent data storer. """
   
         parentId = util.determineParentPath(self.identifier)
-        return DataSubversionAdapter(parentId, self._connectionPool)
+        return DataSubversionAdapter(parentId, self._connectionPool, self._transaction)
 
     def getChildren(self):
         """ @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>}  """
         
+        createdChildren = self._transaction.getCreatedChildren(self.identifier)
+        if self._transaction.isCreated(self.identifier):
+            return createdChildren
         connection = self._connectionPool.acquire()
         try:
-            return connection.getChildren(self.identifier)
+            children = connection.getChildren(self.identifier)
+            return children + [child for child in createdChildren if not child in children]
         except SubversionError, error:
             errorMessage = u"Cannot retrieve children of item '%s'. Reason: '%s'" \
                            % (self.identifier, error)
@@ -248,7 +283,8 @@ class DataSubversionAdapter(NullDataStorer):
         
         connection = self._connectionPool.acquire()
         try:
-            connection.update(self.identifier)
+            if not self._transaction.isCreated(self.identifier):
+                connection.update(self.identifier)
             fd = open(connection.workingCopyPath + self.identifier, "wb")
             try:
                 block = dataStream.read(_BLOCK_SIZE)
@@ -258,7 +294,7 @@ class DataSubversionAdapter(NullDataStorer):
             finally:
                 fd.close()
                 dataStream.close()
-            connection.checkin(self.identifier)
+            self._checkin(connection)
         except SubversionError, error:
             errorMessage = u"Unable to write data to '%s'. " % self.identifier + \
                            u"Reason: %s" % error
@@ -274,7 +310,8 @@ class DataSubversionAdapter(NullDataStorer):
         
         connection = self._connectionPool.acquire()
         try:
-            connection.update(self.identifier)
+            if not self._transaction.isCreated(self.identifier):
+                connection.update(self.identifier)
             return open(connection.workingCopyPath + self.identifier, "rb")
         except IOError, error:
             errorMessage = os.strerror(error.errno)
@@ -291,7 +328,16 @@ class DataSubversionAdapter(NullDataStorer):
         
         connection = self._connectionPool.acquire()
         try:
-            connection.delete(self.identifier)
+            isCreated = self._transaction.isCreated(self.identifier)
+            if self._transaction.unstage(self.identifier):
+                connection.revert([self.identifier])
+            if isCreated:
+                self._removeLocalItem(connection.workingCopyPath + self.identifier)
+            else:
+                connection.delete(self.identifier)
+        except OSError, error:
+            errorMessage = os.strerror(error.errno)
+            raise PersistenceError(errorMessage)
         except SubversionError, error:
             errorMessage = u"Unable to delete item '%s'. " % self.identifier \
                            + u"Reason: %s" % error
@@ -299,6 +345,13 @@ class DataSubversionAdapter(NullDataStorer):
         finally:
             self._connectionPool.release(connection)
 
+    @staticmethod
+    def _removeLocalItem(path):
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
     def move(self, destination):
         """ @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>}  """
         
@@ -322,6 +375,8 @@ class DataSubversionAdapter(NullDataStorer):
     def exists(self):
         """ @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>}  """
 
+        if self._transaction.isCreated(self.identifier):
+            return True
         connection = self._connectionPool.acquire()
         try:
             self._updateParentItem(connection)
@@ -48,6 +48,8 @@ from datafinder.persistence.error import PersistenceError
 from datafinder.persistence.adapters.svn import constants
 from datafinder.persistence.adapters.svn.configuration import Configuration
 from datafinder.persistence.adapters.svn.connection_pool import SubversionConnectionPool
+from datafinder.persistence.adapters.svn.error import SubversionError
+from datafinder.persistence.adapters.svn.transaction import Transaction
 from datafinder.persistence.adapters.svn.data.adapter import DataSubversionAdapter
 from datafinder.persistence.adapters.svn.metadata.adapter import MetadataSubversionAdapter
 
@@ -71,6 +73,7 @@ class FileSystem(BaseFileSystem):
         BaseFileSystem.__init__(self)
         self._configuration = Configuration(baseConfiguration)
         self._connectionPool = self._getConnectionPool()
+        self._transaction = Transaction()
         
     def _getConnectionPool(self):
         """ Creates / retrieves a usable connection pool for the given configuration. """
@@ -101,7 +104,7 @@ class FileSystem(BaseFileSystem):
         data.adapter.DataSubversionAdapter>
         """
         
-        return DataSubversionAdapter(identifier, self._connectionPool)    
+        return DataSubversionAdapter(identifier, self._connectionPool, self._transaction)
     
     def createMetadataStorer(self, identifier):
         """ 
@@ -112,13 +115,51 @@ class FileSystem(BaseFileSystem):
         metadata.adapter.MetadataSubversionAdapter>
         """
 
-        return MetadataSubversionAdapter(identifier, self._connectionPool)
+        return MetadataSubversionAdapter(identifier, self._connectionPool, self._transaction)
     
     def release(self):
         """ Releases the acquired connection pool. """
         
         self._connectionManager.remove(self._configuration.baseUrl)
         
+    def beginTransaction(self):
+        """ 
+        Starts staging created and written items as well as custom property changes 
+        in the working copy instead of committing them one by one. Only the changes
+        of the calling thread are staged.
+        @see: L{FileSystem.beginTransaction<datafinder.persistence.factory.FileSystem.beginTransaction>} 
+        """
+        
+        self._transaction.begin()
+        
+    def commitTransaction(self):
+        """ 
+        Commits all changes staged by the calling thread in one revision.
+        @see: L{FileSystem.commitTransaction<datafinder.persistence.factory.FileSystem.commitTransaction>} 
+        """
+        
+        connection = self._connectionPool.acquire()
+        try:
+            self._transaction.commit(connection)
+        except SubversionError, error:
+            raise PersistenceError("Cannot commit the changes. Reason: '%s'" % error)
+        finally:
+            self._connectionPool.release(connection)
+    
+    def rollbackTransaction(self):
+        """ 
+        Reverts all changes staged by the calling thread in the working copy.
+        @see: L{FileSystem.rollbackTransaction<datafinder.persistence.factory.FileSystem.rollbackTransaction>} 
+        """
+        
+        connection = self._connectionPool.acquire()
+        try:
+            self._transaction.rollback(connection)
+        except (OSError, SubversionError), error:
+            raise PersistenceError("Cannot revert the changes. Reason: '%s'" % error)
+        finally:
+            self._connectionPool.release(connection)
+        
     def prepareUsage(self):
         """ Creates the working copy before any action is performed. """
         
@@ -43,9 +43,11 @@ This module implements how the meta data is persisted on the SVN server.
 import datetime
 import logging
 import mimetypes
+import os
 
-from datafinder.persistence.adapters.svn.constants import JSON_PROPERTY_NAME
+from datafinder.persistence.adapters.svn.constants import DEPTH_IMMEDIATES, JSON_PROPERTY_NAME
 from datafinder.persistence.adapters.svn.error import SubversionError
+from datafinder.persistence.adapters.svn.transaction import Transaction
 from datafinder.persistence.adapters.svn.util import util
 from datafinder.persistence.error import PersistenceError
 from datafinder.persistence.metadata import constants as const
@@ -61,9 +63,12 @@ _log = logging.getLogger()
 
 
 class MetadataSubversionAdapter(NullMetadataStorer):
-    """ Implements meta data storer interface for subversion. """
+    """ 
+    Implements meta data storer interface for subversion. While the transaction is active,
+    changed custom properties are kept by the transaction and serialized on commit.
+    """
     
-    def __init__(self, identifier, connectionPool):
+    def __init__(self, identifier, connectionPool, transaction=None):
         """
         Constructor.
         
@@ -71,10 +76,16 @@ class MetadataSubversionAdapter(NullMetadataStorer):
         @type identifier: C{unicode}
         @param connectionPool: Connection pool.
         @type connectionPool: L{Connection<datafinder.persistence.svn.connection_pool.SVNConnectionPool>}
+        @param transaction: Transaction collecting the changes which is shared by all adapters
+                            of the file system. If it is not provided, changes are committed immediately.
+        @type transaction: L{Transaction<datafinder.persistence.adapters.svn.transaction.Transaction>}
         """
         
         NullMetadataStorer.__init__(self, identifier)
         self.__connectionPool = connectionPool
+        self.__transaction = transaction
+        if self.__transaction is None:
+            self.__transaction = Transaction()
 
     def retrieve(self, propertyIds=None):
         """ @see: L{NullMetadataStorer<datafinder.persistence.metadata.metadatastorer.NullMetadataStorer>}"""
@@ -102,13 +113,17 @@ class MetadataSubversionAdapter(NullMetadataStorer):
         return filteredProps
 
     def _retrieveCustomProperties(self, connection):
+        customProperties = self.__transaction.getProperties(self.identifier)
+        if not customProperties is None:
+            return customProperties
+        
         customProperties = dict()
         try:
             jsonString = connection.getProperty(self.identifier, JSON_PROPERTY_NAME)
         except SubversionError:
             parentId = util.determineParentPath(self.identifier)
             try:
-                connection.update(parentId)
+                connection.update(parentId, DEPTH_IMMEDIATES)
                 jsonString = connection.getProperty(self.identifier, JSON_PROPERTY_NAME)
             except SubversionError, error:
                 raise PersistenceError(str(error))
@@ -118,8 +133,11 @@ class MetadataSubversionAdapter(NullMetadataStorer):
         
     def _retrieveSystemProperties(self, connection):
         try:
-            rawSystemProps = connection.info(self.identifier)
-        except SubversionError, error:
+            if self.__transaction.isCreated(self.identifier):
+                rawSystemProps = self._retrieveLocalInformation(connection)
+            else:
+                rawSystemProps = connection.info(self.identifier)
+        except (OSError, SubversionError), error:
             errorMessage = "Problem during meta data retrieval. " \
                            + "Reason: '%s'" % str(error) 
             raise PersistenceError(errorMessage)
@@ -134,6 +152,17 @@ class MetadataSubversionAdapter(NullMetadataStorer):
             systemProps[const.MIME_TYPE] = custom_format.MetadataValue(self._guessMimeType() or "")
             return systemProps
 
+    def _retrieveLocalInformation(self, connection):
+        """ Determines the information of an item which has not been committed yet. """
+        
+        status = os.stat(connection.workingCopyPath + self.identifier)
+        result = dict()
+        result["lastChangedDate"] = str(status.st_mtime)
+        result["size"] = str(status.st_size)
+        result["owner"] = ""
+        result["creationDate"] = str(status.st_mtime)
+        return result
+
     def _guessMimeType(self):
         return mimetypes.guess_type(self.identifier, False)[0]
     
@@ -144,6 +173,9 @@ class MetadataSubversionAdapter(NullMetadataStorer):
         try:
             customProperties = self._retrieveCustomProperties(connection)
             customProperties.update(properties)
+            if self.__transaction.isActive:
+                self.__transaction.setProperties(self.identifier, customProperties)
+                return
             newJsonString = json_format.convertToPersistenceFormat(customProperties)
             try:
                 connection.update(self.identifier)
@@ -164,6 +196,9 @@ class MetadataSubversionAdapter(NullMetadataStorer):
             for propertyId in propertyIds:
                 if propertyId in customProperties:
                     del customProperties[propertyId]
+            if self.__transaction.isActive:
+                self.__transaction.setProperties(self.identifier, customProperties)
+                return
             newJsonString = json_format.convertToPersistenceFormat(customProperties)
             try:
                 connection.update(self.identifier)
@@ -0,0 +1,200 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Implements the collection of working copy changes which are committed together.
+"""
+
+
+import os
+import shutil
+import threading
+
+from datafinder.persistence.adapters.svn.constants import JSON_PROPERTY_NAME
+from datafinder.persistence.metadata.value_mapping import json_format
+
+
+__version__ = "$Revision-Id$" 
+
+
+class Transaction(threading.local):
+    """ 
+    Collects the items which have been created or changed in the working copy and their 
+    custom properties. While the transaction is active, the adapters only stage their changes.
+    They are committed in one revision when the outermost transaction is committed. Custom 
+    properties are serialized only once per item on commit. Transactions can be nested.
+    The collected changes are kept per thread. Thus, a transaction only contains the changes 
+    of the thread which has begun it. Changes of other threads are committed directly.
+    """
+    
+    def __init__(self):
+        """ Constructor. """
+        
+        threading.local.__init__(self)
+        self._reset()
+        
+    @property
+    def isActive(self):
+        """ Flag indicating whether changes are collected. """
+        
+        return self._depth > 0
+    
+    def begin(self):
+        """ Starts a transaction or a nested transaction. """
+        
+        self._depth += 1
+            
+    def stage(self, path, created=False):
+        """ 
+        Records an item which has been changed in the working copy.
+        
+        @param path: Path of the item.
+        @type path: C{unicode}
+        @param created: Flag indicating that the item has been newly added.
+        @type created: C{bool}
+        """
+        
+        if not path in self._paths:
+            self._paths.append(path)
+        if created and not path in self._createdPaths:
+            self._createdPaths.append(path)
+            
+    def unstage(self, path):
+        """ 
+        Forgets the item and its descendants. 
+        
+        @return: Flag indicating whether the item has been staged.
+        @rtype: C{bool}
+        """
+        
+        isStaged = self.isStaged(path)
+        prefix = path.rstrip("/") + "/"
+        isRemoved = lambda stagedPath: stagedPath == path or stagedPath.startswith(prefix)
+        self._paths = [stagedPath for stagedPath in self._paths if not isRemoved(stagedPath)]
+        self._createdPaths = [stagedPath for stagedPath in self._createdPaths if not isRemoved(stagedPath)]
+        for stagedPath in self._properties.keys():
+            if isRemoved(stagedPath):
+                del self._properties[stagedPath]
+        return isStaged
+            
+    def isStaged(self, path):
+        """ Checks whether the item has been changed within the transaction. """
+        
+        return path in self._paths or path in self._properties
+            
+    def isCreated(self, path):
+        """ Checks whether the item has been newly added within the transaction. """
+        
+        return path in self._createdPaths
+            
+    def getCreatedChildren(self, path):
+        """ 
+        Returns the newly added direct children of the collection.
+        
+        @rtype: C{list} of C{unicode}
+        """
+        
+        prefix = path.rstrip("/") + "/"
+        return [createdPath for createdPath in self._createdPaths 
+                if createdPath.startswith(prefix) and not "/" in createdPath[len(prefix):]]
+            
+    def getProperties(self, path):
+        """ 
+        Returns the custom properties of the item which are going to be committed.
+        
+        @return: The custom properties or C{None} if they have not been changed.
+        @rtype: C{dict}
+        """
+        
+        if path in self._properties:
+            return self._properties[path].copy()
+            
+    def setProperties(self, path, properties):
+        """ Records the complete custom properties of the item which are going to be committed. """
+        
+        self._properties[path] = properties.copy()
+            
+    def commit(self, connection):
+        """ 
+        Ends the transaction. The outermost transaction sets the collected custom 
+        properties and commits all changes with a single checkin.
+        
+        @param connection: Subversion connection.
+        
+        @raise SubversionError: Indicating problems committing the changes. The changes
+            remain staged and the transaction remains active.
+        """
+        
+        if self._depth > 1:
+            self._depth -= 1
+            return
+        if len(self._properties) > 0 or len(self._paths) > 0:
+            for path in sorted(self._properties):
+                jsonString = json_format.convertToPersistenceFormat(self._properties[path])
+                connection.stageProperty(path, JSON_PROPERTY_NAME, jsonString)
+                self.stage(path)
+            connection.checkinAll(self._paths)
+        self._reset()
+            
+    def rollback(self, connection):
+        """ 
+        Ends the transaction and all enclosing transactions. The collected changes 
+        are reverted and newly added items are removed from the working copy.
+        
+        @param connection: Subversion connection.
+        """
+        
+        try:
+            if len(self._paths) > 0:
+                connection.revert(self._paths)
+            for path in reversed(self._createdPaths):
+                localPath = connection.workingCopyPath + path
+                if os.path.isdir(localPath):
+                    shutil.rmtree(localPath, True)
+                elif os.path.exists(localPath):
+                    os.remove(localPath)
+        finally:
+            self._reset()
+            
+    def _reset(self):
+        """ Forgets the collected changes. """
+        
+        self._depth = 0
+        self._paths = list()
+        self._createdPaths = list()
+        self._properties = dict()
@@ -47,6 +47,7 @@ import os
 import pysvn
 import sys
 import threading
+import urllib
 
 # pylint: disable=E0611
 # E0611: pylint could not resolve ClientError.
@@ -55,7 +56,9 @@ from pysvn import ClientError
 from datafinder.persistence.error import PersistenceError
 from datafinder.persistence.adapters.svn import constants
 from datafinder.persistence.adapters.svn.error import SubversionError
-from datafinder.persistence.adapters.svn.util.util import pepareSvnPath
+from datafinder.persistence.adapters.svn.util.creation_index import CreationIndex, scanCreationInformation
+from datafinder.persistence.adapters.svn.util.freshness import ReadWriteLock, WorkingCopyFreshness
+from datafinder.persistence.adapters.svn.util.util import determineParentPath, pepareSvnPath
 
 
 __version__ = "$Revision-Id$" 
@@ -63,6 +66,13 @@ __version__ = "$Revision-Id$"
 
 _logger = logging.getLogger()
 
+_CREATION_INDEX_FILE_NAME = "creation_index.json"
+
+# Maps the update depths to the pysvn-specific depths. Pylint could not resolve the depth attribute.
+_DEPTHS = {constants.DEPTH_EMPTY: pysvn.depth.empty, # pylint: disable=E1101
+           constants.DEPTH_IMMEDIATES: pysvn.depth.immediates, # pylint: disable=E1101
+           constants.DEPTH_INFINITY: pysvn.depth.infinity} # pylint: disable=E1101
+
 
 class CPythonSubversionWrapper(object):
     """ 
@@ -87,6 +97,7 @@ class CPythonSubversionWrapper(object):
         self._client.callback_ssl_server_trust_prompt = \
             lambda trustData: (True, trustData["failures"], True)
         self._repositoryUri = repositoryUri
+        self._repositoryPath = None
         
     def _getLogin(self, _, __, ___):
         """ Provides the login information for the pysvn
@@ -129,44 +140,123 @@ class CPythonSubversionWrapper(object):
         entry = self._determineInfo(path)
         return entry.kind == kind
     
-    def update(self, path):
-        """ Updates the working copy. 
+    def update(self, path, depth=constants.DEPTH_EMPTY):
+        """ 
+        Updates the given path of the working copy with the given depth. 
+        The HEAD revision is only checked once per update interval and the path 
+        is only updated if it has not been updated to this revision yet. Cleanup 
+        and revert are only performed when previous operations failed.
         This method is synchronized among different connections.
-        The update call also restores accidently deleted files (mode: infinity).
+        
+        @param path: Path relative to the working copy.
+        @type path: C{unicode}
+        @param depth: One of the C{DEPTH_*} constants.
+        @type depth: C{int}
         """
-        # pylint: disable=E1101
-        # E1101: pylint could not resolve the depth attribute.
-            
-        self._sharedState.lock.acquire()
+        
+        freshness = self._sharedState.freshness
         try:
+            headRevision = freshness.determineHeadRevision(self._determineHeadRevision)
+            if freshness.isUpToDate(path, depth, headRevision):
+                return
+            self._sharedState.lock.acquireWrite()
             try:
-                self._client.cleanup(self.workingCopyPath)
-                self._client.revert(self._workingCopyPath + path, True)
-                self._client.update(self._workingCopyPath + path, depth=pysvn.depth.infinity )
-            except ClientError, error:
-                raise SubversionError(error)
-        finally:
-            self._sharedState.lock.release()
+                if not freshness.isUpToDate(path, depth, headRevision):
+                    self._restoreFailedPaths()
+                    self._client.update(self._workingCopyPath + path, depth=_DEPTHS[depth])
+                    freshness.markUpdated(path, depth, headRevision)
+            finally:
+                self._sharedState.lock.releaseWrite()
+        except ClientError, error:
+            freshness.markFailed(path)
+            raise SubversionError(error)
+        
+    def _determineHeadRevision(self):
+        """ Retrieves the HEAD revision number from the server. """
+        # pylint: disable=E1101
+        # E1101: pylint could not resolve the opt_revision_kind attribute.
+        
+        entries = self._client.info2(self._repositoryUri, 
+                                     revision=pysvn.Revision(pysvn.opt_revision_kind.head), recurse=False)
+        return entries[0][1]["rev"].number
+    
+    def _restoreFailedPaths(self):
+        """ Cleans up the working copy and reverts paths involved in failed operations. """
+        
+        failedPaths = self._sharedState.freshness.popFailedPaths()
+        if len(failedPaths) > 0:
+            try:
+                self._client.cleanup(self._workingCopyPath)
+                for failedPath in failedPaths:
+                    if os.path.exists(self._workingCopyPath + failedPath):
+                        self._client.revert(self._workingCopyPath + failedPath, True)
+            except ClientError:
+                for failedPath in failedPaths:
+                    self._sharedState.freshness.markFailed(failedPath)
+                raise
     
     def checkin(self, path):
         """ Commits changes of the item identified with C{path}. It also
         ensures that existing conflicts are resolved.
         """
         
+        self._sharedState.lock.acquireWrite()
         try:
-            self._client.checkin(self._workingCopyPath + path, "")
-        except ClientError, error:
-            raise SubversionError(error)
-        else:
-            self._sharedState.removeFromCache(path)
+            try:
+                self._client.checkin(self._workingCopyPath + path, "")
+            except ClientError, error:
+                self._sharedState.freshness.markFailed(path)
+                raise SubversionError(error)
+            else:
+                self._sharedState.freshness.expire()
+                self._sharedState.removeFromCache(path)
+        finally:
+            self._sharedState.lock.releaseWrite()
+        
+    def checkinAll(self, paths):
+        """ Commits the changes of all given items in one revision. """
+        
+        self._sharedState.lock.acquireWrite()
+        try:
+            try:
+                self._client.checkin([self._workingCopyPath + path for path in paths], "")
+            except ClientError, error:
+                for path in paths:
+                    self._sharedState.freshness.markFailed(path)
+                raise SubversionError(error)
+            else:
+                self._sharedState.freshness.expire()
+                for path in paths:
+                    self._sharedState.removeFromCache(path)
+        finally:
+            self._sharedState.lock.releaseWrite()
+            
+    def revert(self, paths):
+        """ Reverts the local changes of the given items and their descendants. """
+        
+        self._sharedState.lock.acquireWrite()
+        try:
+            try:
+                self._client.revert([self._workingCopyPath + path for path in paths], True)
+            except ClientError, error:
+                for path in paths:
+                    self._sharedState.freshness.markFailed(path)
+                raise SubversionError(error)
+        finally:
+            self._sharedState.lock.releaseWrite()
         
     def add(self, path):
         """ Adds a new file/directory to the working copy. """
         
+        self._sharedState.lock.acquireWrite()
         try:
-            self._client.add(self._workingCopyPath + path, recurse=True)
-        except ClientError, error:
-            raise SubversionError(error)
+            try:
+                self._client.add(self._workingCopyPath + path, recurse=True)
+            except ClientError, error:
+                self._sharedState.freshness.markFailed(path)
+                raise SubversionError(error)
+        finally:
+            self._sharedState.lock.releaseWrite()
         
     def delete(self, path):
         """ Removes a file or directory from the repository. It works
@@ -179,6 +269,7 @@ class CPythonSubversionWrapper(object):
         except ClientError, error:
             raise SubversionError(error)
         else:
+            self._sharedState.freshness.expire()
             self._sharedState.removeFromCache(path)
         
     def _getEncodedUri(self, path):
@@ -197,6 +288,8 @@ class CPythonSubversionWrapper(object):
                               self._getEncodedUri(destinationPath))
         except ClientError, error:
             raise SubversionError(error)
+        else:
+            self._sharedState.freshness.expire()
 
     def setProperty(self, path, key, value):
         """
@@ -208,11 +301,32 @@ class CPythonSubversionWrapper(object):
         @type value: C{unicode}
         """
         
+        self._sharedState.lock.acquireWrite()
         try:
-            self._client.propset(key, value, self._workingCopyPath + path)
+            self.stageProperty(path, key, value)
             self.checkin(path)
-        except ClientError, error:
-            raise SubversionError(error)
+        finally:
+            self._sharedState.lock.releaseWrite()
+            
+    def stageProperty(self, path, key, value):
+        """
+        Sets the property of a file or directory in the working copy only.
+        
+        @param key: Name of the property.
+        @type key: C{unicode}
+        @param value: Value of the property.
+        @type value: C{unicode}
+        """
+        
+        self._sharedState.lock.acquireWrite()
+        try:
+            try:
+                self._client.propset(key, value, self._workingCopyPath + path)
+            except ClientError, error:
+                self._sharedState.freshness.markFailed(path)
+                raise SubversionError(error)
+        finally:
+            self._sharedState.lock.releaseWrite()
         
     def getProperty(self, path, name):
         """
@@ -229,26 +343,30 @@ class CPythonSubversionWrapper(object):
         result = None
         fullWorkingPath = (self._workingCopyPath + path).encode(constants.UTF8)
 
+        self._sharedState.lock.acquireRead()
         try:
-            propertyValues = self._client.propget(
-                name, fullWorkingPath, revision=pysvn.Revision(pysvn.opt_revision_kind.working),
-                depth=pysvn.depth.empty)
-            if fullWorkingPath in propertyValues:
-                result = unicode(propertyValues[fullWorkingPath], constants.UTF8)
-        except ClientError, error:
-            raise SubversionError(error)
-        else:
-            return result
+            try:
+                propertyValues = self._client.propget(
+                    name, fullWorkingPath, revision=pysvn.Revision(pysvn.opt_revision_kind.working),
+                    depth=pysvn.depth.empty)
+                if fullWorkingPath in propertyValues:
+                    result = unicode(propertyValues[fullWorkingPath], constants.UTF8)
+            except ClientError, error:
+                raise SubversionError(error)
+            else:
+                return result
+        finally:
+            self._sharedState.lock.releaseRead()
     
     def getChildren(self, path):
-        """ Determines the direct children of the given directory. In prior an
-        update is performed. The retrieved information are cached. This method 
-        is synchronized among different connections. """
+        """ Determines the direct children of the given directory. In prior the 
+        directory and its direct children are updated if required. The retrieved 
+        information are cached. This method is synchronized among different connections. """
         
-        self._sharedState.lock.acquire()
+        self.update(path, constants.DEPTH_IMMEDIATES)
+        self._sharedState.lock.acquireRead()
         try:
             try:
-                self.update(path)
                 children = list()
                 entries = self._client.list(self._workingCopyPath + path, recurse=False)
                 for entry in entries:
@@ -266,23 +384,18 @@ class CPythonSubversionWrapper(object):
             except ClientError, error:
                 raise SubversionError(error)
         finally:
-            self._sharedState.lock.release()
+            self._sharedState.lock.releaseRead()
         
     def info(self, path):
         """ Returns a C{dict} holding the information about:
         - "lastChangedDate", "size", "owner", "creationDate".
         """
-        # pylint: disable=E1101
-        # E1101: pylint could not resolve the opt_revision_kind attribute.
         
         info = self._determineInfo(path)
             
         if info.logMessage is None: # determine creation date and owner
             try:
-                info.logMessage = self._client.log(
-                    self._workingCopyPath + path, 
-                    revision_start=pysvn.Revision(pysvn.opt_revision_kind.number, 1),
-                    revision_end=pysvn.Revision(pysvn.opt_revision_kind.head), limit=1)[0]
+                info.logMessage = self._determineCreationInformation(path)
             except ClientError, error:
                 raise SubversionError(error)
         
@@ -293,12 +406,106 @@ class CPythonSubversionWrapper(object):
         result["creationDate"] = str(info.creationTime)
         return result
 
+    def _determineCreationInformation(self, path):
+        """ 
+        Determines date and author of the first commit of the item. The creation 
+        information of all children of the parent directory is determined at once 
+        and kept in the creation index. Only items which cannot be found in the 
+        history of the parent directory are looked up individually.
+        """
+        # pylint: disable=E1101
+        # E1101: pylint could not resolve the opt_revision_kind attribute.
+        
+        creationIndex = self._sharedState.creationIndex
+        if path != "/":
+            self._scanDirectory(determineParentPath(path))
+        creation = creationIndex.get(path)
+        if creation is None:
+            self._sharedState.lock.acquireRead()
+            try:
+                logMessage = self._client.log(
+                    self._workingCopyPath + path, 
+                    revision_start=pysvn.Revision(pysvn.opt_revision_kind.number, 1),
+                    revision_end=pysvn.Revision(pysvn.opt_revision_kind.head), limit=1)[0]
+            finally:
+                self._sharedState.lock.releaseRead()
+            creation = (logMessage["revision"].number, logMessage["date"], logMessage["author"])
+            creationIndex.add(path, *creation)
+        return {"date": creation[1], "author": creation[2]}
+    
+    def _scanDirectory(self, directory):
+        """ 
+        Scans the history of the directory for the creation information of its children 
+        if it has not been scanned up to the HEAD revision. Only the history after the 
+        formerly scanned revision is retrieved unless the directory itself has changed.
+        """
+        
+        creationIndex = self._sharedState.creationIndex
+        headRevision = self._sharedState.freshness.determineHeadRevision(self._determineHeadRevision)
+        scannedRevision = creationIndex.getScannedRevision(directory)
+        if not scannedRevision is None and scannedRevision >= headRevision:
+            return
+        
+        directoryPath = self._determineRepositoryPath() + directory
+        result = None
+        if not scannedRevision is None:
+            logEntries = self._retrieveLogEntries(directory, scannedRevision + 1, headRevision)
+            result = scanCreationInformation(directoryPath, logEntries, True)
+        replace = result is None
+        if replace:
+            logEntries = self._retrieveLogEntries(directory, 1, headRevision)
+            result = scanCreationInformation(directoryPath, logEntries)
+        createdItems, deletedNames = result
+        childPrefix = directory.rstrip("/") + "/"
+        createdItems = dict([(childPrefix + name, creation) for name, creation in createdItems.iteritems()])
+        deletedPaths = [childPrefix + name for name in deletedNames]
+        creationIndex.update(directory, headRevision, createdItems, deletedPaths, replace)
+        
+    def _retrieveLogEntries(self, directory, startRevision, endRevision):
+        """ Retrieves the history of the directory including the changed paths in ascending order. """
+        # pylint: disable=E1101
+        # E1101: pylint could not resolve the opt_revision_kind attribute.
+        
+        endRevision = pysvn.Revision(pysvn.opt_revision_kind.number, endRevision)
+        logMessages = self._client.log(
+            self._getEncodedUri(directory), 
+            revision_start=pysvn.Revision(pysvn.opt_revision_kind.number, startRevision),
+            revision_end=endRevision, peg_revision=endRevision, discover_changed_paths=True)
+        logEntries = list()
+        for logMessage in logMessages:
+            changedPaths = list()
+            for changedPath in logMessage["changed_paths"]:
+                copyFromPath = changedPath["copyfrom_path"]
+                if not copyFromPath is None:
+                    copyFromPath = self._decode(copyFromPath)
+                changedPaths.append((self._decode(changedPath["path"]), changedPath["action"], copyFromPath))
+            logEntries.append((logMessage["revision"].number, logMessage["date"], 
+                               logMessage["author"], changedPaths))
+        return logEntries
+    
+    @staticmethod
+    def _decode(path):
+        """ Converts UTF-8 encoded paths reported by pysvn to C{unicode}. """
+        
+        if isinstance(path, unicode):
+            return path
+        return unicode(path, constants.UTF8)
+        
+    def _determineRepositoryPath(self):
+        """ Determines the path of the repository URI relative to the repository root. """
+        
+        if self._repositoryPath is None:
+            rootUri = self._client.root_url_from_path(self._repositoryUri)
+            self._repositoryPath = self._decode(urllib.unquote(self._repositoryUri[len(rootUri):])).rstrip("/")
+        return self._repositoryPath
+
     def _determineInfo(self, path):
         """ Retrieves the entry information and puts it into the 
         cache or uses the cached information. """
         
         entry = self._sharedState.getFromCache(path)
         if entry is None:
+            self._sharedState.lock.acquireRead()
             try:
                 entry = self._client.list(self._workingCopyPath + path, 
                                           recurse=False)[0][0]
@@ -307,6 +514,8 @@ class CPythonSubversionWrapper(object):
                 return entry
             except ClientError, error:
                 raise SubversionError(error)
+            finally:
+                self._sharedState.lock.releaseRead()
         return entry
 
     @property
@@ -359,16 +568,19 @@ class _Info(object):
         
 class _SharedState(object):
     """ Holds the synchronization information.
-    This includes a shared lock and a thread-safe
+    This includes a shared read-write lock, the freshness 
+    information of the working copy, the creation index and a thread-safe
     cache for sharing item information. Items are 
     identified by the their path relative to the
     repository working copy."""
     # Doc strings add no value: pylint: disable=C0111
      
-    def __init__(self):
+    def __init__(self, updateInterval, creationIndexPath):
         self._lock = threading.RLock()
         self._cache = dict()
-        self.lock = threading.RLock()
+        self.lock = ReadWriteLock()
+        self.freshness = WorkingCopyFreshness(updateInterval)
+        self.creationIndex = CreationIndex(creationIndexPath)
         
     def addToCache(self, path, info):
         self._lock.acquire()
@@ -399,7 +611,8 @@ class _SharedState(object):
 _repositoryUriSharedStateMap = dict()
 
 
-def createCPythonWrapper(repositoryUri, workingCopyPath, username, password):
+def createCPythonWrapper(repositoryUri, workingCopyPath, username, password, 
+                         updateInterval=constants.UPDATE_INTERVAL):
     """ Factory method for safe creation of SVN connections.
     
     Adds specific shared shared state to synchronize work of different 
@@ -412,7 +625,8 @@ def createCPythonWrapper(repositoryUri, workingCopyPath, username, password):
     if repositoryUri in _repositoryUriSharedStateMap:
         sharedState = _repositoryUriSharedStateMap[repositoryUri]
     else:
-        sharedState = _SharedState()
+        creationIndexPath = os.path.join(os.path.dirname(workingCopyPath), _CREATION_INDEX_FILE_NAME)
+        sharedState = _SharedState(updateInterval, creationIndexPath)
         _repositoryUriSharedStateMap[repositoryUri] = sharedState
     return CPythonSubversionWrapper(repositoryUri, workingCopyPath, username, password, sharedState)
 
@@ -0,0 +1,275 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Implements the persistent index of the creation information of repository items,
+i.e. revision, date and author of the first commit. The information is determined 
+for all children of a directory at once by scanning the directory history.
+"""
+
+
+import json
+import logging
+import os
+import tempfile
+import threading
+
+
+__version__ = "$Revision-Id$" 
+
+
+_log = logging.getLogger()
+
+_FORMAT_VERSION = 1
+
+ADDED = "A"
+DELETED = "D"
+REPLACED = "R"
+
+
+class CreationIndex(object):
+    """ 
+    Keeps the creation information of items identified by their path relative to the 
+    working copy and the revision up to which the history of directories has been scanned. 
+    The index is stored in a JSON file which is replaced atomically on every change. 
+    Problems accessing the file are ignored because the information can be retrieved again.
+    """
+    
+    def __init__(self, path):
+        """
+        Constructor.
+        
+        @param path: Path of the index file.
+        @type path: C{unicode}
+        """
+        
+        self._path = path
+        self._lock = threading.Lock()
+        self._items = None
+        self._scannedRevisions = None
+        
+    def _load(self):
+        """ Loads the index file on first access. """
+        
+        if self._items is None:
+            self._items = dict()
+            self._scannedRevisions = dict()
+            if os.path.exists(self._path):
+                try:
+                    fileObject = open(self._path, "rb")
+                    try:
+                        content = json.load(fileObject)
+                    finally:
+                        fileObject.close()
+                    if content["version"] == _FORMAT_VERSION:
+                        for path, item in content["items"].iteritems():
+                            self._items[path] = tuple(item)
+                        self._scannedRevisions.update(content["scannedRevisions"])
+                except (IOError, ValueError, KeyError, TypeError), error:
+                    self._items.clear()
+                    self._scannedRevisions.clear()
+                    _log.debug("Ignoring creation index '%s'. Reason: '%s'" % (self._path, error))
+                    
+    def _save(self):
+        """ Writes the index to a temporary file which replaces the index file. """
+        
+        content = {"version": _FORMAT_VERSION, "items": self._items, 
+                   "scannedRevisions": self._scannedRevisions}
+        directory = os.path.dirname(self._path)
+        try:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            fd, temporaryPath = tempfile.mkstemp(dir=directory)
+            try:
+                fileObject = os.fdopen(fd, "wb")
+                try:
+                    json.dump(content, fileObject)
+                finally:
+                    fileObject.close()
+                if os.path.exists(self._path): # Required on Windows
+                    os.remove(self._path)
+                os.rename(temporaryPath, self._path)
+            except (IOError, OSError):
+                if os.path.exists(temporaryPath):
+                    os.remove(temporaryPath)
+                raise
+        except (IOError, OSError), error:
+            _log.debug("Cannot store creation index '%s'. Reason: '%s'" % (self._path, error))
+        
+    def get(self, path):
+        """ 
+        Returns the creation information of the item.
+        
+        @param path: Path of the item.
+        @type path: C{unicode}
+        
+        @return: Revision number, date and author of the first commit or C{None}.
+        @rtype: C{tuple} of C{int}, C{float}, C{unicode}
+        """
+        
+        self._lock.acquire()
+        try:
+            self._load()
+            return self._items.get(path)
+        finally:
+            self._lock.release()
+            
+    def getScannedRevision(self, directory):
+        """ 
+        Returns the revision up to which the history of the directory has been scanned.
+        
+        @param directory: Path of the directory.
+        @type directory: C{unicode}
+        
+        @return: The revision number or C{None} if the directory has not been scanned yet.
+        @rtype: C{int}
+        """
+        
+        self._lock.acquire()
+        try:
+            self._load()
+            return self._scannedRevisions.get(directory)
+        finally:
+            self._lock.release()
+            
+    def add(self, path, revision, date, author):
+        """ Adds the creation information of a single item. """
+        
+        self._lock.acquire()
+        try:
+            self._load()
+            self._items[path] = (revision, date, author)
+            self._save()
+        finally:
+            self._lock.release()
+            
+    def update(self, directory, revision, createdItems, deletedPaths, replace=False):
+        """ 
+        Applies the result of scanning the history of a directory.
+        
+        @param directory: Path of the directory.
+        @type directory: C{unicode}
+        @param revision: Revision up to which the history has been scanned.
+        @type revision: C{int}
+        @param createdItems: Maps paths of children to their creation information.
+        @type createdItems: C{dict}
+        @param deletedPaths: Paths of children which have been deleted.
+        @type deletedPaths: C{list} of C{unicode}
+        @param replace: Flag indicating that the information of all children is replaced.
+        @type replace: C{bool}
+        """
+        
+        self._lock.acquire()
+        try:
+            self._load()
+            if replace:
+                deletedPaths = [path for path in self._items if _determineParentPath(path) == directory]
+            for deletedPath in deletedPaths:
+                self._remove(deletedPath)
+            self._items.update(createdItems)
+            self._scannedRevisions[directory] = max(revision, self._scannedRevisions.get(directory, revision))
+            self._save()
+        finally:
+            self._lock.release()
+
+    def _remove(self, path):
+        """ Removes the information of the item and its descendants. """
+        
+        prefix = path + "/"
+        for mapping in [self._items, self._scannedRevisions]:
+            for key in mapping.keys():
+                if key == path or key.startswith(prefix):
+                    del mapping[key]
+
+
+def scanCreationInformation(directoryPath, logEntries, incremental=False):
+    """ 
+    Determines the creation information of the children of a directory from its history.
+    The history is followed backwards across copies of the directory or its ancestors.
+    A child is created by its latest addition or replacement. A child which has been 
+    added individually by a copy is considered to be created by this copy.
+    
+    @param directoryPath: Path of the directory relative to the repository root.
+    @type directoryPath: C{unicode}
+    @param logEntries: History of the directory in ascending order. Every entry consists of
+        revision number, date, author and a list of the changed paths. Every changed path
+        consists of the path relative to the repository root, the action and the copy source path. 
+    @type logEntries: C{list} of C{tuple}
+    @param incremental: Flag indicating that only the recent part of the history is provided.
+    @type incremental: C{bool}
+    
+    @return: Maps child names to revision number, date and author of their creation and the set of
+        names of deleted children. C{None} is returned if the directory itself has been
+        created or replaced in the recent part of the history so the full history is required. 
+    @rtype: C{tuple} of C{dict} and C{set}
+    """
+    
+    historyPath = directoryPath.rstrip("/")
+    createdItems = dict()
+    deletedNames = set()
+    finishedNames = set()
+    for revision, date, author, changedPaths in reversed(logEntries):
+        copySourcePath = historyPath
+        for path, action, copyFromPath in changedPaths:
+            if historyPath == path or historyPath.startswith(path + "/"):
+                if action in (ADDED, REPLACED, DELETED):
+                    if incremental:
+                        return None
+                    if copyFromPath is None:
+                        copySourcePath = None
+                    else:
+                        copySourcePath = copyFromPath + historyPath[len(path):]
+            elif _determineParentPath(path) == (historyPath or "/"):
+                name = path[len(historyPath) + 1:]
+                if not name in finishedNames:
+                    if action in (ADDED, REPLACED):
+                        createdItems[name] = (revision, date, author)
+                        finishedNames.add(name)
+                    elif action == DELETED:
+                        deletedNames.add(name)
+                        finishedNames.add(name)
+        if copySourcePath is None: # The directory has been created
+            break
+        historyPath = copySourcePath
+    return createdItems, deletedNames
+
+
+def _determineParentPath(path):
+    """ Determines the parent path. The parent of top-level items is the root path "/". """
+    
+    return path.rsplit("/", 1)[0] or "/"
@@ -0,0 +1,274 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Implements the synchronization and freshness tracking of a shared working copy.
+The HEAD revision of the repository is only checked once per update interval
+and working copy paths are only updated when they were not updated to the
+current HEAD revision yet.
+"""
+
+
+import threading
+import time
+
+from datafinder.persistence.adapters.svn import constants
+
+
+__version__ = "$Revision-Id$" 
+
+
+class ReadWriteLock(object):
+    """ 
+    Lock which allows concurrent readers as long as no writer holds it or waits for it.
+    Thus, writers cannot be starved by a steady stream of readers. The writing thread 
+    may acquire the lock again for reading or writing. A reading thread may acquire the 
+    lock again for reading but it cannot upgrade the lock, i.e. it has to release the lock 
+    before acquiring it for writing.
+    """
+    
+    def __init__(self):
+        """ Constructor. """
+        
+        self._condition = threading.Condition(threading.Lock())
+        self._readerDepths = dict() # Maps reading threads to the number of their acquisitions
+        self._waitingWriterNumber = 0
+        self._writer = None
+        self._writerDepth = 0
+        
+    def acquireRead(self):
+        """ Blocks while another thread holds the lock for writing or waits for it. """
+        
+        currentThread = threading.currentThread()
+        self._condition.acquire()
+        try:
+            if self._writer == currentThread:
+                self._writerDepth += 1
+                return
+            if currentThread in self._readerDepths: # Waiting writers would otherwise dead lock with a nested reader
+                self._readerDepths[currentThread] += 1
+                return
+            while not self._writer is None or self._waitingWriterNumber > 0:
+                self._condition.wait()
+            self._readerDepths[currentThread] = 1
+        finally:
+            self._condition.release()
+            
+    def releaseRead(self):
+        """ Releases the lock acquired for reading. """
+        
+        currentThread = threading.currentThread()
+        self._condition.acquire()
+        try:
+            if self._writer == currentThread:
+                self._writerDepth -= 1
+            else:
+                self._readerDepths[currentThread] -= 1
+                if self._readerDepths[currentThread] == 0:
+                    del self._readerDepths[currentThread]
+                    if len(self._readerDepths) == 0:
+                        self._condition.notifyAll()
+        finally:
+            self._condition.release()
+            
+    def acquireWrite(self):
+        """ 
+        Blocks until no other thread holds the lock. 
+        
+        @raise RuntimeError: Indicating that the calling thread holds the lock for reading.
+                             Upgrading the lock would block forever.
+        """
+        
+        currentThread = threading.currentThread()
+        self._condition.acquire()
+        try:
+            if self._writer == currentThread:
+                self._writerDepth += 1
+                return
+            if currentThread in self._readerDepths:
+                raise RuntimeError("The lock cannot be acquired for writing while it is held for reading.")
+            self._waitingWriterNumber += 1
+            try:
+                while not self._writer is None or len(self._readerDepths) > 0:
+                    self._condition.wait()
+            finally:
+                self._waitingWriterNumber -= 1
+            self._writer = currentThread
+            self._writerDepth = 1
+        finally:
+            self._condition.release()
+            
+    def releaseWrite(self):
+        """ Releases the lock acquired for writing. """
+        
+        self._condition.acquire()
+        try:
+            self._writerDepth -= 1
+            if self._writerDepth == 0:
+                self._writer = None
+                self._condition.notifyAll()
+        finally:
+            self._condition.release()
+
+
+class WorkingCopyFreshness(object):
+    """ 
+    Remembers to which revision and depth working copy paths have been updated
+    and which paths were involved in failed operations.
+    """
+    
+    def __init__(self, updateInterval, timer=time.time):
+        """
+        Constructor.
+        
+        @param updateInterval: Seconds during which the determined HEAD revision is reused.
+        @type updateInterval: C{int}
+        @param timer: Function returning the current time in seconds.
+        @type timer: C{callable}
+        """
+        
+        self._updateInterval = updateInterval
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._headRevision = None
+        self._checkTime = None
+        self._updatedPaths = dict()
+        self._failedPaths = set()
+        
+    def determineHeadRevision(self, retrieveHeadRevision):
+        """ 
+        Returns the HEAD revision of the repository. It is only retrieved again when
+        the update interval elapsed or the freshness information has been expired.
+        Already recorded updates are forgotten when the HEAD revision changed.
+        
+        @param retrieveHeadRevision: Function retrieving the HEAD revision from the server.
+        @type retrieveHeadRevision: C{callable}
+        
+        @return: The HEAD revision number.
+        @rtype: C{int}
+        """
+        
+        self._lock.acquire()
+        try:
+            currentTime = self._timer()
+            if self._checkTime is None or currentTime - self._checkTime >= self._updateInterval:
+                headRevision = retrieveHeadRevision()
+                if headRevision != self._headRevision:
+                    self._updatedPaths.clear()
+                    self._headRevision = headRevision
+                self._checkTime = currentTime
+            return self._headRevision
+        finally:
+            self._lock.release()
+            
+    def isUpToDate(self, path, depth, revision):
+        """ 
+        Checks whether the path has already been updated to the given revision
+        with at least the given depth. This is also the case when the parent
+        path has been updated including its children or an ancestor path 
+        has been updated recursively.
+        
+        @param path: Path relative to the working copy.
+        @type path: C{unicode}
+        @param depth: One of the C{DEPTH_*} constants.
+        @type depth: C{int}
+        @param revision: Revision number.
+        @type revision: C{int}
+        
+        @rtype: C{bool}
+        """
+        
+        self._lock.acquire()
+        try:
+            requiredDepth = depth
+            while True:
+                if path in self._updatedPaths:
+                    updatedRevision, updatedDepth = self._updatedPaths[path]
+                    if updatedRevision >= revision and updatedDepth >= requiredDepth:
+                        return True
+                if path == "/" or path == "":
+                    return False
+                path = "/".join(path.split("/")[:-1]) or "/"
+                if requiredDepth == constants.DEPTH_EMPTY:
+                    requiredDepth = constants.DEPTH_IMMEDIATES
+                else:
+                    requiredDepth = constants.DEPTH_INFINITY
+        finally:
+            self._lock.release()
+
+    def markUpdated(self, path, depth, revision):
+        """ Records that the path has been updated to the given revision and depth. """
+        
+        self._lock.acquire()
+        try:
+            if revision == self._headRevision:
+                if path in self._updatedPaths:
+                    depth = max(depth, self._updatedPaths[path][1])
+                self._updatedPaths[path] = (revision, depth)
+        finally:
+            self._lock.release()
+            
+    def expire(self):
+        """ Forces a check of the HEAD revision on next access, e.g. after a commit. """
+        
+        self._lock.acquire()
+        try:
+            self._checkTime = None
+        finally:
+            self._lock.release()
+            
+    def markFailed(self, path):
+        """ Records that an operation on the path failed so the working copy requires a cleanup. """
+        
+        self._lock.acquire()
+        try:
+            self._failedPaths.add(path)
+            self._checkTime = None
+        finally:
+            self._lock.release()
+            
+    def popFailedPaths(self):
+        """ Returns and forgets the paths involved in failed operations. """
+        
+        self._lock.acquire()
+        try:
+            failedPaths = sorted(self._failedPaths)
+            self._failedPaths.clear()
+            return failedPaths
+        finally:
+            self._lock.release()
@@ -58,6 +58,7 @@ from org.tmatesoft.svn.core.wc import SVNWCUtil, SVNCommitClient, \
                                       ISVNPropertyHandler
 
 from datafinder.persistence.error import PersistenceError    
+from datafinder.persistence.adapters.svn import constants
 from datafinder.persistence.adapters.svn.error import SubversionError
 
 
@@ -143,11 +144,12 @@ class JythonSubversionWrapper(object):
         except SVNException, error:
             raise SubversionError(error)
     
-    def update(self, path):
-        """ Updates the working copy. """
+    def update(self, path, depth=constants.DEPTH_EMPTY):
+        """ Updates the working copy. Only the empty depth restricts the update to the item itself. """
         
         try:
-            self._svnUpdateClient.doUpdate(self._repoWorkingCopyFile + path, SVNRevision.HEAD, True)
+            self._svnUpdateClient.doUpdate(self._repoWorkingCopyFile + path, SVNRevision.HEAD, 
+                                           depth != constants.DEPTH_EMPTY)
         except SVNException, error:
             raise SubversionError(error)
         
@@ -164,6 +166,34 @@ class JythonSubversionWrapper(object):
         except SVNException, error:
             raise SubversionError(error)
         
+    def checkinAll(self, paths):
+        """ 
+        Commits the changes of all given items and their descendants in one revision.
+        
+        @param paths: Paths to checkin.
+        @type paths: C{list} of C{unicode} 
+        """
+        
+        try:
+            self._svnCommitClient.doCommit([File(self._repoWorkingCopyPath + path) for path in paths], 
+                                           False, "", False, True)
+        except SVNException, error:
+            raise SubversionError(error)
+        
+    def revert(self, paths):
+        """ 
+        Reverts the local changes of the given items and their descendants.
+        
+        @param paths: Paths to revert.
+        @type paths: C{list} of C{unicode} 
+        """
+        
+        try:
+            self._svnWorkingCopyClient.doRevert([File(self._repoWorkingCopyPath + path) for path in paths], 
+                                                SVNDepth.INFINITY, None)
+        except SVNException, error:
+            raise SubversionError(error)
+        
     def add(self, _):
         """ 
         Marks changes in the working copy for checking in. 
@@ -225,6 +255,26 @@ class JythonSubversionWrapper(object):
         except SVNException, error:
             raise SubversionError(error)
         
+    def stageProperty(self, path, key, value):
+        """
+        Sets the property of a file or directory in the working copy only.
+        It is committed with the next call of L{checkinAll<checkinAll>}.
+        
+        @param path: Path of the item relative to the working copy.
+        @type path: C{unicode}
+        @param key: Name of the property.
+        @type key: C{unicode}
+        @param value: Value of the property.
+        @type value: C{unicode}
+        """
+        
+        try:
+            self._svnWorkingCopyClient.doSetProperty(File(self._repoWorkingCopyPath + path), key, 
+                                                     SVNPropertyValue.create(value), False, 
+                                                     SVNDepth.EMPTY, ISVNPropertyHandler, None)
+        except SVNException, error:
+            raise SubversionError(error)
+        
     def getProperty(self, path, key):
         """
         Gets the property of a file or directory.
@@ -50,7 +50,8 @@ from datafinder.persistence.adapters.svn import constants
 __version__ = "$Revision-Id$" 
 
 
-def createSubversionConnection(repoPath, workingCopyPath, username, password):
+def createSubversionConnection(repoPath, workingCopyPath, username, password, 
+                               updateInterval=constants.UPDATE_INTERVAL):
     """ 
     Creates a SVN connection and determines which interpreter is used.
         
@@ -62,6 +63,8 @@ def createSubversionConnection(repoPath, workingCopyPath, username, password):
     @type username: C{unicode}
     @param password: The password.
     @type password: C{unicode}
+    @param updateInterval: Seconds during which the HEAD revision is not checked again.
+    @type updateInterval: C{int}
     
     @return: SVN connection.
     
@@ -70,11 +73,10 @@ def createSubversionConnection(repoPath, workingCopyPath, username, password):
 
     if platform.platform().lower().find("java") == -1:
         from datafinder.persistence.adapters.svn.util.cpython import createCPythonWrapper
-        SubversionWrapper = createCPythonWrapper
+        return createCPythonWrapper(repoPath, workingCopyPath, username, password, updateInterval)
     else:
         from datafinder.persistence.adapters.svn.util.jython import JythonSubversionWrapper
-        SubversionWrapper = JythonSubversionWrapper
-    return SubversionWrapper(repoPath, workingCopyPath, username, password)
+        return JythonSubversionWrapper(repoPath, workingCopyPath, username, password)
 
 
 def determineParentPath(path):
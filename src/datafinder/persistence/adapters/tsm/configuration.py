@@ -42,6 +42,8 @@ Implements a configuration holder object.
 
 from urlparse import urlsplit
 
+from datafinder.persistence.adapters.tsm import constants
+
 
 __version__ = "$Revision-Id:$" 
 
@@ -64,6 +66,9 @@ class Configuration(object):
         self.username = baseConfiguration.username
         self.password = baseConfiguration.password
         self.serverNodeName = baseConfiguration.serverNodeName
+
+        self.connectionIdleTimeout = baseConfiguration.connectionIdleTimeout or constants.CONNECTION_IDLE_TIMEOUT
+        self.connectionMaximumLifetime = baseConfiguration.connectionMaximumLifetime or constants.CONNECTION_MAXIMUM_LIFETIME
         
     @staticmethod
     def _determineHostAndPath(hostAndPath):
@@ -65,7 +65,8 @@ class TsmConnectionPool(ConnectionPool):
         """
         
         self._configuration = configuration
-        ConnectionPool.__init__(self, 5)
+        ConnectionPool.__init__(self, 5, idleTimeout=configuration.connectionIdleTimeout, 
+                                maxLifetime=configuration.connectionMaximumLifetime)
 
     def _createConnection(self):
         """
@@ -81,6 +82,13 @@ class TsmConnectionPool(ConnectionPool):
                            % (self._configuration.hostname) + "\nReason: '%s'" % str(error)
             raise PersistenceError(errorMessage)
 
+    def _validateConnection(self, connection):
+        """
+        @see: L{_validateConnection<datafinder.persistence.common.connection.pool.ConnectionPool._validateConnection>}
+        """
+        
+        return connection.is_active()
+
     def _releaseConnection(self, connection):
         """
         @see: L{_releaseConnection<datafinder.persistence.common.connection.pool.ConnectionPool._releaseConnection>}
@@ -47,3 +47,5 @@ DEFAULT_SSH_PORT = 22
 MAXIMUM_RECEIVED_BYTES = 1024
 CONNECTION_TIMEOUT = 500.0
 MAX_POOL_NUMBER = 10
+CONNECTION_IDLE_TIMEOUT = 300 # in seconds
+CONNECTION_MAXIMUM_LIFETIME = 3600 # in seconds
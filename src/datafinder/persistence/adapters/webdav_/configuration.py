@@ -40,6 +40,9 @@ Defines WebDAV-specific connection parameters.
 """
 
 
+from datafinder.persistence.adapters.webdav_ import constants
+
+
 __version__ = "$Revision-Id:$" 
 
 
@@ -63,3 +66,18 @@ class Configuration(object):
         self.password = baseConfiguration.password
         self.userCollectionUrl = baseConfiguration.userCollectionUrl
         self.groupCollectionUrl = baseConfiguration.groupCollectionUrl
+
+        self.connectionIdleTimeout = baseConfiguration.connectionIdleTimeout or constants.CONNECTION_IDLE_TIMEOUT
+        self.connectionMaximumLifetime = baseConfiguration.connectionMaximumLifetime or constants.CONNECTION_MAXIMUM_LIFETIME
+        
+        self.metadataPrefetchEnabled = baseConfiguration.metadataPrefetchEnabled
+        if self.metadataPrefetchEnabled is None:
+            self.metadataPrefetchEnabled = constants.METADATA_PREFETCH_ENABLED
+        self.metadataPrefetchPropertyIds = baseConfiguration.metadataPrefetchPropertyIds
+        
+        self.cacheMaximumSize = baseConfiguration.cacheMaximumSize or constants.CACHE_MAXIMUM_SIZE
+        self.cacheTimeToLive = baseConfiguration.cacheTimeToLive
+        if self.cacheTimeToLive is None:
+            self.cacheTimeToLive = constants.CACHE_TIME_TO_LIVE
+        
+        self.progressCallback = baseConfiguration.progressCallback
@@ -46,6 +46,7 @@ from webdav.Connection import AuthorizationError, Connection, WebdavError
 from webdav.WebdavClient import CollectionStorer, parseDigestAuthInfo
 
 from datafinder.persistence.adapters.webdav_.constants import MAX_CONNECTION_NUMBER
+from datafinder.persistence.adapters.webdav_.util import UploadStream
 from datafinder.persistence.common.connection.pool import ConnectionPool
 from datafinder.persistence.error import PersistenceError
 
@@ -66,7 +67,8 @@ class WebdavConnectionPool(ConnectionPool):
         """
         
         self._configuration = configuration
-        ConnectionPool.__init__(self, MAX_CONNECTION_NUMBER)
+        ConnectionPool.__init__(self, MAX_CONNECTION_NUMBER, idleTimeout=configuration.connectionIdleTimeout, 
+                                maxLifetime=configuration.connectionMaximumLifetime)
         
     def _createConnection(self):
         """ Overwrites template method for connection creation. """
@@ -74,7 +76,7 @@ class WebdavConnectionPool(ConnectionPool):
         protocol = self._configuration.protocol
         hostname = self._configuration.hostname
         port = self._configuration.port
-        connection = Connection(hostname, port, protocol=protocol)
+        connection = _StreamingConnection(hostname, port, protocol=protocol)
         baseCollection = CollectionStorer(self._configuration.basePath, connection)
         try:
             try:
@@ -97,3 +99,17 @@ class WebdavConnectionPool(ConnectionPool):
             errorMessage = "Cannot create connection.\nReason:'%s'" % error.reason
             raise PersistenceError(errorMessage)
         return connection
+
+
+class _StreamingConnection(Connection):
+    """ 
+    Extends the WebDAV library connection to detect interrupted transfers
+    of L{UploadStream<datafinder.persistence.adapters.webdav_.util.UploadStream>} instances.
+    """
+    
+    def request(self, method, url, body=None, headers=None):
+        """ Notifies upload streams before the request is sent. """
+        
+        if isinstance(body, UploadStream):
+            body.prepareRequest()
+        Connection.request(self, method, url, body, headers or dict())
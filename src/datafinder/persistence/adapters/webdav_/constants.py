@@ -40,7 +40,7 @@ Constant definitions for connection handling.
 """
 
 
-from webdav.Constants import NS_DAV, PROP_RESOURCE_TYPE
+from webdav.Constants import NS_DAV, PROP_RESOURCE_TYPE, PROP_CONTENT_LENGTH
 
 
 __version__ = "$Revision-Id:$" 
@@ -49,7 +49,23 @@ __version__ = "$Revision-Id:$"
 # Constants for connection pooling
 MAX_POOL_NUMBER = 10
 MAX_CONNECTION_NUMBER = 4
+CONNECTION_IDLE_TIMEOUT = 300 # in seconds
+CONNECTION_MAXIMUM_LIFETIME = 3600 # in seconds
 
 # Defines special WebDAV properties
 LINK_TARGET_PROPERTY = ("http://dlr.de/system/", "linkTarget")
 RESOURCE_TYPE_PROPERTY = (NS_DAV, PROP_RESOURCE_TYPE)
+CONTENT_LENGTH_PROPERTY = (NS_DAV, PROP_CONTENT_LENGTH)
+
+# Constants for bulk retrieval of meta data
+METADATA_PREFETCH_ENABLED = True
+
+# Constants for caching of resource type and meta data information
+CACHE_MAXIMUM_SIZE = 10000
+CACHE_TIME_TO_LIVE = 60 # in seconds
+
+# Constants for uploading data
+MAX_UPLOAD_RESUME_NUMBER = 3
+
+# Constants for downloading data
+BLOCK_SIZE = 65536
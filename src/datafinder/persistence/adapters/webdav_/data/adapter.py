@@ -40,11 +40,12 @@ Implements adapter for manipulating a WebDAV file system.
 """
 
 
-import types
-        
+from httplib import BAD_REQUEST, NOT_IMPLEMENTED
+
 from webdav.Connection import WebdavError
 from webdav.Constants import CODE_NOT_FOUND
 
+from datafinder.persistence.common.cache import LruCache
 from datafinder.persistence.error import PersistenceError
 from datafinder.persistence.data.datastorer import NullDataStorer
 from datafinder.persistence.adapters.webdav_ import constants, util
@@ -60,7 +61,8 @@ _PROPERTY_NOT_FOUND_MESSAGE = "Property is missing"
 class DataWebdavAdapter(NullDataStorer):
     """ An adapter instance represents an item within the WebDAV file system. """
 
-    def __init__(self, identifier, connectionPool, itemIdMapper, connectionHelper=util, resourceTypeCache=dict()):
+    def __init__(self, identifier, connectionPool, itemIdMapper, connectionHelper=util, resourceTypeCache=None,
+                 metadataCache=None, metadataPrefetchPropertyIds=None, progressCallback=None):
         """
         Constructor.
         
@@ -73,7 +75,18 @@ class DataWebdavAdapter(NullDataStorer):
         @param connectionHelper: Utility object/module creating WebDAV library storer instances.
         @type connectionHelper: L{ItemIdentifierMapper<datafinder.persistence.adapters.webdav_.util}
         @param resourceTypeCache: Cache for resource type information. Identifier => isCollection, linkTargetPath
-        @type resourceTypeCache: C{dict} keys:C{unicode}, values:C{tuple} of C{bool}, C{unicoe}
+                                  C{None} indicates that a private cache is used.
+        @type resourceTypeCache: L{LruCache<datafinder.persistence.common.cache.LruCache>}
+        @param metadataCache: Cache which is filled with the properties of the children when listing
+                              a collection. C{None} disables the bulk retrieval of properties.
+                              Identifier => properties, retrieved property identifiers
+        @type metadataCache: L{LruCache<datafinder.persistence.common.cache.LruCache>}
+        @param metadataPrefetchPropertyIds: WebDAV properties retrieved when listing a collection. 
+                                            C{None} indicates that all properties are retrieved.
+        @type metadataPrefetchPropertyIds: C{list} of C{tuple} of C{unicode}, C{unicode}
+        @param progressCallback: Function which is called with the identifier, the number of transferred bytes
+                                 and the total number of bytes (C{None} if it is unknown) while writing data.
+        @type progressCallback: C{callable}
         """
 
         NullDataStorer.__init__(self, identifier)
@@ -83,6 +96,11 @@ class DataWebdavAdapter(NullDataStorer):
         self._name = self._itemIdMapper.determineBaseName(identifier)
         self._connectionHelper = connectionHelper
         self._resourceTypeCache = resourceTypeCache
+        if self._resourceTypeCache is None:
+            self._resourceTypeCache = LruCache()
+        self._metadataCache = metadataCache
+        self._metadataPrefetchPropertyIds = metadataPrefetchPropertyIds
+        self._progressCallback = progressCallback
 
     @property
     def linkTarget(self):
@@ -118,23 +136,31 @@ class DataWebdavAdapter(NullDataStorer):
         
         return self.isCollection
     
+    @property
+    def canReadDataRange(self):
+        """
+        @see L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>}
+        """
+        
+        return True
+    
     def _determineResourceType(self):
         """ Returns resource type and link target path. """
         
-        if self.identifier in self._resourceTypeCache:
-            isCollection, linkTargetPath = self._resourceTypeCache[self.identifier]
-        else:
+        resourceType = self._resourceTypeCache.get(self.identifier)
+        if resourceType is None:
             connection = self._connectionPool.acquire()
             try:
                 resourceStorer = self._connectionHelper.createResourceStorer(self._persistenceId, connection)
                 try:
-                    isCollection, linkTargetPath = self._connectionHelper.determineResourceType(resourceStorer).values()[0]
+                    resourceType = self._connectionHelper.determineResourceType(resourceStorer).values()[0]
                 except WebdavError, error:
                     errorMessage = u"Cannot determine resource type of '%s'. Reason: '%s'" % (self.identifier, error.reason)
                     raise PersistenceError(errorMessage)
             finally:
                 self._connectionPool.release(connection)
-        return isCollection, linkTargetPath
+            self._resourceTypeCache[self.identifier] = resourceType
+        return resourceType
     
     @property
     def isCollection(self):
@@ -155,6 +181,7 @@ class DataWebdavAdapter(NullDataStorer):
             resourceStorer = self._connectionHelper.createResourceStorer(self._persistenceId, connection)
             try:
                 resourceStorer.writeProperties({constants.LINK_TARGET_PROPERTY:destination.identifier})
+                self._invalidateCaches(self.identifier)
             except WebdavError, error:
                 raise PersistenceError("Cannot set property. Reason: '%s'" % error.reason)
         finally:
@@ -209,7 +236,9 @@ class DataWebdavAdapter(NullDataStorer):
         """ Helper which creates the parent data storer. """
         
         parentId = self._itemIdMapper.determineParentPath(self.identifier)
-        return DataWebdavAdapter(parentId, self._connectionPool, self._itemIdMapper, self._connectionHelper, self._resourceTypeCache)
+        return DataWebdavAdapter(parentId, self._connectionPool, self._itemIdMapper, self._connectionHelper, 
+                                 self._resourceTypeCache, self._metadataCache, self._metadataPrefetchPropertyIds,
+                                 self._progressCallback)
 
     def getChildren(self):
         """ @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>}  """
@@ -219,7 +248,10 @@ class DataWebdavAdapter(NullDataStorer):
             result = list()
             resourceStorer = self._connectionHelper.createResourceStorer(self._persistenceId, connection, False)
             try:
-                rawResult = self._connectionHelper.determineResourceType(resourceStorer, True)
+                if self._metadataCache is None:
+                    rawResult = self._connectionHelper.determineResourceType(resourceStorer, True)
+                else:
+                    rawResult = self._prefetchMetadata(resourceStorer)
             except WebdavError, error:
                 errorMessage = u"Cannot retrieve children of item '%s'. Reason: '%s'" % (self.identifier, error.reason)
                 raise PersistenceError(errorMessage)
@@ -234,6 +266,23 @@ class DataWebdavAdapter(NullDataStorer):
         finally:
             self._connectionPool.release(connection)
             
+    def _prefetchMetadata(self, resourceStorer):
+        """ 
+        Retrieves resource type and properties of the children using one request
+        and fills the meta data cache. The properties are used once by the meta data adapter
+        to avoid a separate request per child.
+        """
+        
+        result = dict()
+        rawResult = self._connectionHelper.determineResourceTypeAndProperties(resourceStorer, self._metadataPrefetchPropertyIds)
+        for path, resourceTypeAndProperties in rawResult.iteritems():
+            resourceType, properties = resourceTypeAndProperties
+            identifier = self._itemIdMapper.mapPersistenceIdentifier(path)
+            if identifier != self.identifier:
+                self._metadataCache[identifier] = (properties, self._metadataPrefetchPropertyIds)
+            result[path] = resourceType
+        return result
+            
     def writeData(self, dataStream):
         """ @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>}  """
         
@@ -241,12 +290,10 @@ class DataWebdavAdapter(NullDataStorer):
         try:
             resourceStorer = self._connectionHelper.createResourceStorer(self._persistenceId, connection)
             try:
-                if isinstance(dataStream, types.FileType):
-                    connection.connect()
-                    resourceStorer.uploadFile(dataStream)
-                else:
-                    content = dataStream.read()
-                    resourceStorer.uploadContent(content)
+                uploadStream = util.UploadStream(dataStream, self._createProgressCallback())
+                self._upload(resourceStorer, uploadStream)
+                if not self._metadataCache is None: # Size and modification date have changed
+                    self._metadataCache.invalidate(self.identifier)
             except WebdavError, error:
                 errorMessage = "Unable to write data to '%s'. " % self.identifier + \
                                "Reason: %s" % error.reason
@@ -258,20 +305,85 @@ class DataWebdavAdapter(NullDataStorer):
             dataStream.close()
             self._connectionPool.release(connection)
 
+    def _createProgressCallback(self):
+        """ Creates a progress callback reporting the transferred bytes of this item. """
+        
+        if self._progressCallback is None:
+            return None
+        
+        def _reportProgress(transferredBytes, totalBytes):
+            """ Adds the item identifier. """
+            
+            self._progressCallback(self.identifier, transferredBytes, totalBytes)
+        return _reportProgress
+    
+    def _upload(self, resourceStorer, uploadStream):
+        """ 
+        Uploads the content. If the connection drops, the transfer is resumed 
+        starting at the content length reported by the server.
+        """
+        
+        resumeNumber = 0
+        while True:
+            try:
+                self._connectionHelper.putUploadStream(resourceStorer, uploadStream)
+                return
+            except WebdavError, error:
+                if uploadStream.offset > 0 and error.code in (BAD_REQUEST, NOT_IMPLEMENTED):
+                    uploadStream.resume(0) # Server does not support partial updates
+                elif error.code == 0 and uploadStream.canResume and resumeNumber < constants.MAX_UPLOAD_RESUME_NUMBER:
+                    uploadStream.resume(self._connectionHelper.determineContentLength(resourceStorer))
+                else:
+                    raise
+                resumeNumber += 1
+    
     def readData(self):
         """ @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>}  """
         
         connection = self._connectionPool.acquire()
+        response = None
         try:
             resourceStorer = self._connectionHelper.createResourceStorer(self._persistenceId, connection)
             try:
-                return resourceStorer.downloadContent()
+                response = resourceStorer.downloadContent()
+            except WebdavError, error:
+                errorMessage = "Unable to read data from '%s'. " % self.identifier + \
+                               "Reason: %s" % error.reason
+                raise PersistenceError(errorMessage)
+        finally:
+            if response is None:
+                self._connectionPool.release(connection)
+        return _ResponseStream(response, connection, self._connectionPool)
+    
+    def readDataRange(self, offset, length):
+        """ @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>}  """
+        
+        connection = self._connectionPool.acquire()
+        try:
+            resourceStorer = self._connectionHelper.createResourceStorer(self._persistenceId, connection)
+            try:
+                return self._connectionHelper.readContentRange(resourceStorer, offset, length)
             except WebdavError, error:
                 errorMessage = "Unable to read data from '%s'. " % self.identifier + \
                                "Reason: %s" % error.reason
                 raise PersistenceError(errorMessage)
         finally:
             self._connectionPool.release(connection)
+            
+    def determineSize(self):
+        """ @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>}  """
+        
+        connection = self._connectionPool.acquire()
+        try:
+            resourceStorer = self._connectionHelper.createResourceStorer(self._persistenceId, connection)
+            try:
+                return self._connectionHelper.determineContentLength(resourceStorer)
+            except WebdavError, error:
+                errorMessage = "Unable to determine size of '%s'. " % self.identifier + \
+                               "Reason: %s" % error.reason
+                raise PersistenceError(errorMessage)
+        finally:
+            self._connectionPool.release(connection)
  
     def delete(self):
         """ @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>}  """
@@ -281,8 +393,7 @@ class DataWebdavAdapter(NullDataStorer):
             resourceStorer = self._connectionHelper.createResourceStorer(self._persistenceId, connection, False)
             try:
                 resourceStorer.delete()
-                if self.identifier in self._resourceTypeCache:
-                    del self._resourceTypeCache[self.identifier]
+                self._invalidateCaches(self.identifier)
             except WebdavError, error:
                 errorMessage = "Unable to delete item '%s'. " % self.identifier \
                                + "Reason: %s" % error.reason
@@ -299,8 +410,8 @@ class DataWebdavAdapter(NullDataStorer):
             destinationPersistenceId = self._itemIdMapper.mapIdentifier(destination.identifier)
             try:
                 resourceStorer.move(destinationPersistenceId)
-                if self.identifier in self._resourceTypeCache:
-                    del self._resourceTypeCache[self.identifier]
+                self._invalidateCaches(self.identifier)
+                self._invalidateCaches(destination.identifier)
             except WebdavError, error:
                 errorMessage = "Unable to move item '%s' to '%s'. " % (self.identifier, destination.identifier) \
                                + "Reason: %s" % error.reason
@@ -308,6 +419,13 @@ class DataWebdavAdapter(NullDataStorer):
         finally:
             self._connectionPool.release(connection)
             
+    def _invalidateCaches(self, identifier):
+        """ Removes cached information of the given item and its children. """
+        
+        self._resourceTypeCache.invalidate(identifier)
+        if not self._metadataCache is None:
+            self._metadataCache.invalidate(identifier)
+            
     def copy(self, destination):
         """ @see: L{NullDataStorer<datafinder.persistence.data.datastorer.NullDataStorer>}  """
         
@@ -317,6 +435,7 @@ class DataWebdavAdapter(NullDataStorer):
             destinationPersistenceId = self._itemIdMapper.mapIdentifier(destination.identifier)
             try:
                 resourceStorer.copy(destinationPersistenceId)
+                self._invalidateCaches(destination.identifier)
             except WebdavError, error:
                 errorMessage = "Unable to copy item '%s' to '%s'. " % (self.identifier, destination.identifier) \
                                + "Reason: %s" % error.reason
@@ -341,3 +460,79 @@ class DataWebdavAdapter(NullDataStorer):
         finally:
             self._connectionPool.release(connection)
         return exists
+
+
+class _ResponseStream(object):
+    """ 
+    Provides read access to the content of a HTTP response without buffering it. 
+    The connection is exclusively used until the content has been completely read 
+    or the stream has been closed. Then it is released to the connection pool.
+    If the stream is closed before the content has been completely read, the unread 
+    bytes are still pending on the socket. In this case the underlying HTTP connection 
+    is closed before the release. It is transparently re-opened with the next request.
+    """
+    
+    def __init__(self, response, connection, connectionPool):
+        """
+        Constructor.
+        
+        @param response: Response of the GET request whose content has not been read yet.
+        @type response: C{object} implementing the file protocol
+        @param connection: Connection used to perform the request.
+        @type connection: L{Connection<webdav.Connection.Connection>}
+        @param connectionPool: Connection pool the connection belongs to.
+        @type connectionPool: L{Connection<datafinder.persistence.webdav_.connection_pool.WebdavConnectionPool>}
+        """
+        
+        self._response = response
+        self._connection = connection
+        self._connectionPool = connectionPool
+        self._released = False
+        self.closed = False
+        
+    def read(self, size=-1):
+        """ 
+        Reads at most C{size} bytes from the response.
+        If C{size} is negative or omitted, the remaining content is returned.
+        """
+        
+        if self.closed:
+            raise ValueError("I/O operation on closed stream.")
+        if self._released:
+            return ""
+        try:
+            if size < 0:
+                content = self._response.read()
+            else:
+                content = self._response.read(size)
+        except Exception:
+            self._release(False)
+            raise
+        if size < 0 or len(content) == 0:
+            self._release(True)
+        return content
+    
+    def close(self):
+        """ Closes the stream and releases the connection if this has not happened yet. """
+        
+        self.closed = True
+        self._release(False)
+            
+    def _release(self, completelyRead):
+        """ 
+        Closes the response and releases the connection exactly once.
+        
+        @param completelyRead: Flag indicating whether the response content has been read until EOF.
+        @type completelyRead: C{bool}
+        """
+        
+        if not self._released:
+            self._released = True
+            try:
+                try:
+                    self._response.close()
+                finally:
+                    if not completelyRead:
+                        self._connection.close()
+            finally:
+                self._connectionPool.release(self._connection)
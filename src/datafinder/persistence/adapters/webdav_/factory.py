@@ -54,11 +54,13 @@ from datafinder.persistence.adapters.webdav_ import constants
 from datafinder.persistence.adapters.webdav_.util import ItemIdentifierMapper, createCollectionStorer
 from datafinder.persistence.adapters.webdav_.data.adapter import DataWebdavAdapter
 from datafinder.persistence.adapters.webdav_.metadata.adapter import MetadataWebdavAdapter
+from datafinder.persistence.adapters.webdav_.metadata import identifier_mapping
 from datafinder.persistence.adapters.webdav_.principal_search.adapter import PrincipalSearchWebdavAdapter
 from datafinder.persistence.adapters.webdav_.privileges.adapter import PrivilegeWebdavAdapter, SimplePrivilegeWebdavAdapter
 from datafinder.persistence.adapters.webdav_.privileges.privileges_mapping import PrivilegeMapper
 from datafinder.persistence.adapters.webdav_.search.adapter import SearchWebdavAdapter
 from datafinder.persistence.common.base_factory import BaseFileSystem
+from datafinder.persistence.common.cache import LruCache
 from datafinder.persistence.common.connection.manager import ConnectionPoolManager
 from datafinder.persistence.error import PersistenceError
 from datafinder.persistence.principal_search.principalsearcher import NullPrincipalSearcher
@@ -67,7 +69,8 @@ from datafinder.persistence.principal_search.principalsearcher import NullPrinci
 _logger = logging.getLogger()
 
 
-class FileSystem(BaseFileSystem):    """ 
+class FileSystem(BaseFileSystem):
+    """ 
     Implements factory methods of the different aspects of file system items. 
     Moreover, information of specific feature are available.
     """
@@ -86,9 +89,21 @@ class FileSystem(BaseFileSystem):    """
         self._configuration = Configuration(baseConfiguration)
         self._hasMetadataSearchSupport = None
         self._hasPrivilegeSupport = None
-        self._resourceTypeCache = dict()
+        self._resourceTypeCache = self._createCache()
+        self._metadataCache = None
+        self._metadataPrefetchPropertyIds = None
+        if self._configuration.metadataPrefetchEnabled:
+            self._metadataCache = self._createCache()
+            if not self._configuration.metadataPrefetchPropertyIds is None:
+                self._metadataPrefetchPropertyIds = [identifier_mapping.mapMetadataId(propertyId) 
+                                                     for propertyId in self._configuration.metadataPrefetchPropertyIds]
         self._connectionPool = self._getConnectionPool()
 
+    def _createCache(self):
+        """ Creates a cache which is bounded and expires outdated entries as configured. """
+        
+        return LruCache(self._configuration.cacheMaximumSize, self._configuration.cacheTimeToLive)
+        
     def _getConnectionPool(self):
         """ Creates / retrieves a usable connection pool for the given configuration. """
         
@@ -119,7 +134,9 @@ class FileSystem(BaseFileSystem):    """
         """
         
         return DataWebdavAdapter(identifier, self._connectionPool, 
-                                 ItemIdentifierMapper(self._configuration.baseUrl), resourceTypeCache=self._resourceTypeCache)
+                                 ItemIdentifierMapper(self._configuration.baseUrl), resourceTypeCache=self._resourceTypeCache,
+                                 metadataCache=self._metadataCache, metadataPrefetchPropertyIds=self._metadataPrefetchPropertyIds,
+                                 progressCallback=self._configuration.progressCallback)
     
     def createMetadataStorer(self, identifier):
         """ 
@@ -132,7 +149,7 @@ class FileSystem(BaseFileSystem):    """
 
         return MetadataWebdavAdapter(
             identifier, self._connectionPool, ItemIdentifierMapper(self._configuration.baseUrl), 
-            hasMetadataSearchSupport=self.hasMetadataSearchSupport)
+            hasMetadataSearchSupport=self.hasMetadataSearchSupport, metadataCache=self._metadataCache)
     
     def createPrivilegeStorer(self, identifier):
         """ 
@@ -58,7 +58,7 @@ class MetadataWebdavAdapter(NullMetadataStorer):
     """ This class implements property retrieval, storage and deletion using the WebDAV protocol. """
     
     def __init__(self, identifier, connectionPool, itemIdMapper, metadataIdMapper=identifier_mapping, connectionHelper=util,
-                 hasMetadataSearchSupport=True):
+                 hasMetadataSearchSupport=True, metadataCache=None):
         """
         Constructor.
         
@@ -72,6 +72,9 @@ class MetadataWebdavAdapter(NullMetadataStorer):
         @type metadataIdMapper: L{ItemIdentifierMapper<datafinder.persistence.adapters.webdav_.metadata.identifier_mapping}
         @param connectionHelper: Utility object/module creating WebDAV library storer instances.
         @type connectionHelper: L{ItemIdentifierMapper<datafinder.persistence.adapters.webdav_.util}
+        @param metadataCache: Cache containing properties which have been retrieved when listing the parent collection.
+                              Identifier => properties, retrieved property identifiers
+        @type metadataCache: L{LruCache<datafinder.persistence.common.cache.LruCache>}
         """
 
         NullMetadataStorer.__init__(self, identifier)
@@ -81,32 +84,64 @@ class MetadataWebdavAdapter(NullMetadataStorer):
         self._persistenceId = self.__itemIdMapper.mapIdentifier(identifier)
         self.__connectionHelper = connectionHelper
         self.__hasMetadataSearchSupport = hasMetadataSearchSupport
+        self.__metadataCache = metadataCache
 
     def retrieve(self, propertyIds=None):
         """ @see: L{NullMetadataStorer<datafinder.persistence.metadata.metadatastorer.NullMetadataStorer>}"""
 
-        connection = self.__connectionPool.acquire()
-        try:
-            if propertyIds is None:
-                persistenceProperties = self._retrieveAllProperties(connection)
-                properties = {constants.CREATION_DATETIME: value_mapping.MetadataValue(""), 
-                              constants.MODIFICATION_DATETIME: value_mapping.MetadataValue(""),
-                              constants.SIZE: value_mapping.MetadataValue("0"), 
-                              constants.MIME_TYPE: value_mapping.MetadataValue(""), 
-                              constants.OWNER: value_mapping.MetadataValue("")}
-            else:
-                persistenceIds = [self.__metadataIdMapper.mapMetadataId(propertyId) for propertyId in propertyIds]
-                persistenceProperties = self._retrieveProperties(connection, persistenceIds)
-                properties = dict()
+        if propertyIds is None:
+            persistenceIds = None
+            properties = {constants.CREATION_DATETIME: value_mapping.MetadataValue(""), 
+                          constants.MODIFICATION_DATETIME: value_mapping.MetadataValue(""),
+                          constants.SIZE: value_mapping.MetadataValue("0"), 
+                          constants.MIME_TYPE: value_mapping.MetadataValue(""), 
+                          constants.OWNER: value_mapping.MetadataValue("")}
+        else:
+            persistenceIds = [self.__metadataIdMapper.mapMetadataId(propertyId) for propertyId in propertyIds]
+            properties = dict()
             
-            for persistenceId, value in persistenceProperties.iteritems():
-                logicalId = self.__metadataIdMapper.mapPersistenceMetadataId(persistenceId)
-                if not logicalId is None:
-                    representationValue = self._getMetadataValue(persistenceId, value)
-                    properties[logicalId] = representationValue
-            return properties
-        finally:
-            self.__connectionPool.release(connection)
+        persistenceProperties = self._retrievePrefetchedProperties(persistenceIds)
+        if persistenceProperties is None:
+            connection = self.__connectionPool.acquire()
+            try:
+                if persistenceIds is None:
+                    persistenceProperties = self._retrieveAllProperties(connection)
+                else:
+                    persistenceProperties = self._retrieveProperties(connection, persistenceIds)
+            finally:
+                self.__connectionPool.release(connection)
+            
+        for persistenceId, value in persistenceProperties.iteritems():
+            logicalId = self.__metadataIdMapper.mapPersistenceMetadataId(persistenceId)
+            if not logicalId is None:
+                representationValue = self._getMetadataValue(persistenceId, value)
+                properties[logicalId] = representationValue
+        return properties
+    
+    def _retrievePrefetchedProperties(self, persistenceIds):
+        """ 
+        Returns the properties retrieved when listing the parent collection or C{None}
+        if they are not available. A cache entry is used only once to avoid outdated results.
+        """
+        
+        if self.__metadataCache is None:
+            return None
+        cacheEntry = self.__metadataCache.pop(self.identifier, None)
+        if cacheEntry is None:
+            return None
+        
+        prefetchedProperties, prefetchedIds = cacheEntry
+        if persistenceIds is None:
+            if prefetchedIds is None:
+                return prefetchedProperties
+            return None
+        result = dict()
+        for persistenceId in persistenceIds:
+            if persistenceId in prefetchedProperties:
+                result[persistenceId] = prefetchedProperties[persistenceId]
+            elif not prefetchedIds is None and not persistenceId in prefetchedIds:
+                return None
+        return result
     
     def _retrieveAllProperties(self, connection):
         """ Retrieves all properties. """
@@ -156,6 +191,12 @@ class MetadataWebdavAdapter(NullMetadataStorer):
             persistedValueAsString = peristedValueAsXml.textof()
         return value_mapping.MetadataValue(persistedValueAsString)
 
+    def _invalidatePrefetchedProperties(self):
+        """ Removes outdated properties from the meta data cache. """
+        
+        if not self.__metadataCache is None:
+            self.__metadataCache.pop(self.identifier, None)
+
     def update(self, properties):
         """ @see: L{NullMetadataStorer<datafinder.persistence.metadata.metadatastorer.NullMetadataStorer>}"""
 
@@ -167,6 +208,7 @@ class MetadataWebdavAdapter(NullMetadataStorer):
                 persistenceValue = value_mapping.getPersistenceRepresentation(value)
                 persistencePropertyValueMapping[persistenceId] = persistenceValue
             webdavStorer = self.__connectionHelper.createResourceStorer(self._persistenceId, connection)
+            self._invalidatePrefetchedProperties()
             try:
                 webdavStorer.writeProperties(persistencePropertyValueMapping)
             except WebdavError, error:
@@ -188,6 +230,7 @@ class MetadataWebdavAdapter(NullMetadataStorer):
         try:
             persistenceIds = [self.__metadataIdMapper.mapMetadataId(propertyId) for propertyId in propertyIds]
             webdavStorer = self.__connectionHelper.createResourceStorer(self._persistenceId, connection)
+            self._invalidatePrefetchedProperties()
             try:
                 webdavStorer.deleteProperties(None, *persistenceIds)
             except WebdavError, error:
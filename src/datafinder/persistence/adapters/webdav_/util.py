@@ -41,13 +41,15 @@ Implements mapping of logical identifiers to WebDAV-specific identifiers.
 
 
 import urlparse
+from httplib import PARTIAL_CONTENT
 
 from webdav.Connection import WebdavError
 from webdav.WebdavClient import ResourceStorer, CollectionStorer
 from webdav.WebdavRequests import createFindBody
 
 from datafinder.persistence.error import PersistenceError
-from datafinder.persistence.adapters.webdav_.constants import RESOURCE_TYPE_PROPERTY, LINK_TARGET_PROPERTY
+from datafinder.persistence.adapters.webdav_.constants import RESOURCE_TYPE_PROPERTY, LINK_TARGET_PROPERTY, \
+                                                          CONTENT_LENGTH_PROPERTY, BLOCK_SIZE
 
 
 __version__ = "$Revision-Id:$" 
@@ -220,11 +222,233 @@ def determineResourceType(resourceStorer, includeChildren=False):
     response = resourceStorer.connection.propfind(resourceStorer.path, body, depth=depth)
     result = dict()
     for path, properties in response.msr.items():
-        isCollection = None
-        linkTargetPath = None
-        if RESOURCE_TYPE_PROPERTY in properties:
-            isCollection = len(properties[RESOURCE_TYPE_PROPERTY].children) > 0
-        if LINK_TARGET_PROPERTY in properties:
-            linkTargetPath = properties[LINK_TARGET_PROPERTY].textof()
-        result[path] = isCollection, linkTargetPath
+        result[path] = _extractResourceType(properties)
     return result
+
+
+def determineResourceTypeAndProperties(resourceStorer, propertyIds=None):
+    """ 
+    Helper method which determines resource type (link, resource, collection) and
+    the properties of the given WebDAV resource and its children using a single 
+    PROPFIND request of depth one.
+    
+    @param resourceStorer: 
+    @type resourceStorer: instance of L{ResourceStorer<webdav.WebdavClient.ResourceStorer>}
+    @param propertyIds: Properties which should be retrieved in addition to the resource
+                        type information. C{None} indicates that all properties are retrieved.
+    @type propertyIds: C{list} of C{tuple} of C{unicode}, C{unicode}
+    
+    @return: Maps the resource path to the resource type information and the retrieved properties.
+    @rtype: C{dict} keys: C{unicode}, values: C{tuple} of (C{tuple} of C{bool}, C{unicode}), C{dict}
+    """
+    
+    if propertyIds is None:
+        response = resourceStorer.connection.allprops(resourceStorer.path, depth=1)
+    else:
+        body = createFindBody([LINK_TARGET_PROPERTY, RESOURCE_TYPE_PROPERTY] + list(propertyIds))
+        response = resourceStorer.connection.propfind(resourceStorer.path, body, depth=1)
+    result = dict()
+    for path, properties in response.msr.items():
+        result[path] = _extractResourceType(properties), properties
+    return result
+
+
+def _extractResourceType(properties):
+    """ Determines resource type and link target path from the given WebDAV properties. """
+    
+    isCollection = None
+    linkTargetPath = None
+    if RESOURCE_TYPE_PROPERTY in properties:
+        isCollection = len(properties[RESOURCE_TYPE_PROPERTY].children) > 0
+    if LINK_TARGET_PROPERTY in properties:
+        linkTargetPath = properties[LINK_TARGET_PROPERTY].textof()
+    return isCollection, linkTargetPath
+
+
+def determineContentLength(resourceStorer):
+    """ 
+    Determines the length of the content which is currently stored on the server.
+    
+    @param resourceStorer: 
+    @type resourceStorer: instance of L{ResourceStorer<webdav.WebdavClient.ResourceStorer>}
+    
+    @return: The content length. C{0} is returned if the server does not provide it.
+    @rtype: C{int}
+    """
+    
+    body = createFindBody([CONTENT_LENGTH_PROPERTY])
+    response = resourceStorer.connection.propfind(resourceStorer.path, body, depth=0)
+    for properties in response.msr.values():
+        if CONTENT_LENGTH_PROPERTY in properties:
+            try:
+                return int(properties[CONTENT_LENGTH_PROPERTY].textof())
+            except ValueError:
+                return 0
+    return 0
+
+
+def readContentRange(resourceStorer, offset, length):
+    """ 
+    Reads a part of the content using a GET request with C{Range} header.
+    If the server ignores the range the preceding content is skipped and the
+    connection is closed afterwards to discard the remaining content.
+    
+    @param resourceStorer: 
+    @type resourceStorer: instance of L{ResourceStorer<webdav.WebdavClient.ResourceStorer>}
+    @param offset: Position of the first byte.
+    @type offset: C{int}
+    @param length: Maximum number of bytes to read.
+    @type length: C{int}
+    
+    @return: The requested content.
+    @rtype: C{str}
+    """
+    
+    if length <= 0:
+        return ""
+    response = resourceStorer.downloadContent({"Range": "bytes=%i-%i" % (offset, offset + length - 1)})
+    try:
+        if response.status == PARTIAL_CONTENT:
+            return response.read()
+        else:
+            while offset > 0:
+                skippedContent = response.read(min(offset, BLOCK_SIZE))
+                if not skippedContent:
+                    return ""
+                offset -= len(skippedContent)
+            return response.read(length)
+    finally:
+        response.close()
+        if response.status != PARTIAL_CONTENT:
+            resourceStorer.connection.close()
+
+
+def putUploadStream(resourceStorer, uploadStream):
+    """ 
+    Sends the content of the upload stream using a PUT request.
+    
+    @param resourceStorer: 
+    @type resourceStorer: instance of L{ResourceStorer<webdav.WebdavClient.ResourceStorer>}
+    @param uploadStream: The content which is sent starting at its current offset.
+    @type uploadStream: L{UploadStream<datafinder.persistence.adapters.webdav_.util.UploadStream>}
+    """
+    
+    response = resourceStorer.connection.put(resourceStorer.path, uploadStream, extra_hdrs=uploadStream.createHeaders())
+    try:
+        response.read()
+    finally:
+        response.close()
+
+
+class UploadStream(object):
+    """ 
+    Wraps a file-like object which is sent as body of a PUT request without loading it into memory.
+    If the size can be determined using C{seek} and C{tell}, the C{Content-Length} header is used.
+    Otherwise, the content is sent using chunked transfer encoding. Transfers of a seekable
+    stream can be resumed using the C{Content-Range} header.
+    """
+    
+    def __init__(self, dataStream, progressCallback=None):
+        """
+        Constructor.
+        
+        @param dataStream: The content which should be sent.
+        @type dataStream: C{object} implementing the file protocol
+        @param progressCallback: Function which is called with the number of transferred bytes and 
+                                 the total number of bytes (C{None} if it is unknown) whenever a block has been read.
+        @type progressCallback: C{callable}
+        """
+        
+        self._dataStream = dataStream
+        self._progressCallback = progressCallback
+        self._startPosition, self.size = self._determinePositionAndSize(dataStream)
+        self.offset = 0
+        self.transferredBytes = 0
+        self._isRequestStarted = False
+        self._isFinished = False
+        
+    @staticmethod
+    def _determinePositionAndSize(dataStream):
+        """ Determines the current position and the remaining number of bytes of a seekable stream. """
+        
+        try:
+            position = dataStream.tell()
+            dataStream.seek(0, 2)
+            size = dataStream.tell() - position
+            dataStream.seek(position)
+        except (AttributeError, IOError, ValueError):
+            return None, None
+        else:
+            return position, size
+    
+    @property
+    def canResume(self):
+        """ Indicates whether the transfer can be resumed at a specific offset. """
+        
+        return not self.size is None
+    
+    def createHeaders(self):
+        """ 
+        Creates the HTTP headers describing the content which is sent.
+        
+        @rtype: C{dict} keys: C{str}, values: C{str}
+        """
+        
+        headers = dict()
+        if self.size is None:
+            headers["Transfer-Encoding"] = "chunked"
+        else:
+            headers["Content-Length"] = str(self.size - self.offset)
+            if self.offset > 0:
+                headers["Content-Range"] = "bytes %i-%i/%i" % (self.offset, self.size - 1, self.size)
+        return headers
+    
+    def prepareRequest(self):
+        """ 
+        Called directly before a request sending the content is performed.
+        Automatically repeated requests are aborted because the content 
+        has already been partially consumed.
+        
+        @raise WebdavError: Indicating an interrupted transfer.
+        """
+        
+        if self._isRequestStarted:
+            raise WebdavError("Transfer of the content has been interrupted.")
+        self._isRequestStarted = True
+        
+    def resume(self, offset):
+        """ 
+        Prepares sending of the remaining content starting at the given offset.
+        
+        @param offset: Number of bytes which have already been stored. If it is
+                       out of range, the complete content is sent again.
+        @type offset: C{int}
+        """
+        
+        if not 0 < offset < self.size:
+            offset = 0
+        self._dataStream.seek(self._startPosition + offset)
+        self.offset = offset
+        self.transferredBytes = offset
+        self._isRequestStarted = False
+        self._isFinished = False
+        
+    def read(self, size=-1):
+        """ Reads the next block of the content in the transfer format. """
+        
+        if self._isFinished:
+            return ""
+        if not self.size is None:
+            remainingBytes = self.size - self.transferredBytes
+            if size < 0 or size > remainingBytes:
+                size = remainingBytes
+        content = self._dataStream.read(size)
+        self.transferredBytes += len(content)
+        if not self._progressCallback is None:
+            self._progressCallback(self.transferredBytes, self.size)
+        if self.size is None:
+            if len(content) == 0:
+                self._isFinished = True
+                return "0\r\n\r\n"
+            return "%x\r\n%s\r\n" % (len(content), content)
+        return content
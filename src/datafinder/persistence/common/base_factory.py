@@ -56,6 +56,8 @@ __version__ = "$Revision-Id:$"
 class BaseFileSystem(object):
     """ Base class for the adaptor specific file system factory implementations. """
     
+    _connectionPool = None # Set by adaptors which access the file system using a connection pool
+    
     @property
     def canHandleLocation(self):
         """
@@ -146,6 +148,30 @@ class BaseFileSystem(object):
     
         pass
     
+    def beginTransaction(self):
+        """ 
+        @see: L{FileSystem.beginTransaction<datafinder.persistence.factory.FileSystem.beginTransaction>} 
+        @note: The default implementation does nothing, i.e. changes are performed immediately.
+        """
+        
+        pass
+    
+    def commitTransaction(self):
+        """ 
+        @see: L{FileSystem.commitTransaction<datafinder.persistence.factory.FileSystem.commitTransaction>} 
+        @note: The default implementation does nothing.
+        """
+        
+        pass
+    
+    def rollbackTransaction(self):
+        """ 
+        @see: L{FileSystem.rollbackTransaction<datafinder.persistence.factory.FileSystem.rollbackTransaction>} 
+        @note: The default implementation does nothing.
+        """
+        
+        pass
+    
     def isValidIdentifier(self, name):
         """ 
         @see: L{FileSystem.isValidIdentifier<datafinder.persistence.factory.FileSystem.metadataIdentifierPattern>}
@@ -212,6 +238,15 @@ class BaseFileSystem(object):
         self = self # silent pylint
         return False
     
+    @property
+    def connectionPool(self):
+        """ 
+        @see: L{FileSystem.connectionPool<datafinder.persistence.factory.FileSystem.connectionPool>}
+        @note: This implementation returns the connection pool of adaptors which use one.
+        """
+        
+        return self._connectionPool
+    
     def determineFreeDiskSpace(self):
         """ 
         @see: L{FileSystem.determineFreeDiskSpace<datafinder.persistence.factory.FileSystem.determineFreeDiskSpace>}
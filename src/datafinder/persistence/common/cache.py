@@ -0,0 +1,304 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Implements a size-limited cache with time-based expiration of entries.
+"""
+
+
+import threading
+import time
+
+
+__version__ = "$Revision-Id:$" 
+
+
+class LruCache(object):
+    """ 
+    Thread-safe cache which evicts the least recently used entry when
+    the maximum size is reached. Entries expire after the configured time to live.
+    Keys are expected to be slash-separated paths which allows invalidation of complete sub trees.
+    The keys are additionally indexed by their parent paths. Thus, invalidation of a sub tree only 
+    visits the keys of this sub tree.
+    """
+    
+    def __init__(self, maximumSize=1000, timeToLive=None, timer=time.time):
+        """ 
+        Constructor.
+        
+        @param maximumSize: Maximum number of cached entries. Default: 1000.
+        @type maximumSize: C{int}
+        @param timeToLive: Time in seconds after which an entry expires or 
+                           C{None} specifying no expiration (default).
+        @type timeToLive: C{int}
+        @param timer: Function returning the current time in seconds.
+        @type timer: C{callable}
+        """
+        
+        self._maximumSize = maximumSize
+        self._timeToLive = timeToLive
+        self._timer = timer
+        self._lock = threading.RLock()
+        self._entries = dict() # key => [previous entry, next entry, key, value, expiration time]
+        self._pathIndex = dict() # path without trailing slashes => [keys of the path, child paths]
+        self._root = list()
+        self._root[:] = [self._root, self._root, None, None, None]
+        self.hits = 0
+        self.misses = 0
+        
+    def get(self, key, default=None):
+        """ 
+        Returns the value of the given key and marks it as most recently used. 
+        
+        @param key: Key of the entry.
+        @type key: C{unicode}
+        @param default: Value returned if the key is not cached or expired.
+        @type default: C{object}
+        
+        @return: The cached value or the default value.
+        @rtype: C{object}
+        """
+        
+        self._lock.acquire()
+        try:
+            entry = self._getValidEntry(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._unlink(entry)
+            self._link(entry)
+            return entry[3]
+        finally:
+            self._lock.release()
+            
+    def _getValidEntry(self, key):
+        """ Returns the entry of the given key or C{None} if it does not exist or has been expired. """
+        
+        entry = self._entries.get(key)
+        if not entry is None:
+            expirationTime = entry[4]
+            if not expirationTime is None and expirationTime < self._timer():
+                self._removeEntry(entry)
+                entry = None
+        return entry
+    
+    def __getitem__(self, key):
+        """ Returns the value of the given key or raises a C{KeyError}. """
+        
+        value = self.get(key, self._root)
+        if value is self._root:
+            raise KeyError(key)
+        return value
+    
+    def __contains__(self, key):
+        """ Checks whether a valid entry exists for the given key. """
+        
+        self._lock.acquire()
+        try:
+            return not self._getValidEntry(key) is None
+        finally:
+            self._lock.release()
+    
+    def __setitem__(self, key, value):
+        """ Adds or replaces the entry of the given key and evicts the least recently used entry if required. """
+        
+        self._lock.acquire()
+        try:
+            expirationTime = None
+            if not self._timeToLive is None:
+                expirationTime = self._timer() + self._timeToLive
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self._maximumSize:
+                    self._removeEntry(self._root[1])
+                entry = [None, None, key, value, expirationTime]
+                self._entries[key] = entry
+                self._addToIndex(key)
+            else:
+                self._unlink(entry)
+                entry[3] = value
+                entry[4] = expirationTime
+            self._link(entry)
+        finally:
+            self._lock.release()
+            
+    def __delitem__(self, key):
+        """ Removes the entry of the given key or raises a C{KeyError}. """
+        
+        self._lock.acquire()
+        try:
+            self._removeEntry(self._entries[key])
+        finally:
+            self._lock.release()
+            
+    def pop(self, key, default=None):
+        """ 
+        Removes the entry of the given key and returns its value. 
+        
+        @param key: Key of the entry.
+        @type key: C{unicode}
+        @param default: Value returned if the key is not cached or expired.
+        @type default: C{object}
+        
+        @return: The cached value or the default value.
+        @rtype: C{object}
+        """
+        
+        self._lock.acquire()
+        try:
+            entry = self._getValidEntry(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._removeEntry(entry)
+            return entry[3]
+        finally:
+            self._lock.release()
+    
+    def invalidate(self, key):
+        """ 
+        Removes the entry of the given key and the entries of all keys below it.
+        
+        @param key: Key of the entry, i.e. a slash-separated path.
+        @type key: C{unicode}
+        """
+        
+        path = key.rstrip("/")
+        self._lock.acquire()
+        try:
+            if path in self._pathIndex:
+                paths = [path]
+                while paths:
+                    cachedKeys, childPaths = self._pathIndex.pop(paths.pop())
+                    for cachedKey in cachedKeys:
+                        self._unlink(self._entries.pop(cachedKey))
+                    paths.extend(childPaths)
+                parentPath = _determineParentPath(path)
+                if not parentPath is None:
+                    self._pathIndex[parentPath][1].remove(path)
+                    self._prunePathIndex(parentPath)
+        finally:
+            self._lock.release()
+            
+    def _removeEntry(self, entry):
+        """ Removes the entry from the usage order, the entries, and the path index. """
+        
+        self._unlink(entry)
+        key = entry[2]
+        del self._entries[key]
+        path = key.rstrip("/")
+        self._pathIndex[path][0].remove(key)
+        self._prunePathIndex(path)
+        
+    def _addToIndex(self, key):
+        """ Adds the key to the path index. Missing parent paths are added as well. """
+        
+        path = key.rstrip("/")
+        indexEntry = self._pathIndex.get(path)
+        if indexEntry is None:
+            indexEntry = self._pathIndex[path] = [set(), set()]
+            childPath = path
+            parentPath = _determineParentPath(childPath)
+            while not parentPath is None:
+                parentIndexEntry = self._pathIndex.get(parentPath)
+                if not parentIndexEntry is None:
+                    parentIndexEntry[1].add(childPath)
+                    break
+                self._pathIndex[parentPath] = [set(), set([childPath])]
+                childPath = parentPath
+                parentPath = _determineParentPath(childPath)
+        indexEntry[0].add(key)
+        
+    def _prunePathIndex(self, path):
+        """ Removes the path and its parent paths from the index as long as they neither have keys nor child paths. """
+        
+        while not path is None:
+            cachedKeys, childPaths = self._pathIndex[path]
+            if cachedKeys or childPaths:
+                break
+            del self._pathIndex[path]
+            parentPath = _determineParentPath(path)
+            if not parentPath is None:
+                self._pathIndex[parentPath][1].remove(path)
+            path = parentPath
+            
+    def clear(self):
+        """ Removes all entries and resets the statistics. """
+        
+        self._lock.acquire()
+        try:
+            self._entries.clear()
+            self._pathIndex.clear()
+            self._root[:] = [self._root, self._root, None, None, None]
+            self.hits = 0
+            self.misses = 0
+        finally:
+            self._lock.release()
+    
+    def __len__(self):
+        """ Returns the number of cached entries including expired entries which have not been removed yet. """
+        
+        return len(self._entries)
+    
+    def _link(self, entry):
+        """ Appends the entry as most recently used entry. """
+        
+        lastEntry = self._root[0]
+        entry[0] = lastEntry
+        entry[1] = self._root
+        lastEntry[1] = entry
+        self._root[0] = entry
+        
+    @staticmethod
+    def _unlink(entry):
+        """ Removes the entry from the usage order. """
+        
+        previousEntry, nextEntry = entry[0], entry[1]
+        previousEntry[1] = nextEntry
+        nextEntry[0] = previousEntry
+
+
+def _determineParentPath(path):
+    """ Returns the parent of the given path without trailing slashes or C{None} for the root path. """
+    
+    index = path.rfind("/")
+    if index < 0:
+        return None
+    return path[:index].rstrip("/")
@@ -55,6 +55,7 @@ class BaseConfiguration(object):
     """
     
     baseWorkingDirectory = None
+    contentCacheMaximumSize = None
     
     def __init__(self, baseUri=None, **kwargs):
         """ 
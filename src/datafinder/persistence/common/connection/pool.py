@@ -34,12 +34,14 @@
 #(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
 #OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
 
-
 """ 
-Implements the connection pool for WebDAV connections.
+Implements a generic connection pool.
 """
 
 
+import bisect
+from collections import deque
+import logging
 import threading
 import time
 
@@ -49,10 +51,24 @@ from datafinder.persistence.error import PersistenceError
 __version__ = "$Revision-Id:$" 
 
 
+_log = logging.getLogger()
+
+# Upper bounds (in seconds) of the wait time histogram buckets. The last bucket is unbounded.
+WAIT_TIME_BUCKETS = (0.001, 0.01, 0.1, 1.0, 10.0)
+
+
 class ConnectionPool(object):
-    """ Implements a generic connection pool for shared resources. """
+    """ 
+    Implements a generic connection pool for shared resources. 
+    
+    Unused connections are kept in a free list which is used in LIFO order. Thus, 
+    rarely needed connections stay at its front and can be evicted when their
+    idle time out has expired. Waiting threads are notified as soon as a 
+    connection is released. Before a pooled connection is handed out, it is
+    checked using the template method L{_validateConnection<_validateConnection>}.
+    """
     
-    def __init__(self, maxConnectionNumber=10, timeout=None):
+    def __init__(self, maxConnectionNumber=10, timeout=None, idleTimeout=None, maxLifetime=None, timer=time.time):
         """ 
         Constructor. 
         
@@ -60,25 +76,51 @@ class ConnectionPool(object):
         @type maxConnectionNumber: C{int}
         @param timeout: Time out in seconds or C{None} specifying no time out (default).
         @type timeout: C{int}
+        @param idleTimeout: Time in seconds after which an unused connection is closed. 
+                            C{None} specifies that unused connections are kept open (default).
+        @type idleTimeout: C{int}
+        @param maxLifetime: Time in seconds after which a connection is closed once it is released. 
+                            C{None} specifies an unlimited lifetime (default).
+        @type maxLifetime: C{int}
+        @param timer: Function returning the current time in seconds.
+        @type timer: C{callable}
         """
         
         self._maxConnectionNumber = maxConnectionNumber
         self._timeout = timeout
+        self._idleTimeout = idleTimeout
+        self._maxLifetime = maxLifetime
+        self._timer = timer
         self._connections = dict()
+        self._freeConnections = deque()
+        self._pendingConnectionNumber = 0
+        self._waiterNumber = 0
+        self._generation = 0
         self._lock = threading.Condition()
-        self.reload()
+        
+        self._createdConnectionNumber = 0
+        self._closedConnectionNumber = 0
+        self._invalidConnectionNumber = 0
+        self._timeoutNumber = 0
+        self._waitTimeHistogram = [0] * (len(WAIT_TIME_BUCKETS) + 1)
         
     def reload(self):
-        """ Empties the connection pool and calls the specific 
-        releasing behavior of every connection. """
+        """ 
+        Empties the connection pool and calls the specific releasing behavior of 
+        every unused connection. Connections which are currently in use are closed
+        when they are released. 
+        """
         
         self._lock.acquire()
         try:
-            for connection, _ in self._connections.values():
-                self._releaseConnection(connection)
-            self._connections = dict()
+            self._generation += 1
+            obsoleteConnections = list()
+            while self._freeConnections:
+                obsoleteConnections.append(self._removePooledConnection(self._freeConnections.pop()))
+            self._lock.notifyAll()
         finally:
             self._lock.release()
+        self._closeConnections(obsoleteConnections)
             
     def acquire(self):
         """ 
@@ -90,32 +132,91 @@ class ConnectionPool(object):
         @raise PersistenceError: Indicating time when acquiring a connection object.
         """
 
+        startTime = self._timer()
+        while True:
+            connection = self._borrowConnection(startTime)
+            if connection is None:
+                connection = self._addConnection()
+            elif not self._validateConnection(connection):
+                self._discardConnection(connection)
+                continue
+            self._recordWaitTime(self._timer() - startTime)
+            return connection
+        
+    def _borrowConnection(self, startTime):
+        """ 
+        Takes a connection from the free list. If no connection is available and the 
+        maximum number of connections is not yet reached, C{None} is returned and the 
+        caller has to create the connection. Otherwise, the method waits until a 
+        connection is released.
+        """
+        
+        obsoleteConnections = list()
         self._lock.acquire()
         try:
-            if self._availableConnections < self._maxConnectionNumber:
-                connection = self._createConnection()
-            else:
-                start = time.time()
-                while self._determineUnunsedConnection() is None:
-                    if not self._timeout is None:
-                        if time.time() - start > self._timeout:
-                            break
-                    self._lock.wait(1) # check at least every second
-                connection = self._determineUnunsedConnection()
-                if connection is None:
-                    raise PersistenceError("Time out occurred before a new connection was available.")
-            self._connections[id(connection)] = connection, True
-            return connection
+            while True:
+                now = self._timer()
+                obsoleteConnections.extend(self._evictIdleConnections(now))
+                while self._freeConnections:
+                    pooledConnection = self._freeConnections.pop()
+                    if not self._isExpired(pooledConnection, now):
+                        pooledConnection.inUse = True
+                        return pooledConnection.connection
+                    obsoleteConnections.append(self._removePooledConnection(pooledConnection))
+                if len(self._connections) + self._pendingConnectionNumber < self._maxConnectionNumber:
+                    self._pendingConnectionNumber += 1
+                    return None
+                
+                remainingTime = None
+                if not self._timeout is None:
+                    remainingTime = self._timeout - (now - startTime)
+                    if remainingTime <= 0:
+                        self._timeoutNumber += 1
+                        raise PersistenceError("Time out occurred before a new connection was available.")
+                self._waiterNumber += 1
+                try:
+                    self._lock.wait(remainingTime)
+                finally:
+                    self._waiterNumber -= 1
         finally:
             self._lock.release()
-
-    def _determineUnunsedConnection(self):
-        """ Returns an unused connection or C{None}. """
-        
-        for connection, used in self._connections.values():
-            if not used:
-                return connection
+            self._closeConnections(obsoleteConnections)
             
+    def _addConnection(self):
+        """ Creates a new connection for a reserved place in the pool. """
+        
+        try:
+            connection = self._createConnection()
+        except:
+            self._lock.acquire()
+            try:
+                self._pendingConnectionNumber -= 1
+                self._lock.notify()
+            finally:
+                self._lock.release()
+            raise
+        
+        self._lock.acquire()
+        try:
+            self._pendingConnectionNumber -= 1
+            self._connections[id(connection)] = _PooledConnection(connection, self._timer(), self._generation)
+            self._createdConnectionNumber += 1
+        finally:
+            self._lock.release()
+        return connection
+    
+    def _discardConnection(self, connection):
+        """ Removes a connection which failed validation from the pool and closes it. """
+        
+        self._lock.acquire()
+        try:
+            self._invalidConnectionNumber += 1
+            self._removePooledConnection(self._connections[id(connection)])
+            self._lock.notify()
+        finally:
+            self._lock.release()
+        self._closeConnections([connection])
+        
     def release(self, connection):
         """ 
         Releases the given connection. 
@@ -124,27 +225,131 @@ class ConnectionPool(object):
         @type connection: C{object} 
         """
 
+        obsoleteConnections = list()
         self._lock.acquire()
         try:
             if not id(connection) in self._connections:
                 raise PersistenceError("The release connection was not managed by this connection pool.")
-            self._connections[id(connection)] = connection, False
-            self._lock.notify()
+            pooledConnection = self._connections[id(connection)]
+            if pooledConnection.inUse:
+                now = self._timer()
+                pooledConnection.inUse = False
+                pooledConnection.lastUsedTime = now
+                if pooledConnection.generation != self._generation or self._isExpired(pooledConnection, now):
+                    obsoleteConnections.append(self._removePooledConnection(pooledConnection))
+                else:
+                    self._freeConnections.append(pooledConnection)
+                self._lock.notify()
         finally:
             self._lock.release()
+        self._closeConnections(obsoleteConnections)
             
+    def _evictIdleConnections(self, now):
+        """ Removes connections from the front of the free list whose idle time out has expired. """
+        
+        obsoleteConnections = list()
+        if not self._idleTimeout is None:
+            while self._freeConnections and now - self._freeConnections[0].lastUsedTime > self._idleTimeout:
+                obsoleteConnections.append(self._removePooledConnection(self._freeConnections.popleft()))
+        return obsoleteConnections
+    
+    def _isExpired(self, pooledConnection, now):
+        """ Checks whether the idle time out or the lifetime of the connection has expired. """
+        
+        if not self._idleTimeout is None and now - pooledConnection.lastUsedTime > self._idleTimeout:
+            return True
+        return not self._maxLifetime is None and now - pooledConnection.creationTime > self._maxLifetime
+    
+    def _removePooledConnection(self, pooledConnection):
+        """ Removes the connection from the pool and returns it. """
+        
+        del self._connections[id(pooledConnection.connection)]
+        return pooledConnection.connection
+        
+    def _closeConnections(self, connections):
+        """ Calls the specific releasing behavior for the given connections. """
+        
+        for connection in connections:
+            try:
+                self._releaseConnection(connection)
+            except Exception, error:
+                _log.debug("Unable to release connection. Reason: '%s'" % str(error))
+            self._lock.acquire()
+            try:
+                self._closedConnectionNumber += 1
+            finally:
+                self._lock.release()
+        
+    def _recordWaitTime(self, waitTime):
+        """ Adds the wait time to the corresponding histogram bucket. """
+        
+        self._lock.acquire()
+        try:
+            self._waitTimeHistogram[bisect.bisect_left(WAIT_TIME_BUCKETS, waitTime)] += 1
+        finally:
+            self._lock.release()
+        
+    @property
+    def maxConnectionNumber(self):
+        """ Returns the maximum number of parallel connections. """
+        
+        return self._maxConnectionNumber
+        
     @property
-    def _availableConnections(self):
-        """ Calculates the number of produced connections. """
+    def statistics(self):
+        """ 
+        Returns a snapshot of the pool usage. The wait time histogram is a list of
+        upper bucket bounds in seconds and acquisition numbers. The last bucket is
+        unbounded and indicated by C{None}.
+        
+        @rtype: C{dict} keys: C{str}, values: C{int} or C{list} of C{tuple} of C{float}, C{int}
+        """
         
-        return len(self._connections)
+        self._lock.acquire()
+        try:
+            return {"connections": len(self._connections),
+                    "inUse": len(self._connections) - len(self._freeConnections),
+                    "idle": len(self._freeConnections),
+                    "waiters": self._waiterNumber,
+                    "created": self._createdConnectionNumber,
+                    "closed": self._closedConnectionNumber,
+                    "invalid": self._invalidConnectionNumber,
+                    "timeouts": self._timeoutNumber,
+                    "waitTimeHistogram": zip(WAIT_TIME_BUCKETS + (None,), self._waitTimeHistogram)}
+        finally:
+            self._lock.release()
             
     def _createConnection(self):
         """ Template method implementing connection creation. """
 
         pass
     
+    def _validateConnection(self, connection):
+        """ 
+        Template method checking whether a pooled connection is still usable before 
+        it is handed out. Invalid connections are released and replaced.
+        
+        @rtype: C{bool}
+        """
+        
+        return True
+    
     def _releaseConnection(self, connection):
         """ Template method implementing connection specific releasing behavior. """
         
         pass
+
+
+class _PooledConnection(object):
+    """ Book-keeping information of a connection managed by the pool. """
+    
+    __slots__ = ("connection", "creationTime", "lastUsedTime", "generation", "inUse")
+    
+    def __init__(self, connection, creationTime, generation):
+        """ Constructor. """
+        
+        self.connection = connection
+        self.creationTime = creationTime
+        self.lastUsedTime = creationTime
+        self.generation = generation
+        self.inUse = True
@@ -0,0 +1,256 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Implements a persistent, size-limited cache of item content on the local disk.
+"""
+
+
+import glob
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+
+from datafinder.persistence.common.configuration import BaseConfiguration
+from datafinder.persistence.error import PersistenceError
+
+
+__version__ = "$Revision-Id:$" 
+
+
+# Default maximum size of the cached content in bytes
+DEFAULT_MAXIMUM_SIZE = 5 * 1024 ** 3
+
+_CACHE_DIRECTORY_NAME = "content_cache"
+_INCOMPLETE_ENTRY_SUFFIX = ".incomplete"
+_INCOMPLETE_ENTRY_TIME_TO_LIVE = 24 * 60 * 60 # in seconds
+_BLOCK_SIZE = 65536
+_EXTENSION_PATTERN = re.compile(r"\.[a-zA-Z0-9]{1,16}$")
+
+_contentCache = None
+_contentCacheLock = threading.Lock()
+
+
+def getContentCache():
+    """ 
+    Returns the content cache shared within the process. It is located in the base working 
+    directory and limited to the maximum size as configured in the L{BaseConfiguration
+    <datafinder.persistence.common.configuration.BaseConfiguration>} class attributes.
+    
+    @return: The content cache.
+    @rtype: L{ContentCache<ContentCache>}
+    """
+    
+    global _contentCache
+    _contentCacheLock.acquire()
+    try:
+        if _contentCache is None:
+            baseDirectory = BaseConfiguration.baseWorkingDirectory or tempfile.gettempdir()
+            _contentCache = ContentCache(os.path.join(baseDirectory, _CACHE_DIRECTORY_NAME), 
+                                         BaseConfiguration.contentCacheMaximumSize or DEFAULT_MAXIMUM_SIZE)
+        return _contentCache
+    finally:
+        _contentCacheLock.release()
+
+
+class ContentCache(object):
+    """ 
+    Keeps the content of items in files of a local directory. Every entry is identified by a key 
+    and a version, e.g. the modification date of the item. Outdated versions are replaced. 
+    When the maximum size is exceeded the least recently used entries are removed. The 
+    modification time of the entry files is used to determine the usage order. 
+    
+    The directory can be shared by several processes. Entries are written to temporary 
+    files first and are atomically renamed when they are complete. The entry files keep the
+    file name extension of the key so applications can determine the type of the content.
+    """
+    
+    def __init__(self, directory, maximumSize=DEFAULT_MAXIMUM_SIZE):
+        """ 
+        Constructor.
+        
+        @param directory: Path of the directory keeping the cached content.
+        @type directory: C{unicode}
+        @param maximumSize: Maximum size of the cached content in bytes.
+        @type maximumSize: C{int}
+        """
+        
+        self._directory = directory
+        self._maximumSize = maximumSize
+        
+    def open(self, key, version, retrieveData):
+        """ 
+        Opens the cached content of the given key. The content is retrieved 
+        and cached if no entry exists for the key and version.
+        
+        @param key: Identifies the content, e.g. the URI of the item.
+        @type key: C{unicode}
+        @param version: Version of the content, e.g. its modification date.
+        @type version: C{unicode}
+        @param retrieveData: Function returning a file-like object providing the content.
+        @type retrieveData: C{callable}
+        
+        @return: Read-only file object of the cached content.
+        @rtype: C{file}
+        
+        @raise PersistenceError: Indicating problems retrieving or caching the content.
+        """
+        
+        keyHash = _hash(key)
+        path = os.path.join(self._directory, keyHash + "_" + _hash(version) + _determineExtension(key))
+        try:
+            try:
+                fileObject = open(path, "rb")
+            except IOError:
+                self._store(path, retrieveData)
+                self._removeEntries(keyHash, path)
+                self._evict(path)
+                fileObject = open(path, "rb")
+            else:
+                os.utime(path, None)
+            return fileObject
+        except (IOError, OSError), error:
+            reason = os.strerror(error.errno or 0)
+            raise PersistenceError("Cannot access cached content of '%s'. Reason: '%s'" % (key, reason))
+        
+    def _store(self, path, retrieveData):
+        """ Writes the content to a temporary file which is renamed to the final path on completion. """
+        
+        if not os.path.isdir(self._directory):
+            try:
+                os.makedirs(self._directory)
+            except OSError:
+                if not os.path.isdir(self._directory): # Another process might have created it
+                    raise
+        fd, temporaryPath = tempfile.mkstemp(suffix=_INCOMPLETE_ENTRY_SUFFIX, dir=self._directory)
+        try:
+            fileObject = os.fdopen(fd, "wb")
+            try:
+                inStream = retrieveData()
+                try:
+                    block = inStream.read(_BLOCK_SIZE)
+                    while len(block) > 0:
+                        fileObject.write(block)
+                        block = inStream.read(_BLOCK_SIZE)
+                finally:
+                    inStream.close()
+            finally:
+                fileObject.close()
+            if os.path.exists(path): # Required on Windows. Another process has already stored the content.
+                os.remove(temporaryPath)
+            else:
+                os.rename(temporaryPath, path)
+        except (IOError, OSError, PersistenceError):
+            self._remove(temporaryPath)
+            raise
+        
+    def _removeEntries(self, keyHash, keptPath=None):
+        """ Removes the entries of all versions of the key except the kept one. """
+        
+        for entryPath in glob.glob(os.path.join(self._directory, keyHash + "_*")):
+            if entryPath != keptPath and not entryPath.endswith(_INCOMPLETE_ENTRY_SUFFIX):
+                self._remove(entryPath)
+
+    def _evict(self, path):
+        """ Removes the least recently used entries until the maximum size is kept. The given entry is kept. """
+        
+        entries = list()
+        size = 0
+        now = time.time()
+        for name in os.listdir(self._directory):
+            entryPath = os.path.join(self._directory, name)
+            try:
+                status = os.stat(entryPath)
+            except OSError:
+                continue # Concurrently removed
+            if name.endswith(_INCOMPLETE_ENTRY_SUFFIX):
+                if status.st_mtime + _INCOMPLETE_ENTRY_TIME_TO_LIVE < now: # Left over by an aborted process
+                    self._remove(entryPath)
+                else:
+                    size += status.st_size
+            else:
+                size += status.st_size
+                if entryPath != path:
+                    entries.append((status.st_mtime, status.st_size, entryPath))
+        
+        entries.sort()
+        for _, entrySize, entryPath in entries:
+            if size <= self._maximumSize:
+                break
+            if self._remove(entryPath):
+                size -= entrySize
+                
+    @staticmethod
+    def _remove(path):
+        """ Removes the entry file. Returns C{False} if it is still in use (Windows) or concurrently removed. """
+        
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+        
+    def invalidate(self, key):
+        """ 
+        Removes all cached versions of the given key.
+        
+        @param key: Identifies the content.
+        @type key: C{unicode}
+        """
+        
+        self._removeEntries(_hash(key))
+
+
+def _determineExtension(key):
+    """ Returns the file name extension of the key or an empty string. """
+    
+    match = _EXTENSION_PATTERN.search(key)
+    if match is None:
+        return ""
+    return match.group()
+
+
+def _hash(value):
+    """ Returns the hexadecimal SHA-1 digest of the given string. """
+    
+    if isinstance(value, unicode):
+        value = value.encode("utf-8")
+    return hashlib.sha1(value).hexdigest()
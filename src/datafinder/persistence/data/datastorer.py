@@ -127,6 +127,19 @@ class NullDataStorer(object):
         self = self # silent pylint
         return False
     
+    @property
+    def canReadDataRange(self):
+        """
+        Determines whether parts of the associated data can be efficiently read 
+        without transferring the preceding data.
+        
+        @return: Flag indicating support of L{readDataRange<NullDataStorer.readDataRange>}.
+        @rtype: C{bool}
+        """
+           
+        self = self # silent pylint
+        return False
+    
     def createCollection(self, recursively):
         """ 
         Creates a collection.
@@ -215,6 +228,33 @@ class NullDataStorer(object):
         self = self # silent pylint
         return StringIO("")
     
+    def readDataRange(self, offset, length):
+        """ 
+        Returns a part of the associated data.
+        
+        @param offset: Position of the first byte.
+        @type offset: C{int}
+        @param length: Maximum number of bytes to read.
+        @type length: C{int}
+        
+        @return: The requested data. It is shorter than C{length} when the end of the data is reached.
+        @rtype: C{str}
+        """
+        
+        self = self # silent pylint
+        return ""
+    
+    def determineSize(self):
+        """ 
+        Determines the size of the associated data.
+        
+        @return: Size in bytes.
+        @rtype: C{int}
+        """
+        
+        self = self # silent pylint
+        return 0
+    
     def writeData(self, data):
         """ 
         Writes data of the associated item.
@@ -0,0 +1,170 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Provides seekable read access to the data of an item without transferring the complete data.
+"""
+
+
+import threading
+
+
+__version__ = "$Revision-Id:$" 
+
+
+_MINIMUM_BLOCK_SIZE = 65536
+_MAXIMUM_BLOCK_SIZE = 4194304
+
+
+class RandomAccessFile(object):
+    """ 
+    Read-only file object which retrieves the requested parts of the data of an item
+    using L{readDataRange<datafinder.persistence.filestorer.FileStorer.readDataRange>}.
+    Data is read ahead in blocks. The block size grows while the data is read sequentially.
+    
+    @note: Instances are not thread-safe. Use L{clone<RandomAccessFile.clone>} to
+           obtain an independent file object for another thread.
+    """
+    
+    def __init__(self, fileStorer, size=None):
+        """ 
+        Constructor.
+        
+        @param fileStorer: The item whose data is accessed.
+        @type fileStorer: L{FileStorer<datafinder.persistence.filestorer.FileStorer>}
+        @param size: Size of the data if it is already known. 
+                     Otherwise, it is determined when required.
+        @type size: C{int}
+        """
+        
+        self._fileStorer = fileStorer
+        self._size = size
+        self._sizeLock = threading.Lock()
+        self._position = 0
+        self._buffer = ""
+        self._bufferOffset = 0
+        self._blockSize = _MINIMUM_BLOCK_SIZE
+        self.name = fileStorer.identifier
+        self.closed = False
+        
+    @property
+    def size(self):
+        """ Returns the size of the data. """
+        
+        if self._size is None:
+            self._sizeLock.acquire()
+            try:
+                if self._size is None:
+                    self._size = self._fileStorer.determineSize()
+            finally:
+                self._sizeLock.release()
+        return self._size
+    
+    def clone(self):
+        """ 
+        Creates an independent file object for the same data. 
+        
+        @return: File object positioned at the beginning of the data.
+        @rtype: L{RandomAccessFile<RandomAccessFile>}
+        """
+        
+        return RandomAccessFile(self._fileStorer, self._size)
+    
+    def seek(self, offset, whence=0):
+        """ Sets the current position. C{whence} is interpreted as described for C{file.seek}. """
+        
+        self._checkClosed()
+        if whence == 1:
+            offset += self._position
+        elif whence == 2:
+            offset += self.size
+        if offset < 0:
+            raise IOError("Invalid position '%i'." % offset)
+        self._position = offset
+        
+    def tell(self):
+        """ Returns the current position. """
+        
+        self._checkClosed()
+        return self._position
+    
+    def read(self, size=-1):
+        """ 
+        Reads at most C{size} bytes from the current position.
+        If C{size} is negative or omitted, the remaining data is returned.
+        
+        @raise PersistenceError: Indicating problems retrieving the data.
+        """
+        
+        self._checkClosed()
+        remainingSize = max(self.size - self._position, 0)
+        if size < 0 or size > remainingSize:
+            size = remainingSize
+        if size == 0:
+            return ""
+        
+        bufferPosition = self._position - self._bufferOffset
+        if bufferPosition < 0 or bufferPosition + size > len(self._buffer):
+            self._fillBuffer(size)
+            bufferPosition = 0
+        content = self._buffer[bufferPosition:bufferPosition + size]
+        self._position += len(content)
+        return content
+        
+    def _fillBuffer(self, size):
+        """ Retrieves at least C{size} bytes starting at the current position. """
+        
+        if self._bufferOffset <= self._position <= self._bufferOffset + len(self._buffer):
+            self._blockSize = min(self._blockSize * 2, _MAXIMUM_BLOCK_SIZE) # Sequential access
+        else:
+            self._blockSize = _MINIMUM_BLOCK_SIZE
+        length = min(max(size, self._blockSize), self.size - self._position)
+        self._buffer = self._fileStorer.readDataRange(self._position, length)
+        self._bufferOffset = self._position
+    
+    def close(self):
+        """ Closes the file object and discards buffered data. """
+        
+        self.closed = True
+        self._buffer = ""
+        
+    def _checkClosed(self):
+        """ Raises a C{ValueError} if the file object has been closed. """
+        
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
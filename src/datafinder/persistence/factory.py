@@ -269,6 +269,33 @@ class FileSystem(object):
         """ Releases the file system. """
         
         self._factory.release()
+        
+    def beginTransaction(self):
+        """ 
+        Starts collecting the changes of items which are committed together. Transactions can 
+        be nested and only the outermost transaction commits the changes. File systems 
+        without transaction support perform the changes immediately. 
+        """
+        
+        self._factory.beginTransaction()
+        
+    def commitTransaction(self):
+        """ 
+        Commits the changes collected since the outermost transaction has been started.
+        
+        @raise PersistenceError: Indicating problems committing the changes.
+        """
+        
+        self._factory.commitTransaction()
+        
+    def rollbackTransaction(self):
+        """ 
+        Discards the changes collected since the outermost transaction has been started.
+        
+        @raise PersistenceError: Indicating problems discarding the changes.
+        """
+        
+        self._factory.rollbackTransaction()
 
     @property
     def baseConfiguration(self):
@@ -285,6 +312,17 @@ class FileSystem(object):
             result = self._baseConfiguration.baseUri
         return result
     
+    @property
+    def connectionPool(self):
+        """ 
+        Returns the connection pool which is used to access the file system.
+        
+        @return: The connection pool or C{None} if the file system does not use a connection pool.
+        @rtype: L{ConnectionPool<datafinder.persistence.common.connection.pool.ConnectionPool>}
+        """
+        
+        return self._factory.connectionPool
+    
     @property
     def isAccessible(self):
         """ Flag indicating whether the file system is accessible. """
@@ -42,14 +42,17 @@ Provides file storer implementation allowing access to an item on a specific sto
 
 import os
 
-from tempfile import NamedTemporaryFile, mkstemp
+from tempfile import NamedTemporaryFile, TemporaryFile, mkstemp
+from datafinder.persistence.common.content_cache import getContentCache
 from datafinder.persistence.error import PersistenceError
+from datafinder.persistence.metadata.constants import MODIFICATION_DATETIME, SIZE
         
 
 __version__ = "$Revision-Id:$" 
 
 
 _BLOCK_SIZE = 30000
+_LOCAL_URI_SCHEMES = ("file", "arch") # Content of these items is not cached
 
 
 class FileStorer(object):
@@ -90,6 +93,7 @@ class FileStorer(object):
         self.__metadataStorer = metadataStorer
         self.__privilegeStorer = privilegeStorer
         self._tempfile = None
+        self._tempfileIsCached = False
         
     @property
     def identifier(self):
@@ -210,6 +214,18 @@ class FileStorer(object):
         """
            
         return self.__dataStorer.canAddChildren
+    
+    @property
+    def canReadDataRange(self):
+        """
+        Determines whether parts of the associated data can be efficiently read 
+        without transferring the preceding data.
+        
+        @return: Flag indicating support of L{readDataRange<FileStorer.readDataRange>}.
+        @rtype: C{bool}
+        """
+           
+        return self.__dataStorer.canReadDataRange
         
     def createCollection(self, recursively=False):
         """ 
@@ -307,6 +323,31 @@ class FileStorer(object):
         
         return self.__dataStorer.readData()
     
+    def readDataRange(self, offset, length):
+        """ 
+        Returns a part of the associated data.
+        
+        @param offset: Position of the first byte.
+        @type offset: C{int}
+        @param length: Maximum number of bytes to read.
+        @type length: C{int}
+        
+        @return: The requested data. It is shorter than C{length} when the end of the data is reached.
+        @rtype: C{str}
+        """
+        
+        return self.__dataStorer.readDataRange(offset, length)
+    
+    def determineSize(self):
+        """ 
+        Determines the size of the associated data.
+        
+        @return: Size in bytes.
+        @rtype: C{int}
+        """
+        
+        return self.__dataStorer.determineSize()
+    
     def writeData(self, data):
         """ 
         Writes data of the associated item.
@@ -316,8 +357,11 @@ class FileStorer(object):
         """
         
         self.__dataStorer.writeData(data)
+        uri = self.uri
+        if not uri is None and not self._isLocal:
+            getContentCache().invalidate(uri)
         
-    def getTemporaryFileObject(self, fileNameSuffix="", deleteOnClose=True):
+    def getTemporaryFileObject(self, fileNameSuffix="", deleteOnClose=True, readOnly=False):
         """ 
         Returns a named local temporary file object allowing access to the binary 
         content. The file path of the 
@@ -326,42 +370,122 @@ class FileStorer(object):
         @type deleteOnClose: C{bool}
         @param fileNameSuffix: Optional suffix for the name of the temporary file. Default: Empty string
         @type fileNameSuffix: C{unicode}
+        @param readOnly: Flag indicating that the file is neither changed nor deleted by the caller. Default: C{False}
+        @type readOnly: C{bool}
         
         @return: Tuple consisting of local file path and opened temporary file object.
         @rtype: C{tuple} of C{unicode}, C{object} implementing file protocol
         
         @raise PersistenceError: Indicating problems accessing file content.
+        
+        @note: The private copy is filled from the content cache if the content of the remote item
+               is already cached. For read-only access, the file of the content cache is provided directly.
+               This file is managed by the cache. Thus, it is not deleted on close and the file name 
+               suffix is restricted to the file name extension of the item.
         """
         
         if self._tempfile is None \
-        or not os.path.exists(self._tempfile[0]):
+        or not os.path.exists(self._tempfile[0]) \
+        or (self._tempfileIsCached and not readOnly):
+            cachedFileObject = self._retrieveCachedData()
+            self._tempfileIsCached = readOnly and not cachedFileObject is None
+            if self._tempfileIsCached:
+                self._tempfile = cachedFileObject.name, cachedFileObject
+            else:
+                self._tempfile = self._createTemporaryFile(fileNameSuffix, deleteOnClose, cachedFileObject)
+        elif self._tempfile is not None:
+            if self._tempfileIsCached:
+                self._tempfile = self._tempfile[0], open(self._tempfile[0], "rb")
+            else:
+                self._tempfile = self._tempfile[0], open(self._tempfile[0], "r+b")
+        return self._tempfile
+    
+    def _createTemporaryFile(self, fileNameSuffix, deleteOnClose, inStream=None):
+        """ Copies the content to a new temporary file and returns its path and file object. """
+        
+        if inStream is None:
             inStream = self.readData()
-            try:
-                if deleteOnClose:
-                    tempNamedFile = NamedTemporaryFile(suffix=fileNameSuffix)
-                    path = tempNamedFile.name
-                    fileHandle = tempNamedFile.file
-                else:
-                    fd, path = mkstemp(suffix=fileNameSuffix)
-                    fileHandle = os.fdopen(fd, "w+b")
+        try:
+            if deleteOnClose:
+                tempNamedFile = NamedTemporaryFile(suffix=fileNameSuffix)
+                path = tempNamedFile.name
+                fileHandle = tempNamedFile.file
+            else:
+                fd, path = mkstemp(suffix=fileNameSuffix)
+                fileHandle = os.fdopen(fd, "w+b")
 
+            block = inStream.read(_BLOCK_SIZE)
+            while len(block) > 0:
+                fileHandle.write(block)
                 block = inStream.read(_BLOCK_SIZE)
-                while len(block) > 0:
-                    fileHandle.write(block)
+        except (OSError, IOError), error:
+            reason = os.strerror(error.errno or 0)
+            errorMessage = "Cannot create local temporary file for '%s'. Reason: '%s'." % (self.identifier, reason)
+            raise PersistenceError(errorMessage)
+        finally:
+            inStream.close()
+        return path, fileHandle
+    
+    def getLocalFileObject(self):
+        """ 
+        Returns a seekable file object allowing read access to a local copy of the binary content.
+        The content of remote items is kept in the content cache shared by all file storers. 
+        Thus, it is only transferred again when it has been changed in the meantime or has been
+        evicted from the cache. 
+        
+        @return: Opened file object.
+        @rtype: C{object} implementing file protocol
+        
+        @raise PersistenceError: Indicating problems accessing file content.
+        """
+        
+        if self._isLocal:
+            return self.readData()
+        fileObject = self._retrieveCachedData()
+        if fileObject is None:
+            inStream = self.readData()
+            try:
+                try:
+                    fileObject = TemporaryFile()
                     block = inStream.read(_BLOCK_SIZE)
                     while len(block) > 0:
-                        fileHandle.write(block)
+                        fileObject.write(block)
                         block = inStream.read(_BLOCK_SIZE)
-            except (OSError, IOError), error:
-                reason = os.strerror(error.errno or 0)
-                errorMessage = "Cannot create local temporary file for '%s'. Reason: '%s'." % (self.identifier, reason)
-                raise PersistenceError(errorMessage)
+                    fileObject.seek(0)
+                except (OSError, IOError), error:
+                    reason = os.strerror(error.errno or 0)
+                    errorMessage = "Cannot create local temporary file for '%s'. Reason: '%s'." % (self.identifier, reason)
+                    raise PersistenceError(errorMessage)
             finally:
                 inStream.close()
-            self._tempfile = path, fileHandle
-        elif self._tempfile is not None:
-            self._tempfile = self._tempfile[0], open(self._tempfile[0], "r+b")
-        return self._tempfile
+        return fileObject
+    
+    @property
+    def _isLocal(self):
+        """ Flag indicating whether the content is located on the local disk. """
+        
+        uri = self.uri
+        return not uri is None and uri.split(":", 1)[0] in _LOCAL_URI_SCHEMES
+        
+    def _retrieveCachedData(self):
+        """ 
+        Opens the cached content of remote items. C{None} is returned for local items and 
+        items whose content version, i.e. modification date and size, cannot be determined.
+        """
+        
+        uri = self.uri
+        if uri is None or self._isLocal:
+            return None
+        try:
+            metadata = self.retrieveMetadata([MODIFICATION_DATETIME, SIZE])
+        except PersistenceError:
+            return None
+        if not MODIFICATION_DATETIME in metadata:
+            return None
+        version = unicode(metadata[MODIFICATION_DATETIME].persistedValue)
+        if SIZE in metadata:
+            version += u"/" + unicode(metadata[SIZE].persistedValue)
+        return getContentCache().open(uri, version, self.readData)
         
     def retrieveMetadata(self, propertyIds=None):
         """ 
@@ -0,0 +1,89 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+"""
+Tests the worker pool.
+"""
+
+
+import threading
+import unittest
+
+from datafinder.common.worker_pool import WorkerPool
+
+
+__version__ = "$Revision-Id:$" 
+
+
+class WorkerPoolTestCase(unittest.TestCase):
+    """ Tests the worker pool. """
+    
+    def testParallelExecution(self):
+        """ Tests that all tasks are executed by the worker threads. """
+        
+        threadNames = set()
+        results = list()
+        workerPool = WorkerPool(3)
+        for number in range(100):
+            workerPool.execute(lambda number=number: (results.append(number), 
+                                                      threadNames.add(threading.currentThread().getName())))
+        workerPool.shutdown()
+        self.assertEquals(sorted(results), range(100))
+        self.assertFalse(threading.currentThread().getName() in threadNames)
+        
+    def testSequentialExecution(self):
+        """ Tests that a single worker executes the tasks in the calling thread. """
+        
+        threadNames = list()
+        workerPool = WorkerPool(1)
+        workerPool.execute(lambda: threadNames.append(threading.currentThread().getName()))
+        self.assertEquals(threadNames, [threading.currentThread().getName()])
+        workerPool.shutdown()
+        
+    def testErrorHandling(self):
+        """ Tests that unexpected errors are raised on shut down. """
+        
+        def _raiseError():
+            raise ValueError("")
+        
+        results = list()
+        workerPool = WorkerPool(2)
+        workerPool.execute(_raiseError)
+        workerPool.execute(lambda: results.append(True))
+        self.assertRaises(ValueError, workerPool.shutdown)
+        self.assertEquals(results, [True])
@@ -0,0 +1,222 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Tests the streaming creation of ZIP archives.
+"""
+
+
+import os
+from StringIO import StringIO
+import threading
+import unittest
+from zipfile import ZipFile
+
+from datafinder.core.archive_writer import ArchiveWriter
+from datafinder.persistence.error import PersistenceError
+
+
+__version__ = "$Revision-Id:$" 
+
+
+class _StreamMock(StringIO):
+    """ Records whether the stream has been closed and the maximum number of simultaneously open streams. """
+    
+    _lock = threading.Lock()
+    openStreamNumber = 0
+    maximumOpenStreamNumber = 0
+    
+    def __init__(self, content, error=None):
+        """ Constructor. """
+        
+        StringIO.__init__(self, content)
+        self.error = error
+        self.isClosed = False
+        self._lock.acquire()
+        try:
+            _StreamMock.openStreamNumber += 1
+            _StreamMock.maximumOpenStreamNumber = max(_StreamMock.maximumOpenStreamNumber, _StreamMock.openStreamNumber)
+        finally:
+            self._lock.release()
+        
+    def read(self, size=-1):
+        """ Raises the configured error. """
+        
+        if not self.error is None:
+            raise self.error
+        return StringIO.read(self, size)
+        
+    def close(self):
+        """ Records the closing. """
+        
+        self._lock.acquire()
+        try:
+            if not self.isClosed:
+                _StreamMock.openStreamNumber -= 1
+        finally:
+            self._lock.release()
+        self.isClosed = True
+
+
+class ArchiveWriterTestCase(unittest.TestCase):
+    """ Tests the streaming creation of ZIP archives. """
+    
+    def setUp(self):
+        """ Creates the test setup. """
+        
+        self._parts = list()
+        self._contents = dict()
+        self._streams = list()
+        _StreamMock.openStreamNumber = 0
+        _StreamMock.maximumOpenStreamNumber = 0
+        
+    def _storePart(self, dataStream):
+        """ Stores the archive part. """
+        
+        self._parts.append(dataStream.read())
+        
+    def _addMembers(self, writer, number, namePattern=u"/collection/leaf%i"):
+        """ Adds members of increasing size. """
+        
+        for index in range(number):
+            name = namePattern % index
+            self._contents[name] = os.urandom(500 * index)
+            writer.addMember(name, lambda name=name: self._openStream(name))
+            
+    def _openStream(self, name):
+        """ Opens a new stream of the member content. """
+        
+        stream = _StreamMock(self._contents[name])
+        self._streams.append(stream)
+        return stream
+            
+    def _checkPart(self, part, names):
+        """ Checks the names and the content of the archive members. """
+        
+        archive = ZipFile(StringIO(part))
+        self.assertEquals(archive.testzip(), None)
+        self.assertEquals(archive.namelist(), names)
+        for name in names:
+            self.assertEquals(archive.read(name), self._contents[name])
+    
+    def testSinglePart(self):
+        """ Tests the creation of a single archive part. """
+        
+        writer = ArchiveWriter(self._storePart, workerNumber=3, parallelCompressionLimit=1000)
+        self._addMembers(writer, 10)
+        writer.close()
+        self.assertEquals(writer.partNumber, 1)
+        self.assertEquals(writer.memberPartIndexes, [0] * 10)
+        self._checkPart(self._parts[0], sorted(self._contents.keys()))
+        for stream in self._streams:
+            self.assertTrue(stream.isClosed)
+            
+    def testOpenStreams(self):
+        """ Tests that large members are not kept open until they are written. """
+        
+        storeStarted = threading.Event()
+        def _blockingStorePart(dataStream):
+            storeStarted.wait()
+            self._storePart(dataStream)
+            
+        writer = ArchiveWriter(_blockingStorePart, workerNumber=2, parallelCompressionLimit=100)
+        self._addMembers(writer, 10)
+        storeStarted.set()
+        writer.close()
+        self._checkPart(self._parts[0], sorted(self._contents.keys()))
+        self.assertTrue(_StreamMock.maximumOpenStreamNumber <= 3)
+        self.assertEquals(_StreamMock.openStreamNumber, 0)
+        
+    def testMemberNames(self):
+        """ Tests that names which cannot be encoded in ASCII are stored in UTF-8. """
+        
+        writer = ArchiveWriter(self._storePart, workerNumber=1)
+        self._addMembers(writer, 2, u"/collection/\u00e4\u20ac%i")
+        writer.close()
+        self._checkPart(self._parts[0], sorted(self._contents.keys()))
+            
+    def testMultipleParts(self):
+        """ Tests the splitting into multiple archive parts. """
+        
+        writer = ArchiveWriter(self._storePart, 1000, 1, 1000)
+        self._addMembers(writer, 5)
+        writer.close()
+        self.assertEquals(writer.partNumber, 3)
+        self.assertEquals(writer.memberPartIndexes, [0, 0, 0, 1, 2])
+        self.assertEquals(len(self._parts), 3)
+        self._checkPart(self._parts[0], [u"/collection/leaf%i" % index for index in range(3)])
+        self._checkPart(self._parts[1], [u"/collection/leaf3"])
+        self._checkPart(self._parts[2], [u"/collection/leaf4"])
+        
+    def testEmptyArchive(self):
+        """ Tests that no part is created without members. """
+        
+        writer = ArchiveWriter(self._storePart)
+        writer.close()
+        self.assertEquals(writer.partNumber, 0)
+        self.assertEquals(self._parts, list())
+        
+    def testErrorHandling(self):
+        """ Tests the handling of errors when reading members and storing parts. """
+        
+        writer = ArchiveWriter(self._storePart, workerNumber=2)
+        writer.addMember(u"/leaf", lambda: _StreamMock("", IOError("")))
+        self.assertRaises(IOError, writer.close)
+        
+        def _failingStorePart(dataStream):
+            dataStream.read(10)
+            raise PersistenceError("")
+        
+        writer = ArchiveWriter(_failingStorePart, workerNumber=1, parallelCompressionLimit=10)
+        writer.addMember(u"/leaf", lambda: _StreamMock("x" * 1024 * 1024))
+        self.assertRaises(PersistenceError, writer.close)
+        
+        abortedParts = list()
+        def _recordingStorePart(dataStream):
+            try:
+                dataStream.read()
+            except PersistenceError:
+                abortedParts.append(True)
+                raise
+        
+        writer = ArchiveWriter(_recordingStorePart, workerNumber=1)
+        writer.addMember(u"/leaf", lambda: _StreamMock(""))
+        writer.addMember(u"/leaf2", lambda: _StreamMock("", IOError("")))
+        writer.addMember(u"/leaf3", lambda: _StreamMock(""))
+        self.assertRaises(IOError, writer.close)
+        self.assertEquals(abortedParts, [True])
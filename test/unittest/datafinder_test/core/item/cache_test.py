@@ -0,0 +1,158 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Implements test cases for the path-indexed item cache.
+"""
+
+
+import unittest
+
+from datafinder.core.item.cache import ItemCache
+
+
+__version__ = "$Revision-Id:$" 
+
+
+class ItemCacheTestCase(unittest.TestCase):
+    """ Implements the test cases. """
+    
+    def setUp(self):
+        """ Creates test setup. """
+        
+        self._cache = ItemCache(3)
+        
+    def testSuccessfulUsage(self):
+        """ Tests the standard set/get behavior. """
+        
+        self._cache["/"] = 0
+        self._cache["/a"] = 1
+        self.assertTrue("/a" in self._cache)
+        self.assertEquals(self._cache.get("/"), 0)
+        self.assertEquals(self._cache.get("/a"), 1)
+        self.assertEquals(self._cache.get("/a/b"), None)
+        self.assertEquals(self._cache.get("/a/b", 2), 2)
+        self.assertEquals(len(self._cache), 2)
+        
+        self._cache["/a"] = 3
+        self.assertEquals(self._cache.get("/a"), 3)
+        self.assertEquals(len(self._cache), 2)
+        
+        self._cache.clear()
+        self.assertFalse("/a" in self._cache)
+        self.assertEquals(len(self._cache), 0)
+        
+    def testInvalidate(self):
+        """ Tests the invalidation of sub trees. """
+        
+        self._cache = ItemCache(10)
+        for path in ["/", "/a", "/a/b", "/a/b/c", "/ab", "/d/e"]:
+            self._cache[path] = path
+        
+        self._cache.invalidate("/a")
+        self.assertFalse("/a" in self._cache)
+        self.assertFalse("/a/b" in self._cache)
+        self.assertFalse("/a/b/c" in self._cache)
+        self.assertTrue("/ab" in self._cache)
+        self.assertEquals(len(self._cache), 3)
+
+        self._cache.invalidate("/d/e")
+        self.assertFalse("/d" in self._cache)
+        self.assertEquals(len(self._cache), 2)
+        self._cache.invalidate("/unknown")
+        self.assertEquals(len(self._cache), 2)
+        
+        self._cache.invalidate("/")
+        self.assertEquals(len(self._cache), 0)
+        
+    def testEviction(self):
+        """ Tests the eviction of least recently used items. """
+        
+        self._cache["/a"] = 1
+        self._cache["/b"] = 2
+        self._cache["/c"] = 3
+        self._cache.get("/a")
+        self._cache["/d"] = 4
+        self.assertFalse("/b" in self._cache)
+        self.assertTrue("/a" in self._cache)
+        self.assertEquals(len(self._cache), 3)
+        
+    def testPinnedItemsAreNotEvicted(self):
+        """ Tests that items with cached descendants are not evicted. """
+        
+        self._cache["/a"] = 1
+        self._cache["/a/b"] = 2
+        self._cache["/c"] = 3
+        self._cache["/a/b/d"] = 4 # "/a" and "/a/b" are pinned
+        self.assertTrue("/a" in self._cache)
+        self.assertTrue("/a/b" in self._cache)
+        self.assertFalse("/c" in self._cache)
+        
+        self._cache["/e"] = 5 # "/a/b/d" is the least recently used unpinned item
+        self.assertFalse("/a/b/d" in self._cache)
+        self.assertTrue("/e" in self._cache)
+        
+        self._cache.get("/e")
+        self._cache["/f"] = 6 # "/a/b" became unpinned
+        self.assertFalse("/a/b" in self._cache)
+        self.assertTrue("/a" in self._cache)
+        self.assertTrue("/e" in self._cache)
+        self.assertEquals(len(self._cache), 3)
+        
+    def testEvictionPreparation(self):
+        """ Tests that items rejected by the eviction preparation are held until they are used again. """
+        
+        heldItems = set([1])
+        self._cache = ItemCache(2, lambda item: not item in heldItems)
+        self._cache["/a"] = 1
+        self._cache["/b"] = 2
+        self._cache["/c"] = 3 # "/a" is held
+        self.assertTrue("/a" in self._cache)
+        self.assertFalse("/b" in self._cache)
+        
+        heldItems.clear()
+        self._cache["/d"] = 4 # "/a" is no candidate until it is used again
+        self.assertTrue("/a" in self._cache)
+        self.assertFalse("/c" in self._cache)
+        
+        self._cache.get("/a")
+        self._cache["/e"] = 5
+        self.assertFalse("/d" in self._cache)
+        self._cache["/f"] = 6
+        self.assertFalse("/a" in self._cache)
+        self.assertEquals(len(self._cache), 2)
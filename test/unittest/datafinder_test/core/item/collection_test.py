@@ -109,6 +109,52 @@ class ItemCollectionTestCase(unittest.TestCase):
         collection.removeChild(item)
         self.assertTrue(len(collection.getChildren()) == 0)
 
+    def testHasChild(self):
+        """
+        Test for the hasChild method.
+        """
+
+        collection = ItemCollection("collection")
+        collection.itemFactory = SimpleMock(SimpleMock(list()))
+        parent = SimpleMock(list(), isLeaf=False, isLink=False)
+        parent.path = "/"
+        collection.parent = parent 
+        self.assertFalse(collection.hasChild("subitem"))
+
+        item = ItemCollection("SubItem")
+        item.itemFactory = SimpleMock(SimpleMock())
+        collection.addChild(item)
+        self.assertTrue(collection.hasChild("SubItem"))
+        self.assertFalse(collection.hasChild("subitem"))
+        self.assertTrue(collection.hasChild("subitem", True))
+        
+        collection.removeChild(item)
+        self.assertFalse(collection.hasChild("SubItem"))
+        self.assertFalse(collection.hasChild("subitem", True))
+
+    def testRemoveChildByIdentity(self):
+        """
+        Test that removeChild only removes the given child object.
+        """
+
+        collection = ItemCollection("collection")
+        collection.itemFactory = SimpleMock(SimpleMock(list()))
+        parent = SimpleMock(list(), isLeaf=False, isLink=False)
+        parent.path = "/"
+        collection.parent = parent 
+        item = ItemCollection("subitem")
+        item.itemFactory = SimpleMock(SimpleMock())
+        collection.addChild(item)
+
+        otherItem = ItemCollection("subitem")
+        collection.removeChild(otherItem)
+        self.assertTrue(item in collection.getChildren())
+
+        item.name = "renamed"
+        collection.removeChild(item)
+        self.assertTrue(len(collection.getChildren()) == 0)
+        self.assertFalse(collection.hasChild("subitem"))
+
     def testIsLeaf(self):
         """
         Test for the isLeaf method.
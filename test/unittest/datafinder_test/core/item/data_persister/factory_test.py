@@ -158,6 +158,32 @@ class DataPersisterFactoryTestCase(unittest.TestCase):
         dataPersister = self._factory.createDataPersister(self._itemMock)
         self.assertEquals(dataPersister.state, constants.ITEM_STATE_ARCHIVED_READONLY)
         self.assertTrue(isinstance(dataPersister, persisters.ArchiveDataPersister))
+        
+    def testReleaseArchiveFileSystems(self):
+        """ Tests that the opened archive parts are shared and released by the factory. """
+        
+        archiveFile = SimpleMock(name="/local/archive.zip")
+        rootItem = SimpleMock(state="", path="/archive", dataPersister=SimpleMock(archiveFile))
+        self._itemMock.itemFactory = SimpleMock(rootItem)
+        self._itemMock.properties[ARCHIVE_ROOT_COLLECTION_ID] = SimpleMock(value="/archive")
+        self._itemMock.properties[ARCHIVE_PART_INDEX_ID] = SimpleMock(value=0)
+        self._dataStoreMock.storeType = ""
+        self._factory._determineDatastore = SimpleMock(self._dataStoreMock)
+        archiveFileSystem = SimpleMock(SimpleMock(), released=False)
+        def _release():
+            archiveFileSystem.released = True
+        archiveFileSystem.release = _release
+        fileSystemClass = persisters.FileSystem
+        persisters.FileSystem = SimpleMock(archiveFileSystem)
+        try:
+            self.assertNotEquals(self._factory.createDataPersister(self._itemMock).fileStorer, None)
+            persisters.FileSystem = None # The opened archive part is reused
+            self.assertNotEquals(self._factory.createDataPersister(self._itemMock).fileStorer, None)
+        finally:
+            persisters.FileSystem = fileSystemClass
+        
+        self._factory.release()
+        self.assertTrue(archiveFileSystem.released)
 
     def testCreateDataPersiterWithHierachicalDataStore(self):
         """ Tests the creation with hierarchical data stores. """
@@ -41,6 +41,7 @@ Tests the different data persister implementations.
 """
 
 
+from StringIO import StringIO
 import unittest
 
 from datafinder.core.configuration.properties.constants import ARCHIVE_PART_COUNT_ID, CONTENT_IDENTIFIER_ID
@@ -128,6 +129,13 @@ class FlatDataPersisterTestCase(unittest.TestCase):
         self._fileStorerMock.error = PersistenceError("")
         self.assertRaises(PersistenceError, self._persister.copy, itemMock)
 
+    def testGenerateUniqueIdentifiers(self):
+        """ FlatDataPersisterTestCase: Tests the generation of content identifiers. """
+        
+        identifiers = [persisters._generateUniqueIdentifier("test") for _ in range(1000)]
+        self.assertEquals(len(set(identifiers)), 1000)
+        self.assertEquals(len(identifiers[0]), 40)
+
 
 class HierarchicalDataPersisterTestCase(unittest.TestCase):
     """ Tests the hierarchical data persister. """
@@ -232,6 +240,17 @@ class ArchivePersisterTestCase(unittest.TestCase):
         
         self._fileStorerMock.parent.value.error = PersistenceError("Does not exist.")
         self.assertRaises(PersistenceError, self._persister.retrieveData, -1)
+        
+    def testRetrieveRandomAccessData(self):
+        """ Test retrieveRandomAccessData method of the archive data persister. """
+        
+        localFileObject = StringIO("")
+        partFileStorerMock = SimpleMock(localFileObject, identifier="/base_1", canReadDataRange=True)
+        self._fileStorerMock.parent.value = partFileStorerMock
+        self.assertEquals(self._persister.retrieveRandomAccessData(1).name, "/base_1")
+        
+        partFileStorerMock.canReadDataRange = False
+        self.assertEquals(self._persister.retrieveRandomAccessData(1), localFileObject)
 
     def testStoreData(self):
         """ Test the storeData method of the archive persister. """
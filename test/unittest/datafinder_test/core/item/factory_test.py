@@ -0,0 +1,88 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Implements test cases of the item factory.
+"""
+
+
+import unittest
+
+from datafinder.core.item.factory import ItemFactory
+from datafinder_test.mocks import SimpleMock
+
+
+__version__ = "$Revision-Id:$" 
+
+
+class ItemFactoryTestCase(unittest.TestCase):
+    """ Implements the test cases. """
+    
+    def setUp(self):
+        """ Creates test setup. """
+        
+        fileSystem = SimpleMock(SimpleMock(identifier="/b", isCollection=False, isLink=False, isLeaf=True))
+        self._factory = ItemFactory(fileSystem, SimpleMock(maximumItemCacheSize=3))
+        self._rootFileStorer = SimpleMock(identifier="/")
+        self._root = self._factory.create("/", fileStorer=self._rootFileStorer)
+        self._root._children = list()
+        self._root._childrenPopulated = True
+        
+    def _createLeaf(self, path):
+        """ Creates a leaf item without parent. """
+        
+        fileStorer = SimpleMock(identifier=path, isCollection=False, isLink=False, isLeaf=True)
+        return self._factory.create(path, fileStorer=fileStorer)
+    
+    def testEvictionOfReferencedItems(self):
+        """ Tests that the eviction of an item referenced by its parent resets the children of the parent. """
+        
+        collection = self._factory.createCollection("a", self._root)
+        leaf = self._factory.createLeaf("b", self._root)
+        self._createLeaf("/c") # Evicts "/a"
+        
+        self.assertFalse(self._root.childrenPopulated)
+        self.assertTrue(self._factory.create("/b") is leaf)
+        self._rootFileStorer.getChildren = SimpleMock([leaf.fileStorer])
+        self.assertEquals(self._root.getChildren(), [leaf]) # The cached sibling is reused
+        self.assertFalse(self._factory.create("/a") is collection)
+        
+        self._createLeaf("/d")
+        self._createLeaf("/e")
+        self.assertTrue(self._factory.create("/") is self._root)
+        self.assertEquals(len(self._factory._itemCache), 3)
@@ -0,0 +1,335 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" Implements tests of the importer. """
+
+
+from StringIO import StringIO
+import time
+import unittest
+
+from datafinder.core.error import ItemError
+from datafinder.core.item.collection import ItemCollection
+from datafinder.core.item.leaf import ItemLeaf
+from datafinder.core.item.visitor.importer import Importer
+from datafinder.persistence.common.connection.pool import ConnectionPool
+from datafinder.persistence.error import PersistenceError
+from datafinder_test.mocks import SimpleMock
+
+
+__version__ = "$Revision-Id:$" 
+
+
+class _ConnectionPoolMock(ConnectionPool):
+    """ Small connection pool which fails instead of waiting forever. """
+    
+    def __init__(self):
+        """ Constructor. """
+        
+        ConnectionPool.__init__(self, 2, timeout=1)
+        
+    def _createConnection(self):
+        """ Creates a dummy connection. """
+        
+        return object()
+    
+    
+class _ConnectionStream(StringIO):
+    """ Content stream which uses a connection until it is closed. """
+    
+    def __init__(self, content, connectionPool):
+        """ Constructor. """
+        
+        StringIO.__init__(self, content)
+        self._connectionPool = connectionPool
+        self._connection = connectionPool.acquire()
+        time.sleep(0.1) # Allows other workers to open their streams as well
+        
+    def close(self):
+        """ Releases the connection. """
+        
+        if not self.closed:
+            self._connectionPool.release(self._connection)
+        StringIO.close(self)
+        
+
+class _DataPersisterMock(object):
+    """ Provides the name of the item as its content. """
+    
+    state = None
+    connectionPool = None
+    
+    def __init__(self, name):
+        """ Constructor. """
+        
+        self.name = name
+        
+    @property
+    def fileStorer(self):
+        """ Provides the connection pool of the source. """
+        
+        return SimpleMock(fileSystem=SimpleMock(connectionPool=self.connectionPool))
+        
+    def retrieveData(self):
+        """ Returns the content. """
+        
+        if self.connectionPool is None:
+            return StringIO(self.name)
+        return _ConnectionStream(self.name, self.connectionPool)
+    
+
+def _initSourceItem(item, parent):
+    """ Initializes a source item and adds it to the parent collection. """
+    
+    item.path = "/" + item.name
+    if not parent is None:
+        item.path = parent.path + "/" + item.name
+        parent.getChildren().append(item)
+    item.itemFactory = SimpleMock(SimpleMock(canRetrieveData=True), isManaged=True)
+    item._dataPersister = _DataPersisterMock(item.name)
+    item._properties = dict()
+    return item
+
+
+def _createSourceCollection(name, parent=None):
+    """ Creates a source collection without children. """
+    
+    collection = ItemCollection(name)
+    collection._children = list()
+    return _initSourceItem(collection, parent)
+
+
+def _createSourceLeaf(name, parent):
+    """ Creates a source leaf whose content is its name. """
+    
+    return _initSourceItem(ItemLeaf(name), parent)
+    
+
+class _TargetItem(object):
+    """ Records the creation and the content of an imported item. """
+    
+    connectionPool = None
+    
+    def __init__(self, name, parent, error=None):
+        """ Constructor. """
+        
+        self.name = name
+        self.parent = parent
+        self.path = "/" + name
+        if not parent is None:
+            self.path = parent.path + "/" + name
+        self.error = error
+        self.created = False
+        self.invalidated = False
+        self.content = None
+        self.dataStream = None
+        
+    @property
+    def dataPersister(self):
+        """ Provides the connection pool of the target. """
+        
+        return SimpleMock(fileStorer=SimpleMock(fileSystem=SimpleMock(connectionPool=self.connectionPool)))
+        
+    def create(self, _):
+        """ Creates the item or raises the configured error. """
+        
+        if not self.error is None:
+            raise self.error
+        self.created = True
+        
+    def storeData(self, dataStream):
+        """ Reads the content using a connection of the pool. """
+        
+        self.dataStream = dataStream
+        try:
+            if self.connectionPool is None:
+                self.content = dataStream.read()
+            else:
+                try:
+                    connection = self.connectionPool.acquire()
+                except PersistenceError, error:
+                    raise ItemError(error.message)
+                try:
+                    self.content = dataStream.read()
+                finally:
+                    self.connectionPool.release(connection)
+        finally:
+            dataStream.close()
+            
+    def delete(self, **_):
+        """ Deletes the item. """
+        
+        self.created = False
+        
+    def invalidate(self):
+        """ Records the invalidation. """
+        
+        self.invalidated = True
+    
+
+class _ItemFactoryMock(object):
+    """ Creates target items and remembers them by path. """
+    
+    def __init__(self, failingNames=None):
+        """ Constructor. """
+        
+        self.failingNames = failingNames or list()
+        self.items = dict()
+        
+    @staticmethod
+    def determineValidItemName(name):
+        """ Keeps the name. """
+        
+        return name
+        
+    def createCollection(self, name, parent):
+        """ Creates a target collection. """
+        
+        error = None
+        if name in self.failingNames:
+            error = ItemError("Cannot create '%s'." % name)
+        return self._createItem(name, parent, error)
+        
+    def createLeaf(self, name, parent):
+        """ Creates a target leaf. """
+        
+        return self._createItem(name, parent)
+    
+    def _createItem(self, name, parent, error=None):
+        """ Creates and remembers the target item. """
+        
+        item = _TargetItem(name, parent, error)
+        self.items[item.path] = item
+        return item
+        
+
+class _FileSystemMock(object):
+    """ Records the transaction handling. """
+    
+    def __init__(self, rollbackError=None):
+        """ Constructor. """
+        
+        self.rollbackError = rollbackError
+        self.calls = list()
+        
+    def beginTransaction(self):
+        """ Records the call. """
+        
+        self.calls.append("beginTransaction")
+        
+    def commitTransaction(self):
+        """ Records the call. """
+        
+        self.calls.append("commitTransaction")
+        
+    def rollbackTransaction(self):
+        """ Records the call and raises the configured error. """
+        
+        self.calls.append("rollbackTransaction")
+        if not self.rollbackError is None:
+            raise self.rollbackError
+
+
+class ImporterTestCase(unittest.TestCase):
+    """ Tests the importer. """
+    
+    def setUp(self):
+        """ Creates the source tree /source[/a, /b[/c], /d]. """
+        
+        self._source = _createSourceCollection("source")
+        _createSourceLeaf("a", self._source)
+        collection = _createSourceCollection("b", self._source)
+        _createSourceLeaf("c", collection)
+        _createSourceLeaf("d", self._source)
+        
+        self._itemFactory = _ItemFactoryMock()
+        self._fileSystem = _FileSystemMock()
+        self._targetCollection = _TargetItem("target", None)
+        self._targetCollection.itemFactory = self._itemFactory
+        self._targetCollection.fileStorer = SimpleMock(fileSystem=self._fileSystem)
+        self._importer = Importer()
+        
+    def testImport(self):
+        """ Tests the import of the complete tree. """
+        
+        self._importer.performImport(self._source, self._targetCollection)
+        self.assertEquals(self._fileSystem.calls, ["beginTransaction", "commitTransaction"])
+        for path, content in [("/target/source/a", "a"), ("/target/source/b/c", "c"), ("/target/source/d", "d")]:
+            self.assertEquals(self._itemFactory.items[path].content, content)
+            self.assertTrue(isinstance(self._itemFactory.items[path].dataStream, StringIO)) # Not buffered
+        self.assertEquals(len(self._importer.importedLeafs), 3)
+        
+    def testFailingWalk(self):
+        """ Tests the roll back of the transaction when the walk fails partway. """
+        
+        self._itemFactory.failingNames.append("b")
+        self.assertRaises(ItemError, self._importer.performImport, self._source, self._targetCollection)
+        self.assertEquals(self._fileSystem.calls, ["beginTransaction", "rollbackTransaction"])
+        self.assertEquals(self._itemFactory.items["/target/source/a"].content, "a")
+        self.assertFalse("/target/source/d" in self._itemFactory.items)
+        for path in ["/target/source", "/target/source/a", "/target/source/b"]:
+            self.assertTrue(self._itemFactory.items[path].invalidated)
+        
+        # The original error is not masked by roll back problems
+        self._fileSystem.rollbackError = PersistenceError("Cannot roll back.")
+        try:
+            self._importer.performImport(self._source, self._targetCollection)
+            self.fail("No error has been raised.")
+        except ItemError, error:
+            self.assertEquals(error.message, "Cannot create 'b'.")
+            
+    def testSharedConnectionPool(self):
+        """ Tests the import between repositories sharing a connection pool with less connections than workers. """
+        
+        connectionPool = _ConnectionPoolMock()
+        _DataPersisterMock.connectionPool = connectionPool
+        _TargetItem.connectionPool = connectionPool
+        try:
+            for name in ["e", "f", "g", "h", "i", "j"]:
+                _createSourceLeaf(name, self._source)
+            self._importer.performImport(self._source, self._targetCollection)
+            self.assertEquals(len(self._importer.importedLeafs), 9)
+            self.assertFalse(isinstance(self._itemFactory.items["/target/source/e"].dataStream, StringIO))
+            
+            # Enough connections for all workers
+            self._importer = Importer(workerNumber=1)
+            self._importer.performImport(self._source, self._targetCollection)
+            self.assertTrue(isinstance(self._itemFactory.items["/target/source/e"].dataStream, StringIO))
+        finally:
+            _DataPersisterMock.connectionPool = None
+            _TargetItem.connectionPool = None
@@ -40,25 +40,250 @@ Tests the data adapter implementation.
 """
 
 
+import threading
+from StringIO import StringIO
 from unittest import TestCase
 
 from boto.exception import S3ResponseError
-from datafinder.persistence.adapters.amazonS3.data.adapter import DataS3Adapter, _cleanupTemporaryFile, _temporaryFiles
+from boto.s3.prefix import Prefix
+from datafinder.persistence.adapters.amazonS3 import constants
+from datafinder.persistence.adapters.amazonS3.data.adapter import DataS3Adapter
+from datafinder.persistence.common.cache import LruCache
 from datafinder.persistence.error import PersistenceError
 from datafinder_test.mocks import SimpleMock 
 
 
 __version__ = "$Revision-Id$" 
 
+
+class _KeyStandIn(object):
+    """ Represents a stored object. """
+    
+    def __init__(self, content, bucket=None, name=None):
+        """ Constructor. """
+        
+        self._bucket = bucket
+        self.name = name
+        self.content = content
+        self.size = len(content)
+        self.last_modified = "2011-05-03T08:15:30.000Z"
+        self.content_type = "application/octet-stream"
+        self.metadata = dict()
+        self._response = None
+        
+    def delete(self):
+        """ Removes the object. """
+        
+        del self._bucket.keys[self.name]
+        
+    def open_read(self, headers=None):
+        """ Opens the response starting at the requested position. """
+        
+        start = 0
+        if not headers is None:
+            start = int(headers["Range"][len("bytes="):-1])
+        self._response = StringIO(self._bucket.keys[self.name].content[start:])
+        self._bucket.openResponseNumber += 1
+        
+    def read(self, size=0):
+        """ Reads from the response. """
+        
+        return self._response.read(size or -1)
+    
+    def close(self, fast=False):
+        """ Releases the response. """
+        
+        if not self._response is None:
+            self._response = None
+            self._bucket.openResponseNumber -= 1
+        
+    def set_contents_from_string(self, content):
+        """ Stores the content. """
+        
+        self._bucket.keys[self.name] = _KeyStandIn(content, self._bucket, self.name)
+        
+    def set_contents_from_file(self, fileObject, query_args, **_):
+        """ Stores a part of a multipart upload. """
+        
+        self._bucket.fail()
+        parameters = dict([parameter.split("=") for parameter in query_args.split("&")])
+        upload = [upload for upload in self._bucket.uploads if upload.id == parameters["uploadId"]][0]
+        upload.parts[int(parameters["partNumber"])] = fileObject.read()
+        
+    def get_contents_as_string(self, headers):
+        """ Returns the requested byte range. """
+        
+        self._bucket.fail()
+        start, end = headers["Range"][len("bytes="):].split("-")
+        return self._bucket.keys[self.name].content[int(start):int(end) + 1]
+        
+
+class _UploadStandIn(object):
+    """ Collects the copied parts of a multipart upload. """
+    
+    def __init__(self, s3, bucket, keyname):
+        """ Constructor. """
+        
+        self.id = str(len(bucket.uploads))
+        self._s3 = s3
+        self._bucket = bucket
+        self._keyname = keyname
+        self.parts = dict()
+        
+    def copy_part_from_key(self, bucketname, keyname, partNumber, start, end):
+        """ Copies the given range of the source object. """
+        
+        self.parts[partNumber] = self._s3.buckets[bucketname].keys[keyname].content[start:end + 1]
+        
+    def complete_upload(self):
+        """ Joins the parts. """
+        
+        content = "".join([self.parts[partNumber] for partNumber in sorted(self.parts)])
+        self._bucket.keys[self._keyname] = _KeyStandIn(content, self._bucket, self._keyname)
+        
+    def cancel_upload(self):
+        """ Discards the parts. """
+        
+        self.parts.clear()
+        
+
+class _BucketStandIn(object):
+    """ Keeps objects in memory and supports server-side copies. """
+    
+    def __init__(self, s3, name):
+        """ Constructor. """
+        
+        self._s3 = s3
+        self.name = name
+        self.keys = dict()
+        self.uploads = list()
+        self.failureNumber = 0
+        self.openResponseNumber = 0
+        self.pageSize = 1000
+        self._lock = threading.Lock()
+        
+    def fail(self):
+        """ Raises a server error as long as failures are requested. """
+        
+        self._lock.acquire()
+        try:
+            if self.failureNumber > 0:
+                self.failureNumber -= 1
+                raise S3ResponseError(500, "Internal Server Error")
+        finally:
+            self._lock.release()
+        
+    def get_key(self, keyname):
+        """ Returns the object or C{None}. """
+        
+        return self.keys.get(keyname)
+    
+    def new_key(self, keyname):
+        """ Returns a new object. """
+        
+        return _KeyStandIn("", self, keyname)
+    
+    def get_all_keys(self, prefix, max_keys=None, delimiter=None, marker=""):
+        """ Returns a page of the objects and the common prefixes following the marker. """
+        
+        result = _ResultSet()
+        for keyname in sorted(self.keys):
+            if keyname.startswith(prefix):
+                delimiterPosition = -1
+                if delimiter:
+                    delimiterPosition = keyname.find(delimiter, len(prefix))
+                if delimiterPosition < 0:
+                    entry = self.keys[keyname]
+                else:
+                    entry = Prefix(self, keyname[:delimiterPosition + 1])
+                if entry.name > marker and not (result and result[-1].name == entry.name):
+                    result.append(entry)
+        pageSize = min(max_keys or self.pageSize, self.pageSize)
+        result.is_truncated = len(result) > pageSize
+        del result[pageSize:]
+        return result
+    
+    def copy_key(self, keyname, sourceBucketname, sourceKeyname):
+        """ Copies an object on the server. """
+        
+        self.keys[keyname] = _KeyStandIn(self._s3.buckets[sourceBucketname].keys[sourceKeyname].content, self, keyname)
+        
+    def initiate_multipart_upload(self, keyname, *_, **__):
+        """ Starts a multipart upload. """
+        
+        upload = _UploadStandIn(self._s3, self, keyname)
+        self.uploads.append(upload)
+        return upload
+    
+
+class _ResultSet(list):
+    """ Page of a listing. """
+    
+    is_truncated = False
+    next_marker = None
+    
+
+class _S3StandIn(object):
+    """ Simple local stand-in of the S3 service. """
     
+    def __init__(self):
+        """ Constructor. """
+        
+        self.buckets = dict()
+        
+    def lookup(self, bucketname):
+        """ Returns the bucket. """
+        
+        return self.buckets.setdefault(bucketname, _BucketStandIn(self, bucketname))
+    
+    def get_bucket(self, bucketname, **_):
+        """ Returns the bucket. """
+        
+        return self.buckets[bucketname]
+
+    
+class _SingleConnectionPool(object):
+    """ Connection pool providing a single connection which fails instead of waiting for it. """
+    
+    def __init__(self, s3, accessKey):
+        """ Constructor. """
+        
+        self._s3 = s3
+        self.accessKey = accessKey
+        self._inUse = False
+        
+    def acquire(self):
+        """ Returns the connection if it is not in use. """
+        
+        if self._inUse:
+            raise PersistenceError("The connection is already in use.")
+        self._inUse = True
+        return self._s3
+    
+    def release(self, _):
+        """ Releases the connection. """
+        
+        self._inUse = False
+    
+
 class DataS3AdapterTestCase(TestCase):
     """ Tests the S3 - data adapter implementation. """
     
     def setUp(self):
         """ Creates default adapter usable by test cases."""
         
-        self._defaultAdapter = DataS3Adapter("/path/identify", SimpleMock(SimpleMock(SimpleMock(SimpleMock(SimpleMock(SimpleMock(SimpleMock(SimpleMock()))))))), SimpleMock(SimpleMock()))
+        self._s3 = _S3StandIn()
+        self._bucket = self._s3.lookup("bucket")
+        for keyname in ["/path/identify", "/path/sub/a", "/path/sub/b", "/path/", "/other"]:
+            self._bucket.keys[keyname] = _KeyStandIn("content", self._bucket, keyname)
+        self._listingCache = LruCache()
+        self._defaultAdapter = self._createAdapter("/path/identify")
         self.responseError = S3ResponseError("","","")
+        
+    def _createAdapter(self, identifier):
+        """ Creates an adapter using the S3 stand-in. """
+        
+        return DataS3Adapter(identifier, SimpleMock(self._s3), "bucket", listingCache=self._listingCache)
                        
     def testGetBucket(self):
         """ Tests the getBucket method"""
@@ -80,29 +305,32 @@ class DataS3AdapterTestCase(TestCase):
         """ Tests the normal behavior of the isLeaf method. """
         
         #true
-        adapter = DataS3Adapter("identifier", SimpleMock(SimpleMock()), SimpleMock() )
-        self.assertTrue(adapter.isLeaf)
-        adapter = DataS3Adapter("", SimpleMock(SimpleMock()), SimpleMock())
-        self.assertTrue(adapter.isLeaf)
+        self.assertTrue(self._defaultAdapter.isLeaf)
+        self.assertTrue(self._createAdapter("/unknown").isLeaf)
         #false
-        adapter = DataS3Adapter("/", SimpleMock(SimpleMock()), '')
-        self.assertFalse(adapter.isLeaf)
+        self.assertFalse(self._createAdapter("/").isLeaf)
+        self.assertFalse(self._createAdapter("/path").isLeaf)
         
     def testIsCollection(self):
         """ Tests the normal behavior of the isResource method. """
         
         #true
-        adapter = DataS3Adapter("/", SimpleMock(SimpleMock()), SimpleMock())
-        self.assertTrue(adapter.isCollection)
+        self.assertTrue(self._createAdapter("/").isCollection)
+        self.assertTrue(self._createAdapter("/path/sub").isCollection)
+        self.assertTrue(self._listingCache.get("/path/sub").isCollection)
         #false
-        adapter = DataS3Adapter("identifier", SimpleMock(SimpleMock()), '')
-        self.assertFalse(adapter.isCollection)
+        self.assertFalse(self._defaultAdapter.isCollection)
+        #failure
+        adapter = DataS3Adapter("/identifier", SimpleMock(SimpleMock(SimpleMock(error=self.responseError))), "")
+        self.assertRaises(PersistenceError, getattr, adapter, "isCollection")
        
     def testCanAddChildren(self):
         """" Tests the property to add children """
         
         #false
         self.assertFalse(self._defaultAdapter.canAddChildren)
+        #true
+        self.assertTrue(self._createAdapter("/path").canAddChildren)
     
     def testCreateResource(self):
         """ Tests the normal behavior of the createResource createKey method."""  
@@ -121,14 +349,23 @@ class DataS3AdapterTestCase(TestCase):
         """ Tests the normal behavior of the getChildren method. """
         
         #success
-        adapter = DataS3Adapter("/identifier", SimpleMock(SimpleMock(SimpleMock(SimpleMock(keyset = 1)))), SimpleMock())
-        self.assertEquals(adapter.getChildren(), list())
-        adapter = DataS3Adapter("/", SimpleMock(SimpleMock(SimpleMock(returnValue = []))), SimpleMock())
-        self.assertEquals(adapter.getChildren(), list())
+        self.assertEquals(list(self._defaultAdapter.getChildren()), list())
+        self.assertEquals(list(self._createAdapter("/").getChildren()), [u"/other", u"/path"])
+        self.assertEquals(list(self._createAdapter("/path").getChildren()), [u"/path/identify", u"/path/sub"])
+        self.assertEquals(list(self._createAdapter("/path/sub").getChildren()), [u"/path/sub/a", u"/path/sub/b"])
+        listingEntry = self._listingCache.get("/path/sub/a")
+        self.assertFalse(listingEntry.isCollection)
+        self.assertEquals(listingEntry.size, 7)
+        self.assertEquals(listingEntry.lastModified, "2011-05-03T08:15:30.000Z")
+        self.assertTrue(self._listingCache.get("/path").isCollection)
+        #paged
+        self._bucket.pageSize = 1
+        self.assertEquals(list(self._createAdapter("/").getChildren()), [u"/other", u"/path"])
+        self.assertEquals(list(self._createAdapter("/path").getChildren()), [u"/path/identify", u"/path/sub"])
         #failure
         adapter = DataS3Adapter("/", SimpleMock(SimpleMock(SimpleMock(error=self.responseError))), SimpleMock())
         try:
-            adapter.getChildren()
+            list(adapter.getChildren())
             self.fail("PersistenceError not thrown")
         except PersistenceError:
             self.assertTrue(True)
@@ -137,11 +374,11 @@ class DataS3AdapterTestCase(TestCase):
         """ Tests the normal behavior of the writeData method. """
         
         #success
-        self._defaultAdapter.writeData("Testen")
+        self._defaultAdapter.writeData(StringIO("Testen"))
         #failure
         adapter = DataS3Adapter("", SimpleMock(SimpleMock(SimpleMock(error=self.responseError))), '')
         try:
-            adapter.writeData("Testen")
+            adapter.writeData(StringIO("Testen"))
             self.fail("PersistenceError not thrown")
         except PersistenceError:
             self.assertTrue(True)
@@ -150,15 +387,117 @@ class DataS3AdapterTestCase(TestCase):
         """ Tests the normal behavior of the readData method. """
         
         #success
-        adapter = DataS3Adapter("identifier", SimpleMock(SimpleMock(SimpleMock(SimpleMock()))), SimpleMock())
-        fileObject = adapter.readData()
-        self.assertEquals(fileObject.read(), "")
+        data = self._defaultAdapter.readData()
+        self.assertEquals(data.read(3), "con")
+        self.assertEquals(data.read(), "tent")
+        data.close()
+        self.assertEquals(self._bucket.openResponseNumber, 0)
+        self.assertRaises(ValueError, data.read)
+        #failure: does not exist
+        self.assertRaises(PersistenceError, self._createAdapter("/anotherIdentifier").readData)
+        
+    def testReadDataSeek(self):
+        """ Tests seeking within the read data. """
+        
+        self._bucket.keys["/path/identify"] = _KeyStandIn("0123456789", self._bucket, "/path/identify")
+        #spilled content
+        data = self._defaultAdapter.readData()
+        self.assertEquals(data.read(4), "0123")
+        data.seek(-2, 1)
+        self.assertEquals(data.tell(), 2)
+        self.assertEquals(data.read(3), "234")
+        data.seek(-1, 2)
+        self.assertEquals(data.read(), "9")
+        self.assertEquals(self._bucket.openResponseNumber, 0)
+        data.close()
+        
+        #large content is requested again from the new position
+        maximumSpillSize = constants.MAXIMUM_SPILL_SIZE
+        constants.MAXIMUM_SPILL_SIZE = 4
+        try:
+            data = self._defaultAdapter.readData()
+            self.assertEquals(data.read(2), "01")
+            data.seek(6)
+            self.assertEquals(data.tell(), 6)
+            self.assertEquals(data.read(2), "67")
+            data.seek(1)
+            self.assertEquals(data.read(), "123456789")
+            data.seek(3)
+            self.assertEquals(self._bucket.openResponseNumber, 0)
+            self.assertEquals(data.read(1), "3")
+            data.close()
+            self.assertEquals(self._bucket.openResponseNumber, 0)
+        finally:
+            constants.MAXIMUM_SPILL_SIZE = maximumSpillSize
+        
+    def testTransferParts(self):
+        """ Tests the concurrent transfer of parts. """
+        
+        s3 = _S3StandIn()
+        adapter = DataS3Adapter("/identifier", SimpleMock(s3), "bucket", partSize=4, transferThreadNumber=2)
+        bucket = s3.buckets["bucket"]
+        bucket.failureNumber = 2
+        adapter.writeData(StringIO("0123456789"))
+        self.assertEquals(bucket.keys["/identifier"].content, "0123456789")
+        self.assertEquals(len(bucket.uploads[0].parts), 3)
+        
+        bucket.failureNumber = 2
+        data = adapter.readData()
+        self.assertEquals(data.read(3), "012")
+        self.assertEquals(data.read(), "3456789")
+        data.seek(5)
+        self.assertEquals(data.read(), "56789")
+        data.close()
+        bucket.failureNumber = 10
+        self.assertRaises(IOError, adapter.readData().read)
+        bucket.failureNumber = 0
+        
+        #small content
+        adapter.writeData(StringIO("012"))
+        self.assertEquals(bucket.keys["/identifier"].content, "012")
+        
+        #failure: retries are exhausted
+        bucket.failureNumber = 10
+        self.assertRaises(PersistenceError, adapter.writeData, StringIO("0123456789"))
+        self.assertEquals(bucket.uploads[1].parts, dict())
+        self.assertEquals(bucket.keys["/identifier"].content, "012")
+        
+    def testNoNestedConnections(self):
+        """ Tests that writing and copying do not hold a connection while the transfers acquire their own. """
+        
+        s3 = _S3StandIn()
+        adapter = DataS3Adapter("/identifier", _SingleConnectionPool(s3, "key"), "bucket", partSize=4, transferThreadNumber=1)
+        adapter.writeData(StringIO("0123456789"))
+        self.assertEquals(s3.buckets["bucket"].keys["/identifier"].content, "0123456789")
+        
+        destination = DataS3Adapter("/copied", _SingleConnectionPool(s3, "anotherKey"), "bucket", partSize=4, transferThreadNumber=1)
+        adapter.copy(destination)
+        self.assertEquals(s3.buckets["bucket"].keys["/copied"].content, "0123456789")
+        
+        adapter.copy(DataS3Adapter("/copiedOnServer", adapter._connectionPool, "bucket"))
+        self.assertEquals(s3.buckets["bucket"].keys["/copiedOnServer"].content, "0123456789")
+        
+    def testBucketOfAcquiredConnection(self):
+        """ Tests that the bucket is always accessed using the acquired connection. """
+        
+        connectionPool = SimpleMock(self._s3)
+        adapter = DataS3Adapter("/path/identify", connectionPool, "bucket")
+        self.assertTrue(adapter.exists())
+        
+        connectionPool.value = _S3StandIn() # E.g., the connections have been replaced after updating the credentials
+        connectionPool.value.lookup("bucket")
+        self.assertFalse(adapter.exists())
+        adapter.writeData(StringIO("content"))
+        self.assertEquals(connectionPool.value.buckets["bucket"].keys["/path/identify"].content, "content")
         
     def testDelete (self):
         """ Tests the normal behavior of the delete method. """
         
         #success
+        list(self._createAdapter("/path").getChildren())
         self._defaultAdapter.delete()
+        self.assertFalse("/path/identify" in self._bucket.keys)
+        self.assertFalse("/path/identify" in self._listingCache)
         #failure
         adapter = DataS3Adapter("/anotherIdentifier", SimpleMock(SimpleMock(SimpleMock(error=self.responseError))), SimpleMock())
         try: 
@@ -178,8 +517,9 @@ class DataS3AdapterTestCase(TestCase):
         """ Tests the normal behavior of the move method. """
         
         #success        
-        destinationBucket = SimpleMock(SimpleMock(SimpleMock()))
-        self._defaultAdapter.move(destinationBucket)
+        self._defaultAdapter.move(self._createAdapter("/moved"))
+        self.assertFalse("/path/identify" in self._bucket.keys)
+        self.assertEquals(self._bucket.keys["/moved"].content, "content")
         
     def testCopy(self):
         """ Tests the normal behavior of the copy method. """
@@ -187,6 +527,8 @@ class DataS3AdapterTestCase(TestCase):
         #success
         destinationBucket = SimpleMock(SimpleMock(SimpleMock(SimpleMock())))
         self._defaultAdapter.copy(destinationBucket)
+        self._defaultAdapter.copy(self._createAdapter("/copied"))
+        self.assertEquals(self._bucket.keys["/copied"].content, "content")
         #failure
         adapter = DataS3Adapter("/anotherIdentifier", SimpleMock(SimpleMock(SimpleMock(error=self.responseError))), SimpleMock())
         try:
@@ -195,15 +537,40 @@ class DataS3AdapterTestCase(TestCase):
         except PersistenceError:
             self.assertTrue(True)
         
+    def testCopyOnServer(self):
+        """ Tests the server-side copy within the same account. """
+        
+        s3 = _S3StandIn()
+        connectionPool = SimpleMock(s3, accessKey="key")
+        source = DataS3Adapter("/source", connectionPool, "source")
+        s3.buckets["source"].keys["/source"] = _KeyStandIn("0123456789")
+        
+        destination = DataS3Adapter("/destination", SimpleMock(s3, accessKey="key"), "destination")
+        source.copy(destination)
+        self.assertEquals(s3.buckets["destination"].keys["/destination"].content, "0123456789")
+        
+        maximumSingleCopySize, copyPartSize = constants.MAXIMUM_SINGLE_COPY_SIZE, constants.COPY_PART_SIZE
+        constants.MAXIMUM_SINGLE_COPY_SIZE, constants.COPY_PART_SIZE = 5, 4
+        try:
+            destination = DataS3Adapter("/large", connectionPool, "source")
+            source.copy(destination)
+        finally:
+            constants.MAXIMUM_SINGLE_COPY_SIZE, constants.COPY_PART_SIZE = maximumSingleCopySize, copyPartSize
+        self.assertEquals(s3.buckets["source"].keys["/large"].content, "0123456789")
+        self.assertEquals(len(s3.buckets["source"].uploads[0].parts), 3)
+        
+        #failure: source does not exist
+        self.assertRaises(PersistenceError, DataS3Adapter("/unknown", connectionPool, "source").copy, destination)
+        
     def testExists(self):
         """ Tests the normal behavior of the exists method. """
         
         #exists
-        adapter = DataS3Adapter("/anotherIdentifier", SimpleMock(SimpleMock(SimpleMock(SimpleMock()))), SimpleMock())
-        self.assertTrue(adapter.exists())
+        self.assertTrue(self._defaultAdapter.exists())
+        self.assertTrue(self._createAdapter("/path/sub").exists())
+        self.assertTrue(self._createAdapter("/").exists())
         #does not exist
-        adapter = DataS3Adapter("/anotherIdentifier", SimpleMock(SimpleMock(SimpleMock())), "" )
-        self.assertFalse(adapter.exists())
+        self.assertFalse(self._createAdapter("/anotherIdentifier").exists())
         #error
         adapter = DataS3Adapter("/anotherIdentifier", SimpleMock(SimpleMock(SimpleMock(error=self.responseError))), SimpleMock())
         try:
@@ -211,12 +578,3 @@ class DataS3AdapterTestCase(TestCase):
             self.fail("PersistenceError not thrown")
         except PersistenceError:
             self.assertTrue(True)
-        
-    def testCleanupTemporary(self):
-        """ Testing the cleanup procedure """
-        
-        #success and failure
-        files= list()
-        files.append(SimpleMock(error = PersistenceError("")))
-        _cleanupTemporaryFile(files)
-            
@@ -47,6 +47,7 @@ from boto.s3.connection import S3Connection
 from datafinder.persistence.common.configuration import BaseConfiguration
 from datafinder.persistence.adapters.amazonS3 import factory
 from datafinder.persistence.adapters.amazonS3.data.adapter import DataS3Adapter
+from datafinder.persistence.adapters.amazonS3.metadata.adapter import MetadataS3Adapter
 from datafinder.persistence.adapters.amazonS3.connection_pool import S3ConnectionPool
 from datafinder_test.mocks import SimpleMock
 
@@ -54,6 +55,21 @@ from datafinder_test.mocks import SimpleMock
 __version__ = "$Revision-Id$" 
 
 
+class _ConnectionMock(object):
+    """ Counts the bucket look ups. """
+    
+    def __init__(self):
+        """ Constructor. """
+        
+        self.lookupCount = 0
+        
+    def lookup(self, _):
+        """ Returns a bucket. """
+        
+        self.lookupCount += 1
+        return SimpleMock()
+    
+
 class FileSystemTestCase(TestCase):
     """ Test cases for Amazon S3 file system factory."""
     
@@ -67,6 +83,25 @@ class FileSystemTestCase(TestCase):
         """ Tests the creation of a AmazonS3 specific data storer. """
         
         self.assertTrue(isinstance(self._factory.createDataStorer("identifier"), DataS3Adapter))
+        
+    def testCreateMetadataStorer(self):
+        """ Tests the creation of a AmazonS3 specific meta data storer. """
+        
+        self.assertTrue(isinstance(self._factory.createMetadataStorer("identifier"), MetadataS3Adapter))
+        
+    def testBucketCaching(self):
+        """ Tests that the bucket is looked up only once. """
+        
+        connection = _ConnectionMock()
+        self._factory._connectionPool = SimpleMock(connection)
+        self._factory.createDataStorer("/first")
+        self._factory.createDataStorer("/second")
+        self._factory.createMetadataStorer("/second")
+        self.assertEquals(connection.lookupCount, 1)
+        
+        self._factory.updateCredentials({"username": "", "password": ""})
+        self._factory.createDataStorer("/third")
+        self.assertEquals(connection.lookupCount, 2)
   
     def testUpdateCredentials(self):
         """ Tests to update the credentials """
@@ -0,0 +1,97 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Tests the meta data adapter implementation.
+"""
+
+
+import calendar
+import datetime
+from unittest import TestCase
+
+from boto.exception import S3ResponseError
+
+from datafinder.persistence.adapters.amazonS3.data.adapter import ListingEntry
+from datafinder.persistence.adapters.amazonS3.metadata.adapter import MetadataS3Adapter
+from datafinder.persistence.common.cache import LruCache
+from datafinder.persistence.error import PersistenceError
+from datafinder.persistence.metadata import constants
+from datafinder_test.mocks import SimpleMock
+
+
+__version__ = "$Revision-Id$" 
+
+
+_TIMESTAMP = calendar.timegm(datetime.datetime(2011, 5, 3, 8, 15, 30).timetuple())
+
+
+class MetadataS3AdapterTestCase(TestCase):
+    """ Tests the S3 meta data adapter implementation. """
+    
+    def setUp(self):
+        """ Creates the listing cache. """
+        
+        self._listingCache = LruCache()
+        self._connectionPool = SimpleMock(SimpleMock(SimpleMock(SimpleMock(size=42, last_modified="Tue, 03 May 2011 08:15:30 GMT"))))
+        
+    def testRetrieveListed(self):
+        """ Tests the retrieval of the properties from the listing results. """
+        
+        self._listingCache["/identifier"] = ListingEntry(False, 7, "2011-05-03T08:15:30.000Z")
+        adapter = MetadataS3Adapter("/identifier", SimpleMock(error=S3ResponseError(500, "")), "bucket", self._listingCache)
+        
+        properties = adapter.retrieve()
+        self.assertEquals(properties[constants.SIZE].value, 7)
+        self.assertEquals(properties[constants.MODIFICATION_DATETIME].persistedValue, str(_TIMESTAMP))
+        self.assertEquals(adapter.retrieve([constants.SIZE]).keys(), [constants.SIZE])
+        
+    def testRetrieveRequested(self):
+        """ Tests the retrieval of the properties if the item has not been listed. """
+        
+        properties = MetadataS3Adapter("/identifier", self._connectionPool, "bucket", self._listingCache).retrieve()
+        self.assertEquals(properties[constants.SIZE].value, 42)
+        self.assertEquals(properties[constants.MODIFICATION_DATETIME].persistedValue, str(_TIMESTAMP))
+        
+        #collections
+        self.assertEquals(MetadataS3Adapter("/", self._connectionPool, "bucket").retrieve(), dict())
+        self.assertEquals(MetadataS3Adapter("/collection", SimpleMock(SimpleMock(SimpleMock())), "bucket").retrieve(), dict())
+        
+        #failure
+        adapter = MetadataS3Adapter("/identifier", SimpleMock(SimpleMock(SimpleMock(error=S3ResponseError(500, "")))), "bucket")
+        self.assertRaises(PersistenceError, adapter.retrieve)
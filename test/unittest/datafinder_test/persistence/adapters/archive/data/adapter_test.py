@@ -0,0 +1,92 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Tests the data adapter of ZIP archives.
+"""
+
+
+import unittest
+from StringIO import StringIO
+from zipfile import ZipFile
+
+from datafinder.core.archive_writer import ArchiveWriter
+from datafinder.persistence.adapters.archive.data.adapter import DataArchiveAdapter
+from datafinder.persistence.error import PersistenceError
+
+
+__version__ = "$Revision-Id:$" 
+
+
+class DataArchiveAdapterTestCase(unittest.TestCase):
+    """ Tests the data adapter of ZIP archives. """
+    
+    def setUp(self):
+        """ Creates the test setup. """
+        
+        self._contents = {u"/dir/f\u00e4.txt": "first", u"/dir/plain.txt": "second"}
+    
+    def testReadWrittenArchive(self):
+        """ Tests reading the members of an archive created by the archive writer. """
+        
+        parts = list()
+        writer = ArchiveWriter(lambda dataStream: parts.append(dataStream.read()))
+        for name, content in self._contents.items():
+            writer.addMember(name, lambda content=content: StringIO(content))
+        writer.close()
+        archive = ZipFile(StringIO(parts[0]))
+        
+        self.assertEquals(sorted(DataArchiveAdapter(u"/dir", archive).getChildren()), sorted(self._contents.keys()))
+        for name, content in self._contents.items():
+            adapter = DataArchiveAdapter(name, archive, readonly=True)
+            self.assertTrue(adapter.exists())
+            self.assertEquals(adapter.readData().read(), content)
+        self.assertRaises(PersistenceError, DataArchiveAdapter(u"/dir/unknown", archive).readData)
+        
+    def testWriteAndRead(self):
+        """ Tests reading members which have been written by the adapter. """
+        
+        archiveStream = StringIO()
+        archive = ZipFile(archiveStream, "w")
+        for name, content in self._contents.items():
+            DataArchiveAdapter(name, archive).writeData(StringIO(content))
+        archive.close()
+        
+        archive = ZipFile(StringIO(archiveStream.getvalue()))
+        for name, content in self._contents.items():
+            self.assertEquals(DataArchiveAdapter(name, archive).readData().read(), content)
@@ -0,0 +1,102 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Implements test cases for the index of the ZIP archive members.
+"""
+
+
+import unittest
+from StringIO import StringIO
+from zipfile import ZipFile, ZipInfo
+
+from datafinder.persistence.adapters.archive.data.adapter import DataArchiveAdapter
+from datafinder.persistence.adapters.archive.index import ArchiveIndex
+
+
+__version__ = "$Revision-Id:$" 
+
+
+class ArchiveIndexTestCase(unittest.TestCase):
+    """ Tests the archive index. """
+    
+    def setUp(self):
+        """ Creates an archive with some members. """
+        
+        self._archive = ZipFile(StringIO(), "w")
+        for name in ["/a", "/ab", "/a/b", "/a/c", "/a/c/d", "/e/"]:
+            self._archive.writestr(name, "data")
+        self._index = ArchiveIndex(self._archive)
+        
+    def testGetChildren(self):
+        """ Tests the listing of the direct members. """
+        
+        self.assertEquals(self._index.getChildren("/"), ["/a", "/ab"])
+        self.assertEquals(self._index.getChildren("/a"), ["/a/b", "/a/c"])
+        self.assertEquals(self._index.getChildren("/a/c"), ["/a/c/d"])
+        self.assertEquals(self._index.getChildren("/a/b"), list())
+        self.assertEquals(self._index.getChildren("/unknown"), list())
+        
+        self._index.getChildren("/").append("/x")
+        self.assertEquals(self._index.getChildren("/"), ["/a", "/ab"])
+        
+    def testGetInfo(self):
+        """ Tests the access to the member information. """
+        
+        self.assertEquals(self._index.getInfo("/a/c").filename, "/a/c")
+        self.assertEquals(self._index.getInfo("/e/").filename, "/e/")
+        self.assertEquals(self._index.getInfo("/unknown"), None)
+        
+    def testAdd(self):
+        """ Tests the update of the index. """
+        
+        self._index.add(ZipInfo("/a/f"))
+        self._index.add(ZipInfo("/a/f"))
+        self.assertEquals(self._index.getChildren("/a"), ["/a/b", "/a/c", "/a/f"])
+        self.assertEquals(self._index.getInfo("/a/f").filename, "/a/f")
+        
+    def testDataAdapter(self):
+        """ Tests the usage of the index by the data adapter. """
+        
+        adapter = DataArchiveAdapter("/a/g", self._archive, index=self._index)
+        self.assertFalse(adapter.exists())
+        adapter.writeData(StringIO("content"))
+        self.assertTrue(adapter.exists())
+        self.assertEquals(adapter.readData().read(), "content")
+        self.assertEquals(DataArchiveAdapter("/a", self._archive, index=self._index).getChildren(), 
+                          ["/a/b", "/a/c", "/a/g"])
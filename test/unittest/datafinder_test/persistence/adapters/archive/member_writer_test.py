@@ -0,0 +1,169 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Implements test cases for the streamed writing of archive members.
+"""
+
+
+import threading
+import unittest
+from StringIO import StringIO
+from zipfile import ZipFile, ZipInfo, ZIP_DEFLATED, ZIP_STORED
+
+from datafinder.persistence.adapters.archive.member_writer import MemberWriter
+
+
+__version__ = "$Revision-Id:$" 
+
+
+class _FailingStream(object):
+    """ Provides some content and fails afterwards. """
+    
+    def __init__(self):
+        """ Constructor. """
+        
+        self._blocks = ["content"]
+        
+    def read(self, _):
+        """ Returns the content and raises an C{IOError} afterwards. """
+        
+        if self._blocks:
+            return self._blocks.pop()
+        raise IOError("Connection lost.")
+
+
+class _ObservedStream(StringIO):
+    """ Signals when the content is read. """
+    
+    def __init__(self, content):
+        """ Constructor. """
+        
+        StringIO.__init__(self, content)
+        self.readEvent = threading.Event()
+        
+    def read(self, size=-1):
+        """ Signals the read access. """
+        
+        self.readEvent.set()
+        return StringIO.read(self, size)
+
+
+class MemberWriterTestCase(unittest.TestCase):
+    """ Tests the member writer. """
+    
+    def setUp(self):
+        """ Creates an empty archive. """
+        
+        self._archiveFile = StringIO()
+        self._archive = ZipFile(self._archiveFile, "w", ZIP_DEFLATED, allowZip64=True)
+        self._writer = MemberWriter(self._archive)
+        
+    def _readArchive(self):
+        """ Closes the archive and returns the archive for reading. """
+        
+        self._archive.close()
+        archive = ZipFile(StringIO(self._archiveFile.getvalue()))
+        self.assertEquals(archive.testzip(), None)
+        return archive
+    
+    def testWrite(self):
+        """ Tests the direct writing of compressed and stored members. """
+        
+        content = "0123456789" * 100000
+        self._writer.write(ZipInfo("a"), StringIO("stored"))
+        info = ZipInfo("b")
+        info.compress_type = ZIP_DEFLATED
+        self._writer.write(info, StringIO(content))
+        self.assertEquals(info.file_size, len(content))
+        self.assertTrue(info.compress_size < info.file_size)
+        
+        archive = self._readArchive()
+        self.assertEquals(archive.namelist(), ["a", "b"])
+        self.assertEquals(archive.getinfo("a").compress_type, ZIP_STORED)
+        self.assertEquals(archive.read("a"), "stored")
+        self.assertEquals(archive.read("b"), content)
+        
+    def testWriteConcurrently(self):
+        """ Tests the writing of a member while another writer uses the archive. """
+        
+        self._writer.write(ZipInfo("a"), StringIO("first"))
+        self._writer._lock.acquire() # Simulates another writer
+        info = ZipInfo("b")
+        info.compress_type = ZIP_DEFLATED
+        data = _ObservedStream("content")
+        thread = threading.Thread(target=self._writer.write, args=(info, data))
+        thread.start()
+        data.readEvent.wait(10)
+        self._writer._lock.release()
+        thread.join(10)
+        
+        archive = self._readArchive()
+        self.assertEquals(archive.namelist(), ["a", "b"])
+        self.assertEquals(archive.read("a"), "first")
+        self.assertEquals(archive.read("b"), "content")
+    
+    def testWriteFailure(self):
+        """ Tests that the incomplete member is removed on errors. """
+        
+        self._writer.write(ZipInfo("a"), StringIO("content"))
+        self.assertRaises(IOError, self._writer.write, ZipInfo("b"), _FailingStream())
+        
+        archive = self._readArchive()
+        self.assertEquals(archive.namelist(), ["a"])
+        self.assertEquals(archive.read("a"), "content")
+        
+    def testWriteToExistingArchive(self):
+        """ Tests that members appended to an existing archive are added to its central directory. """
+        
+        self._writer.write(ZipInfo("a"), StringIO("first"))
+        self._archive.close()
+        self._archive = ZipFile(self._archiveFile, "a", ZIP_DEFLATED, allowZip64=True)
+        self._writer = MemberWriter(self._archive, allowZip64=True)
+        self._writer.write(ZipInfo("b"), StringIO("second"))
+        
+        archive = self._readArchive()
+        self.assertEquals(archive.namelist(), ["a", "b"])
+        self.assertEquals(archive.read("b"), "second")
+        
+    def testWriteToReadOnlyArchive(self):
+        """ Tests that members cannot be written to archives which have been opened for reading. """
+        
+        self._archive.close()
+        writer = MemberWriter(ZipFile(StringIO(self._archiveFile.getvalue())))
+        self.assertRaises(IOError, writer.write, ZipInfo("a"), StringIO("content"))
@@ -0,0 +1,69 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Tests the meta data adapter of ZIP archives.
+"""
+
+
+import unittest
+from StringIO import StringIO
+from zipfile import ZipFile
+
+from datafinder.persistence.adapters.archive.metadata.adapter import MetadataArchiveAdapter
+
+
+__version__ = "$Revision-Id:$" 
+
+
+class MetadataArchiveAdapterTestCase(unittest.TestCase):
+    """ Tests the meta data adapter of ZIP archives. """
+    
+    def testNonAsciiNames(self):
+        """ Tests storing and retrieving the meta data of members with non-ASCII names. """
+        
+        archiveStream = StringIO()
+        archive = ZipFile(archiveStream, "w")
+        archive.writestr(u"/f\u00e4.txt.xml".encode("CP437"), '<properties><property name="a">first</property></properties>')
+        MetadataArchiveAdapter(u"/g\u00e4.txt", archive).update({"b": u"second"})
+        archive.close()
+        
+        archive = ZipFile(StringIO(archiveStream.getvalue()))
+        self.assertEquals(MetadataArchiveAdapter(u"/f\u00e4.txt", archive).retrieve()["a"].value, "first")
+        self.assertEquals(MetadataArchiveAdapter(u"/g\u00e4.txt", archive).retrieve()["b"].value, "second")
+        self.assertEquals(MetadataArchiveAdapter(u"/unknown", archive).retrieve(), dict())
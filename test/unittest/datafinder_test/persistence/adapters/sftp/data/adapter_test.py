@@ -51,6 +51,7 @@ import paramiko
 
 from datafinder.persistence.adapters.sftp.data import adapter
 from datafinder.persistence.adapters.sftp import utils
+from datafinder.persistence.common import cache
 from datafinder.persistence import error
 
 
@@ -59,6 +60,22 @@ __version__ = "$Revision-Id:$"
 
 _STAT_IS_COLLECTION_CODE = 16895
 _STAT_IS_LEAF_CODE = 1
+_STAT_IS_LINK_CODE = 41471
+
+
+class _RemoteFileStandIn(StringIO.StringIO):
+    """ Records the transfer options of a remote file. """
+    
+    def __init__(self, content):
+        StringIO.StringIO.__init__(self, content)
+        self.prefetched = False
+        self.pipelined = False
+        
+    def prefetch(self):
+        self.prefetched = True
+        
+    def set_pipelined(self, pipelined=True):
+        self.pipelined = pipelined
 
 
 class SftpDataAdapterTest(unittest.TestCase):
@@ -69,7 +86,8 @@ class SftpDataAdapterTest(unittest.TestCase):
         self._factoryMock = mock.Mock()
         
         self._connectionMock = mock.Mock(spec=paramiko.SFTPClient)
-        self._connectionMock.open.return_value = StringIO.StringIO("Test Data")
+        self._remoteFile = _RemoteFileStandIn("Test Data")
+        self._connectionMock.open.return_value = self._remoteFile
         
         self._connectionPoolMock = mock.Mock()
         self._connectionPoolMock.acquire.return_value = self._connectionMock
@@ -78,7 +96,7 @@ class SftpDataAdapterTest(unittest.TestCase):
         
         self._sftpItem = adapter.SftpDataAdapter(
             u"/pärent/identifier", "/ppärent/pidentifier", 
-            self._connectionPoolMock, self._factoryMock, self._idMapper)
+            self._connectionPoolMock, self._factoryMock, self._idMapper, treeOperationThreadNumber=1)
         
     def testIsCollection(self):
         self._markItemAsCollection()
@@ -144,12 +162,43 @@ class SftpDataAdapterTest(unittest.TestCase):
         self.assertRaises(error.PersistenceError, self._sftpItem.createLink, None)
         
     def testGetChildrenSuccess(self):
-        self._connectionMock.listdir.return_value = ["a", "b", "c", "d"]
+        self._connectionMock.listdir_attr.return_value = [
+            mock.Mock(st_mode=_STAT_IS_LEAF_CODE, filename=name) for name in ["a", "b", "c", "d"]]
         
         self.assertEquals(len(self._sftpItem.getChildren()), 4)
         
+    def testGetChildrenPrimesAttributeCache(self):
+        attributeCache = cache.LruCache()
+        sftpItem = adapter.SftpDataAdapter(
+            u"/pärent", "/ppärent", self._connectionPoolMock, self._factoryMock, self._idMapper, 
+            attributeCache=attributeCache)
+        self._connectionMock.listdir_attr.return_value = [
+            mock.Mock(st_mode=_STAT_IS_COLLECTION_CODE, filename="c1"), 
+            mock.Mock(st_mode=_STAT_IS_LEAF_CODE, st_size=10, filename="ä1"),
+            mock.Mock(st_mode=_STAT_IS_LINK_CODE, filename="l1")]
+        
+        children = sftpItem.getChildren()
+        self.assertEquals(children, [u"/pärent/c1", u"/pärent/ä1", u"/pärent/l1"])
+        collection, leaf, link = [adapter.SftpDataAdapter(
+            child, None, self._connectionPoolMock, self._factoryMock, self._idMapper, attributeCache=attributeCache)
+                            for child in children]
+        self.assertTrue(collection.isCollection)
+        self.assertTrue(leaf.isLeaf)
+        self.assertTrue(leaf.exists())
+        self.assertEquals(leaf.determineSize(), 10)
+        self.assertFalse(self._connectionMock.stat.called)
+        
+        self._markItemAsCollection()
+        self.assertTrue(link.isCollection) # The link target is retrieved
+        self.assertTrue(self._connectionMock.stat.called)
+        
+        self._connectionMock.stat.reset_mock()
+        leaf.writeData(StringIO.StringIO(""))
+        self.assertTrue(leaf.isCollection)
+        self.assertTrue(self._connectionMock.stat.called)
+        
     def testGetChildrenFromLeaf(self):
-        self._connectionMock.listdir.side_effect = IOError
+        self._connectionMock.listdir_attr.side_effect = IOError
         
         self.assertRaises(error.PersistenceError, self._sftpItem.getChildren)
         
@@ -186,6 +235,7 @@ class SftpDataAdapterTest(unittest.TestCase):
         self._sftpItem.delete()
         
         self.assertEquals(self._connectionMock.rmdir.call_count, 3)
+        self.assertEquals(self._connectionMock.remove.call_count, 2)
         
     def _defineSubCollectionStructure(self):
         leaf1 = mock.Mock(st_mode=_STAT_IS_LEAF_CODE, filename="ä1")
@@ -214,20 +264,21 @@ class SftpDataAdapterTest(unittest.TestCase):
         self.assertRaises(error.PersistenceError, self._sftpItem.copy, destination)
         
     def testCopyCollectionSuccess(self):
-        # pylint: disable=R0201,C0111
-        # we do have to worry about such small fake implementations        
-        # pylint: disable=W0212
-        # access to prtected member ok for testing
-        
         self._markItemAsCollection()
         self._defineSubCollectionStructure()
-        class _FactoryMock(object):
-            def createDataStorer(self, identifier):
-                return mock.Mock(identifier=identifier)
-        self._sftpItem._factory = _FactoryMock()
+        self._connectionMock.open.side_effect = lambda *_: _RemoteFileStandIn("Test Data")
+        progress = list()
+        sftpItem = adapter.SftpDataAdapter(
+            u"/pärent/identifier", "/ppärent/pidentifier", 
+            self._connectionPoolMock, self._factoryMock, self._idMapper, treeOperationThreadNumber=1, progressCallback=
+            lambda identifier, processed, discovered: progress.append((identifier, processed, discovered)))
             
         destination = mock.Mock(identifier=u"/newDästination")
-        self._sftpItem.copy(destination)
+        sftpItem.copy(destination)
+        
+        self.assertEquals(self._connectionMock.mkdir.call_count, 3)
+        self.assertEquals(self._connectionMock.open.call_count, 4)
+        self.assertTrue((u"/pärent/identifier", 5, 5) in progress)
     
     def testCopyCollectionWhichDoesNotExist(self):
         self._markItemAsCollection()
@@ -254,6 +305,16 @@ class SftpDataAdapterTest(unittest.TestCase):
         
         self.assertTrue(self._connectionMock.open.called)
         self.assertTrue(data.closed)
+        self.assertTrue(self._remoteFile.pipelined)
+        self.assertTrue(self._remoteFile.closed)
+        
+    def testWriteWithoutPipelining(self):
+        sftpItem = adapter.SftpDataAdapter(
+            u"/pärent/identifier", "/ppärent/pidentifier", 
+            self._connectionPoolMock, self._factoryMock, self._idMapper, writePipeliningEnabled=False)
+        sftpItem.writeData(StringIO.StringIO("Test Data"))
+        
+        self.assertFalse(self._remoteFile.pipelined)
     
     def testWriteEnsureEmptyFileIsCreated(self):
         self._sftpItem.writeData(StringIO.StringIO(""))
@@ -272,6 +333,16 @@ class SftpDataAdapterTest(unittest.TestCase):
         
         self.assertEquals(fileObject.read(), "Test Data")
         self.assertTrue(self._connectionMock.open.called)
+        self.assertTrue(self._remoteFile.prefetched)
+        self.assertTrue(self._remoteFile.closed)
+        
+    def testReadWithoutPrefetching(self):
+        sftpItem = adapter.SftpDataAdapter(
+            u"/pärent/identifier", "/ppärent/pidentifier", 
+            self._connectionPoolMock, self._factoryMock, self._idMapper, readPrefetchEnabled=False)
+        
+        self.assertEquals(sftpItem.readData().read(), "Test Data")
+        self.assertFalse(self._remoteFile.prefetched)
         
     def testReadNoSuchFile(self):
         self._connectionMock.open.side_effect = IOError
@@ -0,0 +1,192 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Tests the concurrent deletion and copying of directories.
+"""
+
+
+import stat
+import threading
+import unittest
+
+import mock
+
+from datafinder.persistence.adapters.sftp.data import tree
+
+
+__version__ = "$Revision-Id:$" 
+
+
+class _ServerStandIn(object):
+    """ Keeps directories and files in memory and checks the order of the operations. """
+    # pylint: disable=C0111
+    
+    def __init__(self):
+        self.directories = set(["/", "/a", "/a/b", "/a/b/c", "/a/d"])
+        self.files = dict([(path, path) for path in ["/a/1", "/a/2", "/a/b/3", "/a/b/c/4", "/a/b/c/5", "/a/d/6"]])
+        self._lock = threading.Lock()
+        
+    @staticmethod
+    def _parent(path):
+        return path.rsplit("/", 1)[0] or "/"
+        
+    def listdir_attr(self, path):
+        self._lock.acquire()
+        try:
+            if not path in self.directories:
+                raise IOError("No such directory '%s'." % path)
+            result = list()
+            for childPath in list(self.directories) + self.files.keys():
+                if childPath != path and self._parent(childPath) == path:
+                    mode = stat.S_IFREG
+                    if childPath in self.directories:
+                        mode = stat.S_IFDIR
+                    result.append(mock.Mock(filename=childPath.rsplit("/", 1)[1], st_mode=mode))
+            return result
+        finally:
+            self._lock.release()
+    
+    def remove(self, path):
+        self._lock.acquire()
+        try:
+            del self.files[path]
+        finally:
+            self._lock.release()
+            
+    def rmdir(self, path):
+        self._lock.acquire()
+        try:
+            for childPath in list(self.directories) + self.files.keys():
+                if childPath.startswith(path + "/"):
+                    raise IOError("Directory '%s' is not empty." % path)
+            self.directories.remove(path)
+        finally:
+            self._lock.release()
+            
+    def mkdir(self, path):
+        self._lock.acquire()
+        try:
+            if not self._parent(path) in self.directories:
+                raise IOError("Missing parent directory of '%s'." % path)
+            self.directories.add(path)
+        finally:
+            self._lock.release()
+            
+    def chmod(self, path, mode):
+        pass
+            
+    def copyFile(self, _, sourcePath, destinationPath):
+        self._lock.acquire()
+        try:
+            if not self._parent(destinationPath) in self.directories:
+                raise IOError("Missing parent directory of '%s'." % destinationPath)
+            self.files[destinationPath] = self.files[sourcePath]
+        finally:
+            self._lock.release()
+            
+
+class _ConnectionPoolStandIn(object):
+    """ Provides the server stand-in and counts the borrowed connections. """
+    # pylint: disable=C0111
+    
+    def __init__(self, connection):
+        self._connection = connection
+        self._lock = threading.Lock()
+        self.borrowedNumber = 0
+        
+    def acquire(self):
+        self._lock.acquire()
+        try:
+            self.borrowedNumber += 1
+        finally:
+            self._lock.release()
+        return self._connection
+    
+    def release(self, _):
+        self._lock.acquire()
+        try:
+            self.borrowedNumber -= 1
+        finally:
+            self._lock.release()
+            
+
+class TreeTestCase(unittest.TestCase):
+    """ Tests the tree operations with several worker threads. """
+    # pylint: disable=R0904
+    
+    def setUp(self):
+        self._server = _ServerStandIn()
+        self._connectionPool = _ConnectionPoolStandIn(self._server)
+        self._progress = list()
+        
+    def _createProgress(self):
+        return tree.Progress(u"/a", lambda *args: self._progress.append(args))
+        
+    def testDeleteTree(self):
+        tree.deleteTree(tree.WorkQueue(self._connectionPool, 4), "/a", self._createProgress())
+        
+        self.assertEquals(self._server.directories, set(["/"]))
+        self.assertEquals(self._server.files, dict())
+        self.assertTrue((u"/a", 10, 10) in self._progress)
+        self.assertEquals(self._connectionPool.borrowedNumber, 0)
+        
+    def testDeleteTreeError(self):
+        def _remove(_):
+            raise IOError("Permission denied.")
+        self._server.remove = _remove
+        
+        self.assertRaises(IOError, tree.deleteTree, tree.WorkQueue(self._connectionPool, 4), "/a", self._createProgress())
+        self.assertTrue("/a" in self._server.directories)
+        
+    def testCopyTree(self):
+        tree.copyTree(tree.WorkQueue(self._connectionPool, 4), "/a", "/e", self._server.copyFile, self._createProgress())
+        
+        self.assertEquals(self._server.directories, set(["/", "/a", "/a/b", "/a/b/c", "/a/d", "/e", "/e/b", "/e/b/c", "/e/d"]))
+        self.assertEquals(self._server.files["/e/b/c/5"], "/a/b/c/5")
+        self.assertEquals(len(self._server.files), 12)
+        self.assertTrue((u"/a", 10, 10) in self._progress)
+        
+    def testCopyTreeSingleThread(self):
+        tree.copyTree(tree.WorkQueue(self._connectionPool, 1), "/a/b", "/e", self._server.copyFile, tree.Progress(u"/a/b"))
+        
+        self.assertEquals(self._server.files["/e/c/4"], "/a/b/c/4")
+        
+    def testCopyTreeError(self):
+        self.assertRaises(IOError, tree.copyTree, tree.WorkQueue(self._connectionPool, 4), 
+                          "/a", "/x/e", self._server.copyFile, self._createProgress())
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+#
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Tests for the SFTP meta data adapter.
+"""
+
+
+import unittest
+
+import mock
+import paramiko
+
+from datafinder.persistence.adapters.sftp.metadata import adapter
+from datafinder.persistence.common import cache
+from datafinder.persistence import error
+from datafinder.persistence.metadata import constants
+
+
+__version__ = "$Revision-Id:$" 
+
+
+class MetadataSftpAdapterTest(unittest.TestCase):
+    """ Provides all unit tests for the SFTP meta data adapter. """
+    # pylint: disable=R0904
+    
+    def setUp(self):
+        self._connectionMock = mock.Mock(spec=paramiko.SFTPClient)
+        self._connectionMock.stat.return_value = mock.Mock(st_mtime=1304410530, st_size=42, st_uid=1000)
+        
+        self._connectionPoolMock = mock.Mock()
+        self._connectionPoolMock.acquire.return_value = self._connectionMock
+        
+        self._attributeCache = cache.LruCache()
+        self._metadataItem = adapter.MetadataSftpAdapter(
+            u"/pärent/identifier", "/ppärent/pidentifier", self._connectionPoolMock, self._attributeCache)
+        
+    def testRetrieveSuccess(self):
+        properties = self._metadataItem.retrieve()
+        
+        self.assertEquals(len(properties), 3)
+        self.assertEquals(properties[constants.SIZE].value, 42)
+        self.assertEquals(properties[constants.OWNER].value, u"1000")
+        self.assertEquals(properties[constants.MODIFICATION_DATETIME].value.year, 2011)
+        self.assertEquals(self._connectionMock.stat.call_count, 1)
+        
+    def testRetrieveSelectedProperties(self):
+        properties = self._metadataItem.retrieve([constants.SIZE, constants.MIME_TYPE])
+        
+        self.assertEquals(properties.keys(), [constants.SIZE])
+        
+    def testRetrieveCachedAttributes(self):
+        self._attributeCache[u"/pärent/identifier"] = mock.Mock(st_mtime=0, st_size=7, st_uid=0)
+        
+        self.assertEquals(self._metadataItem.retrieve()[constants.SIZE].value, 7)
+        self.assertFalse(self._connectionMock.stat.called)
+        
+    def testRetrieveNoSuchFile(self):
+        self._connectionMock.stat.side_effect = IOError
+        
+        self.assertRaises(error.PersistenceError, self._metadataItem.retrieve)
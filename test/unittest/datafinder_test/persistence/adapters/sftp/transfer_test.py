@@ -0,0 +1,251 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Compares pipelined and synchronous SFTP transfers using a local SSH server 
+which is reached through a link with an artificial latency.
+"""
+
+
+import os
+import Queue
+import shutil
+import socket
+import StringIO
+import tempfile
+import threading
+import time
+import unittest
+
+import paramiko
+
+from datafinder.persistence.adapters.sftp.factory import FileSystem
+from datafinder.persistence.common.configuration import BaseConfiguration
+
+
+__version__ = "$Revision-Id:$" 
+
+
+_LATENCY = 0.01 # One-way delay in seconds
+_CONTENT = os.urandom(1024 ** 2)
+
+
+class _ServerStandIn(paramiko.ServerInterface):
+    """ Accepts every password and session. """
+    # pylint: disable=R0201,W0613
+    
+    def get_allowed_auths(self, username):
+        return "password"
+    
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+    
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED
+    
+    
+class _SftpHandleStandIn(paramiko.SFTPHandle):
+    """ Provides the attributes of the opened local file. """
+    
+    def stat(self):
+        return paramiko.SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+    
+    
+class _SftpServerStandIn(paramiko.SFTPServerInterface):
+    """ Maps the SFTP paths into a local directory. """
+    
+    def __init__(self, server, rootDirectory):
+        paramiko.SFTPServerInterface.__init__(self, server)
+        self._rootDirectory = rootDirectory
+        
+    def _localPath(self, path):
+        return os.path.join(self._rootDirectory, path.lstrip("/"))
+    
+    def open(self, path, flags, attr):
+        mode = "rb"
+        if flags & (os.O_WRONLY | os.O_RDWR):
+            mode = "wb"
+        fileObject = open(self._localPath(path), mode)
+        handle = _SftpHandleStandIn(flags)
+        handle.readfile = fileObject
+        handle.writefile = fileObject
+        return handle
+    
+    def stat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(self._localPath(path)))
+        except OSError, error:
+            return paramiko.SFTPServer.convert_errno(error.errno)
+    lstat = stat
+    
+    
+class _LatencyLink(object):
+    """ Forwards the data between two sockets after a fixed delay in both directions. """
+    
+    def __init__(self, firstSocket, secondSocket, latency):
+        self._latency = latency
+        for source, destination in [(firstSocket, secondSocket), (secondSocket, firstSocket)]:
+            queue = Queue.Queue()
+            self._startThread(self._receive, source, queue)
+            self._startThread(self._send, queue, destination)
+            
+    @staticmethod
+    def _startThread(target, *args):
+        thread = threading.Thread(target=target, args=args)
+        thread.setDaemon(True)
+        thread.start()
+    
+    def _receive(self, source, queue):
+        data = True
+        while data:
+            try:
+                data = source.recv(65536)
+            except socket.error:
+                data = ""
+            queue.put((time.time() + self._latency, data))
+            
+    @staticmethod
+    def _send(queue, destination):
+        while True:
+            dueTime, data = queue.get()
+            delay = dueTime - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                if not data:
+                    destination.shutdown(socket.SHUT_WR)
+                    break
+                destination.sendall(data)
+            except socket.error:
+                break
+            
+
+class _SshServerStandIn(object):
+    """ Local SSH server which provides the SFTP subsystem on a free port. """
+    
+    _hostKey = None
+    
+    def __init__(self, rootDirectory, latency):
+        if self._hostKey is None:
+            _SshServerStandIn._hostKey = paramiko.RSAKey.generate(1024)
+        self._rootDirectory = rootDirectory
+        self._latency = latency
+        self._transports = list()
+        self._listeningSocket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listeningSocket.bind(("127.0.0.1", 0))
+        self._listeningSocket.listen(5)
+        self.port = self._listeningSocket.getsockname()[1]
+        thread = threading.Thread(target=self._serve)
+        thread.setDaemon(True)
+        thread.start()
+        
+    def _serve(self):
+        while True:
+            try:
+                clientSocket, _ = self._listeningSocket.accept()
+            except socket.error:
+                break
+            serverSocket, linkSocket = socket.socketpair()
+            _LatencyLink(clientSocket, linkSocket, self._latency)
+            transport = paramiko.Transport(serverSocket)
+            transport.add_server_key(self._hostKey)
+            transport.set_subsystem_handler("sftp", paramiko.SFTPServer, _SftpServerStandIn, self._rootDirectory)
+            transport.start_server(server=_ServerStandIn())
+            self._transports.append(transport)
+            
+    def close(self):
+        self._listeningSocket.close()
+        for transport in self._transports:
+            transport.close()
+    
+
+class SftpTransferTest(unittest.TestCase):
+    """ Measures the transfer rates with and without pipelining. """
+    # pylint: disable=R0904
+    
+    def setUp(self):
+        self._rootDirectory = tempfile.mkdtemp()
+        self._server = _SshServerStandIn(self._rootDirectory, _LATENCY)
+        
+    def tearDown(self):
+        self._server.close()
+        shutil.rmtree(self._rootDirectory)
+        
+    def _createFileSystem(self, pipelined):
+        configuration = BaseConfiguration(
+            u"sftp://127.0.0.1:%i/" % self._server.port, username="user", password="secret",
+            readPrefetchEnabled=pipelined, writePipeliningEnabled=pipelined)
+        return FileSystem(configuration)
+    
+    def _measureTransfer(self, pipelined):
+        fileSystem = self._createFileSystem(pipelined)
+        try:
+            dataStorer = fileSystem.createDataStorer(u"/file")
+            dataStorer.exists() # Establishes the connection
+            
+            startTime = time.time()
+            dataStorer.writeData(StringIO.StringIO(_CONTENT))
+            writeTime = time.time() - startTime
+            
+            startTime = time.time()
+            content = dataStorer.readData().read()
+            readTime = time.time() - startTime
+        finally:
+            fileSystem.release()
+        self.assertEquals(content, _CONTENT)
+        return writeTime, readTime
+        
+    def testPipelinedTransfer(self):
+        self._measureTransfer(True)
+        
+        localFile = open(os.path.join(self._rootDirectory, "file"), "rb")
+        try:
+            self.assertEquals(localFile.read(), _CONTENT)
+        finally:
+            localFile.close()
+        
+    def testThroughput(self):
+        pipelinedWriteTime, pipelinedReadTime = self._measureTransfer(True)
+        writeTime, readTime = self._measureTransfer(False)
+        
+        message = "Write: %.1f KB/s pipelined, %.1f KB/s synchronous. " \
+                  % (len(_CONTENT) / 1024.0 / pipelinedWriteTime, len(_CONTENT) / 1024.0 / writeTime) \
+                  + "Read: %.1f KB/s prefetched, %.1f KB/s synchronous." \
+                  % (len(_CONTENT) / 1024.0 / pipelinedReadTime, len(_CONTENT) / 1024.0 / readTime)
+        self.assertTrue(pipelinedWriteTime * 2 < writeTime, message)
+        self.assertTrue(pipelinedReadTime * 2 < readTime, message)
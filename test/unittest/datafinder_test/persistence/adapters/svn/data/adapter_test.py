@@ -45,6 +45,7 @@ import unittest
 
 from datafinder.persistence.adapters.svn.data import adapter as svn_adapter
 from datafinder.persistence.adapters.svn.error import SubversionError
+from datafinder.persistence.adapters.svn.transaction import Transaction
 from datafinder.persistence.error import PersistenceError
 from datafinder_test.mocks import SimpleMock 
 
@@ -276,3 +277,29 @@ class DataSubversionAdapterTestCase(unittest.TestCase):
         self.assertTrue(self._adapter.exists()) 
         self._connectionMock.error = SubversionError("")
         self.assertFalse(self._adapter.exists())
+        
+    def testTransaction(self):
+        transaction = Transaction()
+        adapter = svn_adapter.DataSubversionAdapter(
+            "/path/identify", SimpleMock(self._connectionMock), transaction)
+        parentAdapter = svn_adapter.DataSubversionAdapter(
+            "/path", SimpleMock(self._connectionMock), transaction)
+        self._connectionMock.methodNameResultMap = {"checkin": (None, SubversionError("")),
+                                                    "getChildren": (["/path/other"], None)}
+        
+        # Changes are only staged
+        transaction.begin()
+        adapter.createResource()
+        adapter.writeData(io.StringIO(u"test"))
+        self.assertTrue(adapter.exists())
+        self.assertEquals(parentAdapter.getChildren(), ["/path/other", "/path/identify"])
+        self.assertTrue(transaction.isCreated("/path/identify"))
+        
+        # Deleting a created item only reverts it locally
+        self._connectionMock.methodNameResultMap["delete"] = (None, SubversionError(""))
+        adapter.delete()
+        self.assertFalse(transaction.isStaged("/path/identify"))
+        
+        # Without active transaction the changes are committed immediately
+        transaction.rollback(self._connectionMock)
+        self.assertRaises(PersistenceError, adapter.createResource)
@@ -44,6 +44,7 @@ import unittest
 
 from datafinder.persistence.adapters.svn.error import SubversionError
 from datafinder.persistence.adapters.svn.metadata import adapter
+from datafinder.persistence.adapters.svn.transaction import Transaction
 from datafinder.persistence.error import PersistenceError
 from datafinder.persistence.metadata import constants as const
 from datafinder.persistence.metadata.value_mapping import MetadataValue
@@ -101,3 +102,17 @@ class MetadataSubversionAdapterTestCase(unittest.TestCase):
                                     "getProperty": ("{\"1\": \"value\"}", None)})
         defaultAdapter = adapter.MetadataSubversionAdapter("identifier", SimpleMock(connectionMock))
         self.assertRaises(PersistenceError, defaultAdapter.delete, ["1", "2"])
+        
+    def testTransaction(self):
+        """ Tests that changed properties are kept by the active transaction. """
+        
+        connectionMock = SimpleMock(methodNameResultMap={"setProperty": (None, SubversionError), \
+                                    "getProperty": ("{\"1\": \"value\"}", None), \
+                                    "info": ({"lastChangedDate": "", "owner": "", "size": "10", "creationDate": ""}, None)})
+        transaction = Transaction()
+        defaultAdapter = adapter.MetadataSubversionAdapter("identifier", SimpleMock(connectionMock), transaction)
+        transaction.begin()
+        defaultAdapter.update({"2": "new"})
+        defaultAdapter.delete(["1"])
+        self.assertEquals(transaction.getProperties("identifier"), {"2": "new"})
+        self.assertEquals(defaultAdapter.retrieve(["1", "2"]), {"2": MetadataValue("new")})
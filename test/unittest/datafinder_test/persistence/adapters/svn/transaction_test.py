@@ -0,0 +1,206 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Implements test cases for the collection of working copy changes.
+"""
+
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from datafinder.persistence.adapters.svn.constants import JSON_PROPERTY_NAME
+from datafinder.persistence.adapters.svn.error import SubversionError
+from datafinder.persistence.adapters.svn.transaction import Transaction
+
+
+__version__ = "$Revision-Id$" 
+
+
+class _ConnectionStandIn(object):
+    """ Records the calls of the transaction. """
+    
+    def __init__(self, workingCopyPath=""):
+        """ Constructor. """
+        
+        self.workingCopyPath = workingCopyPath
+        self.properties = dict()
+        self.checkins = list()
+        self.revertedPaths = list()
+        self.error = None
+        
+    def stageProperty(self, path, key, value):
+        """ Records the property. """
+        
+        self.properties[(path, key)] = value
+        
+    def checkinAll(self, paths):
+        """ Records the committed paths. """
+        
+        if not self.error is None:
+            raise self.error
+        self.checkins.append(paths[:])
+        
+    def revert(self, paths):
+        """ Records the reverted paths. """
+        
+        self.revertedPaths.extend(paths)
+        
+        
+class TransactionTestCase(unittest.TestCase):
+    """ Implements the test cases of the transaction. """
+    
+    def setUp(self):
+        """ Creates test setup. """
+        
+        self._connection = _ConnectionStandIn()
+        self._transaction = Transaction()
+        
+    def testCommit(self):
+        """ Tests that all changes are committed in one checkin. """
+        
+        self.assertFalse(self._transaction.isActive)
+        self._transaction.begin()
+        self.assertTrue(self._transaction.isActive)
+        self._transaction.stage(u"/a", True)
+        self._transaction.stage(u"/a/b", True)
+        self._transaction.stage(u"/c")
+        self._transaction.setProperties(u"/a/b", {u"name": u"first"})
+        self._transaction.setProperties(u"/a/b", {u"name": u"second"})
+        self._transaction.setProperties(u"/d", {u"name": u"third"})
+        
+        self.assertTrue(self._transaction.isStaged(u"/d"))
+        self.assertTrue(self._transaction.isCreated(u"/a/b"))
+        self.assertFalse(self._transaction.isCreated(u"/c"))
+        self.assertEquals(self._transaction.getCreatedChildren(u"/"), [u"/a"])
+        self.assertEquals(self._transaction.getCreatedChildren(u"/a"), [u"/a/b"])
+        self.assertEquals(self._transaction.getProperties(u"/a/b"), {u"name": u"second"})
+        self.assertEquals(self._transaction.getProperties(u"/c"), None)
+        
+        self._transaction.commit(self._connection)
+        self.assertFalse(self._transaction.isActive)
+        self.assertEquals(self._connection.checkins, [[u"/a", u"/a/b", u"/c", u"/d"]])
+        self.assertEquals(len(self._connection.properties), 2)
+        self.assertTrue(u"second" in self._connection.properties[(u"/a/b", JSON_PROPERTY_NAME)])
+        self.assertFalse(self._transaction.isStaged(u"/a"))
+        
+        # Nothing to commit
+        self._transaction.begin()
+        self._transaction.commit(self._connection)
+        self.assertEquals(len(self._connection.checkins), 1)
+        
+    def testNestedTransactions(self):
+        """ Tests that only the outermost transaction commits. """
+        
+        self._transaction.begin()
+        self._transaction.begin()
+        self._transaction.stage(u"/a")
+        self._transaction.commit(self._connection)
+        self.assertTrue(self._transaction.isActive)
+        self.assertEquals(self._connection.checkins, list())
+        self._transaction.commit(self._connection)
+        self.assertFalse(self._transaction.isActive)
+        self.assertEquals(self._connection.checkins, [[u"/a"]])
+        
+    def testFailedCommit(self):
+        """ Tests that changes remain staged when the commit fails. """
+        
+        self._connection.error = SubversionError("")
+        self._transaction.begin()
+        self._transaction.stage(u"/a")
+        self.assertRaises(SubversionError, self._transaction.commit, self._connection)
+        self.assertTrue(self._transaction.isActive)
+        self.assertTrue(self._transaction.isStaged(u"/a"))
+        
+    def testThreadScope(self):
+        """ Tests that the transaction only contains the changes of the thread which has begun it. """
+        
+        self._transaction.begin()
+        self._transaction.stage(u"/a")
+        states = list()
+        def _stageConcurrently():
+            states.append(self._transaction.isActive)
+            self._transaction.stage(u"/b")
+        thread = threading.Thread(target=_stageConcurrently)
+        thread.start()
+        thread.join()
+        
+        self.assertEquals(states, [False])
+        self.assertFalse(self._transaction.isStaged(u"/b"))
+        self._transaction.commit(self._connection)
+        self.assertEquals(self._connection.checkins, [[u"/a"]])
+        
+    def testUnstage(self):
+        """ Tests that unstaged items and their descendants are forgotten. """
+        
+        self._transaction.begin()
+        self._transaction.stage(u"/a", True)
+        self._transaction.stage(u"/a/b", True)
+        self._transaction.setProperties(u"/a/b", dict())
+        self._transaction.stage(u"/ab", True)
+        self.assertTrue(self._transaction.unstage(u"/a"))
+        self.assertFalse(self._transaction.isStaged(u"/a/b"))
+        self.assertTrue(self._transaction.isStaged(u"/ab"))
+        self.assertFalse(self._transaction.unstage(u"/a"))
+        
+    def testRollback(self):
+        """ Tests that changes are reverted and created items are removed. """
+        
+        workingCopyPath = tempfile.mkdtemp()
+        try:
+            os.mkdir(workingCopyPath + "/a")
+            open(workingCopyPath + "/a/b", "wb").close()
+            open(workingCopyPath + "/c", "wb").close()
+            self._connection.workingCopyPath = workingCopyPath
+            
+            self._transaction.begin()
+            self._transaction.begin()
+            self._transaction.stage(u"/a", True)
+            self._transaction.stage(u"/a/b", True)
+            self._transaction.stage(u"/c")
+            self._transaction.rollback(self._connection)
+            
+            self.assertFalse(self._transaction.isActive)
+            self.assertEquals(self._connection.revertedPaths, [u"/a", u"/a/b", u"/c"])
+            self.assertFalse(os.path.exists(workingCopyPath + "/a"))
+            self.assertTrue(os.path.exists(workingCopyPath + "/c"))
+        finally:
+            shutil.rmtree(workingCopyPath)
@@ -0,0 +1,161 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Implements test cases for the creation index and the history scan.
+"""
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from datafinder.persistence.adapters.svn.util.creation_index import CreationIndex, scanCreationInformation
+
+
+__version__ = "$Revision-Id$" 
+
+
+class CreationIndexTestCase(unittest.TestCase):
+    """ Implements the test cases of the persistent index. """
+    
+    def setUp(self):
+        """ Creates test setup. """
+        
+        self._directory = tempfile.mkdtemp()
+        self._indexPath = os.path.join(self._directory, "index", "creation_index.json")
+        self._index = CreationIndex(self._indexPath)
+        
+    def tearDown(self):
+        """ Removes the index directory. """
+        
+        shutil.rmtree(self._directory)
+        
+    def testPersistence(self):
+        """ Tests that the index is reused by a new instance. """
+        
+        self.assertEquals(self._index.get(u"/a"), None)
+        self.assertEquals(self._index.getScannedRevision(u"/"), None)
+        
+        self._index.update(u"/", 3, {u"/a": (1, 10.0, u"me"), u"/b": (2, 20.0, u"you")}, list())
+        self._index.add(u"/c", 3, 30.0, u"me")
+        
+        index = CreationIndex(self._indexPath)
+        self.assertEquals(index.get(u"/a"), (1, 10.0, u"me"))
+        self.assertEquals(index.get(u"/c"), (3, 30.0, u"me"))
+        self.assertEquals(index.getScannedRevision(u"/"), 3)
+        
+    def testUpdate(self):
+        """ Tests incremental and replacing updates. """
+        
+        self._index.update(u"/", 3, {u"/a": (1, 10.0, u"me"), u"/b": (2, 20.0, u"me")}, list())
+        self._index.update(u"/a", 3, {u"/a/c": (3, 30.0, u"me")}, list())
+        
+        self._index.update(u"/", 5, {u"/d": (5, 50.0, u"me")}, [u"/a"])
+        self.assertEquals(self._index.get(u"/a"), None)
+        self.assertEquals(self._index.get(u"/a/c"), None)
+        self.assertEquals(self._index.getScannedRevision(u"/a"), None)
+        self.assertEquals(self._index.get(u"/b"), (2, 20.0, u"me"))
+        self.assertEquals(self._index.getScannedRevision(u"/"), 5)
+        
+        self._index.update(u"/", 6, {u"/e": (6, 60.0, u"me")}, list(), True)
+        self.assertEquals(self._index.get(u"/b"), None)
+        self.assertEquals(self._index.get(u"/e"), (6, 60.0, u"me"))
+        
+    def testInvalidIndexFile(self):
+        """ Tests that an unreadable index file is ignored. """
+        
+        os.makedirs(os.path.dirname(self._indexPath))
+        fileObject = open(self._indexPath, "wb")
+        fileObject.write("{invalid")
+        fileObject.close()
+        self.assertEquals(self._index.get(u"/a"), None)
+        
+        self._index.add(u"/a", 1, 10.0, u"me")
+        self.assertEquals(CreationIndex(self._indexPath).get(u"/a"), (1, 10.0, u"me"))
+
+
+class ScanCreationInformationTestCase(unittest.TestCase):
+    """ Implements the test cases of the history scan. """
+    
+    def testAddedChildren(self):
+        """ Tests that children are created by their latest addition. """
+        
+        logEntries = [(1, 10.0, u"me", [(u"/trunk", "A", None)]),
+                      (2, 20.0, u"me", [(u"/trunk/a", "A", None), (u"/trunk/b", "A", None), 
+                                        (u"/trunk/b/c", "A", None)]),
+                      (3, 30.0, u"you", [(u"/trunk/a", "M", None)]),
+                      (4, 40.0, u"you", [(u"/trunk/b", "D", None)]),
+                      (5, 50.0, u"you", [(u"/trunk/b", "A", None), (u"/trunk", "M", None)]),
+                      (6, 60.0, u"you", [(u"/trunk/a", "R", u"/trunk/x")])]
+        createdItems, deletedNames = scanCreationInformation(u"/trunk/", logEntries)
+        self.assertEquals(createdItems, {u"a": (6, 60.0, u"you"), u"b": (5, 50.0, u"you")})
+        self.assertEquals(deletedNames, set())
+        
+    def testRootDirectory(self):
+        """ Tests the scan of the repository root. """
+        
+        logEntries = [(1, 10.0, u"me", [(u"/a", "A", None), (u"/a/b", "A", None)]),
+                      (2, 20.0, u"me", [(u"/c", "A", None), (u"/", "M", None)])]
+        createdItems, _ = scanCreationInformation(u"/", logEntries)
+        self.assertEquals(createdItems, {u"a": (1, 10.0, u"me"), u"c": (2, 20.0, u"me")})
+        
+    def testCopiedDirectory(self):
+        """ Tests that the history of copied ancestors is followed. """
+        
+        logEntries = [(1, 10.0, u"me", [(u"/trunk", "A", None), (u"/trunk/d", "A", None)]),
+                      (2, 20.0, u"me", [(u"/trunk/d/a", "A", None)]),
+                      (3, 30.0, u"you", [(u"/branch", "A", u"/trunk")]),
+                      (4, 40.0, u"you", [(u"/branch/d/b", "A", None)])]
+        createdItems, _ = scanCreationInformation(u"/branch/d", logEntries)
+        self.assertEquals(createdItems, {u"a": (2, 20.0, u"me"), u"b": (4, 40.0, u"you")})
+        
+    def testIncrementalScan(self):
+        """ Tests the scan of the recent history only. """
+        
+        logEntries = [(7, 70.0, u"me", [(u"/trunk/a", "D", None)]),
+                      (8, 80.0, u"me", [(u"/trunk/b", "A", None), (u"/trunk/c", "D", None)]),
+                      (9, 90.0, u"me", [(u"/trunk/c", "A", None)])]
+        createdItems, deletedNames = scanCreationInformation(u"/trunk", logEntries, True)
+        self.assertEquals(createdItems, {u"b": (8, 80.0, u"me"), u"c": (9, 90.0, u"me")})
+        self.assertEquals(deletedNames, set([u"a"]))
+        
+        # The directory itself has been replaced
+        logEntries.append((10, 100.0, u"me", [(u"/trunk", "R", u"/branch")]))
+        self.assertEquals(scanCreationInformation(u"/trunk", logEntries, True), None)
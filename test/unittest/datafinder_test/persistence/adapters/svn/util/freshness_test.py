@@ -0,0 +1,257 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Implements test cases for the working copy freshness tracking.
+"""
+
+
+import threading
+import time
+import unittest
+
+from datafinder.persistence.adapters.svn import constants
+from datafinder.persistence.adapters.svn.util.freshness import ReadWriteLock, WorkingCopyFreshness
+
+
+__version__ = "$Revision-Id$" 
+
+
+class _TimerMock(object):
+    """ Allows control of the current time. """
+    
+    def __init__(self):
+        """ Constructor. """
+        
+        self.currentTime = 0
+        
+    def __call__(self):
+        """ Returns the current time. """
+        
+        return self.currentTime
+    
+
+class _HeadRevisionStandIn(object):
+    """ Counts the retrievals of the HEAD revision. """
+    
+    def __init__(self):
+        """ Constructor. """
+        
+        self.revision = 1
+        self.callNumber = 0
+        
+    def __call__(self):
+        """ Returns the current HEAD revision. """
+        
+        self.callNumber += 1
+        return self.revision
+
+
+class WorkingCopyFreshnessTestCase(unittest.TestCase):
+    """ Implements the test cases of the freshness tracking. """
+    
+    def setUp(self):
+        """ Creates test setup. """
+        
+        self._timer = _TimerMock()
+        self._headRevision = _HeadRevisionStandIn()
+        self._freshness = WorkingCopyFreshness(10, self._timer)
+        
+    def testHeadRevisionCheckInterval(self):
+        """ Tests that the HEAD revision is only checked once per interval. """
+        
+        self.assertEquals(self._freshness.determineHeadRevision(self._headRevision), 1)
+        self._headRevision.revision = 2
+        self._timer.currentTime = 9
+        self.assertEquals(self._freshness.determineHeadRevision(self._headRevision), 1)
+        self.assertEquals(self._headRevision.callNumber, 1)
+        
+        self._timer.currentTime = 10
+        self.assertEquals(self._freshness.determineHeadRevision(self._headRevision), 2)
+        self.assertEquals(self._headRevision.callNumber, 2)
+        
+        self._freshness.expire()
+        self._freshness.determineHeadRevision(self._headRevision)
+        self.assertEquals(self._headRevision.callNumber, 3)
+        
+    def testUpToDate(self):
+        """ Tests which updates cover a requested path and depth. """
+        
+        revision = self._freshness.determineHeadRevision(self._headRevision)
+        self.assertFalse(self._freshness.isUpToDate("/a/b", constants.DEPTH_EMPTY, revision))
+        
+        self._freshness.markUpdated("/a/b", constants.DEPTH_EMPTY, revision)
+        self.assertTrue(self._freshness.isUpToDate("/a/b", constants.DEPTH_EMPTY, revision))
+        self.assertFalse(self._freshness.isUpToDate("/a/b", constants.DEPTH_IMMEDIATES, revision))
+        
+        self._freshness.markUpdated("/a", constants.DEPTH_IMMEDIATES, revision)
+        self.assertTrue(self._freshness.isUpToDate("/a/c", constants.DEPTH_EMPTY, revision))
+        self.assertFalse(self._freshness.isUpToDate("/a/c", constants.DEPTH_IMMEDIATES, revision))
+        self.assertFalse(self._freshness.isUpToDate("/a/c/d", constants.DEPTH_EMPTY, revision))
+        
+        self._freshness.markUpdated("/", constants.DEPTH_INFINITY, revision)
+        self.assertTrue(self._freshness.isUpToDate("/a/c/d", constants.DEPTH_IMMEDIATES, revision))
+        self.assertTrue(self._freshness.isUpToDate("/", constants.DEPTH_INFINITY, revision))
+        
+    def testNewHeadRevision(self):
+        """ Tests that recorded updates are outdated by a new HEAD revision. """
+        
+        revision = self._freshness.determineHeadRevision(self._headRevision)
+        self._freshness.markUpdated("/a", constants.DEPTH_IMMEDIATES, revision)
+        
+        self._headRevision.revision = 2
+        self._freshness.expire()
+        revision = self._freshness.determineHeadRevision(self._headRevision)
+        self.assertFalse(self._freshness.isUpToDate("/a", constants.DEPTH_EMPTY, revision))
+        
+        # Updates to an outdated revision are not recorded
+        self._freshness.markUpdated("/a", constants.DEPTH_IMMEDIATES, 1)
+        self.assertFalse(self._freshness.isUpToDate("/a", constants.DEPTH_EMPTY, revision))
+        
+    def testFailedPaths(self):
+        """ Tests the recording of paths involved in failed operations. """
+        
+        self._freshness.determineHeadRevision(self._headRevision)
+        self.assertEquals(self._freshness.popFailedPaths(), list())
+        
+        self._freshness.markFailed("/b")
+        self._freshness.markFailed("/a")
+        self._freshness.markFailed("/a")
+        self.assertEquals(self._freshness.popFailedPaths(), ["/a", "/b"])
+        self.assertEquals(self._freshness.popFailedPaths(), list())
+        
+        # A failure forces a check of the HEAD revision
+        self._freshness.determineHeadRevision(self._headRevision)
+        self.assertEquals(self._headRevision.callNumber, 2)
+        
+        
+class ReadWriteLockTestCase(unittest.TestCase):
+    """ Implements the test cases of the read-write lock. """
+    
+    def setUp(self):
+        """ Creates test setup. """
+        
+        self._lock = ReadWriteLock()
+        
+    def testConcurrentReaders(self):
+        """ Tests that readers do not block each other. """
+        
+        self._lock.acquireRead()
+        acquired = threading.Event()
+        def _read():
+            self._lock.acquireRead()
+            acquired.set()
+            self._lock.releaseRead()
+        reader = threading.Thread(target=_read)
+        reader.start()
+        acquired.wait(5)
+        reader.join()
+        self._lock.releaseRead()
+        self.assertTrue(acquired.isSet())
+        
+    def testWriterExcludesReaders(self):
+        """ Tests that readers wait for the writer and the writer waits for readers. """
+        
+        self._lock.acquireWrite()
+        self._lock.acquireWrite() # Reentrant for the writer
+        self._lock.acquireRead()
+        self._lock.releaseRead()
+        events = list()
+        def _read():
+            self._lock.acquireRead()
+            events.append("read")
+            self._lock.releaseRead()
+        reader = threading.Thread(target=_read)
+        reader.start()
+        time.sleep(0.05)
+        events.append("write")
+        self._lock.releaseWrite()
+        time.sleep(0.05)
+        self.assertEquals(events, ["write"])
+        self._lock.releaseWrite()
+        reader.join(5)
+        self.assertEquals(events, ["write", "read"])
+        
+        self._lock.acquireRead()
+        def _write():
+            self._lock.acquireWrite()
+            events.append("write")
+            self._lock.releaseWrite()
+        writer = threading.Thread(target=_write)
+        writer.start()
+        time.sleep(0.05)
+        events.append("read")
+        self._lock.releaseRead()
+        writer.join(5)
+        self.assertEquals(events, ["write", "read", "read", "write"])
+        
+    def testWriterPreference(self):
+        """ Tests that new readers wait for a waiting writer while nested readers do not. """
+        
+        events = list()
+        def _write():
+            self._lock.acquireWrite()
+            events.append("write")
+            self._lock.releaseWrite()
+        def _read():
+            self._lock.acquireRead()
+            events.append("read")
+            self._lock.releaseRead()
+        self._lock.acquireRead()
+        writer = threading.Thread(target=_write)
+        writer.start()
+        time.sleep(0.05)
+        reader = threading.Thread(target=_read)
+        reader.start()
+        time.sleep(0.05)
+        self._lock.acquireRead() # Nested readers do not wait
+        self._lock.releaseRead()
+        self.assertEquals(events, list())
+        self._lock.releaseRead()
+        writer.join(5)
+        reader.join(5)
+        self.assertEquals(events, ["write", "read"])
+        
+    def testNoUpgrade(self):
+        """ Tests that a reader cannot acquire the lock for writing. """
+        
+        self._lock.acquireRead()
+        self.assertRaises(RuntimeError, self._lock.acquireWrite)
+        self._lock.releaseRead()
+        self._lock.acquireWrite()
+        self._lock.releaseWrite()
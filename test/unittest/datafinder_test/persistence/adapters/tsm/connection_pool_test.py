@@ -71,6 +71,12 @@ class _TransportMock(object):
         if not self.error is None:
             raise self.error
         
+    @staticmethod
+    def is_active():
+        """ Mocks the check of the connection state. """
+        
+        return True
+        
     def close(self):
         pass
 
@@ -83,7 +89,8 @@ class TsmConnectionTestCase(unittest.TestCase):
         
         _TransportMock.error = None
         connection_pool.Transport = _TransportMock
-        self._connectionPool = connection_pool.TsmConnectionPool(SimpleMock())
+        configuration = SimpleMock(connectionIdleTimeout=None, connectionMaximumLifetime=None)
+        self._connectionPool = connection_pool.TsmConnectionPool(configuration)
         
     def tearDown(self):
         self._connectionPool.reload()
@@ -105,3 +112,16 @@ class TsmConnectionTestCase(unittest.TestCase):
 
         _TransportMock.error = socket.gaierror("")
         self.assertRaises(PersistenceError, self._connectionPool.acquire)
+        
+    def testConfiguredTimeouts(self):
+        """ Tests that the configured connection lifetime is applied. """
+        
+        connection = self._connectionPool.acquire()
+        self._connectionPool.release(connection)
+        self.assertTrue(self._connectionPool.acquire() is connection)
+        
+        configuration = SimpleMock(connectionIdleTimeout=None, connectionMaximumLifetime=-1)
+        self._connectionPool = connection_pool.TsmConnectionPool(configuration)
+        connection = self._connectionPool.acquire()
+        self._connectionPool.release(connection)
+        self.assertFalse(self._connectionPool.acquire() is connection)
@@ -50,6 +50,7 @@ import unittest
 from webdav.Connection import WebdavError
 
 from datafinder.persistence.adapters.webdav_.data.adapter import DataWebdavAdapter
+from datafinder.persistence.common.cache import LruCache
 from datafinder.persistence.error import PersistenceError
 from datafinder_test.mocks import SimpleMock
 
@@ -62,6 +63,59 @@ _VALID_GETCHILDREN_RESULT = ["/Path"]
 _PROPERTY_NOT_FOUND_MESSAGE = "Property is missing:"
 
 
+class _ConnectionPoolMock(object):
+    """ Counts the released connections. """
+    
+    def __init__(self):
+        """ Constructor. """
+        
+        self.releasedConnections = 0
+        self.closedConnections = 0
+        
+    def acquire(self):
+        """ Returns a connection. """
+        
+        connection = SimpleMock()
+        connection.close = self._closeConnection
+        return connection
+    
+    def _closeConnection(self):
+        """ Counts the closed connections. """
+        
+        self.closedConnections += 1
+    
+    def release(self, _):
+        """ Counts the released connections. """
+        
+        self.releasedConnections += 1
+
+
+class _InterruptingConnectionHelperMock(SimpleMock):
+    """ Simulates a connection loss during the first upload request. """
+    
+    def __init__(self, errorCode=0):
+        """ Constructor. """
+        
+        SimpleMock.__init__(self, SimpleMock())
+        self.errorCode = errorCode
+        self.uploadedContent = ""
+        self.headers = list()
+        
+    def putUploadStream(self, _, uploadStream):
+        """ Interrupts the first transfer after three bytes. """
+        
+        self.headers.append(uploadStream.createHeaders())
+        if len(self.headers) == 1:
+            self.uploadedContent = uploadStream.read(3)
+            raise WebdavError("", self.errorCode)
+        self.uploadedContent = self.uploadedContent[:uploadStream.offset] + uploadStream.read()
+        
+    def determineContentLength(self, _):
+        """ Returns the length of the already uploaded content. """
+        
+        return len(self.uploadedContent)
+
+
 class DataWebdavAdapterTestCase(unittest.TestCase):
     """ Tests the data adapter implementation. """
     
@@ -139,16 +193,61 @@ class DataWebdavAdapterTestCase(unittest.TestCase):
                                     SimpleMock(_VALID_GETCHILDREN_WEBDAV_RESULT))
         self.assertEquals(adapter.getChildren(), _VALID_GETCHILDREN_RESULT)
         
+    def testGetChildrenWithMetadataPrefetch(self):
+        """ Tests the bulk retrieval of the children properties when listing a collection. """
+
+        metadataCache = LruCache()
+        properties = {("1", "1"): SimpleMock("value")}
+        connectionHelperMock = SimpleMock(SimpleMock(), methodNameResultMap={
+            "determineResourceTypeAndProperties": ({"/Path": ((True, None), properties)}, None)})
+        adapter = DataWebdavAdapter("/identifier", SimpleMock(), SimpleMock("/Path"), connectionHelperMock, 
+                                    metadataCache=metadataCache)
+        self.assertEquals(adapter.getChildren(), _VALID_GETCHILDREN_RESULT)
+        self.assertEquals(metadataCache.get("/Path"), (properties, None))
+        
     def testWriteData(self):
         """ Tests the normal behavior of the writeData method. """
 
         self._defaultAdapter.writeData(StringIO(""))
         
+    def testWriteDataWithResume(self):
+        """ Tests the resumption of an interrupted upload. """
+        
+        progress = list()
+        connectionHelper = _InterruptingConnectionHelperMock()
+        adapter = DataWebdavAdapter("identifier", SimpleMock(), SimpleMock(), connectionHelper, 
+                                    progressCallback=lambda *args: progress.append(args))
+        adapter.writeData(StringIO("content"))
+        self.assertEquals(connectionHelper.uploadedContent, "content")
+        self.assertEquals(connectionHelper.headers[1], {"Content-Length": "4", "Content-Range": "bytes 3-6/7"})
+        self.assertEquals(progress, [("identifier", 3, 7), ("identifier", 7, 7)])
+        
+        connectionHelper = _InterruptingConnectionHelperMock(400)
+        adapter = DataWebdavAdapter("identifier", SimpleMock(), SimpleMock(), connectionHelper)
+        self.assertRaises(PersistenceError, adapter.writeData, StringIO("content"))
+        
     def testReadData(self):
         """ Tests the normal behavior of the readData method. """
 
-        adapter = DataWebdavAdapter("identifier", SimpleMock(), SimpleMock(), SimpleMock(SimpleMock(StringIO(""))))
-        self.assertTrue(isinstance(adapter.readData(), StringIO))
+        connectionPool = _ConnectionPoolMock()
+        adapter = DataWebdavAdapter("identifier", connectionPool, SimpleMock(), SimpleMock(SimpleMock(StringIO("content"))))
+        dataStream = adapter.readData()
+        self.assertEquals(connectionPool.releasedConnections, 0)
+        self.assertEquals(dataStream.read(3), "con")
+        self.assertEquals(dataStream.read(), "tent")
+        self.assertEquals(connectionPool.releasedConnections, 1)
+        self.assertEquals(dataStream.read(), "")
+        dataStream.close()
+        self.assertEquals(connectionPool.releasedConnections, 1)
+        self.assertEquals(connectionPool.closedConnections, 0)
+        self.assertRaises(ValueError, dataStream.read)
+        
+        adapter = DataWebdavAdapter("identifier", connectionPool, SimpleMock(), SimpleMock(SimpleMock(StringIO("content"))))
+        dataStream = adapter.readData()
+        dataStream.read(3)
+        dataStream.close()
+        self.assertEquals(connectionPool.releasedConnections, 2)
+        self.assertEquals(connectionPool.closedConnections, 1) # Unread content is pending
         
     def testDelete(self):
         """ Tests the normal behavior of the delete method. """
@@ -161,6 +260,28 @@ class DataWebdavAdapterTestCase(unittest.TestCase):
         destination = DataWebdavAdapter("/anotherIdentifier", SimpleMock(), SimpleMock(), SimpleMock(SimpleMock()))
         self._defaultAdapter.move(destination)
     
+    def testCacheInvalidation(self):
+        """ Tests the invalidation of cached information when changing the item. """
+        
+        resourceTypeCache = LruCache()
+        metadataCache = LruCache()
+        adapter = DataWebdavAdapter("/identifier", SimpleMock(), SimpleMock("identifier"), SimpleMock(SimpleMock()), 
+                                    resourceTypeCache, metadataCache)
+        destination = DataWebdavAdapter("/anotherIdentifier", SimpleMock(), SimpleMock(), SimpleMock(SimpleMock()))
+        for identifier in ["/identifier", "/identifier/child", "/anotherIdentifier"]:
+            resourceTypeCache[identifier] = (True, None)
+            metadataCache[identifier] = (dict(), None)
+        adapter.copy(destination)
+        self.assertFalse("/anotherIdentifier" in resourceTypeCache)
+        self.assertTrue(adapter.isCollection)
+        adapter.delete()
+        self.assertEquals(len(resourceTypeCache), 0)
+        self.assertEquals(len(metadataCache), 0)
+        
+        metadataCache["/identifier"] = (dict(), None)
+        adapter.writeData(StringIO(""))
+        self.assertFalse("/identifier" in metadataCache)
+        
     def testCopy(self):
         """ Tests the normal behavior of the copy method. """
         
@@ -229,7 +350,8 @@ class DataWebdavAdapterTestCase(unittest.TestCase):
             self.assertTrue(True)
         self.assertRaises(PersistenceError, adapter.getChildren)
         
-        connectionHelperMock = SimpleMock(SimpleMock(error=WebdavError("")))
+        connectionHelperMock = SimpleMock(SimpleMock(error=WebdavError("")), 
+                                          methodNameResultMap={"putUploadStream": (None, WebdavError(""))})
         adapter = DataWebdavAdapter("/anotherIdentifier", SimpleMock(), SimpleMock(""), connectionHelperMock)
         self.assertRaises(PersistenceError, adapter.createLink, self._defaultAdapter)
         self.assertRaises(PersistenceError, adapter.createResource)
@@ -83,6 +83,25 @@ class MetadataWebdavAdapterTestCase(unittest.TestCase):
         webdavStorerMock.value = {("1", "1"): SimpleMock("value")}
         self.assertEquals(adapter.retrieve(["1"]), {"1": MetadataValue("value")})
 
+    def testRetrievePrefetchedProperties(self):
+        """ Tests the usage of properties retrieved when listing the parent collection. """
+        
+        metadataCache = {"identifier": ({("1", "1"): SimpleMock("value")}, None)}
+        adapter = MetadataWebdavAdapter("identifier", SimpleMock(), SimpleMock(), SimpleMock("1"), 
+                                        SimpleMock(error=PersistenceError("")), metadataCache=metadataCache)
+        expectedResult = dict(_VALID_PROPERTY_RESULT)
+        expectedResult["1"] = MetadataValue("value")
+        self.assertEquals(adapter.retrieve(), expectedResult)
+        self.assertEquals(metadataCache, dict())
+        self.assertRaises(PersistenceError, adapter.retrieve)
+        
+        metadataCache["identifier"] = (dict(), ["1"])
+        self.assertEquals(adapter.retrieve(["1"]), dict())
+        
+        metadataCache["identifier"] = (dict(), ["1"])
+        self.assertRaises(PersistenceError, adapter.retrieve)
+        self.assertEquals(metadataCache, dict())
+
     def testUpdateSuccess(self):
         """ Tests successful update of meta data. """
         
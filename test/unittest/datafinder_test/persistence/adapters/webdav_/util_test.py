@@ -43,9 +43,13 @@ Tests utility functionality.
 __version__ = "$Revision-Id:$" 
 
 
+from StringIO import StringIO
 import unittest
 
+from webdav.Connection import WebdavError
+
 from datafinder.persistence.adapters.webdav_ import util
+from datafinder_test.mocks import SimpleMock
 
 
 _PERSISTENCE_ID = "http://test.de:80/hhh/j/c:/lll/"
@@ -100,3 +104,109 @@ class ItemIdentifierMapperTestCase(unittest.TestCase):
         
         self.assertRaises(AttributeError, util.ItemIdentifierMapper, None)
         util.ItemIdentifierMapper("invalidURL")
+
+
+class _UnseekableStream(object):
+    """ Stream without support for random access. """
+    
+    def __init__(self, content):
+        """ Constructor. """
+        
+        self._stream = StringIO(content)
+        
+    def read(self, size=-1):
+        """ Reads the content. """
+        
+        return self._stream.read(size)
+
+
+class UploadStreamTestCase(unittest.TestCase):
+    """ Tests the upload stream. """
+    
+    def testSeekableStream(self):
+        """ Tests the transfer of a stream with known size. """
+        
+        progress = list()
+        dataStream = StringIO("xxcontent")
+        dataStream.seek(2)
+        uploadStream = util.UploadStream(dataStream, lambda *args: progress.append(args))
+        self.assertTrue(uploadStream.canResume)
+        self.assertEquals(uploadStream.createHeaders(), {"Content-Length": "7"})
+        uploadStream.prepareRequest()
+        self.assertEquals(uploadStream.read(4), "cont")
+        self.assertRaises(WebdavError, uploadStream.prepareRequest)
+        
+        uploadStream.resume(4)
+        self.assertEquals(uploadStream.createHeaders(), {"Content-Length": "3", "Content-Range": "bytes 4-6/7"})
+        uploadStream.prepareRequest()
+        self.assertEquals(uploadStream.read(), "ent")
+        self.assertEquals(uploadStream.read(), "")
+        self.assertEquals(progress, [(4, 7), (7, 7), (7, 7)])
+        
+        uploadStream.resume(7)
+        self.assertEquals(uploadStream.createHeaders(), {"Content-Length": "7"})
+        self.assertEquals(uploadStream.read(), "content")
+        
+    def testUnseekableStream(self):
+        """ Tests the chunked transfer of a stream with unknown size. """
+        
+        uploadStream = util.UploadStream(_UnseekableStream("content"))
+        self.assertFalse(uploadStream.canResume)
+        self.assertEquals(uploadStream.createHeaders(), {"Transfer-Encoding": "chunked"})
+        self.assertEquals(uploadStream.read(4), "4\r\ncont\r\n")
+        self.assertEquals(uploadStream.read(4), "3\r\nent\r\n")
+        self.assertEquals(uploadStream.read(4), "0\r\n\r\n")
+        self.assertEquals(uploadStream.read(4), "")
+
+
+
+class _ResponseMock(StringIO):
+    """ Emulates a HTTP response. """
+    
+    def __init__(self, content, status):
+        """ Constructor. """
+        
+        StringIO.__init__(self, content)
+        self.status = status
+        
+        
+class _RangeResourceStorerMock(object):
+    """ Emulates a resource storer whose server optionally supports range requests. """
+    
+    def __init__(self, content, supportsRanges):
+        """ Constructor. """
+        
+        self._content = content
+        self._supportsRanges = supportsRanges
+        self.connection = SimpleMock()
+        self.requestedHeaders = None
+        
+    def downloadContent(self, extra_hdrs):
+        """ Returns the requested range or the complete content. """
+        
+        self.requestedHeaders = extra_hdrs
+        if self._supportsRanges:
+            start, end = extra_hdrs["Range"][len("bytes="):].split("-")
+            return _ResponseMock(self._content[int(start):int(end) + 1], 206)
+        else:
+            return _ResponseMock(self._content, 200)
+        
+        
+class ReadContentRangeTestCase(unittest.TestCase):
+    """ Tests the retrieval of content ranges. """
+    
+    def testRangeSupport(self):
+        """ Tests the retrieval of a range from a server supporting range requests. """
+        
+        resourceStorer = _RangeResourceStorerMock("content", True)
+        self.assertEquals(util.readContentRange(resourceStorer, 3, 2), "te")
+        self.assertEquals(resourceStorer.requestedHeaders, {"Range": "bytes=3-4"})
+        self.assertEquals(util.readContentRange(resourceStorer, 3, 0), "")
+        
+    def testMissingRangeSupport(self):
+        """ Tests the retrieval of a range from a server ignoring range requests. """
+        
+        resourceStorer = _RangeResourceStorerMock("content", False)
+        self.assertEquals(util.readContentRange(resourceStorer, 3, 2), "te")
+        self.assertEquals(util.readContentRange(resourceStorer, 6, 5), "t")
+        self.assertEquals(util.readContentRange(resourceStorer, 10, 5), "")
@@ -0,0 +1,170 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Implements test cases for the size-limited cache.
+"""
+
+
+import unittest
+
+from datafinder.persistence.common.cache import LruCache
+
+
+__version__ = "$Revision-Id:$" 
+
+
+class _TimerMock(object):
+    """ Allows control of the current time. """
+    
+    def __init__(self):
+        """ Constructor. """
+        
+        self.currentTime = 0
+        
+    def __call__(self):
+        """ Returns the current time. """
+        
+        return self.currentTime
+    
+
+class LruCacheTestCase(unittest.TestCase):
+    """ Implements the test cases. """
+    
+    def setUp(self):
+        """ Creates test setup. """
+        
+        self._timer = _TimerMock()
+        self._cache = LruCache(2, 10, self._timer)
+        
+    def testSuccessfulUsage(self):
+        """ Tests the standard set/get/delete behavior. """
+        
+        self._cache["/a"] = 1
+        self.assertTrue("/a" in self._cache)
+        self.assertEquals(self._cache["/a"], 1)
+        self.assertEquals(self._cache.get("/b"), None)
+        self.assertRaises(KeyError, self._cache.__getitem__, "/b")
+        self.assertEquals(self._cache.hits, 1)
+        self.assertEquals(self._cache.misses, 2)
+        
+        self._cache["/a"] = 2
+        self.assertEquals(self._cache.get("/a"), 2)
+        self.assertEquals(self._cache.pop("/a"), 2)
+        self.assertEquals(self._cache.pop("/a", 3), 3)
+        self._cache["/a"] = 1
+        del self._cache["/a"]
+        self.assertEquals(len(self._cache), 0)
+        self.assertRaises(KeyError, self._cache.__delitem__, "/a")
+        
+    def testEviction(self):
+        """ Tests that the least recently used entry is evicted. """
+        
+        self._cache["/a"] = 1
+        self._cache["/b"] = 2
+        self._cache.get("/a")
+        self._cache["/c"] = 3
+        self.assertEquals(len(self._cache), 2)
+        self.assertTrue("/a" in self._cache)
+        self.assertFalse("/b" in self._cache)
+        self.assertTrue("/c" in self._cache)
+        
+    def testExpiration(self):
+        """ Tests that entries expire after the time to live. """
+        
+        self._cache["/a"] = 1
+        self._timer.currentTime = 5
+        self._cache["/b"] = 2
+        self._timer.currentTime = 11
+        self.assertEquals(self._cache.get("/a"), None)
+        self.assertEquals(self._cache.get("/b"), 2)
+        self._timer.currentTime = 16
+        self.assertFalse("/b" in self._cache)
+        self.assertEquals(len(self._cache), 0)
+        
+        cache = LruCache(2, None, self._timer)
+        cache["/a"] = 1
+        self._timer.currentTime = 1000
+        self.assertEquals(cache.get("/a"), 1)
+        
+    def testInvalidate(self):
+        """ Tests the invalidation of sub trees. """
+        
+        cache = LruCache(10)
+        cache["/a"] = 1
+        cache["/a/b"] = 2
+        cache["/a/b/c"] = 3
+        cache["/ab"] = 4
+        cache.invalidate("/a")
+        self.assertEquals(len(cache), 1)
+        self.assertTrue("/ab" in cache)
+        cache.invalidate("/")
+        self.assertEquals(len(cache), 0)
+        
+    def testInvalidateUris(self):
+        """ Tests the invalidation of URI keys without cached parent entries. """
+        
+        cache = LruCache(3)
+        cache["http://server/a/"] = 1
+        cache["http://server/a/b/c"] = 2
+        cache["http://server/ab/c"] = 3
+        cache.invalidate("http://server/a/b/")
+        self.assertFalse("http://server/a/b/c" in cache)
+        self.assertEquals(len(cache), 2)
+        
+        cache["http://server/a/d"] = 4
+        cache["http://server/e"] = 5 # Evicts "http://server/a/"
+        cache.invalidate("http://server/a")
+        self.assertFalse("http://server/a/d" in cache)
+        self.assertTrue("http://server/ab/c" in cache)
+        self.assertEquals(len(cache), 2)
+        
+        del cache["http://server/e"]
+        self.assertEquals(cache.pop("http://server/ab/c"), 3)
+        self.assertEquals(cache._pathIndex, dict())
+        
+    def testClear(self):
+        """ Tests the removal of all entries. """
+        
+        self._cache["/a"] = 1
+        self._cache.get("/a")
+        self._cache.clear()
+        self.assertEquals(len(self._cache), 0)
+        self.assertEquals(self._cache.hits, 0)
+        self._cache["/b"] = 1
+        self.assertEquals(self._cache.get("/b"), 1)
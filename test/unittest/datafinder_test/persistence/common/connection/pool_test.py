@@ -42,6 +42,7 @@ Implements test cases for the generic connection pool."
 
 import unittest
 import threading
+import time
 
 from datafinder.persistence.common.connection.pool import ConnectionPool
 from datafinder.persistence.error import PersistenceError
@@ -104,3 +105,129 @@ class ConnectionPoolTestCase(unittest.TestCase):
             for thread in threads:
                 alive_ = alive_ | thread.isAlive()
             alive = alive_
+
+
+class _Timer(object):
+    """ Allows setting of the current time. """
+    
+    def __init__(self):
+        """ Constructor. """
+        
+        self.now = 0
+        
+    def __call__(self):
+        """ Returns the current time. """
+        
+        return self.now
+
+
+class _ConnectionPool(ConnectionPool):
+    """ Creates distinct connections and records closed ones. """
+    
+    def __init__(self, maxConnectionNumber, **kwargs):
+        """ Constructor. """
+        
+        ConnectionPool.__init__(self, maxConnectionNumber, **kwargs)
+        self.invalidConnections = list()
+        self.closedConnections = list()
+        
+    def _createConnection(self):
+        """ Creates a new connection. """
+        
+        return object()
+    
+    def _validateConnection(self, connection):
+        """ Checks whether the connection was marked as invalid. """
+        
+        return not connection in self.invalidConnections
+    
+    def _releaseConnection(self, connection):
+        """ Records the closed connection. """
+        
+        self.closedConnections.append(connection)
+
+
+class ConnectionPoolManagementTestCase(unittest.TestCase):
+    """ Tests the reuse, validation and eviction of pooled connections. """
+    
+    def setUp(self):
+        """ Creates test setup. """
+        
+        self._timer = _Timer()
+        self._connectionPool = _ConnectionPool(2, idleTimeout=10, maxLifetime=100, timer=self._timer)
+        
+    def testReuse(self):
+        """ Tests that released connections are reused in LIFO order. """
+        
+        first = self._connectionPool.acquire()
+        second = self._connectionPool.acquire()
+        self._connectionPool.release(first)
+        self._connectionPool.release(second)
+        self.assertTrue(self._connectionPool.acquire() is second)
+        self.assertTrue(self._connectionPool.acquire() is first)
+        statistics = self._connectionPool.statistics
+        self.assertEquals(statistics["created"], 2)
+        self.assertEquals(statistics["inUse"], 2)
+        self.assertEquals(statistics["idle"], 0)
+        self.assertEquals(statistics["waitTimeHistogram"][0], (0.001, 4))
+        
+    def testValidation(self):
+        """ Tests the replacement of invalid connections. """
+        
+        connection = self._connectionPool.acquire()
+        self._connectionPool.release(connection)
+        self._connectionPool.invalidConnections.append(connection)
+        newConnection = self._connectionPool.acquire()
+        self.assertFalse(newConnection is connection)
+        self.assertEquals(self._connectionPool.closedConnections, [connection])
+        self.assertEquals(self._connectionPool.statistics["invalid"], 1)
+        self.assertEquals(self._connectionPool.statistics["connections"], 1)
+        
+    def testIdleTimeout(self):
+        """ Tests the eviction of unused connections. """
+        
+        first = self._connectionPool.acquire()
+        second = self._connectionPool.acquire()
+        self._connectionPool.release(first)
+        self._connectionPool.release(second)
+        self._timer.now = 5
+        self._connectionPool.release(self._connectionPool.acquire())
+        self._timer.now = 12
+        self.assertTrue(self._connectionPool.acquire() is second)
+        self.assertEquals(self._connectionPool.closedConnections, [first])
+        
+    def testMaxLifetime(self):
+        """ Tests that connections are closed after their lifetime. """
+        
+        connection = self._connectionPool.acquire()
+        self._timer.now = 101
+        self._connectionPool.release(connection)
+        self.assertEquals(self._connectionPool.closedConnections, [connection])
+        self.assertEquals(self._connectionPool.statistics["connections"], 0)
+        
+    def testReload(self):
+        """ Tests that connections in use are closed when they are released after a reload. """
+        
+        usedConnection = self._connectionPool.acquire()
+        unusedConnection = self._connectionPool.acquire()
+        self._connectionPool.release(unusedConnection)
+        self._connectionPool.reload()
+        self.assertEquals(self._connectionPool.closedConnections, [unusedConnection])
+        self._connectionPool.release(usedConnection)
+        self.assertEquals(self._connectionPool.closedConnections, [unusedConnection, usedConnection])
+        self.assertEquals(self._connectionPool.statistics["closed"], 2)
+        
+    def testWaiterNotification(self):
+        """ Tests that a waiting thread is woken up when a connection is released. """
+        
+        connectionPool = _ConnectionPool(1)
+        connection = connectionPool.acquire()
+        result = list()
+        thread = threading.Thread(target=lambda: result.append(connectionPool.acquire()))
+        thread.start()
+        while connectionPool.statistics["waiters"] == 0:
+            time.sleep(0.01)
+        connectionPool.release(connection)
+        thread.join(1)
+        self.assertEquals(result, [connection])
+        self.assertEquals(connectionPool.statistics["waiters"], 0)
@@ -0,0 +1,149 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Implements test cases for the content cache.
+"""
+
+
+import os
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from datafinder.persistence.common.content_cache import ContentCache
+from datafinder.persistence.error import PersistenceError
+
+
+__version__ = "$Revision-Id:$" 
+
+
+class _DataRetriever(object):
+    """ Provides the content and counts the retrievals. """
+    
+    def __init__(self, content):
+        """ Constructor. """
+        
+        self.content = content
+        self.retrievalNumber = 0
+        
+    def __call__(self):
+        """ Returns the content. """
+        
+        self.retrievalNumber += 1
+        return StringIO(self.content)
+
+
+class ContentCacheTestCase(unittest.TestCase):
+    """ Implements the test cases. """
+    
+    def setUp(self):
+        """ Creates test setup. """
+        
+        self._directory = tempfile.mkdtemp()
+        self._cache = ContentCache(os.path.join(self._directory, "cache"), 10)
+        
+    def tearDown(self):
+        """ Removes the cache directory. """
+        
+        shutil.rmtree(self._directory)
+        
+    def _read(self, key, version, retriever):
+        """ Returns the cached content. """
+        
+        fileObject = self._cache.open(key, version, retriever)
+        try:
+            return fileObject.read()
+        finally:
+            fileObject.close()
+        
+    def testCaching(self):
+        """ Tests that content is only retrieved if it is not cached in the requested version. """
+        
+        retriever = _DataRetriever("12345")
+        self.assertEquals(self._read(u"/a", u"1", retriever), "12345")
+        self.assertEquals(self._read(u"/a", u"1", retriever), "12345")
+        self.assertEquals(retriever.retrievalNumber, 1)
+        
+        retriever.content = "123"
+        self.assertEquals(self._read(u"/a", u"2", retriever), "123")
+        self.assertEquals(retriever.retrievalNumber, 2)
+        self.assertEquals(len(os.listdir(os.path.join(self._directory, "cache"))), 1)
+        
+        self._cache.invalidate(u"/a")
+        self.assertEquals(self._read(u"/a", u"2", retriever), "123")
+        self.assertEquals(retriever.retrievalNumber, 3)
+        
+    def testFileNameExtension(self):
+        """ Tests that the entry files keep the file name extension of the key. """
+        
+        retriever = _DataRetriever("12345")
+        fileObject = self._cache.open(u"/a/report.pdf", u"1", retriever)
+        fileObject.close()
+        self.assertTrue(fileObject.name.endswith(".pdf"))
+        
+        fileObject = self._cache.open(u"/a/report", u"1", retriever)
+        fileObject.close()
+        self.assertFalse("." in os.path.basename(fileObject.name))
+        
+    def testEviction(self):
+        """ Tests the eviction of least recently used entries. """
+        
+        retriever = _DataRetriever("1234")
+        self._read(u"/a", u"1", retriever)
+        self._read(u"/b", u"1", retriever)
+        for name in os.listdir(self._cache._directory):
+            os.utime(os.path.join(self._cache._directory, name), (0, 0))
+        self._read(u"/a", u"1", retriever) # "/b" becomes the least recently used entry
+        self._read(u"/c", u"1", retriever)
+        self.assertEquals(retriever.retrievalNumber, 3)
+        
+        self._read(u"/a", u"1", retriever)
+        self._read(u"/c", u"1", retriever)
+        self.assertEquals(retriever.retrievalNumber, 3)
+        self._read(u"/b", u"1", retriever)
+        self.assertEquals(retriever.retrievalNumber, 4)
+        
+    def testRetrievalError(self):
+        """ Tests that no incomplete entries are left if the retrieval fails. """
+        
+        def _raiseError():
+            raise PersistenceError("")
+        self.assertRaises(PersistenceError, self._cache.open, u"/a", u"1", _raiseError)
+        self.assertEquals(os.listdir(self._cache._directory), list())
@@ -0,0 +1,130 @@
+# $Filename$ 
+# $Authors$
+# Last Changed: $Date$ $Committer$ $Revision-Id$
+#
+# Copyright (c) 2003-2011, German Aerospace Center (DLR)
+# All rights reserved.
+#
+#
+#Redistribution and use in source and binary forms, with or without
+#modification, are permitted provided that the following conditions are
+#met:
+#
+# * Redistributions of source code must retain the above copyright 
+#   notice, this list of conditions and the following disclaimer. 
+#
+# * Redistributions in binary form must reproduce the above copyright 
+#   notice, this list of conditions and the following disclaimer in the 
+#   documentation and/or other materials provided with the 
+#   distribution. 
+#
+# * Neither the name of the German Aerospace Center nor the names of
+#   its contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+#THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS 
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT 
+#LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR 
+#A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT 
+#OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, 
+#SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT 
+#LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, 
+#DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY 
+#THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT 
+#(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE 
+#OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.  
+
+
+
+""" 
+Implements test cases for the random access file object.
+"""
+
+
+import os
+import unittest
+from StringIO import StringIO
+from zipfile import ZipFile, ZIP_STORED
+
+from datafinder.persistence.adapters.archive.factory import FileSystem
+from datafinder.persistence.common.configuration import BaseConfiguration
+from datafinder.persistence.data.random_access import RandomAccessFile
+
+
+__version__ = "$Revision-Id:$" 
+
+
+class _FileStorerMock(object):
+    """ Provides ranges of the given content and records the transferred bytes. """
+    
+    def __init__(self, content):
+        """ Constructor. """
+        
+        self.identifier = "/archive.zip"
+        self.content = content
+        self.transferredBytes = 0
+        self.requestNumber = 0
+        
+    def readDataRange(self, offset, length):
+        """ Returns the requested range. """
+        
+        self.requestNumber += 1
+        data = self.content[offset:offset + length]
+        self.transferredBytes += len(data)
+        return data
+    
+    def determineSize(self):
+        """ Returns the content size. """
+        
+        return len(self.content)
+    
+
+class RandomAccessFileTestCase(unittest.TestCase):
+    """ Implements the test cases. """
+    
+    def setUp(self):
+        """ Creates test setup. """
+        
+        self._fileStorer = _FileStorerMock("0123456789")
+        self._file = RandomAccessFile(self._fileStorer)
+        
+    def testReadAndSeek(self):
+        """ Tests reading from different positions. """
+        
+        self.assertEquals(self._file.read(3), "012")
+        self.assertEquals(self._file.tell(), 3)
+        self.assertEquals(self._file.read(), "3456789")
+        self.assertEquals(self._file.read(), "")
+        
+        self._file.seek(-2, 2)
+        self.assertEquals(self._file.read(5), "89")
+        self._file.seek(2)
+        self._file.seek(3, 1)
+        self.assertEquals(self._file.read(1), "5")
+        self.assertEquals(self._fileStorer.requestNumber, 1)
+        self.assertRaises(IOError, self._file.seek, -1)
+        
+        clonedFile = self._file.clone()
+        self.assertEquals(clonedFile.read(2), "01")
+        self.assertEquals(self._file.tell(), 6)
+        
+        self._file.close()
+        self.assertRaises(ValueError, self._file.read)
+        
+    def testArchiveAccess(self):
+        """ Tests that only the required parts of an archive are transferred. """
+        
+        content = StringIO()
+        archive = ZipFile(content, "w", ZIP_STORED)
+        archive.writestr("large", os.urandom(1024 * 1024))
+        archive.writestr("dir/small", "small content")
+        archive.close()
+        fileStorer = _FileStorerMock(content.getvalue())
+        
+        fileSystem = FileSystem(BaseConfiguration("arch:/archive.zip", archiveFile=RandomAccessFile(fileStorer)))
+        fileSystem.prepareUsage()
+        self.assertTrue(fileSystem.readonly)
+        member = fileSystem.createDataStorer("dir/small").readData()
+        self.assertEquals(member.read(), "small content")
+        self.assertTrue(fileStorer.transferredBytes < len(fileStorer.content) / 4)
+        fileSystem.release()
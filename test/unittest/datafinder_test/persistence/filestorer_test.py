@@ -40,6 +40,8 @@ Implements tests for the file storer.
 """
 
 
+import os
+import tempfile
 import unittest
 from StringIO import StringIO
 
@@ -114,24 +116,67 @@ class FileStorerTestCase(unittest.TestCase):
         mkstempMock = SimpleMock((expectedFile, expectedName))
         fdOpenMock = SimpleMock(expectedFile)
         namedTemporaryFileMock = SimpleMock(name=expectedName, file=expectedFile)
+        fdOpen = filestorer.os.fdopen
+        mkstemp = filestorer.mkstemp
+        namedTemporaryFile = filestorer.NamedTemporaryFile
         filestorer.mkstemp = mkstempMock
         filestorer.os.fdopen = fdOpenMock
         filestorer.NamedTemporaryFile = SimpleMock(namedTemporaryFileMock)
         self._fileStorer.readData = SimpleMock(StringIO("Some test data."))
+        try:
+            self._fileStorer._tempfile = None
+            self.assertEquals(self._fileStorer.getTemporaryFileObject(), (expectedName, expectedFile))
+            
+            #self._fileStorer._tempfile = None
+            #self._fileStorer.readData = SimpleMock(StringIO("Some test data."))
+            #namedTemporaryFileMock.error = IOError("")
+            #self.assertRaises(PersistenceError, self._fileStorer.getTemporaryFileObject)
+            
+            self._fileStorer._tempfile = None
+            self._fileStorer.readData = SimpleMock(StringIO("Some test data."))
+            self.assertEquals(self._fileStorer.getTemporaryFileObject("", False), (expectedName, expectedFile))
+            
+            self._fileStorer._tempfile = None
+            self._fileStorer.readData = SimpleMock(StringIO("Some test data."))
+            mkstempMock.error = IOError("")
+            self.assertRaises(PersistenceError, self._fileStorer.getTemporaryFileObject, "", False)
+        finally:
+            filestorer.os.fdopen = fdOpen # The os module is shared by all tests
+            filestorer.mkstemp = mkstemp
+            filestorer.NamedTemporaryFile = namedTemporaryFile
         
-        self._fileStorer._tempfile = None
-        self.assertEquals(self._fileStorer.getTemporaryFileObject(), (expectedName, expectedFile))
+    def testGetCachedTemporaryFileObject(self):
+        """ Tests that only read-only access is provided by the cached content without copying it. """
         
-        #self._fileStorer._tempfile = None
-        #self._fileStorer.readData = SimpleMock(StringIO("Some test data."))
-        #namedTemporaryFileMock.error = IOError("")
-        #self.assertRaises(PersistenceError, self._fileStorer.getTemporaryFileObject)
+        cachedFile = tempfile.NamedTemporaryFile()
+        try:
+            cachedFile.write("Cached data.")
+            cachedFile.seek(0)
+            self._fileStorer._retrieveCachedData = SimpleMock(cachedFile)
+            self._fileStorer.readData = SimpleMock(error=PersistenceError(""))
+            self.assertEquals(self._fileStorer.getTemporaryFileObject(readOnly=True), (cachedFile.name, cachedFile))
+            
+            self._fileStorer._retrieveCachedData = None # The cache entry is reused
+            path, fileObject = self._fileStorer.getTemporaryFileObject(readOnly=True)
+            fileObject.close()
+            self.assertEquals(path, cachedFile.name)
+            self.assertEquals(fileObject.mode, "rb")
+            
+            cachedFile.seek(0)
+            self._fileStorer._retrieveCachedData = SimpleMock(cachedFile)
+            path, fileObject = self._fileStorer.getTemporaryFileObject("", False)
+            try:
+                self.assertNotEquals(path, cachedFile.name)
+                fileObject.seek(0)
+                self.assertEquals(fileObject.read(), "Cached data.")
+            finally:
+                fileObject.close()
+                os.remove(path)
+        finally:
+            cachedFile.close()
         
-        self._fileStorer._tempfile = None
-        self._fileStorer.readData = SimpleMock(StringIO("Some test data."))
-        self.assertEquals(self._fileStorer.getTemporaryFileObject("", False), (expectedName, expectedFile))
+    def testGetLocalFileObject(self):
+        """ Tests the creation of the local file object of an item without content version. """
         
-        self._fileStorer._tempfile = None
         self._fileStorer.readData = SimpleMock(StringIO("Some test data."))
-        mkstempMock.error = IOError("")
-        self.assertRaises(PersistenceError, self._fileStorer.getTemporaryFileObject, "", False)
+        self.assertEquals(self._fileStorer.getLocalFileObject().read(), "Some test data.")